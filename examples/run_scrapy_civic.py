@@ -104,7 +104,7 @@ def run_transform(**kwargs):
 
 def run_load(**kwargs):
     """Load staged/ to DuckDB (Gold layer)."""
-    from structure_it.etl.load import load_all
+    from structure_it.etl.load import load_all, load_all_bulk
 
     print("=" * 60)
     print("LOAD: data/staged/ -> DuckDB (Gold)")
@@ -114,7 +114,8 @@ def run_load(**kwargs):
     db_path = Path(kwargs.get("db_path", "./data/structure_it.duckdb"))
     force = kwargs.get("force", False)
 
-    counts = asyncio.run(load_all(staged_dir, db_path, force=force))
+    loader = load_all_bulk if kwargs.get("bulk") else load_all
+    counts = asyncio.run(loader(staged_dir, db_path, force=force))
 
     print()
     print(f"Created: {counts['created']} | Updated: {counts['updated']} | Unchanged: {counts['unchanged']} | Errors: {counts['error']}")
@@ -268,6 +269,11 @@ Legacy Mode (backwards compatible):
         action="store_true",
         help="Force re-transform/re-load even if unchanged",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Use the set-based bulk loader for the load stage",
+    )
 
     args = parser.parse_args()
 
@@ -279,6 +285,7 @@ Legacy Mode (backwards compatible):
         "concurrent": args.concurrent,
         "log_level": args.log_level,
         "force": args.force,
+        "bulk": args.bulk,
     }
 
     # Handle different modes
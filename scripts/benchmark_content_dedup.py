@@ -0,0 +1,99 @@
+"""Benchmark content-hash dedup before extraction.
+
+Simulates a CivicPlus crawl in which the same PDF is linked under several
+ViewFile URLs: each meeting's agenda, often the same bytes again as the
+"packet" link, minutes, and "previous version" links to files already
+published. Every item is recorded in a raw manifest (as RawStagingPipeline
+does) and then offered to StructureItPipeline, which looks its bytes up in
+that manifest.
+
+Reports how many items would be extracted without and with dedup, and what
+the lookups cost per item (manifest insert + canonical lookup).
+
+Usage:
+    uv run python scripts/benchmark_content_dedup.py
+    uv run python scripts/benchmark_content_dedup.py --meetings 5000 --packet-same 0.6 --versions 0.3
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from structure_it.etl.manifest import RawManifest
+from structure_it.scrapers.civic_plus.pipelines import StructureItPipeline
+from structure_it.utils.hashing import generate_entity_id
+
+
+def simulate_crawl(meetings: int, packet_same: float, versions: float, seed: int = 42) -> list[dict]:
+    """Items (url, content_hash) of a crawl over `meetings` meetings."""
+    rng = random.Random(seed)
+    items = []
+    published: list[str] = []
+
+    def digest(label: str) -> str:
+        return hashlib.sha256(label.encode()).hexdigest()
+
+    for m in range(meetings):
+        base = f"https://city{m % 50}.gov/AgendaCenter/ViewFile"
+        agenda = digest(f"agenda {m}")
+        items.append({"url": f"{base}/Agenda/_{m}", "content_hash": agenda})
+        # The packet link serves the agenda itself when no packet was compiled
+        packet = agenda if rng.random() < packet_same else digest(f"packet {m}")
+        items.append({"url": f"{base}/Agenda/_{m}?packet=true", "content_hash": packet})
+        minutes = digest(f"minutes {m}")
+        items.append({"url": f"{base}/Minutes/_{m}", "content_hash": minutes})
+        published += [agenda, minutes]
+        # "Previous versions" links to a file already published elsewhere
+        if rng.random() < versions:
+            items.append({"url": f"{base}/Agenda/_{m}?html=true&v=1", "content_hash": rng.choice(published)})
+    return items
+
+
+async def run(items: list[dict], work: Path) -> dict:
+    manifest = RawManifest(work / "raw")
+    start = time.perf_counter()
+    for item in items:
+        entity_id = generate_entity_id(item["url"], "civic_meeting")
+        manifest.record_original(entity_id, "civic_meeting", None, item["content_hash"], url=item["url"])
+    record_s = time.perf_counter() - start
+    manifest.close()
+
+    stats = MagicMock()
+    pipeline = StructureItPipeline(str(work / "queue.sqlite"), workers=0, stats=stats, raw_dir=str(work / "raw"))
+    spider = MagicMock()
+    start = time.perf_counter()
+    for item in items:
+        await pipeline.process_item(item, spider)
+    queue_s = time.perf_counter() - start
+    queued = pipeline.queue.counts()["pending"]
+    await pipeline._close(spider)
+    return {"queued": queued, "record_s": record_s, "queue_s": queue_s}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark content-hash dedup before extraction")
+    parser.add_argument("--meetings", type=int, default=2000, help="Meetings crawled")
+    parser.add_argument("--packet-same", type=float, default=0.5, help="Share of packet links serving the agenda")
+    parser.add_argument("--versions", type=float, default=0.25, help="Share of meetings with a previous-version link")
+    args = parser.parse_args()
+
+    items = simulate_crawl(args.meetings, args.packet_same, args.versions)
+    distinct = len({item["content_hash"] for item in items})
+    with tempfile.TemporaryDirectory() as scratch:
+        result = asyncio.run(run(items, Path(scratch)))
+
+    print(f"Simulated crawl: {args.meetings} meetings, {len(items)} document URLs, {distinct} distinct files")
+    print()
+    print(f"{'extractions without dedup':<32} {len(items):>8}")
+    print(f"{'extractions with dedup':<32} {result['queued']:>8} ({1 - result['queued'] / len(items):.1%} fewer)")
+    print(f"{'manifest record (us/item)':<32} {result['record_s'] / len(items) * 1e6:>8.0f}")
+    print(f"{'lookup + enqueue (us/item)':<32} {result['queue_s'] / len(items) * 1e6:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
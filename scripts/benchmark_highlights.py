@@ -0,0 +1,124 @@
+"""Benchmark highlight location on a long synthetic packet.
+
+Builds a --pages page document (about 3,000 characters per page) and a
+policy-style extraction result with --requirements requirements whose
+statements are taken from the document: verbatim, re-wrapped (whitespace
+and case differ), paraphrased (a few words swapped), or absent. Then locates
+them with:
+
+- previous: `str.find` per value, then per 50-character prefix (the
+            server's former recursive_highlight_search)
+- locator:  utils.highlights.locate_highlights (one Aho-Corasick pass,
+            prefix and fuzzy fallbacks)
+
+Reports time and highlights found per kind of statement.
+
+Usage:
+    uv run python scripts/benchmark_highlights.py
+    uv run python scripts/benchmark_highlights.py --pages 1000 --requirements 600
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+
+from structure_it.utils.highlights import iter_strings, locate_highlights
+
+WORDS = (
+    "city council shall must approve budget contract vendor department employee review "
+    "annual report public notice hearing zoning permit fee payment account record audit "
+    "finance manager director board meeting agenda item resolution ordinance water sewer "
+    "street project bid award grant fund capital plan policy procedure request service "
+    "within days after before each all any the of to for and by with from on in at"
+).split()
+
+SYNONYMS = {"shall": "must", "must": "shall", "approve": "authorize", "all": "every", "within": "in"}
+
+
+def previous_highlights(data, full_text: str) -> list[dict]:
+    """The server's former highlight search: up to two full scans per value."""
+    highlights = []
+    for path, value in iter_strings(data):
+        if len(value) < 10:
+            continue
+        start = full_text.find(value)
+        if start == -1:
+            start = full_text.find(value[:50])
+        if start != -1:
+            highlights.append({"id": path, "start": start, "end": start + len(value), "text": value})
+    return highlights
+
+
+def build(pages: int, requirements: int, seed: int = 0) -> tuple[str, dict, dict[str, str]]:
+    rng = random.Random(seed)
+    # Names, places, amounts: words that occur only a few times in a packet
+    rare = ["".join(rng.choice("bcdfghklmnprstvz") + rng.choice("aeiou") for _ in range(3)) for _ in range(5000)]
+
+    def word() -> str:
+        return rng.choice(WORDS) if rng.random() < 0.75 else rng.choice(rare)
+
+    sentences = []
+    text_parts = []
+    for page in range(1, pages + 1):
+        text_parts.append(f"\n\n## Page {page}\n\n")
+        size = 0
+        while size < 3000:
+            sentence = " ".join(word() for _ in range(rng.randint(10, 24))).capitalize() + "."
+            sentences.append(sentence)
+            text_parts.append(sentence + (" " if rng.random() < 0.8 else "\n"))
+            size += len(sentence) + 1
+    text = "".join(text_parts)
+
+    kinds = {}
+    items = []
+    for i in range(requirements):
+        sentence = rng.choice(sentences)
+        kind = rng.choices(["verbatim", "rewrapped", "paraphrased", "absent"], [60, 15, 10, 15])[0]
+        if kind == "rewrapped":
+            sentence = sentence.lower().replace(" ", "  ", 3)
+        elif kind == "paraphrased":
+            words = sentence.split()
+            for j in rng.sample(range(len(words)), 2):
+                words[j] = SYNONYMS.get(words[j], "the")
+            sentence = " ".join(words)
+        elif kind == "absent":
+            sentence = " ".join(word() for _ in range(14)).capitalize() + "."
+        path = f"requirements[{i}].statement"
+        kinds[path] = kind
+        items.append(
+            {
+                "statement": sentence,
+                "applies_to": ["All employees", "Finance department"],
+                "category": "mandatory",
+            }
+        )
+    data = {"policy_title": "Consolidated Council Packet", "requirements": items}
+    return text, data, kinds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark highlight location")
+    parser.add_argument("--pages", type=int, default=500, help="Document pages")
+    parser.add_argument("--requirements", type=int, default=300, help="Requirements extracted")
+    args = parser.parse_args()
+
+    text, data, kinds = build(args.pages, args.requirements)
+    strings = sum(1 for _ in iter_strings(data))
+    print(f"{args.pages} pages ({len(text) / 1e6:.1f} M chars), {args.requirements} requirements, {strings} strings")
+    print()
+    print(f"{'method':<9} {'time (s)':>9} " + " ".join(f"{k:>12}" for k in ("verbatim", "rewrapped", "paraphrased", "absent")))
+    for name, locate in (("previous", previous_highlights), ("locator", locate_highlights)):
+        start = time.perf_counter()
+        highlights = locate(data, text)
+        elapsed = time.perf_counter() - start
+        found = Counter(kinds[h["id"]] for h in highlights if h["id"] in kinds)
+        total = Counter(kinds.values())
+        print(
+            f"{name:<9} {elapsed:>9.3f} "
+            + " ".join(f"{found[k]:>5}/{total[k]:<6}" for k in ("verbatim", "rewrapped", "paraphrased", "absent"))
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark the HTML converters on saved CivicPlus pages.
+
+Runs every converter in utils.convert.HTML_CONVERTERS over the HTML fixtures
+(or the files given) and reports throughput and the size of what would be
+sent to Gemini. Converters whose dependency is missing are skipped.
+
+Usage:
+    uv run python scripts/benchmark_html_converters.py
+    uv run python scripts/benchmark_html_converters.py temp_downloads/*.html --repeat 20
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from structure_it.etl.estimate import estimate_tokens
+from structure_it.utils.convert import HTML_CONVERTERS
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures" / "html"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark HTML to text converters")
+    parser.add_argument("files", nargs="*", type=Path, help="HTML files (default: test fixtures)")
+    parser.add_argument("--repeat", type=int, default=10, help="Conversions per file")
+    args = parser.parse_args()
+
+    files = args.files or sorted(FIXTURES.glob("*.html"))
+    pages = [path.read_text(encoding="utf-8", errors="replace") for path in files]
+    input_chars = sum(len(page) for page in pages)
+    print(f"{len(pages)} pages, {input_chars:,} HTML chars, {args.repeat} runs each")
+    print()
+    print(f"{'converter':<12} {'ms/page':>9} {'MB/s':>8} {'out chars':>10} {'out tokens':>11}")
+
+    for name, converter in HTML_CONVERTERS.items():
+        try:
+            outputs = [converter(page) for page in pages]
+        except ImportError as e:
+            print(f"{name:<12} skipped ({e})")
+            continue
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for page in pages:
+                converter(page)
+        elapsed = time.perf_counter() - start
+        runs = args.repeat * len(pages)
+        out_chars = sum(len(text) for text in outputs)
+        out_tokens = sum(estimate_tokens(text) for text in outputs)
+        print(
+            f"{name:<12} {elapsed / runs * 1000:>9.2f} "
+            f"{input_chars * args.repeat / elapsed / 1e6:>8.2f} {out_chars:>10,} {out_tokens:>11,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
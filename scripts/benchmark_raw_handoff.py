@@ -0,0 +1,160 @@
+"""Benchmark the temp_downloads -> data/raw handoff.
+
+Simulates a crawl's downloads in a scratch directory and stages them into a
+raw layer twice:
+
+- copy:    the previous RawStagingPipeline behaviour (shutil.copy2 per file,
+           temp files left behind)
+- handoff: BlobStore ingest + hard link (rename into the content-addressed
+           store, one copy per distinct document)
+
+A share of the downloads are duplicates (the same packet linked from
+several agendas). Reports wall time, bytes written during staging (from
+/proc/self/io where available) and disk usage of raw + temp afterwards.
+
+Usage:
+    uv run python scripts/benchmark_raw_handoff.py                  # 10 GB crawl
+    uv run python scripts/benchmark_raw_handoff.py --total-gb 1 --files 500
+    uv run python scripts/benchmark_raw_handoff.py --dir /mnt/scratch
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from structure_it.etl.blobs import BlobStore
+
+CHUNK = 1024 * 1024
+
+
+def _write_bytes_counter() -> int | None:
+    """Bytes this process caused to be written to storage (Linux only)."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("write_bytes:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def _disk_usage(*dirs: Path) -> int:
+    """Allocated bytes under dirs, counting each inode once (hard links)."""
+    seen = set()
+    total = 0
+    for d in dirs:
+        for root, _, files in os.walk(d):
+            for name in files:
+                stat = os.lstat(os.path.join(root, name))
+                if (stat.st_dev, stat.st_ino) not in seen:
+                    seen.add((stat.st_dev, stat.st_ino))
+                    total += stat.st_blocks * 512
+    return total
+
+
+def make_downloads(temp_dir: Path, total_bytes: int, files: int, dup_ratio: float) -> list[tuple[Path, str]]:
+    """Write simulated downloads; returns (path, sha256) per file."""
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(42)
+    size = max(total_bytes // files, 1)
+    unique = max(int(files * (1 - dup_ratio)), 1)
+    block = os.urandom(CHUNK)
+
+    contents: list[tuple[bytes, str]] = []
+    downloads = []
+    for i in range(files):
+        if i < unique:
+            prefix = f"%PDF-1.7 document {i}\n".encode()
+            hasher = hashlib.sha256(prefix)
+            remaining = size - len(prefix)
+            while remaining > 0:
+                hasher.update(block[: min(CHUNK, remaining)])
+                remaining -= CHUNK
+            digest = hasher.hexdigest()
+            contents.append((prefix, digest))
+        else:
+            prefix, digest = rng.choice(contents)
+
+        path = temp_dir / f"{i:06d}.pdf"
+        with open(path, "wb") as f:
+            f.write(prefix)
+            remaining = size - len(prefix)
+            while remaining > 0:
+                f.write(block[: min(CHUNK, remaining)])
+                remaining -= CHUNK
+        downloads.append((path, digest))
+    os.sync()
+    return downloads
+
+
+def stage_copy(downloads: list[tuple[Path, str]], raw_dir: Path) -> None:
+    for i, (path, _) in enumerate(downloads):
+        item_dir = raw_dir / "civic_meeting" / f"item{i:06d}"
+        item_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(path, item_dir / f"original{path.suffix}")
+
+
+def stage_handoff(downloads: list[tuple[Path, str]], raw_dir: Path) -> BlobStore:
+    blobs = BlobStore(raw_dir)
+    for i, (path, digest) in enumerate(downloads):
+        item_dir = raw_dir / "civic_meeting" / f"item{i:06d}"
+        item_dir.mkdir(parents=True, exist_ok=True)
+        blob_path, _ = blobs.ingest(path, digest)
+        blobs.link(blob_path, item_dir / f"original{path.suffix}")
+    return blobs
+
+
+def run(mode: str, base: Path, total_bytes: int, files: int, dup_ratio: float) -> dict:
+    work = base / mode
+    temp_dir, raw_dir = work / "temp_downloads", work / "raw"
+    downloads = make_downloads(temp_dir, total_bytes, files, dup_ratio)
+
+    written_before = _write_bytes_counter()
+    start = time.perf_counter()
+    if mode == "copy":
+        stage_copy(downloads, raw_dir)
+    else:
+        stage_handoff(downloads, raw_dir)
+    os.sync()
+    elapsed = time.perf_counter() - start
+    written_after = _write_bytes_counter()
+
+    result = {
+        "mode": mode,
+        "seconds": elapsed,
+        "written": (written_after - written_before) if written_before is not None else None,
+        "disk": _disk_usage(temp_dir, raw_dir),
+    }
+    shutil.rmtree(work)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the raw-layer handoff")
+    parser.add_argument("--total-gb", type=float, default=10.0, help="Simulated crawl size")
+    parser.add_argument("--files", type=int, default=2000, help="Number of downloads")
+    parser.add_argument("--dup-ratio", type=float, default=0.2, help="Share of duplicate documents")
+    parser.add_argument("--dir", type=Path, default=None, help="Scratch directory (default: system temp)")
+    args = parser.parse_args()
+
+    total_bytes = int(args.total_gb * 1024**3)
+    gb = 1024**3
+    print(f"Simulated crawl: {args.files} downloads, {args.total_gb:g} GB, {args.dup_ratio:.0%} duplicates")
+    print()
+    print(f"{'mode':<10} {'time (s)':>10} {'written (GB)':>14} {'disk (GB)':>11}")
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as scratch:
+        for mode in ("copy", "handoff"):
+            r = run(mode, Path(scratch), total_bytes, args.files, args.dup_ratio)
+            written = f"{r['written'] / gb:.2f}" if r["written"] is not None else "n/a"
+            print(f"{r['mode']:<10} {r['seconds']:>10.2f} {written:>14} {r['disk'] / gb:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
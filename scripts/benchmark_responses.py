@@ -0,0 +1,86 @@
+"""Benchmark encoding an extraction result for the API server's responses.
+
+Builds the synthetic --pages page packet of benchmark_highlights with its
+policy-style data (--requirements) and located highlights, as
+`/api/extract` returns it, then encodes it with:
+
+- fastapi: jsonable_encoder + json.dumps (FastAPI's default for a dict)
+- server:  server.responses.dumps (orjson when installed)
+
+and compresses the encoded body with gzip and brotli at the server's
+levels. Also reports the size of the `?fields=data,highlights` result
+(raw_text fetched separately from /api/jobs/{id}/raw_text).
+
+Usage:
+    uv run python -m scripts.benchmark_responses
+    uv run python -m scripts.benchmark_responses --pages 1000 --requirements 600
+"""
+
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from scripts.benchmark_highlights import build
+from server import responses
+from server.responses import compress, dumps, select_fields
+from structure_it.utils.highlights import locate_highlights
+
+
+def fastapi_dumps(payload) -> bytes:
+    """What FastAPI's JSONResponse does with a returned dict."""
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode()
+
+
+def timed(func, *args, repeat: int = 5):
+    """Best of repeat runs: (seconds, result)."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark API response encoding")
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the synthetic packet")
+    parser.add_argument("--requirements", type=int, default=300, help="Requirements extracted")
+    args = parser.parse_args()
+
+    text, data, _ = build(args.pages, args.requirements)
+    result = {
+        "raw_text": text,
+        "data": data,
+        "highlights": locate_highlights(data, text),
+        "type": "policy",
+        "doc_id": "benchmark",
+    }
+    print(
+        f"{args.pages} pages ({len(text) / 1e6:.1f} M chars), {args.requirements} requirements, "
+        f"{len(result['highlights'])} highlights; orjson {'on' if responses.orjson else 'not installed'}, "
+        f"brotli {'on' if responses.brotli else 'not installed'}"
+    )
+    print()
+    print(f"{'encoding':<28} {'ms':>8} {'bytes':>11}")
+
+    seconds, baseline = timed(fastapi_dumps, result)
+    print(f"{'fastapi (json)':<28} {seconds * 1000:>8.1f} {len(baseline):>11,}")
+    seconds, body = timed(dumps, result)
+    print(f"{'server (dumps)':<28} {seconds * 1000:>8.1f} {len(body):>11,}")
+    for encoding in ("gzip", "br") if responses.brotli else ("gzip",):
+        seconds, compressed = timed(compress, body, encoding, repeat=3)
+        print(f"{'  + ' + encoding:<28} {seconds * 1000:>8.1f} {len(compressed):>11,}")
+
+    partial = select_fields(result, "data,highlights")
+    seconds, body = timed(dumps, partial)
+    print(f"{'fields=data,highlights':<28} {seconds * 1000:>8.1f} {len(body):>11,}")
+    seconds, compressed = timed(compress, body, "gzip", repeat=3)
+    print(f"{'  + gzip':<28} {seconds * 1000:>8.1f} {len(compressed):>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark SafeSession against AsyncSafeSession at equal politeness.
+
+Starts a local HTTP server answering on several loopback addresses
+(127.0.0.1, 127.0.0.2, ...), each standing in for a municipality, with a
+simulated response latency, then fetches the same URLs with:
+
+- sync:          one SafeSession (the previous civic-scraper patch): requests
+                 in series under one global rate limit
+- sync-per-host: one SafeSession per host, round robin: per-host politeness,
+                 but still one request at a time
+- async:         AsyncSafeSession with all fetches in flight; per-host token
+                 buckets, pooled keep-alive connections
+
+Every mode allows each host the same requests per minute. Reports wall time,
+requests per second and TCP connections opened.
+
+Usage:
+    uv run python scripts/benchmark_safe_session.py
+    uv run python scripts/benchmark_safe_session.py --hosts 8 --requests 20 --rpm 600 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import http.server
+import threading
+import time
+
+from structure_it.utils.safety import AsyncSafeSession, SafeSession
+
+BODY = b"%PDF-1.7\n" + b"x" * 20_000
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    latency = 0.05
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        _Handler.connections += 1
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_sync(urls: list[str], rpm: float, hosts: int) -> None:
+    # SafeSession limits globally: the per-host budget times hosts
+    session = SafeSession(requests_per_minute=rpm * hosts)
+    for url in urls:
+        session.get(url, timeout=10)
+
+
+def run_sync_per_host(urls: list[str], rpm: float, hosts: int) -> None:
+    sessions: dict[str, SafeSession] = {}
+    for url in urls:
+        host = url.split("/")[2]
+        session = sessions.setdefault(host, SafeSession(requests_per_minute=rpm))
+        session.get(url, timeout=10)
+
+
+async def run_async(urls: list[str], rpm: float, hosts: int) -> None:
+    session = AsyncSafeSession(requests_per_minute=rpm)
+    try:
+        await asyncio.gather(*(session.get(url) for url in urls))
+    finally:
+        await session.aclose()
+
+
+MODES = {
+    "sync": run_sync,
+    "sync-per-host": run_sync_per_host,
+    "async": lambda urls, rpm, hosts: asyncio.run(run_async(urls, rpm, hosts)),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SafeSession vs AsyncSafeSession")
+    parser.add_argument("--hosts", type=int, default=8, help="Simulated sites (127.0.0.N)")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per host")
+    parser.add_argument("--rpm", type=float, default=600, help="Requests per minute allowed per host")
+    parser.add_argument("--latency", type=float, default=0.1, help="Server response time in seconds")
+    args = parser.parse_args()
+
+    _Handler.latency = args.latency
+    httpd = http.server.ThreadingHTTPServer(("0.0.0.0", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    port = httpd.server_port
+
+    urls = [
+        f"http://127.0.0.{h + 1}:{port}/doc{i}.pdf"
+        for i in range(args.requests)
+        for h in range(args.hosts)
+    ]
+    total = len(urls)
+    print(
+        f"{args.hosts} hosts x {args.requests} requests, {args.rpm:g} req/min per host, "
+        f"{args.latency * 1000:.0f} ms server latency"
+    )
+    print()
+    print(f"{'mode':<14} {'time (s)':>9} {'req/s':>8} {'connections':>12}")
+    try:
+        for mode, run in MODES.items():
+            _Handler.connections = 0
+            start = time.perf_counter()
+            run(urls, args.rpm, args.hosts)
+            elapsed = time.perf_counter() - start
+            print(f"{mode:<14} {elapsed:>9.2f} {total / elapsed:>8.1f} {_Handler.connections:>12}")
+    finally:
+        httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Load test extraction under overload, with and without admission control.
+
+Starts server/main.py under uvicorn in a separate process with stand-ins:
+conversion burns --convert seconds of CPU in its thread (pure Python, like
+MarkItDown, so it also competes with the event loop for the GIL), and the
+LLM call takes --extract seconds but, like Gemini past its rate limit,
+fails with 429 RESOURCE_EXHAUSTED when more than --llm-capacity calls are
+in flight. Job queue either:
+
+- unbounded: no queue limits, a worker per job, no stage limits (the
+             previous behaviour, give or take the worker count)
+- admission: the server defaults (bounded fair queue, 429 + Retry-After,
+             SERVER_CPU_CONCURRENCY / SERVER_LLM_CONCURRENCY slots)
+
+For each --clients level, every client (with its own X-Client-Id) keeps
+submitting documents for --seconds: POST /api/jobs, long-poll until done,
+and on a 429 (waiting Retry-After) or a failed job, submit again. Reports documents done per
+second, latency from first attempt to done, failed jobs (including dropped
+connections), 429s, and the
+p95 latency of a cheap probe request (event loop responsiveness).
+
+Usage:
+    uv run python -m scripts.load_test_admission
+    uv run python -m scripts.load_test_admission --clients 4,16,64 --seconds 20
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+from pydantic import BaseModel
+
+import server.main as server_main
+from server.cache import ResultCache
+from server.jobs import JobQueue
+from structure_it.config import SERVER_CPU_CONCURRENCY, SERVER_LLM_CONCURRENCY
+from structure_it.utils.stats import percentile
+
+DOCUMENT = "The contractor shall provide monthly status reports.\n" * 200
+
+# Longest Retry-After a client honours (seconds)
+MAX_BACKOFF = 5.0
+
+
+class _Result(BaseModel):
+    summary: str
+
+
+class _TextTool:
+    seconds = 0.1
+
+    def _convert_stream_to_markdown(self, stream, suffix):
+        end = time.perf_counter() + self.seconds
+        while time.perf_counter() < end:
+            pass
+        return stream.read().decode()
+
+
+class _Extractor:
+    seconds = 1.0
+    capacity = 8
+    active = 0
+
+    def __init__(self, schema):
+        pass
+
+    async def extract(self, content):
+        _Extractor.active += 1
+        try:
+            if _Extractor.active > self.capacity:
+                await asyncio.sleep(self.seconds / 10)
+                raise RuntimeError("429 RESOURCE_EXHAUSTED")
+            await asyncio.sleep(self.seconds)
+            return _Result(summary="The contractor shall provide monthly status reports.")
+        finally:
+            _Extractor.active -= 1
+
+
+class _Storage:
+    async def store_entity(self, **kwargs):
+        pass
+
+
+def _serve(port: int, mode: str, work_dir: Path, convert: float, extract: float, capacity: int) -> None:
+    """Server process: stand-in conversion and extraction, job queue per mode."""
+    logging.getLogger("server.jobs").setLevel(logging.CRITICAL)  # Failed jobs are expected
+    _TextTool.seconds, _Extractor.seconds, _Extractor.capacity = convert, extract, capacity
+    server_main.PolicyRequirementsExtractor = _TextTool
+    server_main.GeminiExtractor = _Extractor
+    server_main.storage = _Storage()
+    server_main.cache = ResultCache(work_dir / "cache.sqlite")
+    server_main.SERVER_UPLOAD_DIR = str(work_dir / "uploads")
+    if mode == "unbounded":
+        server_main.jobs = JobQueue(
+            workers=10_000, max_queued=0, max_queued_per_client=0, stage_limits={"cpu": 10_000, "llm": 10_000}
+        )
+    else:
+        server_main.jobs = JobQueue()
+    uvicorn.run(server_main.app, host="127.0.0.1", port=port, log_level="error")
+
+
+async def _client(client: httpx.AsyncClient, name: str, deadline: float, stats: dict) -> None:
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        while time.perf_counter() < deadline:
+            try:
+                response = await client.post(
+                    "/api/jobs",
+                    files={"file": ("doc.md", f"{DOCUMENT}{os.urandom(8).hex()}".encode())},
+                    data={"type": "article", "force": "true"},
+                    headers={"X-Client-Id": name},
+                )
+                if response.status_code == 429:
+                    stats["refused"] += 1
+                    await asyncio.sleep(min(float(response.headers["retry-after"]), MAX_BACKOFF))
+                    continue
+                job = response.json()
+                while job["status"] not in ("done", "failed"):
+                    job = (await client.get(job["status_url"], params={"wait": 30})).json()
+            except httpx.TransportError:
+                # Dropped connection (an overloaded server stops keeping up); count it as a failure
+                stats["failed"] += 1
+                continue
+            if job["status"] == "done":
+                stats["latencies"].append(time.perf_counter() - start)
+                break
+            stats["failed"] += 1
+
+
+async def _probe(client: httpx.AsyncClient, deadline: float, latencies: list[float]) -> None:
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            await client.get("/api/health")
+        except httpx.TransportError:
+            pass
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.1)
+
+
+async def run(base_url: str, mode: str, clients: int, seconds: float) -> None:
+    limits = httpx.Limits(max_connections=clients + 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        stats = {"latencies": [], "failed": 0, "refused": 0}
+        probes: list[float] = []
+        start = time.perf_counter()
+        deadline = start + seconds
+        await asyncio.gather(*(_client(client, f"client-{i}", deadline, stats) for i in range(clients)), _probe(client, deadline, probes))
+        # Jobs in flight at the deadline still finish, so rate over the whole run
+        elapsed = time.perf_counter() - start
+    latencies = sorted(stats["latencies"]) or [float("nan")]
+    print(
+        f"{mode:<10} {clients:>7} {len(stats['latencies']) / elapsed:>7.2f} {percentile(latencies, 50):>8.2f} "
+        f"{percentile(latencies, 95):>8.2f} {stats['failed']:>7} {stats['refused']:>6} "
+        f"{percentile(sorted(probes), 95) * 1000:>10.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test extraction admission control under overload")
+    parser.add_argument("--clients", default="4,16,48", help="Comma-separated client counts")
+    parser.add_argument("--seconds", type=float, default=10, help="Test duration per level")
+    parser.add_argument("--convert", type=float, default=0.1, help="CPU seconds per conversion")
+    parser.add_argument("--extract", type=float, default=1.0, help="LLM call seconds")
+    parser.add_argument("--llm-capacity", type=int, default=SERVER_LLM_CONCURRENCY, help="Concurrent LLM calls before 429s")
+    args = parser.parse_args()
+
+    print(
+        f"{args.convert:g}s CPU conversion + {args.extract:g}s LLM call per document, LLM capacity "
+        f"{args.llm_capacity}; admission: cpu {SERVER_CPU_CONCURRENCY}, llm {SERVER_LLM_CONCURRENCY}; "
+        f"{args.seconds:g}s per level"
+    )
+    print()
+    print(f"{'mode':<10} {'clients':>7} {'docs/s':>7} {'p50 (s)':>8} {'p95 (s)':>8} {'failed':>7} {'429s':>6} {'probe p95':>10}")
+    for mode in ("unbounded", "admission"):
+        for clients in (int(c) for c in args.clients.split(",")):
+            with socket.socket() as s:
+                s.bind(("127.0.0.1", 0))
+                port = s.getsockname()[1]
+            server = multiprocessing.Process(
+                target=_serve,
+                args=(port, mode, Path(tempfile.mkdtemp()), args.convert, args.extract, args.llm_capacity),
+                daemon=True,
+            )
+            server.start()
+            try:
+                while True:
+                    try:
+                        httpx.get(f"http://127.0.0.1:{port}/api/health")
+                        break
+                    except httpx.TransportError:
+                        time.sleep(0.1)
+                asyncio.run(run(f"http://127.0.0.1:{port}", mode, clients, args.seconds))
+            finally:
+                server.terminate()
+                server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Load test concurrent uploads against the API server.
+
+Starts server/main.py under uvicorn with conversion, Gemini and DuckDB
+replaced by stand-ins of realistic cost (conversion blocks its thread for
+--convert seconds, like MarkItDown on a PDF; extraction awaits --extract
+seconds, like a Gemini call), then has --clients clients upload at once:
+
+- inline: the previous request-scoped handler: conversion on the event loop,
+          extraction awaited inside the request
+- jobs:   POST /api/jobs, then long-poll GET /api/jobs/{id}
+
+While the uploads run, a probe requests a cheap endpoint every 50 ms to show
+whether the server stays responsive. Reports wall time, documents per
+second, time until the upload request returns, and probe latency.
+
+Usage:
+    uv run python -m scripts.load_test_extract
+    uv run python -m scripts.load_test_extract --clients 32 --convert 0.5 --extract 2
+"""
+
+import argparse
+import asyncio
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+from fastapi import File, Form, UploadFile
+from pydantic import BaseModel
+
+import server.main as server_main
+from server.cache import ResultCache
+from structure_it.utils.highlights import locate_highlights
+from structure_it.utils.stats import percentile
+
+DOCUMENT = ("The contractor shall provide monthly status reports. " * 400).encode()
+
+
+class _Result(BaseModel):
+    summary: str
+
+
+class _TextTool:
+    seconds = 0.3
+
+    def _convert_stream_to_markdown(self, stream, suffix):
+        time.sleep(self.seconds)
+        return stream.read().decode()
+
+
+class _Extractor:
+    seconds = 1.0
+
+    def __init__(self, schema):
+        pass
+
+    async def extract(self, content):
+        await asyncio.sleep(self.seconds)
+        return _Result(summary="The contractor shall provide monthly status reports.")
+
+
+class _Storage:
+    async def store_entity(self, **kwargs):
+        pass
+
+
+@server_main.app.post("/load-test/inline")
+async def inline_extract(file: UploadFile = File(...), type: str = Form("article")):
+    """The previous /api/extract: everything inside the request, conversion on the loop."""
+    content = await file.read()
+    time.sleep(_TextTool.seconds)  # Conversion, blocking the event loop
+    raw_text = content.decode()
+    result = await _Extractor(None).extract(content=raw_text)
+    data = result.model_dump()
+    highlights = locate_highlights(data, raw_text)
+    await server_main.storage.store_entity(raw_content=raw_text, structured_data=data)
+    return {"raw_text": raw_text, "data": data, "highlights": highlights}
+
+
+async def _upload_inline(client: httpx.AsyncClient) -> tuple[float, float]:
+    start = time.perf_counter()
+    response = await client.post("/load-test/inline", files={"file": ("doc.md", DOCUMENT)})
+    response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+async def _upload_job(client: httpx.AsyncClient) -> tuple[float, float]:
+    start = time.perf_counter()
+    response = await client.post("/api/jobs", files={"file": ("doc.md", DOCUMENT)}, data={"type": "article", "force": "true"})
+    response.raise_for_status()
+    accepted = time.perf_counter() - start
+    job = response.json()
+    while job["status"] not in ("done", "failed"):
+        job = (await client.get(job["status_url"], params={"wait": 30})).json()
+    assert job["status"] == "done", job
+    return accepted, time.perf_counter() - start
+
+
+async def _probe(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/api/jobs/probe")  # 404, but served by the same loop
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+
+
+async def run(base_url: str, mode: str, clients: int) -> None:
+    upload = _upload_inline if mode == "inline" else _upload_job
+    limits = httpx.Limits(max_connections=clients + 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        stop = asyncio.Event()
+        probe_latencies: list[float] = []
+        probe = asyncio.ensure_future(_probe(client, stop, probe_latencies))
+        start = time.perf_counter()
+        timings = await asyncio.gather(*(upload(client) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+
+    accepted = sorted(t[0] for t in timings)
+    print(
+        f"{mode:<7} {elapsed:>8.2f} {clients / elapsed:>7.2f} "
+        f"{percentile(accepted, 50):>9.2f} {percentile(accepted, 95):>9.2f} "
+        f"{percentile(sorted(probe_latencies), 95) * 1000:>10.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test /api/extract vs /api/jobs")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent uploads")
+    parser.add_argument("--convert", type=float, default=0.3, help="Blocking conversion seconds per document")
+    parser.add_argument("--extract", type=float, default=1.0, help="LLM call seconds per document")
+    args = parser.parse_args()
+
+    _TextTool.seconds = args.convert
+    _Extractor.seconds = args.extract
+    server_main.PolicyRequirementsExtractor = _TextTool
+    server_main.GeminiExtractor = _Extractor
+    server_main.storage = _Storage()
+    # Every upload is the same file: bypass the result cache (force), keep its writes out of data/
+    server_main.cache = ResultCache(Path(tempfile.mkdtemp()) / "cache.sqlite")
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    config = uvicorn.Config(server_main.app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    print(
+        f"{args.clients} concurrent uploads, {args.convert:g}s conversion + {args.extract:g}s extraction each, "
+        f"{server_main.jobs.workers} job workers"
+    )
+    print()
+    print(f"{'mode':<7} {'time (s)':>8} {'docs/s':>7} {'p50 resp':>9} {'p95 resp':>9} {'probe p95':>10}")
+    print(f"{'':<7} {'':>8} {'':>7} {'(s)':>9} {'(s)':>9} {'(ms)':>10}")
+    try:
+        for mode in ("inline", "jobs"):
+            asyncio.run(run(f"http://127.0.0.1:{port}", mode, args.clients))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Load test /api/search while extraction jobs write to the star schema.
+
+Starts server/main.py under uvicorn in a separate process with a DuckDB
+database seeded with --docs documents of --facts fact rows, extraction
+replaced by a stand-in returning --facts sections (so every job stores
+that many fact rows with store_entity), and storage either:
+
+- shared: one StarSchemaStorage, one connection, queries on the event loop
+          (the previous setup)
+- pool:   StoragePool, a single writer thread and reader cursors
+          (--readers threads)
+
+Then, for --seconds, --writers clients keep uploading new documents
+(POST /api/jobs, waiting for each) while --searchers clients keep calling
+/api/search with a property filter. Reports search latency and the number
+of searches and stored documents.
+
+Usage:
+    uv run python -m scripts.load_test_search
+    uv run python -m scripts.load_test_search --writers 4 --searchers 16 --docs 5000
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+import uvicorn
+from pydantic import BaseModel
+
+import server.main as server_main
+from server.cache import ResultCache
+from structure_it.storage.pool import StoragePool
+from structure_it.storage.star_schema_storage import StarSchemaStorage
+from structure_it.utils.stats import percentile
+
+CATEGORIES = ("mandatory", "recommended", "prohibited")
+
+
+class _Article(BaseModel):
+    title: str
+    sections: list[dict[str, Any]]
+
+
+class _TextTool:
+    def _convert_stream_to_markdown(self, stream, suffix):
+        return stream.read().decode()
+
+
+class _Extractor:
+    facts = 20
+
+    def __init__(self, schema):
+        pass
+
+    async def extract(self, content):
+        return _Article(title=content[:40], sections=_sections(content, self.facts))
+
+
+def _sections(seed: str, count: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "heading": f"{seed[:16]}-{i}",
+            "content": f"Section {i} of {seed[:16]}: staff shall file the report within {i % 30} days.",
+            "category": CATEGORIES[i % 3],
+        }
+        for i in range(count)
+    ]
+
+
+def _seed(db_path: Path, docs: int, facts: int) -> None:
+    """Seed documents and facts in SQL (store_entity inserts row by row)."""
+    storage = StarSchemaStorage(db_path)
+    storage.conn.execute(
+        """
+        INSERT INTO dim_documents (doc_id, source_type, title, url, metadata, full_text_blob, content_hash)
+        SELECT 'seed-' || d, 'article', 'Seed ' || d, 'seed-' || d || '.md', '{}', 'seed document ' || d, sha256(d::VARCHAR)
+        FROM range(?) t(d)
+        """,
+        [docs],
+    )
+    storage.conn.execute(
+        """
+        INSERT INTO fact_items (item_id, doc_id, domain, item_type, content_text, embedding, properties, location_pointer)
+        SELECT sha256('seed-' || d || '-' || f), 'seed-' || d, 'article', 'section',
+               'Section ' || f || ' of seed ' || d || ': staff shall file the report within ' || (f % 30) || ' days.',
+               list_resize([]::FLOAT[], 768, 0.0),
+               json_object('heading', 'seed-' || d || '-' || f, 'category', (['mandatory', 'recommended', 'prohibited'])[f % 3 + 1]),
+               'seed-' || d || '-' || f
+        FROM range(?) t(d), range(?) u(f)
+        """,
+        [docs, facts],
+    )
+    storage.close()
+
+
+def _serve(port: int, mode: str, db_path: Path, docs: int, facts: int, readers: int) -> None:
+    """Server process: seeded database, stand-in extraction, storage per mode."""
+    _seed(db_path, docs, facts)
+    _Extractor.facts = facts
+    server_main.PolicyRequirementsExtractor = _TextTool
+    server_main.GeminiExtractor = _Extractor
+    server_main.storage = StarSchemaStorage(db_path) if mode == "shared" else StoragePool(db_path, read_threads=readers)
+    server_main.cache = ResultCache(db_path.with_suffix(".cache.sqlite"))
+    server_main.SERVER_UPLOAD_DIR = str(db_path.parent / "uploads")
+    uvicorn.run(server_main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+async def _writer(client: httpx.AsyncClient, deadline: float, stored: list[int]) -> None:
+    while time.perf_counter() < deadline:
+        content = os.urandom(16).hex().encode()
+        response = await client.post(
+            "/api/jobs", files={"file": ("doc.md", content)}, data={"type": "article", "force": "true"}
+        )
+        job = response.json()
+        while job["status"] not in ("done", "failed"):
+            job = (await client.get(job["status_url"], params={"wait": 30})).json()
+        assert job["status"] == "done", job
+        stored.append(1)
+
+
+async def _searcher(client: httpx.AsyncClient, deadline: float, latencies: list[float]) -> None:
+    params = {"q": "report", "filter": json.dumps({"category": "prohibited"})}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/api/search", params=params)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(base_url: str, mode: str, args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.writers + args.searchers)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        deadline = time.perf_counter() + args.seconds
+        latencies: list[float] = []
+        stored: list[int] = []
+        await asyncio.gather(
+            *(_writer(client, deadline, stored) for _ in range(args.writers)),
+            *(_searcher(client, deadline, latencies) for _ in range(args.searchers)),
+        )
+    latencies.sort()
+    print(
+        f"{mode:<7} {len(latencies) / args.seconds:>10.1f} {percentile(latencies, 50) * 1000:>9.1f} "
+        f"{percentile(latencies, 95) * 1000:>9.1f} {latencies[-1] * 1000:>9.1f} {len(stored):>7}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test /api/search under concurrent writes")
+    parser.add_argument("--docs", type=int, default=200, help="Documents seeded before the test")
+    parser.add_argument("--facts", type=int, default=20, help="Fact rows per document")
+    parser.add_argument("--writers", type=int, default=2, help="Clients uploading documents")
+    parser.add_argument("--searchers", type=int, default=8, help="Clients searching")
+    parser.add_argument("--readers", type=int, default=4, help="Reader threads (pool mode)")
+    parser.add_argument("--seconds", type=float, default=10, help="Test duration per mode")
+    args = parser.parse_args()
+
+    print(
+        f"{args.docs} documents x {args.facts} facts seeded; {args.writers} writers, "
+        f"{args.searchers} searchers, {args.seconds:g}s per mode"
+    )
+    print()
+    print(f"{'mode':<7} {'searches/s':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9} {'stored':>7}")
+    for mode in ("shared", "pool"):
+        work_dir = Path(tempfile.mkdtemp())
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        server = multiprocessing.Process(
+            target=_serve,
+            args=(port, mode, work_dir / "search.duckdb", args.docs, args.facts, args.readers),
+            daemon=True,
+        )
+        server.start()
+        try:
+            while True:
+                try:
+                    httpx.get(f"http://127.0.0.1:{port}/docs")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            asyncio.run(run(f"http://127.0.0.1:{port}", mode, args))
+        finally:
+            server.terminate()
+            server.join()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
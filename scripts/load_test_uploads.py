@@ -0,0 +1,158 @@
+"""Load test concurrent large uploads: time to the first response byte.
+
+Starts server/main.py under uvicorn in a separate process (extraction and storage replaced by
+instant stand-ins, result cache in a temp dir) and has --clients clients
+upload a --size MB file each at once to:
+
+- copy:   the previous upload handling: FastAPI's UploadFile (Starlette
+          spools the body to the system temp dir), then a hashed copy
+          into SERVER_UPLOAD_DIR in a thread, then the job is queued
+- stream: POST /api/jobs: the body is parsed as it arrives into one
+          spooled buffer per request, hashed on the way (server/uploads.py)
+
+Reports wall time and the time from sending the request until the first
+byte of the response (the job id) arrives.
+
+Usage:
+    uv run python -m scripts.load_test_uploads
+    uv run python -m scripts.load_test_uploads --clients 32 --size 20
+"""
+
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+import uvicorn
+from fastapi import File, Form, UploadFile
+from pydantic import BaseModel
+
+import server.main as server_main
+from server.cache import ResultCache
+from structure_it.utils.stats import percentile
+
+
+class _Result(BaseModel):
+    summary: str
+
+
+class _TextTool:
+    def _convert_stream_to_markdown(self, stream, suffix):
+        return stream.read(1000).decode(errors="replace")
+
+
+class _Extractor:
+    def __init__(self, schema):
+        pass
+
+    async def extract(self, content):
+        return _Result(summary=content[:100])
+
+
+class _Storage:
+    async def store_entity(self, **kwargs):
+        pass
+
+
+@server_main.app.post("/load-test/copy", status_code=202)
+async def copy_upload(file: UploadFile = File(...), type: str = Form("article")):
+    """The previous upload path: Starlette's spool, then a hashed copy under a unique name."""
+    upload_dir = Path(server_main.SERVER_UPLOAD_DIR)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    path = upload_dir / f"{uuid.uuid4().hex}.md"
+
+    def copy() -> str:
+        digest = hashlib.sha256()
+        with open(path, "wb") as buffer:
+            while chunk := file.file.read(1024 * 1024):
+                digest.update(chunk)
+                buffer.write(chunk)
+        return digest.hexdigest()
+
+    content_hash = await asyncio.to_thread(copy)
+    path.unlink()
+    return {"content_hash": content_hash}
+
+
+async def _upload(client: httpx.AsyncClient, url: str, content: bytes) -> float:
+    start = time.perf_counter()
+    async with client.stream(
+        "POST", url, files={"file": ("doc.md", content)}, data={"type": "article", "force": "true"}
+    ) as response:
+        async for _ in response.aiter_bytes():
+            first_byte = time.perf_counter() - start
+            break
+        assert response.status_code == 202, response.status_code
+    return first_byte
+
+
+async def run(base_url: str, mode: str, clients: int, size_mb: float) -> None:
+    url = "/load-test/copy" if mode == "copy" else "/api/jobs"
+    # Different bytes per client: no two uploads share a cache entry or a job
+    contents = [os.urandom(int(size_mb * 1024 * 1024)) for _ in range(clients)]
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        start = time.perf_counter()
+        latencies = sorted(await asyncio.gather(*(_upload(client, url, c) for c in contents)))
+        elapsed = time.perf_counter() - start
+    print(
+        f"{mode:<7} {elapsed:>8.2f} {percentile(latencies, 50) * 1000:>9.0f} "
+        f"{percentile(latencies, 95) * 1000:>9.0f} {latencies[-1] * 1000:>9.0f}"
+    )
+
+
+def _serve(port: int, work_dir: Path) -> None:
+    """Server process: stand-ins for extraction and storage, state in work_dir."""
+    server_main.PolicyRequirementsExtractor = _TextTool
+    server_main.GeminiExtractor = _Extractor
+    server_main.storage = _Storage()
+    server_main.cache = ResultCache(work_dir / "cache.sqlite")
+    server_main.SERVER_UPLOAD_DIR = str(work_dir / "uploads")
+    uvicorn.run(server_main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test upload-to-first-byte latency")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent uploads")
+    parser.add_argument("--size", type=float, default=20, help="Upload size (MB)")
+    parser.add_argument("--rounds", type=int, default=3, help="Runs per mode")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp())
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    # A separate process, so clients encoding uploads do not share the server's GIL
+    server = multiprocessing.Process(target=_serve, args=(port, work_dir), daemon=True)
+    server.start()
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs")
+            break
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+    print(f"{args.clients} concurrent uploads of {args.size:g} MB")
+    print()
+    print(f"{'mode':<7} {'time (s)':>8} {'p50 TTFB':>9} {'p95 TTFB':>9} {'max TTFB':>9}")
+    print(f"{'':<7} {'':>8} {'(ms)':>9} {'(ms)':>9} {'(ms)':>9}")
+    try:
+        for _ in range(args.rounds):
+            for mode in ("copy", "stream"):
+                asyncio.run(run(f"http://127.0.0.1:{port}", mode, args.clients, args.size))
+    finally:
+        server.terminate()
+        server.join()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
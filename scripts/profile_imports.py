@@ -0,0 +1,115 @@
+"""Profile the import time of a module (default: the API server).
+
+Imports the module in a fresh interpreter under `python -X importtime`
+(after one untimed run, so bytecode is compiled) and reports the total, the
+slowest imports by cumulative and by own time, and which of the heavy
+dependencies the server defers (server.main.WARMUP_MODULES) were imported.
+tests/test_server_startup.py checks the deferred modules with the same
+profile; the time budget is checked here (exit status 1 when over), since
+wall-clock time is only meaningful on an otherwise idle machine.
+
+Usage:
+    uv run python -m scripts.profile_imports
+    uv run python -m scripts.profile_imports --module structure_it.etl.transform --top 30 --budget 3
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from pydantic import BaseModel
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Imports the server loads on first use (keep in sync with server.main.WARMUP_MODULES)
+DEFERRED_MODULES = ("google.genai", "google.genai.types", "markitdown")
+
+# `import server.main` took 2.2s when it loaded google.genai and MarkItDown
+# and opened DuckDB; about 0.8s now, most of it FastAPI
+IMPORT_BUDGET_SECONDS = 1.5
+
+
+class ImportRecord(BaseModel):
+    """One line of `-X importtime` output."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def import_profile(module: str, cwd: str | Path | None = None) -> list[ImportRecord]:
+    """Import module in a fresh interpreter and parse its `-X importtime` report.
+
+    Args:
+        module: Module to import.
+        cwd: Working directory of the interpreter (default: the repository).
+
+    Returns:
+        One record per imported module, in import completion order (the
+        last is module itself).
+    """
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(ROOT), str(ROOT / "src"), os.environ.get("PYTHONPATH", "")]),
+    }
+    command = [sys.executable, "-c", f"import {module}"]
+    subprocess.run(command, cwd=cwd or ROOT, env=env, check=True, capture_output=True)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *command[1:]],
+        cwd=cwd or ROOT, env=env, check=True, capture_output=True, text=True,
+    )
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        records.append(
+            ImportRecord(
+                module=name.strip(),
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+                depth=(len(name) - len(name.lstrip())) // 2,
+            )
+        )
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile a module's import time")
+    parser.add_argument("--module", default="server.main", help="Module to import")
+    parser.add_argument("--top", type=int, default=15, help="Imports to list")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help=f"Fail above this many seconds (default: {IMPORT_BUDGET_SECONDS} for server.main)",
+    )
+    args = parser.parse_args()
+    budget = args.budget
+    if budget is None and args.module == "server.main":
+        budget = IMPORT_BUDGET_SECONDS
+
+    records = import_profile(args.module)
+    total = next(r for r in reversed(records) if r.module == args.module)
+    print(f"import {args.module}: {total.cumulative_us / 1e6:.3f}s, {len(records)} modules")
+
+    for title, key in (("cumulative", "cumulative_us"), ("self", "self_us")):
+        print()
+        print(f"{'slowest by ' + title:<50} {'ms':>9}")
+        for record in sorted(records, key=lambda r: getattr(r, key), reverse=True)[: args.top]:
+            print(f"{record.module:<50} {getattr(record, key) / 1000:>9.1f}")
+
+    imported = {r.module for r in records}
+    print()
+    for module in DEFERRED_MODULES:
+        print(f"{module:<50} {'imported' if module in imported else 'deferred':>9}")
+
+    if budget is not None and total.cumulative_us / 1e6 > budget:
+        print(f"\nOver budget: {total.cumulative_us / 1e6:.3f}s > {budget}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
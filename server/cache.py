@@ -0,0 +1,178 @@
+"""Upload result and search caches for the API server.
+
+Uploads are hashed (SHA256 of the bytes) as they are saved. Converting a
+document and extracting it with Gemini are by far the slowest steps and
+depend only on the bytes, the extraction type and the model, so their
+outputs are kept here, in SQLite next to the other operational state:
+
+- conversions: content hash -> converted text (shared by every type)
+- results: (content hash, type, model) -> extracted data, highlights, doc id
+
+A repeat upload is answered from `results` without running a job; the same
+file uploaded as another type skips conversion. `force` bypasses both.
+
+Search responses are kept in memory (SearchCache, an LRU) under the
+normalized query, filters, page and the storage's write generation, so a
+repeated or paged search is a dictionary lookup, and anything stored
+since makes the old entries unreachable (they age out of the LRU).
+"""
+
+import json
+import sqlite3
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from structure_it.config import SERVER_SEARCH_CACHE_ENTRIES
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    content_hash TEXT PRIMARY KEY,
+    raw_text TEXT NOT NULL,
+    pages INTEGER,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    content_hash TEXT NOT NULL,
+    type TEXT NOT NULL,
+    model TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    data TEXT NOT NULL,          -- JSON
+    highlights TEXT NOT NULL,    -- JSON
+    created_at TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (content_hash, type, model)
+);
+"""
+
+
+class ResultCache:
+    """SQLite-backed cache of conversions and extraction results by upload hash."""
+
+    def __init__(self, db_path: str | Path):
+        """Open (or create) the cache.
+
+        Args:
+            db_path: SQLite file.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Used from the server's event loop thread, which need not be the importing thread
+        self.conn = sqlite3.connect(
+            str(self.db_path), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(CACHE_SCHEMA)
+
+    def conversion(self, content_hash: str) -> sqlite3.Row | None:
+        """Cached conversion (raw_text, pages) of a file, if any."""
+        return self.conn.execute(
+            "SELECT raw_text, pages FROM conversions WHERE content_hash = ?", [content_hash]
+        ).fetchone()
+
+    def put_conversion(self, content_hash: str, raw_text: str, pages: int | None) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO conversions (content_hash, raw_text, pages, created_at) VALUES (?, ?, ?, ?)",
+            [content_hash, raw_text, pages, datetime.now().isoformat()],
+        )
+
+    def result(self, content_hash: str, type: str, model: str) -> dict[str, Any] | None:
+        """Cached response for an upload, in /api/extract's shape, if any."""
+        row = self.conn.execute(
+            """
+            SELECT r.doc_id, r.data, r.highlights, c.raw_text
+            FROM results r JOIN conversions c USING (content_hash)
+            WHERE r.content_hash = ? AND r.type = ? AND r.model = ?
+            """,
+            [content_hash, type, model],
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute(
+            "UPDATE results SET hits = hits + 1 WHERE content_hash = ? AND type = ? AND model = ?",
+            [content_hash, type, model],
+        )
+        return {
+            "raw_text": row["raw_text"],
+            "data": json.loads(row["data"]),
+            "highlights": json.loads(row["highlights"]),
+            "type": type,
+            "doc_id": row["doc_id"],
+        }
+
+    def put_result(self, content_hash: str, type: str, model: str, result: dict[str, Any]) -> None:
+        """Store a response (its raw_text must already be in conversions)."""
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO results (content_hash, type, model, doc_id, data, highlights, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                content_hash,
+                type,
+                model,
+                result["doc_id"],
+                json.dumps(result["data"], default=str),
+                json.dumps(result["highlights"]),
+                datetime.now().isoformat(),
+            ],
+        )
+
+    def stats(self) -> dict[str, int]:
+        """Entries and total hits."""
+        conversions = self.conn.execute("SELECT count(*) FROM conversions").fetchone()[0]
+        results, hits = self.conn.execute("SELECT count(*), coalesce(sum(hits), 0) FROM results").fetchone()
+        return {"conversions": conversions, "results": results, "hits": hits}
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class SearchCache:
+    """In-memory LRU of serialized search responses."""
+
+    def __init__(self, max_entries: int = SERVER_SEARCH_CACHE_ENTRIES):
+        """Create the cache.
+
+        Args:
+            max_entries: Responses kept; 0 disables caching.
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(q: str, filters: dict[str, Any] | None, limit: int, cursor: str | None, generation: int) -> tuple:
+        """Cache key: case and whitespace of the query and order of filters do not matter."""
+        return (
+            " ".join(q.lower().split()),
+            json.dumps(filters or {}, sort_keys=True, default=str),
+            limit,
+            cursor,
+            generation,
+        )
+
+    def get(self, key: tuple) -> bytes | None:
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: tuple, body: bytes) -> None:
+        if not self.max_entries:
+            return
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        """Entries, hits and misses."""
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,454 @@
+"""Background extraction jobs for the API server.
+
+`POST /api/extract` used to convert, extract (Gemini), locate highlights and
+store the document inside the request, so a large PDF held its connection
+for a minute and, since conversion ran on the event loop, stalled every
+other request. Now the upload is saved and submitted as a job: the request
+returns a job id at once, a pool of async workers runs the job, and clients
+poll `GET /api/jobs/{id}` (optionally long-polling with `?wait=`).
+
+Progress: handlers `publish()` stage events (converted, extracted,
+highlights, stored) carrying partial results, and clients can follow them
+as server-sent events from `GET /api/jobs/{id}/events`, reviewing the text
+and highlights before the job is done. Each event records the seconds since
+the job started, and `Job.timings` the time spent per stage.
+
+Jobs live in memory: they carry the full result (raw text included) only
+until a client has had a chance to fetch it. Finished jobs beyond
+SERVER_JOB_HISTORY are forgotten, oldest first; stored documents remain in
+DuckDB.
+
+Admission: at most SERVER_MAX_QUEUED_JOBS jobs wait for a worker, and at
+most SERVER_MAX_QUEUED_PER_CLIENT of them from one client; beyond that
+submit() raises QueueFull with an estimated Retry-After, so an overloaded
+server refuses work instead of letting every job's wait grow without bound.
+Workers take waiting jobs round-robin across clients, so one client's batch
+does not hold up everyone else. Within a job, the CPU-bound stages
+(conversion, highlights) and the LLM call each take a slot from their own
+limit (SERVER_CPU_CONCURRENCY, SERVER_LLM_CONCURRENCY); `metrics()` reports
+queue depth, rejections and wait times.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from contextlib import asynccontextmanager
+from typing import Any, Literal
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+
+from structure_it.config import (
+    SERVER_CPU_CONCURRENCY,
+    SERVER_JOB_HISTORY,
+    SERVER_JOB_WORKERS,
+    SERVER_LLM_CONCURRENCY,
+    SERVER_MAX_QUEUED_JOBS,
+    SERVER_MAX_QUEUED_PER_CLIENT,
+)
+from structure_it.utils.stats import percentile
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+JobHandler = Callable[["Job"], Awaitable[dict[str, Any]]]
+
+# Last event of every job
+TERMINAL_STAGES = ("done", "failed")
+
+# Seconds between SSE keep-alive comments while a job is quiet
+KEEPALIVE_SECONDS = 15.0
+
+# Recent queue waits, run times and stage waits kept for metrics
+METRICS_WINDOW = 1000
+
+# Assumed job run time for Retry-After until jobs have finished
+DEFAULT_RUN_SECONDS = 10.0
+
+
+class QueueFull(Exception):
+    """A job was refused: too many waiting, overall or from its client."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Extraction queue full ({reason}); retry in {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+        # Set when the refused request's body was left unread
+        self.close_connection = False
+
+
+class Job(BaseModel):
+    """An extraction job and, once finished, its result or error."""
+
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = "queued"
+    stage: str = "queued"
+    info: dict[str, Any] = Field(default_factory=dict)
+    created_at: float = Field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    events: list[dict[str, Any]] = Field(default_factory=list)
+    timings: dict[str, float] = Field(default_factory=dict)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def summary(self) -> dict[str, Any]:
+        """Status without the (possibly large) result and events."""
+        return self.model_dump(exclude={"result", "events"})
+
+
+class JobQueue:
+    """In-memory job registry drained by a pool of async workers."""
+
+    def __init__(
+        self,
+        workers: int = SERVER_JOB_WORKERS,
+        history: int = SERVER_JOB_HISTORY,
+        max_queued: int = SERVER_MAX_QUEUED_JOBS,
+        max_queued_per_client: int = SERVER_MAX_QUEUED_PER_CLIENT,
+        stage_limits: dict[str, int] | None = None,
+    ):
+        """Initialize the queue.
+
+        Args:
+            workers: Jobs run at the same time.
+            history: Finished jobs kept for polling.
+            max_queued: Jobs waiting for a worker before submit() refuses (0: no limit).
+            max_queued_per_client: Waiting jobs per client (0: no limit).
+            stage_limits: Concurrent holders of each stage slot (see `slot()`);
+                default cpu: SERVER_CPU_CONCURRENCY, llm: SERVER_LLM_CONCURRENCY.
+        """
+        self.workers = max(workers, 1)
+        self.history = history
+        self.max_queued = max_queued
+        self.max_queued_per_client = max_queued_per_client
+        self.stage_limits = stage_limits or {"cpu": SERVER_CPU_CONCURRENCY, "llm": SERVER_LLM_CONCURRENCY}
+        self.jobs: dict[str, Job] = {}
+        self._handlers: dict[str, JobHandler] = {}
+        self._done_events: dict[str, asyncio.Event] = {}
+        self._subscribers: dict[str, list[asyncio.Queue]] = {}
+        self._finished: deque[str] = deque()
+        # Waiting job ids per client, clients in round-robin order; one
+        # ticket in _queue per waiting job wakes a worker
+        self._pending: dict[str, deque[str]] = {}
+        self._queue: asyncio.Queue[None] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._stage_active = dict.fromkeys(self.stage_limits, 0)
+        self._stage_waiting = dict.fromkeys(self.stage_limits, 0)
+        self._stage_waits: dict[str, deque[float]] = {
+            stage: deque(maxlen=METRICS_WINDOW) for stage in self.stage_limits
+        }
+        self._queue_waits: deque[float] = deque(maxlen=METRICS_WINDOW)
+        self._run_seconds: deque[float] = deque(maxlen=METRICS_WINDOW)
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "client_limit": 0}
+
+    def _ensure_workers(self) -> asyncio.Queue[None]:
+        # Workers start on first use, on the server's event loop
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._queue is not None:
+            return self._queue
+        self._loop = loop
+        queue: asyncio.Queue[None] = asyncio.Queue()
+        self._queue = queue
+        self._pending = {}
+        self._semaphores = {stage: asyncio.Semaphore(max(limit, 1)) for stage, limit in self.stage_limits.items()}
+        self._tasks = [loop.create_task(self._worker(queue)) for _ in range(self.workers)]
+        return queue
+
+    @property
+    def queued(self) -> int:
+        """Jobs waiting for a worker."""
+        return sum(len(ids) for ids in self._pending.values())
+
+    def retry_after(self, ahead: int | None = None) -> float:
+        """Estimated seconds until a worker frees up for a new job.
+
+        Args:
+            ahead: Jobs that would run first (default: all waiting jobs).
+        """
+        run_seconds = percentile(list(self._run_seconds), 50) if self._run_seconds else DEFAULT_RUN_SECONDS
+        ahead = self.queued if ahead is None else ahead
+        return min(max(math.ceil(run_seconds * (ahead + 1) / self.workers), 1), 600)
+
+    def admit(self, client: str = "") -> None:
+        """Check that a job from client would be accepted now.
+
+        Raises:
+            QueueFull: If max_queued jobs are waiting, or max_queued_per_client from client.
+        """
+        if self.max_queued and self.queued >= self.max_queued:
+            self.rejected["queue_full"] += 1
+            raise QueueFull("queue_full", self.retry_after())
+        waiting = len(self._pending.get(client, ()))
+        if self.max_queued_per_client and waiting >= self.max_queued_per_client:
+            self.rejected["client_limit"] += 1
+            # Round-robin: each of the client's jobs waits for a turn of every waiting client
+            raise QueueFull("client_limit", self.retry_after(waiting * len(self._pending)))
+
+    def submit(self, handler: JobHandler, client: str = "", **info: Any) -> Job:
+        """Queue a job; returns immediately.
+
+        Args:
+            handler: `async def handler(job) -> dict`, the job's result;
+                raising marks the job failed. It may `publish()` progress.
+            client: Who submitted it (IP address, client id), for fairness and limits.
+            **info: Shown with the job status (file name, type, ...).
+
+        Raises:
+            QueueFull: If the job is refused (see `admit()`).
+        """
+        queue = self._ensure_workers()
+        self.admit(client)
+        job = Job(info=info)
+        self.jobs[job.id] = job
+        self._handlers[job.id] = handler
+        self._done_events[job.id] = asyncio.Event()
+        self._pending.setdefault(client, deque()).append(job.id)
+        queue.put_nowait(None)
+        self.admitted += 1
+        return job
+
+    def _next_job(self) -> str:
+        # First client in round-robin order; it moves to the back if it has more waiting
+        client = next(iter(self._pending))
+        ids = self._pending.pop(client)
+        job_id = ids.popleft()
+        if ids:
+            self._pending[client] = ids
+        return job_id
+
+    @asynccontextmanager
+    async def slot(self, job: Job, stage: str) -> AsyncIterator[None]:
+        """Hold one of stage's limited slots (cpu, llm) while running part of job.
+
+        The wait is added to the job's timings as `{stage}_wait`.
+        """
+        start = time.perf_counter()
+        self._stage_waiting[stage] += 1
+        try:
+            await self._semaphores[stage].acquire()
+        finally:
+            self._stage_waiting[stage] -= 1
+        waited = time.perf_counter() - start
+        self._stage_waits[stage].append(waited)
+        job.timings[f"{stage}_wait"] = round(job.timings.get(f"{stage}_wait", 0.0) + waited, 3)
+        self._stage_active[stage] += 1
+        try:
+            yield
+        finally:
+            self._stage_active[stage] -= 1
+            self._semaphores[stage].release()
+
+    def completed(
+        self, result: dict[str, Any], events: Sequence[tuple[str, dict[str, Any]]] = (), **info: Any
+    ) -> Job:
+        """Register a job that is already done (answered without running).
+
+        Args:
+            result: The job's result.
+            events: (stage, data) progress events to record, e.g. partial
+                results for event-stream clients.
+            **info: Shown with the job status.
+        """
+        job = Job(info=info, status="done", started_at=time.time(), result=result)
+        self.jobs[job.id] = job
+        for stage, data in events:
+            self.publish(job, stage, **data)
+        job.finished_at = time.time()
+        self.publish(job, "done")
+        self._forget_old(job.id)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float | None = None) -> Job | None:
+        """The job once finished, or as it is after timeout seconds."""
+        job = self.jobs.get(job_id)
+        event = self._done_events.get(job_id)
+        if job is None or event is None or job.finished:
+            return job
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except TimeoutError:
+            pass
+        return job
+
+    def publish(self, job: Job, stage: str, seconds: float | None = None, **data: Any) -> None:
+        """Record a stage event for job and send it to its subscribers.
+
+        Args:
+            job: The job.
+            stage: Stage just completed ("converted", "extracted", ...).
+            seconds: Time the stage took, if not simply the time since the
+                previous event.
+            **data: Event payload: stage details and partial results.
+        """
+        now = time.time()
+        if seconds is None and stage not in TERMINAL_STAGES:
+            # Since the previous event, not counting the wait in the queue
+            since = max(job.events[-1]["_at"] if job.events else 0.0, job.started_at or job.created_at)
+            seconds = now - since
+        if seconds is not None:
+            job.timings[stage] = round(seconds, 3)
+        event = {"stage": stage, "elapsed": round(now - job.created_at, 3), **data}
+        job.events.append({**event, "_at": now})
+        job.stage = stage
+        for queue in self._subscribers.get(job.id, []):
+            queue.put_nowait(event)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[dict[str, Any] | None]:
+        """Events of a job: those already published, then live ones until it finishes.
+
+        Yields None after KEEPALIVE_SECONDS without an event. Ends at once if
+        the job is unknown (evicted from the history since it was looked up).
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            published = list(job.events)
+            for event in published:
+                yield {k: v for k, v in event.items() if k != "_at"}
+            if published and published[-1]["stage"] in TERMINAL_STAGES:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event["stage"] in TERMINAL_STAGES:
+                    return
+        finally:
+            self._subscribers[job_id].remove(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    async def stream(self, job_id: str) -> AsyncIterator[str]:
+        """Job events formatted as a server-sent event stream."""
+        async for event in self.subscribe(job_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                data = json.dumps(jsonable_encoder(event))
+                yield f"event: {event['stage']}\ndata: {data}\n\n"
+
+    def counts(self) -> dict[str, int]:
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    def metrics(self) -> dict[str, Any]:
+        """Queue depth, admissions, rejections, and wait and run times (seconds) of recent jobs."""
+
+        def summary(values: deque[float]) -> dict[str, float]:
+            if not values:
+                return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+            recent = list(values)
+            return {"p50": percentile(recent, 50), "p95": percentile(recent, 95), "max": max(recent)}
+
+        return {
+            "workers": self.workers,
+            "running": sum(1 for job in self.jobs.values() if job.status == "running"),
+            "queued": self.queued,
+            "clients_queued": len(self._pending),
+            "max_queued": self.max_queued,
+            "max_queued_per_client": self.max_queued_per_client,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "retry_after": self.retry_after(),
+            "queue_wait": summary(self._queue_waits),
+            "run_seconds": summary(self._run_seconds),
+            "stages": {
+                stage: {
+                    "limit": limit,
+                    "active": self._stage_active[stage],
+                    "waiting": self._stage_waiting[stage],
+                    "wait": summary(self._stage_waits[stage]),
+                }
+                for stage, limit in self.stage_limits.items()
+            },
+        }
+
+    async def _worker(self, queue: asyncio.Queue[None]) -> None:
+        while True:
+            await queue.get()
+            job_id = self._next_job()
+            job = self.jobs[job_id]
+            handler = self._handlers.pop(job_id)
+            job.status = "running"
+            job.started_at = time.time()
+            job.timings["queued"] = round(job.started_at - job.created_at, 3)
+            self._queue_waits.append(job.started_at - job.created_at)
+            try:
+                job.result = await handler(job)
+                job.status = "done"
+            except Exception as e:
+                logger.exception(f"Job {job_id} failed")
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = "failed"
+            job.finished_at = time.time()
+            self._run_seconds.append(job.finished_at - job.started_at)
+            # The result itself is fetched with GET /api/jobs/{id}
+            if job.error:
+                self.publish(job, job.status, error=job.error)
+            else:
+                self.publish(job, job.status)
+            logger.info(
+                f"Job {job_id} {job.status} in {job.finished_at - job.created_at:.2f}s ("
+                + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in job.timings.items())
+                + ")"
+            )
+            self._done_events.pop(job_id).set()
+            self._forget_old(job_id)
+
+    def _forget_old(self, job_id: str) -> None:
+        self._finished.append(job_id)
+        while len(self._finished) > self.history:
+            self.jobs.pop(self._finished.popleft(), None)
+
+    async def close(self) -> None:
+        """Stop the workers (queued and running jobs are abandoned)."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+
+def prometheus_text(metrics: dict[str, Any]) -> str:
+    """JobQueue.metrics() as gauges in the Prometheus text exposition format."""
+    lines = [
+        f"structure_it_jobs_{key} {metrics[key]}"
+        for key in ("workers", "running", "queued", "clients_queued", "max_queued", "max_queued_per_client", "admitted")
+    ]
+    lines.append(f"structure_it_jobs_retry_after_seconds {metrics['retry_after']}")
+    lines += [f'structure_it_jobs_rejected{{reason="{reason}"}} {count}' for reason, count in metrics["rejected"].items()]
+    for name in ("queue_wait", "run_seconds"):
+        metric = name.removesuffix("_seconds")
+        lines += [f'structure_it_jobs_{metric}_seconds{{stat="{stat}"}} {value}' for stat, value in metrics[name].items()]
+    for stage, values in metrics["stages"].items():
+        lines += [f'structure_it_jobs_stage_{key}{{stage="{stage}"}} {values[key]}' for key in ("limit", "active", "waiting")]
+        lines += [
+            f'structure_it_jobs_stage_wait_seconds{{stage="{stage}",stat="{stat}"}} {value}'
+            for stat, value in values["wait"].items()
+        ]
+    return "\n".join(lines) + "\n"
@@ -1,12 +1,15 @@
-import shutil
-import os
+import asyncio
 import json
-from typing import Any, Dict, List, Type, Optional
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Type, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
 # Import the core library
+from structure_it.config import DEFAULT_MODEL, SERVER_CACHE_DB, SERVER_UPLOAD_DIR, SERVER_WARMUP
 from structure_it.extractors import PolicyRequirementsExtractor, GeminiExtractor
 from structure_it.schemas import (
     PolicyRequirements,
@@ -16,13 +19,113 @@ from structure_it.schemas import (
     MeetingNote,
     MediaTranscript
 )
-from structure_it.storage.star_schema_storage import StarSchemaStorage
+from structure_it.storage.pool import StoragePool
+from structure_it.utils.convert import count_pdf_pages
 from structure_it.utils.hashing import generate_id
+from structure_it.utils.highlights import locate_highlights
+from structure_it.utils.lazy import preload
 
-app = FastAPI()
+from server.cache import ResultCache, SearchCache
+from server.jobs import Job, JobQueue, QueueFull, prometheus_text
+from server.responses import encoded_response, json_response, select_fields, text_response
+from server.uploads import SpooledUpload, discard_body, read_upload
 
-# Initialize Storage
-storage = StarSchemaStorage()
+# Storage: searches read through a pool of cursors while extraction jobs
+# write on the single writer thread. Opened on startup (lifespan), not at import
+storage: Optional[StoragePool] = None
+
+# Extractions run as background jobs (see server/jobs.py)
+jobs = JobQueue()
+
+# Conversions and results by upload hash (see server/cache.py), and the job
+# currently extracting each (hash, type). Opened on startup
+cache: Optional[ResultCache] = None
+inflight: Dict[tuple, str] = {}
+
+# Imported on first use (see utils.lazy): loaded ahead of the first
+# extraction by the warm-up
+WARMUP_MODULES = ("google.genai", "google.genai.types", "markitdown")
+warmup_task: Optional[asyncio.Task] = None
+
+
+def get_storage() -> StoragePool:
+    """The storage pool opened by the lifespan."""
+    if storage is None:
+        raise RuntimeError("Storage is not open: the app lifespan has not started")
+    return storage
+
+
+def get_cache() -> ResultCache:
+    """The result cache opened by the lifespan."""
+    if cache is None:
+        raise RuntimeError("Result cache is not open: the app lifespan has not started")
+    return cache
+
+
+async def warm_up() -> Dict[str, float]:
+    """Load what the first extraction and search would otherwise wait for.
+
+    Imports the extraction stack in a thread and opens a reader cursor.
+    Returns the seconds each step took.
+    """
+    timings = {}
+    start = time.perf_counter()
+    await asyncio.to_thread(preload, *WARMUP_MODULES)
+    timings["imports"] = round(time.perf_counter() - start, 3)
+    start = time.perf_counter()
+    await get_storage().count_entities()
+    timings["storage"] = round(time.perf_counter() - start, 3)
+    return timings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open storage and the result cache on startup, close them on shutdown.
+
+    Instances already set (tests, load tests) are used as they are. With
+    STRUCTURE_IT_SERVER_WARMUP the warm-up runs in the background.
+    """
+    global storage, cache, warmup_task
+    own_storage = StoragePool() if storage is None else None
+    own_cache = ResultCache(SERVER_CACHE_DB) if cache is None else None
+    if own_storage is not None:
+        storage = own_storage
+    if own_cache is not None:
+        cache = own_cache
+    if SERVER_WARMUP:
+        warmup_task = asyncio.create_task(warm_up())
+    try:
+        yield
+    finally:
+        if warmup_task is not None:
+            await asyncio.gather(warmup_task, return_exceptions=True)
+            warmup_task = None
+        await jobs.close()
+        if own_storage is not None:
+            own_storage.close()
+            storage = None
+        if own_cache is not None:
+            own_cache.close()
+            cache = None
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.exception_handler(QueueFull)
+async def queue_full(request: Request, exc: QueueFull):
+    """Overloaded: 429 with the estimated wait, instead of queueing without bound."""
+    headers = {"Retry-After": str(int(exc.retry_after))}
+    if exc.close_connection:
+        headers["Connection"] = "close"
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "reason": exc.reason, "retry_after": exc.retry_after},
+        headers=headers,
+    )
+
+# Recent search responses, until the next write (see server/cache.py)
+search_cache = SearchCache()
 
 # Allow CORS for local UI development
 app.add_middleware(
@@ -43,146 +146,328 @@ SCHEMA_MAP: Dict[str, Type[BaseModel]] = {
     "media": MediaTranscript
 }
 
-# Logic to find start/end indices of a string within the document
-def locate_source_indices(full_text: str, snippet: str) -> dict:
-    if not snippet or len(snippet) < 10: # Ignore short strings
-        return {"start": -1, "end": -1}
-        
-    # 1. Try exact match
-    start = full_text.find(snippet)
-    if start != -1:
-        return {"start": start, "end": start + len(snippet)}
-
-    # 2. Try matching just the first 50 characters (handling slight LLM hallucinations)
-    trunc = snippet[:50]
-    start = full_text.find(trunc)
-    if start != -1:
-        # Estimate end based on statement length
-        return {"start": start, "end": start + len(snippet)}
-
-    return {"start": -1, "end": -1}
-
-def recursive_highlight_search(data: Any, full_text: str, path: str = "") -> List[Dict]:
-    """Recursively find highlights for all string values in the extraction result."""
-    highlights = []
-    
-    if isinstance(data, dict):
-        for key, value in data.items():
-            new_path = f"{path}.{key}" if path else key
-            highlights.extend(recursive_highlight_search(value, full_text, new_path))
-            
-    elif isinstance(data, list):
-        for i, item in enumerate(data):
-            new_path = f"{path}[{i}]"
-            highlights.extend(recursive_highlight_search(item, full_text, new_path))
-            
-    elif isinstance(data, str):
-        # Try to find this string in the source text
-        loc = locate_source_indices(full_text, data)
-        if loc["start"] != -1:
-            highlights.append({
-                "id": path, # Use the JSON path as the ID
-                "start": loc["start"],
-                "end": loc["end"],
-                "text": data
-            })
-            
-    return highlights
-
-@app.post("/api/extract")
-async def extract(
-    file: UploadFile = File(...),
-    type: str = Form("policy") # Default to policy for backward compatibility
-):
-    if type not in SCHEMA_MAP:
-        raise HTTPException(status_code=400, detail=f"Invalid type. Supported: {list(SCHEMA_MAP.keys())}")
+# Upload endpoints read the multipart body themselves (server/uploads.py);
+# this documents the form they expect
+UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "type": {"type": "string", "default": "policy", "enum": list(SCHEMA_MAP)},
+                        "force": {"type": "boolean", "default": False},
+                    },
+                }
+            }
+        },
+    }
+}
+
+async def run_extraction(job: Job, upload: SpooledUpload, type: str, force: bool) -> dict:
+    """Convert, extract, locate highlights and store one uploaded document.
 
-    temp_path = f"temp_{file.filename}"
+    Runs on a job worker; conversion (CPU bound) runs in a thread so the
+    event loop keeps serving other requests. Each stage publishes a progress
+    event with its partial result. Conversions and results are cached by
+    the upload's hash.
+    """
+    filename, content_hash = upload.filename, upload.content_hash
     try:
-        # 1. Save File
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # 2. Run structure-it
-        meta = {"policy_id": "UPLOAD", "policy_title": file.filename, "policy_type": "General"}
-        
-        result_model = None
-        raw_text = ""
-
-        # Special handling for Policy to keep custom logic
-        if type == "policy":
-            extractor = PolicyRequirementsExtractor()
-            # Use internal method to get text (prototype hack)
-            raw_text = extractor._convert_to_markdown(temp_path) 
-            result_model = await extractor.extract(temp_path, meta)
+        meta = {"policy_id": "UPLOAD", "policy_title": filename, "policy_type": "General"}
+
+        # 1. Convert once (PolicyRequirementsExtractor handles PDFs nicely)
+        text_tool = PolicyRequirementsExtractor()
+        converted = None if force else get_cache().conversion(content_hash)
+        if converted is not None:
+            raw_text, pages = converted["raw_text"], converted["pages"]
         else:
-            # Generic handling for other types
-            target_schema = SCHEMA_MAP[type]
-            # We need a way to get raw text. PolicyRequirementsExtractor has _convert_to_markdown.
-            # For now, we instantiate PolicyRequirementsExtractor JUST to get the text converter 
-            # because it handles PDFs nicely.
-            # In a real app, the text conversion should be a separate utility.
-            text_tool = PolicyRequirementsExtractor()
-            raw_text = text_tool._convert_to_markdown(temp_path)
-            
-            # Use Generic Gemini Extractor
-            generic_extractor = GeminiExtractor(schema=target_schema)
-            result_model = await generic_extractor.extract(content=raw_text)
+            async with jobs.slot(job, "cpu"):
+                raw_text, pages = await asyncio.to_thread(convert_upload, text_tool, upload)
+            get_cache().put_conversion(content_hash, raw_text, pages)
+        jobs.publish(
+            job, "converted", pages=pages, chars=len(raw_text), raw_text=raw_text, cached=converted is not None
+        )
 
-        # 3. Generate Generic Visual Highlights
-        # Convert model to dict
+        # 2. Run structure-it (one Gemini call for the whole document)
+        async with jobs.slot(job, "llm"):
+            if type == "policy":
+                # Special handling for Policy to keep custom logic
+                result_model = await text_tool.extract(filename, meta, content=raw_text)
+            else:
+                # Use Generic Gemini Extractor
+                generic_extractor = GeminiExtractor(schema=SCHEMA_MAP[type])
+                result_model = await generic_extractor.extract(content=raw_text)
         data_dict = result_model.model_dump()
-        highlights = recursive_highlight_search(data_dict, raw_text)
+        jobs.publish(job, "extracted", data=data_dict)
+
+        # 3. Generate Generic Visual Highlights
+        async with jobs.slot(job, "cpu"):
+            highlights = await asyncio.to_thread(locate_highlights, data_dict, raw_text)
+        jobs.publish(job, "highlights", highlights=highlights)
 
         # 4. Persist to Star Schema Storage
         # Generate a stable ID for the document based on content
         doc_id = generate_id(raw_text)
-        await storage.store_entity(
+        await get_storage().store_entity(
             entity_id=doc_id,
             source_type=type,
-            source_url=file.filename,
+            source_url=filename,
             raw_content=raw_text,
             structured_data=data_dict,
             metadata=meta
         )
+        jobs.publish(job, "stored", doc_id=doc_id)
 
-        # 5. Return
-        return {
+        result = {
             "raw_text": raw_text,
             "data": data_dict,
             "highlights": highlights,
             "type": type,
             "doc_id": doc_id
         }
-        
-    except Exception as e:
-        print(f"Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        get_cache().put_result(content_hash, type, DEFAULT_MODEL, result)
+        return result
     finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        upload.close()
+        if inflight.get((content_hash, type)) == job.id:
+            del inflight[(content_hash, type)]
+
+
+def convert_upload(text_tool, upload: SpooledUpload) -> tuple[str, int | None]:
+    """Text and page count of an upload, read from its buffer (runs in a thread)."""
+    raw_text = text_tool._convert_stream_to_markdown(upload.open(), upload.suffix)
+    pages = count_pdf_pages(upload.open()) if upload.suffix == ".pdf" else None
+    return raw_text, pages
+
+
+async def submit_extraction(
+    upload: SpooledUpload, type: str, force: bool = False, seconds: float = 0.0, client: str = ""
+) -> Job:
+    """Queue the extraction job of a received upload (which the job then owns).
+
+    A file already extracted as this type is answered from the cache with
+    a finished job, and one being extracted right now joins that job,
+    unless force is set. Raises QueueFull (429) if the queue is full.
+    """
+    if type not in SCHEMA_MAP:
+        upload.close()
+        raise HTTPException(status_code=400, detail=f"Invalid type. Supported: {list(SCHEMA_MAP.keys())}")
+
+    content_hash, filename = upload.content_hash, upload.filename
+    uploaded = {"seconds": seconds, "bytes": upload.size, "content_hash": content_hash}
+
+    if not force:
+        result = get_cache().result(content_hash, type, DEFAULT_MODEL)
+        running = jobs.get(inflight.get((content_hash, type), ""))
+        if result is not None or (running is not None and not running.finished):
+            upload.close()
+        if result is not None:
+            result["cached"] = True
+            return jobs.completed(
+                result,
+                events=[
+                    ("uploaded", uploaded),
+                    ("converted", {"chars": len(result["raw_text"]), "raw_text": result["raw_text"], "cached": True}),
+                    ("extracted", {"data": result["data"]}),
+                    ("highlights", {"highlights": result["highlights"]}),
+                    ("stored", {"doc_id": result["doc_id"]}),
+                ],
+                filename=filename, type=type, cached=True,
+            )
+        if running is not None and not running.finished:
+            return running
+
+    try:
+        job = jobs.submit(lambda job: run_extraction(job, upload, type, force), client=client, filename=filename, type=type)
+    except QueueFull:
+        upload.close()
+        raise
+    inflight[(content_hash, type)] = job.id
+    jobs.publish(job, "uploaded", **uploaded)
+    return job
+
+
+def client_key(request: Request) -> str:
+    """Who is uploading, for per-client fairness: X-Client-Id if sent, else the peer address."""
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "")
+
+
+async def receive_extraction(request: Request) -> Job:
+    """Stream the request's upload into its buffer and submit it (form: file, type, force).
+
+    When the queue is full the upload is refused (429) without being spooled.
+    """
+    client = client_key(request)
+    try:
+        jobs.admit(client)
+    except QueueFull as e:
+        # Not spooled or hashed, only drained so the connection stays usable
+        e.close_connection = not await discard_body(request)
+        raise
+    start = time.perf_counter()
+    upload, form = await read_upload(request, spool_dir=SERVER_UPLOAD_DIR)
+    force = form.get("force", "").lower() in ("1", "true", "yes", "on")
+    return await submit_extraction(upload, form.get("type", "policy"), force, time.perf_counter() - start, client)
+
+
+@app.get("/api/health")
+async def health():
+    """Liveness: answers as soon as the server has started, before any warm-up."""
+    return {
+        "status": "ok",
+        "warm": warmup_task is not None and warmup_task.done() and warmup_task.exception() is None,
+        "jobs": jobs.counts(),
+    }
+
+
+@app.get("/api/metrics")
+async def metrics(format: str = Query("json", pattern="^(json|prometheus)$")):
+    """Admission and job metrics: queue depth, rejections, queue/stage wait and run times.
+
+    `format=prometheus` returns the numbers as gauges in the Prometheus text format.
+    """
+    values = jobs.metrics()
+    if format == "json":
+        return values
+    return PlainTextResponse(prometheus_text(values), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/api/warmup")
+async def warmup():
+    """Load the extraction stack and open a storage cursor now; seconds per step.
+
+    For autoscaled deployments: call before routing traffic so the first
+    extraction does not pay for the imports. Concurrent calls share one run.
+    """
+    global warmup_task
+    if warmup_task is None or (warmup_task.done() and warmup_task.exception() is not None):
+        warmup_task = asyncio.create_task(warm_up())
+    return {"status": "warm", "seconds": await asyncio.shield(warmup_task)}
+
+
+# Results are large (the document's full text): clients pick the parts they
+# need, and fetch raw_text on its own from /api/jobs/{id}/raw_text
+FIELDS_QUERY = Query(None, description="Comma-separated result fields to return (raw_text, data, highlights, ...)")
+
+
+def job_response(job: Job, fields: Optional[str] = None) -> dict:
+    response = job.summary()
+    response["status_url"] = f"/api/jobs/{job.id}"
+    if job.status == "done":
+        response["result"] = select_fields(job.result, fields)
+    return response
+
+
+@app.post("/api/jobs", status_code=202, openapi_extra=UPLOAD_FORM)
+async def create_job(request: Request, fields: Optional[str] = FIELDS_QUERY):
+    """Queue an extraction; returns the job id as soon as the upload is received.
+
+    Files already extracted come back as a finished job with the cached
+    result; `force` extracts them again.
+    """
+    job = await receive_extraction(request)
+    return await json_response(request, job_response(job, fields), status_code=202)
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(
+    request: Request,
+    job_id: str,
+    wait: float = Query(0, ge=0, le=60, description="Seconds to wait for the job to finish"),
+    fields: Optional[str] = FIELDS_QUERY,
+):
+    """Job status, with the extraction result once done."""
+    job = await jobs.wait(job_id, wait) if wait else jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return await json_response(request, job_response(job, fields))
+
+
+@app.get("/api/jobs/{job_id}/raw_text")
+async def job_raw_text(request: Request, job_id: str):
+    """The job's converted text as markdown, once converted (before the job is done).
+
+    Supports a single byte `Range` (206 with Content-Range) to fetch a large
+    document in parts; whole responses are compressed as the client accepts.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    if job.result is not None:
+        raw_text = job.result["raw_text"]
+    else:
+        converted = next((e for e in job.events if e["stage"] == "converted"), None)
+        if converted is None:
+            raise HTTPException(status_code=409, detail=f"Not converted yet (stage: {job.stage})")
+        raw_text = converted["raw_text"]
+    return await text_response(request, raw_text)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Stream a job's progress as server-sent events.
+
+    One event per stage (uploaded, converted, extracted, highlights, stored),
+    each with the seconds since upload and the stage's partial result, then
+    done or failed. Events already published are replayed first.
+    """
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return StreamingResponse(
+        jobs.stream(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/extract", openapi_extra=UPLOAD_FORM)
+async def extract(request: Request, fields: Optional[str] = FIELDS_QUERY):
+    """Extract and return the result in one request (runs as a job).
+
+    `type` defaults to policy for backward compatibility.
+    """
+    job = await receive_extraction(request)
+    job = await jobs.wait(job.id)
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    return await json_response(request, select_fields(job.result, fields))
 
 @app.get("/api/search")
 async def search(
+    request: Request,
     q: str = Query(..., description="Search query"),
-    filter: Optional[str] = Query(None, description="JSON string of filters")
+    filter: Optional[str] = Query(None, description="JSON string of filters"),
+    limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
 ):
-    """Search the Star Schema Knowledge Base."""
+    """Search the Star Schema Knowledge Base, a page at a time.
+
+    Returns {"results": [...], "next_cursor": ...}; pass next_cursor back for
+    the following page (null on the last one). Responses are serialized by
+    DuckDB and cached until the next write to the knowledge base.
+    """
     try:
         filters_dict = json.loads(filter) if filter else None
-        
-        # Placeholder for embedding generation
-        # In a real app, we would call an embedding model here
-        mock_vector = [0.1] * 768 
-        
-        results = await storage.retrieve_context(
-            query_vector=mock_vector,
-            filters=filters_dict,
-            limit=20
-        )
-        
-        return {"results": results}
-        
-    except Exception as e:
-        print(f"Search Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filter JSON: {e}")
+    if filters_dict is not None and not isinstance(filters_dict, dict):
+        raise HTTPException(status_code=400, detail="filter must be a JSON object")
+
+    # Placeholder for embedding generation: results are not ranked by q yet
+    # (see retrieve_context), but q is part of the cache key for when they are
+    pool = get_storage()
+    key = search_cache.key(q, filters_dict, limit, cursor, pool.generation)
+    body = search_cache.get(key)
+    if body is None:
+        try:
+            rows, next_cursor = await pool.search_page(filters=filters_dict, limit=limit, after=cursor)
+        except Exception as e:
+            print(f"Search Error: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        body = f'{{"results":[{",".join(rows)}],"next_cursor":{json.dumps(next_cursor)}}}'.encode()
+        search_cache.put(key, body)
+    return await encoded_response(request, body)
@@ -0,0 +1,180 @@
+"""Response encoding for the API server: orjson, compression, fields and ranges.
+
+Endpoints returning a dict had it walked by jsonable_encoder and encoded
+with json.dumps, both in pure Python, and sent as is. For an extraction
+result (the document's full raw_text, the data and its highlights) that is
+megabytes built and sent uncompressed on every poll.
+
+- json_response() encodes with orjson (json when orjson is not installed,
+  `pip install orjson`) and compresses the body with brotli or gzip,
+  whichever the client accepts (brotli preferred, when installed), from
+  SERVER_COMPRESS_MIN_BYTES up; large bodies are compressed in a thread
+- select_fields() keeps the requested top-level keys of a result
+  (`?fields=data,highlights`), so a client can leave out raw_text
+- text_response() serves text such as raw_text on its own, honouring a
+  single byte `Range` (206), so a viewer can fetch a large document in parts
+"""
+
+import asyncio
+import gzip
+import json
+from typing import Any
+
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from structure_it.config import SERVER_COMPRESS_MIN_BYTES
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+try:
+    import brotli
+except ModuleNotFoundError:
+    brotli = None
+
+# Fast settings: a multi-megabyte result compresses in tens of milliseconds
+# to within a few percent of the highest levels
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
+# Bodies at least this large are compressed in a thread, off the event loop
+THREAD_COMPRESS_BYTES = 256 * 1024
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact UTF-8 JSON; types JSON lacks (datetimes, models) as FastAPI encodes them."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=jsonable_encoder, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """Best content coding we support from an Accept-Encoding header, or None.
+
+    Prefers br (when brotli is installed) over gzip at equal quality;
+    `*` matches either, `q=0` refuses.
+    """
+    if not accept_encoding:
+        return None
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[name.strip().lower()] = q
+
+    supported = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = qualities.get(encoding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+async def encoded_response(
+    request: Request,
+    body: bytes,
+    media_type: str = "application/json",
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """A response with body compressed as the client accepts (if large enough).
+
+    Args:
+        request: The request, for its Accept-Encoding.
+        body: The encoded body.
+        media_type: Content-Type.
+        status_code: Status.
+        headers: Extra headers.
+    """
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    encoding = None
+    if len(body) >= SERVER_COMPRESS_MIN_BYTES:
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding is not None:
+        if len(body) >= THREAD_COMPRESS_BYTES:
+            body = await asyncio.to_thread(compress, body, encoding)
+        else:
+            body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, headers=headers, media_type=media_type)
+
+
+async def json_response(request: Request, payload: Any, status_code: int = 200) -> Response:
+    """payload as (compressed) JSON, bypassing FastAPI's jsonable_encoder."""
+    return await encoded_response(request, dumps(payload), status_code=status_code)
+
+
+def select_fields(result: dict[str, Any], fields: str | None) -> dict[str, Any]:
+    """The top-level keys of result listed in fields (comma-separated); all if None.
+
+    Raises:
+        HTTPException: 400 for a field the result does not have.
+    """
+    if not fields:
+        return result
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in result]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}. Available: {list(result)}")
+    return {name: result[name] for name in names}
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """(first, last) byte of a single `bytes=` Range over size bytes.
+
+    None (send everything) without a header, for other units, several
+    ranges or a malformed one, as RFC 9110 allows.
+
+    Raises:
+        HTTPException: 416 if the range starts past the end.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = header[len("bytes="):].strip().partition("-")
+    if not sep or not first + last or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if not first:
+        # Suffix: the last N bytes (none of them for N = 0)
+        suffix = int(last)
+        start, end = (max(size - suffix, 0) if suffix else size), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    if start >= size:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+async def text_response(request: Request, text: str, media_type: str = "text/markdown; charset=utf-8") -> Response:
+    """text, whole (compressed as accepted) or the requested byte range (206, identity).
+
+    Ranges are over the UTF-8 bytes; a client joining parts decodes the
+    concatenated bytes.
+    """
+    body = text.encode()
+    headers = {"Accept-Ranges": "bytes"}
+    byte_range = parse_range(request.headers.get("range"), len(body))
+    if byte_range is None:
+        return await encoded_response(request, body, media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+    return Response(content=body[start:end + 1], status_code=206, headers=headers, media_type=media_type)
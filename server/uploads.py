@@ -0,0 +1,290 @@
+"""Streaming multipart uploads for the API server.
+
+With an `UploadFile` parameter, Starlette receives the whole request body
+into a spooled file in the system temp dir (in memory up to 1 MB) before
+the endpoint runs; the server then copied it into SERVER_UPLOAD_DIR to
+hand the converter a path. Every upload was written twice, and one that
+was too large was only noticed after it had been received in full.
+
+read_upload() parses the multipart body as it arrives (python-multipart,
+as Starlette does) into one SpooledUpload per request:
+
+- kept in memory up to SERVER_UPLOAD_SPOOL_BYTES, then rolled over to an
+  anonymous file in SERVER_UPLOAD_DIR (point it at a tmpfs such as
+  /dev/shm to keep large uploads off disk)
+- hashed (SHA256) and written in 1 MB blocks in a worker thread, so one
+  upload's hashing and disk I/O overlap with parsing the others
+- rejected with 413 as soon as it exceeds SERVER_MAX_UPLOAD_BYTES, or
+  before reading when Content-Length already says so
+
+The converter reads the buffer directly; it is gone once closed.
+"""
+
+import asyncio
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import IO, TYPE_CHECKING
+
+import python_multipart as multipart
+from fastapi import HTTPException, Request
+from python_multipart.multipart import parse_options_header
+
+from structure_it.config import (
+    SERVER_MAX_UPLOAD_BYTES,
+    SERVER_UPLOAD_DIR,
+    SERVER_UPLOAD_SPOOL_BYTES,
+)
+
+if TYPE_CHECKING:
+    from python_multipart.multipart import MultipartCallbacks
+
+# Form fields other than the file (type, force) are small
+MAX_FIELD_BYTES = 64 * 1024
+
+# File data is hashed and written in blocks of this size, in a thread, so
+# hashing and disk writes overlap with parsing other requests on the event loop
+WRITE_BLOCK_BYTES = 1024 * 1024
+
+# Boundaries, part headers and fields on top of the file, for the Content-Length check
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# A refused upload's body is read and dropped up to this size, so the
+# connection can be reused; beyond it the connection is closed instead
+DISCARD_MAX_BYTES = 1024 * 1024
+
+
+class SpooledUpload:
+    """One uploaded file: spooled bytes, hashed and size-checked as they arrive."""
+
+    def __init__(
+        self,
+        filename: str,
+        content_type: str | None = None,
+        max_bytes: int = SERVER_MAX_UPLOAD_BYTES,
+        spool_bytes: int = SERVER_UPLOAD_SPOOL_BYTES,
+        spool_dir: str | Path = SERVER_UPLOAD_DIR,
+    ):
+        """Create the (empty) buffer.
+
+        Args:
+            filename: Client's filename; only its suffix is used, to pick the converter.
+            content_type: Part's Content-Type, if sent.
+            max_bytes: Largest accepted upload (0 for no limit).
+            spool_bytes: Kept in memory up to this size.
+            spool_dir: Directory for the rolled-over file.
+        """
+        self.filename = filename
+        self.suffix = Path(filename).suffix.lower()
+        self.content_type = content_type
+        self.max_bytes = max_bytes
+        self.spool_bytes = spool_bytes
+        self.size = 0
+        self._stored = 0
+        self._digest = hashlib.sha256()
+        self._block: list[bytes] = []
+        self._block_bytes = 0
+        Path(spool_dir).mkdir(parents=True, exist_ok=True)
+        self.file = tempfile.SpooledTemporaryFile(max_size=spool_bytes, dir=str(spool_dir))
+
+    @property
+    def in_memory(self) -> bool:
+        """Still in memory: SpooledTemporaryFile rolls over once it holds more than spool_bytes."""
+        return not self.spool_bytes or self._stored <= self.spool_bytes
+
+    @property
+    def content_hash(self) -> str:
+        """SHA256 of the bytes written (call after flush())."""
+        return self._digest.hexdigest()
+
+    async def write(self, data: bytes) -> None:
+        """Append a chunk; full blocks are hashed and stored in a thread.
+
+        Raises:
+            HTTPException: 413 if the upload is now larger than max_bytes.
+        """
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds {self.max_bytes} bytes")
+        self._block.append(data)
+        self._block_bytes += len(data)
+        if self._block_bytes >= WRITE_BLOCK_BYTES:
+            await asyncio.to_thread(self._store, self._take_block())
+
+    async def flush(self) -> None:
+        """Store the last partial block (small: inline)."""
+        if self._block:
+            self._store(self._take_block())
+
+    def _take_block(self) -> bytes:
+        block = b"".join(self._block)
+        self._block, self._block_bytes = [], 0
+        return block
+
+    def _store(self, block: bytes) -> None:
+        # hashlib and file writes release the GIL on large buffers
+        self._digest.update(block)
+        self.file.write(block)
+        self._stored += len(block)
+
+    def open(self) -> IO[bytes]:
+        """The uploaded bytes, from the start."""
+        self.file.seek(0)
+        return self.file
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class _FormReader:
+    """python-multipart callbacks: fields into a dict, the file part into a SpooledUpload."""
+
+    def __init__(self, file_field: str, upload_options: dict):
+        self.file_field = file_field
+        self.upload_options = upload_options
+        self.fields: dict[str, str] = {}
+        self.upload: SpooledUpload | None = None
+        # File data waiting to be written (the callbacks cannot await)
+        self.pending: list[bytes] = []
+        self._headers: dict[bytes, bytes] = {}
+        self._header_name = b""
+        self._header_value = b""
+        self._name = ""
+        self._is_file = False
+        self._value = bytearray()
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._value = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        self._is_file = self._name == self.file_field and b"filename" in options
+        if self._is_file:
+            if self.upload is not None:
+                raise HTTPException(status_code=400, detail="Only one file per upload")
+            content_type = self._headers.get(b"content-type")
+            self.upload = SpooledUpload(
+                filename=options[b"filename"].decode("utf-8", errors="replace"),
+                content_type=content_type.decode("latin-1") if content_type else None,
+                **self.upload_options,
+            )
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._is_file:
+            self.pending.append(data[start:end])
+        else:
+            self._value += data[start:end]
+            if len(self._value) > MAX_FIELD_BYTES:
+                raise HTTPException(status_code=400, detail=f"Form field {self._name!r} is too large")
+
+    def on_part_end(self) -> None:
+        if not self._is_file:
+            self.fields[self._name] = self._value.decode("utf-8", errors="replace")
+
+    def callbacks(self) -> "MultipartCallbacks":
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+
+async def read_upload(
+    request: Request,
+    file_field: str = "file",
+    max_bytes: int | None = None,
+    spool_bytes: int | None = None,
+    spool_dir: str | Path | None = None,
+) -> tuple[SpooledUpload, dict[str, str]]:
+    """Stream a multipart/form-data request's file into a SpooledUpload.
+
+    The endpoint must not declare File/Form parameters, so the body is
+    still unread.
+
+    Args:
+        request: The incoming request.
+        file_field: Form field holding the file.
+        max_bytes: Largest accepted file (default SERVER_MAX_UPLOAD_BYTES).
+        spool_bytes: Kept in memory up to this size (default SERVER_UPLOAD_SPOOL_BYTES).
+        spool_dir: Where larger files roll over to (default SERVER_UPLOAD_DIR).
+
+    Returns:
+        (upload, the other form fields). The caller closes the upload.
+
+    Raises:
+        HTTPException: 413 if the file is too large, 400 if the body is not
+            valid multipart form data, 422 if the file field is missing.
+    """
+    max_bytes = SERVER_MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    length = request.headers.get("content-length", "")
+    if max_bytes and length.isdigit() and int(length) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    reader = _FormReader(
+        file_field,
+        {
+            "max_bytes": max_bytes,
+            "spool_bytes": SERVER_UPLOAD_SPOOL_BYTES if spool_bytes is None else spool_bytes,
+            "spool_dir": SERVER_UPLOAD_DIR if spool_dir is None else spool_dir,
+        },
+    )
+    parser = multipart.MultipartParser(params[b"boundary"], reader.callbacks())
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            # File data is only collected once the file part has begun
+            if reader.upload is not None:
+                for data in reader.pending:
+                    await reader.upload.write(data)
+                reader.pending.clear()
+        parser.finalize()
+        if reader.upload is not None:
+            await reader.upload.flush()
+    except BaseException as e:
+        if reader.upload is not None:
+            reader.upload.close()
+        if isinstance(e, multipart.exceptions.FormParserError):
+            raise HTTPException(status_code=400, detail="Invalid multipart data") from e
+        raise
+
+    if reader.upload is None:
+        raise HTTPException(status_code=422, detail=f"Missing file field {file_field!r}")
+    return reader.upload, reader.fields
+
+
+async def discard_body(request: Request, max_bytes: int = DISCARD_MAX_BYTES) -> bool:
+    """Read and drop a request body that will not be processed.
+
+    Returns:
+        Whether the whole body was read; if not, the response should close
+        the connection (`Connection: close`).
+    """
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > max_bytes:
+        return False
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            return False
+    return True
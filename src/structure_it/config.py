@@ -4,7 +4,9 @@ Centralized configuration for model defaults and other settings.
 Uses environment variables with sensible defaults.
 """
 
+import json
 import os
+
 from dotenv import load_dotenv
 
 # Load environment variables from .env file if present
@@ -37,6 +39,33 @@ DEFAULT_JSON_PATH = os.getenv("STRUCTURE_IT_JSON_PATH", "./data/entities")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 """Google API key for Gemini access (required)."""
 
+EXTRACTOR_MAX_CONNECTIONS = int(os.getenv("STRUCTURE_IT_EXTRACTOR_MAX_CONNECTIONS", "10"))
+"""Size of the keep-alive connection pool shared by extractors in one run."""
+
+# =============================================================================
+# ETL Configuration
+# =============================================================================
+
+ETL_CONCURRENCY = int(os.getenv("STRUCTURE_IT_ETL_CONCURRENCY", "1"))
+"""Number of items transformed in parallel (used for wall-clock projections)."""
+
+MODEL_PRICING = {
+    # USD per 1M tokens: (input, output)
+    "gemini-3-flash-preview": (0.50, 3.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-pro": (1.25, 10.00),
+    **{
+        model: tuple(prices)
+        for model, prices in json.loads(os.getenv("STRUCTURE_IT_MODEL_PRICING", "{}")).items()
+    },
+}
+"""Per-model token pricing used by the dry-run estimator.
+
+Override or extend with STRUCTURE_IT_MODEL_PRICING, a JSON object of
+model -> [input_usd_per_1m, output_usd_per_1m].
+"""
+
 # =============================================================================
 # Scraper Configuration
 # =============================================================================
@@ -63,6 +92,73 @@ SCRAPER_CONSERVATIVE_DELAY = float(os.getenv("STRUCTURE_IT_SCRAPER_DELAY_CONSERV
 SCRAPER_MODERATE_CONCURRENT = int(os.getenv("STRUCTURE_IT_SCRAPER_CONCURRENT_MODERATE", "4"))
 SCRAPER_MODERATE_DELAY = float(os.getenv("STRUCTURE_IT_SCRAPER_DELAY_MODERATE", "2.0"))
 
+# Adaptive per-host politeness (FleetThrottleMiddleware): one controller per host
+# shared by every spider in the process. The profile delay is the starting point;
+# the delay then moves between the profile's minimum and AUTOTHROTTLE_MAX and
+# connections between 1 and the profile's concurrency, based on latency and errors.
+SCRAPER_ADAPTIVE_POLITENESS = os.getenv("STRUCTURE_IT_ADAPTIVE_POLITENESS", "true").lower() == "true"
+SCRAPER_CONSERVATIVE_DELAY_MIN = float(os.getenv("STRUCTURE_IT_SCRAPER_DELAY_MIN_CONSERVATIVE", "5.0"))
+SCRAPER_MODERATE_DELAY_MIN = float(os.getenv("STRUCTURE_IT_SCRAPER_DELAY_MIN_MODERATE", "0.5"))
+
+# Conditional GET: revalidate previously downloaded documents with ETag/Last-Modified
+SCRAPER_CONDITIONAL_GET = os.getenv("STRUCTURE_IT_CONDITIONAL_GET", "true").lower() == "true"
+SCRAPER_STATE_DB = os.getenv("STRUCTURE_IT_CRAWL_STATE_DB", "./data/crawl_state.sqlite")
+"""SQLite file holding persistent crawl state (HTTP validators, frontier) across runs."""
+
+# Crawl frontier: skip documents fetched recently enough for their revisit policy
+SCRAPER_FRONTIER = os.getenv("STRUCTURE_IT_CRAWL_FRONTIER", "true").lower() == "true"
+
+# Document downloads are streamed to disk; anything larger than this is skipped
+SCRAPER_MAX_DOCUMENT_BYTES = int(os.getenv("STRUCTURE_IT_MAX_DOCUMENT_BYTES", str(250 * 1024 * 1024)))
+SCRAPER_DOWNLOAD_DIR = os.getenv("STRUCTURE_IT_DOWNLOAD_DIR", "temp_downloads")
+
+# Fleet crawls (scrapers.fleet): site registry, sites crawled at once, default connections per host
+SCRAPER_SITE_REGISTRY = os.getenv("STRUCTURE_IT_SITE_REGISTRY", "./data/sites.json")
+SCRAPER_FLEET_MAX_SITES = int(os.getenv("STRUCTURE_IT_FLEET_MAX_SITES", "32"))
+SCRAPER_FLEET_HOST_CONCURRENCY = int(os.getenv("STRUCTURE_IT_FLEET_HOST_CONCURRENCY", "1"))
+
+# HTML pages (bid details, service listings) skip MarkItDown: main-content
+# extraction with this converter (utils.convert.HTML_CONVERTERS: lxml,
+# markdownify, trafilatura, markitdown)
+HTML_CONVERTER = os.getenv("STRUCTURE_IT_HTML_CONVERTER", "lxml")
+
+# StructureItPipeline queues items here; workers (in the crawl process and/or
+# `python -m structure_it.scrapers.civic_plus.pipelines`) convert, extract and store them
+PIPELINE_QUEUE_DB = os.getenv("STRUCTURE_IT_PIPELINE_QUEUE_DB", "./data/pipeline_queue.sqlite")
+PIPELINE_WORKERS = int(os.getenv("STRUCTURE_IT_PIPELINE_WORKERS", "4"))
+
+# API server (server/main.py): extraction jobs run on this many background
+# workers; finished jobs are kept (in memory) for polling up to SERVER_JOB_HISTORY
+SERVER_JOB_WORKERS = int(os.getenv("STRUCTURE_IT_SERVER_JOB_WORKERS", "16"))
+SERVER_JOB_HISTORY = int(os.getenv("STRUCTURE_IT_SERVER_JOB_HISTORY", "200"))
+# Admission (server/jobs.py): jobs waiting for a worker, overall and per client,
+# before uploads are refused with 429; within running jobs, concurrent
+# conversions/highlight passes (CPU) and Gemini calls
+SERVER_MAX_QUEUED_JOBS = int(os.getenv("STRUCTURE_IT_SERVER_MAX_QUEUED_JOBS", "64"))
+SERVER_MAX_QUEUED_PER_CLIENT = int(os.getenv("STRUCTURE_IT_SERVER_MAX_QUEUED_PER_CLIENT", "8"))
+SERVER_CPU_CONCURRENCY = int(os.getenv("STRUCTURE_IT_SERVER_CPU_CONCURRENCY", str(os.cpu_count() or 1)))
+SERVER_LLM_CONCURRENCY = int(os.getenv("STRUCTURE_IT_SERVER_LLM_CONCURRENCY", "8"))
+# Uploads are streamed into a per-request buffer: in memory up to
+# SERVER_UPLOAD_SPOOL_BYTES, then an anonymous file in SERVER_UPLOAD_DIR (a
+# tmpfs such as /dev/shm keeps them off disk); larger than SERVER_MAX_UPLOAD_BYTES is refused
+SERVER_UPLOAD_DIR = os.getenv("STRUCTURE_IT_SERVER_UPLOAD_DIR", "./data/uploads")
+SERVER_UPLOAD_SPOOL_BYTES = int(os.getenv("STRUCTURE_IT_SERVER_UPLOAD_SPOOL_BYTES", str(8 * 1024 * 1024)))
+SERVER_MAX_UPLOAD_BYTES = int(os.getenv("STRUCTURE_IT_SERVER_MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+# Conversions and extraction results of uploads, by content hash
+SERVER_CACHE_DB = os.getenv("STRUCTURE_IT_SERVER_CACHE_DB", "./data/server_cache.sqlite")
+# Recent /api/search responses kept in memory (LRU)
+SERVER_SEARCH_CACHE_ENTRIES = int(os.getenv("STRUCTURE_IT_SERVER_SEARCH_CACHE_ENTRIES", "512"))
+# JSON and text responses from this size up are compressed (brotli or gzip, as the client accepts)
+SERVER_COMPRESS_MIN_BYTES = int(os.getenv("STRUCTURE_IT_SERVER_COMPRESS_MIN_BYTES", "1024"))
+# Star schema access (storage.pool.StoragePool): one writer thread, this many
+# reader threads with their own cursors, and DuckDB's threads per query (0: DuckDB's default)
+SERVER_DB_READERS = int(os.getenv("STRUCTURE_IT_SERVER_DB_READERS", "4"))
+SERVER_DB_THREADS = int(os.getenv("STRUCTURE_IT_SERVER_DB_THREADS", "0"))
+# Startup: storage opens in the lifespan hook and google.genai/MarkItDown load
+# on first use; with SERVER_WARMUP they are loaded in the background right after
+# startup instead (or on demand: POST /api/warmup)
+SERVER_WARMUP = os.getenv("STRUCTURE_IT_SERVER_WARMUP", "false").lower() == "true"
+
 
 def get_scraper_settings(profile: str = "moderate") -> dict:
     """Get Scrapy settings dict for a scraper profile.
@@ -77,20 +173,49 @@ def get_scraper_settings(profile: str = "moderate") -> dict:
     if profile == "conservative":
         concurrent = SCRAPER_CONSERVATIVE_CONCURRENT
         delay = SCRAPER_CONSERVATIVE_DELAY
+        min_delay = SCRAPER_CONSERVATIVE_DELAY_MIN
         target_concurrency = 1.0
     else:  # moderate
         concurrent = SCRAPER_MODERATE_CONCURRENT
         delay = SCRAPER_MODERATE_DELAY
+        min_delay = SCRAPER_MODERATE_DELAY_MIN
         target_concurrency = float(concurrent)
 
     return {
         "CONCURRENT_REQUESTS": concurrent,
-        "DOWNLOAD_DELAY": delay,
+        # With adaptive politeness the per-host controller spaces requests;
+        # Scrapy's per-crawler delay and AutoThrottle would only add to it
+        "DOWNLOAD_DELAY": 0 if SCRAPER_ADAPTIVE_POLITENESS else delay,
         "RANDOMIZE_DOWNLOAD_DELAY": SCRAPER_RANDOMIZE_DELAY,
-        "AUTOTHROTTLE_ENABLED": SCRAPER_AUTOTHROTTLE_ENABLED,
+        "AUTOTHROTTLE_ENABLED": SCRAPER_AUTOTHROTTLE_ENABLED and not SCRAPER_ADAPTIVE_POLITENESS,
         "AUTOTHROTTLE_START_DELAY": SCRAPER_AUTOTHROTTLE_START,
         "AUTOTHROTTLE_MAX_DELAY": SCRAPER_AUTOTHROTTLE_MAX,
         "AUTOTHROTTLE_TARGET_CONCURRENCY": target_concurrency,
         "USER_AGENT": SCRAPER_USER_AGENT,
+        # Full-body HTTP cache stays off; documents are revalidated instead
         "HTTPCACHE_ENABLED": False,
+        "DOWNLOADER_MIDDLEWARES": {
+            # After redirects/decompression (600/590) see the final response
+            "structure_it.scrapers.civic_plus.middlewares.ConditionalGetMiddleware": 580,
+            # Last before the download handler: holds requests until the host is free
+            "structure_it.scrapers.civic_plus.middlewares.FleetThrottleMiddleware": 950,
+        },
+        "CONDITIONAL_GET_ENABLED": SCRAPER_CONDITIONAL_GET,
+        "CRAWL_STATE_DB": SCRAPER_STATE_DB,
+        "CRAWL_FRONTIER_ENABLED": SCRAPER_FRONTIER,
+        # Per-host politeness shared by all crawlers in the process (always on
+        # in the fleet orchestrator, which may set a fixed per-site delay)
+        "FLEET_THROTTLE_ENABLED": SCRAPER_ADAPTIVE_POLITENESS,
+        "FLEET_THROTTLE_ADAPTIVE": SCRAPER_ADAPTIVE_POLITENESS,
+        "FLEET_HOST_DELAY": delay,
+        "FLEET_HOST_DELAY_MIN": min_delay,
+        "FLEET_HOST_DELAY_MAX": SCRAPER_AUTOTHROTTLE_MAX,
+        "FLEET_HOST_CONCURRENCY": concurrent,
+        # Stream document bodies to disk instead of buffering them in memory
+        "DOWNLOAD_HANDLERS": {
+            "http": "structure_it.scrapers.civic_plus.handlers.StreamingDownloadHandler",
+            "https": "structure_it.scrapers.civic_plus.handlers.StreamingDownloadHandler",
+        },
+        "DOWNLOAD_MAXSIZE": SCRAPER_MAX_DOCUMENT_BYTES,
+        "STREAM_DOWNLOAD_DIR": SCRAPER_DOWNLOAD_DIR,
     }
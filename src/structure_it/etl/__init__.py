@@ -8,4 +8,8 @@ Three-layer architecture:
 Scripts:
 - transform.py: Raw -> Staged (markdown conversion + Gemini extraction)
 - load.py: Staged -> DuckDB (insert/update/merge)
+- manifest.py: Raw-layer manifest used to plan incremental transforms
+- blobs.py: Content-addressed store the raw originals are hard-linked from
+- scheduler.py: Priority classes and fair ordering of pending transform work
+- estimate.py: Offline cost/latency projection for a transform run (--dry-run)
 """
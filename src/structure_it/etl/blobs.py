@@ -0,0 +1,145 @@
+"""Content-addressed blob store for raw original files (Bronze layer).
+
+Original files are stored once per content hash under data/raw/.blobs/ and
+hard-linked into each raw item folder:
+
+    data/raw/.blobs/ab/ab12...ef.pdf               # one copy per distinct content
+    data/raw/{source_type}/{entity_id}/original.pdf  # hard link to the blob
+
+Handing a downloaded file over is a rename into the store (same filesystem)
+plus a hard link, so no bytes are copied; identical files linked from
+several agendas share one inode. The temp file is consumed by the handoff,
+so nothing is left behind in temp_downloads.
+
+Raw originals are treated as immutable: rewriting one in place would change
+every item sharing the blob. Replace files instead (which is what ingest +
+link do). Blobs no longer linked from any item have a link count of 1 and
+are removed by `prune()`.
+
+Falls back to copying when the temp dir is on another filesystem or the
+filesystem has no hard links.
+"""
+
+import errno
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from structure_it.utils.hashing import generate_file_hash
+
+
+class BlobStore:
+    """Content-addressed store of original files, hard-linked into raw items."""
+
+    def __init__(self, raw_dir: str | Path = "./data/raw", dir_name: str = ".blobs"):
+        """Open (or create) the store.
+
+        Args:
+            raw_dir: Root of the raw layer (e.g. ./data/raw).
+            dir_name: Store folder inside raw_dir. Dot-prefixed so the raw
+                tree walkers ignore it.
+        """
+        self.root = Path(raw_dir) / dir_name
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.stats = {"ingested": 0, "deduplicated": 0, "copied": 0, "bytes_deduplicated": 0}
+
+    def path_for(self, content_hash: str, ext: str) -> Path:
+        """Blob location for a content hash."""
+        return self.root / content_hash[:2] / f"{content_hash}{ext}"
+
+    def ingest(self, temp_path: Path, content_hash: str | None = None) -> tuple[Path, str]:
+        """Move a downloaded file into the store.
+
+        The temp file is consumed: renamed into the store, or deleted when an
+        identical blob already exists.
+
+        Args:
+            temp_path: Downloaded file.
+            content_hash: SHA256 of the file, if already known (computed otherwise).
+
+        Returns:
+            (blob path, content hash).
+        """
+        content_hash = content_hash or generate_file_hash(temp_path)
+        blob_path = self.path_for(content_hash, temp_path.suffix)
+
+        if blob_path.exists():
+            self.stats["deduplicated"] += 1
+            self.stats["bytes_deduplicated"] += temp_path.stat().st_size
+            temp_path.unlink()
+            return blob_path, content_hash
+
+        blob_path.parent.mkdir(exist_ok=True)
+        try:
+            os.replace(temp_path, blob_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Temp dir on another filesystem: copy next to the blob, then rename
+            tmp = blob_path.with_name(f".{uuid.uuid4().hex}.tmp")
+            shutil.copy2(temp_path, tmp)
+            os.replace(tmp, blob_path)
+            temp_path.unlink()
+            self.stats["copied"] += 1
+        self.stats["ingested"] += 1
+        return blob_path, content_hash
+
+    def link(self, blob_path: Path, dest: Path) -> None:
+        """Atomically point dest at a blob (hard link, copy if unsupported)."""
+        try:
+            if dest.exists() and os.path.samefile(blob_path, dest):
+                return
+        except FileNotFoundError:
+            pass
+
+        tmp = dest.with_name(f".{uuid.uuid4().hex}.tmp")
+        try:
+            os.link(blob_path, tmp)
+        except OSError:
+            shutil.copy2(blob_path, tmp)
+            self.stats["copied"] += 1
+        os.replace(tmp, dest)
+
+    def prune(self, min_age_s: float = 3600) -> int:
+        """Delete blobs no raw item links to any more.
+
+        Args:
+            min_age_s: Skip blobs ingested or linked more recently than this,
+                so a concurrent crawl's ingest -> link window is not raced.
+
+        Returns:
+            Number of blobs removed.
+        """
+        cutoff = time.time() - min_age_s
+        removed = 0
+        for blob in self.root.glob("*/*"):
+            stat = blob.stat()
+            if blob.is_file() and stat.st_nlink == 1 and stat.st_ctime < cutoff:
+                blob.unlink()
+                removed += 1
+        return removed
+
+
+def sweep_temp_dir(temp_dir: str | Path, max_age_s: float = 24 * 3600) -> int:
+    """Delete downloads (and partial downloads) left behind in a temp dir.
+
+    Staged downloads are consumed by `BlobStore.ingest`; what remains belongs
+    to items that were dropped or failed, or to interrupted crawls. Only files
+    older than max_age_s are removed, so crawls running concurrently keep
+    their in-flight downloads.
+
+    Returns:
+        Number of files removed.
+    """
+    temp_dir = Path(temp_dir)
+    if not temp_dir.is_dir():
+        return 0
+    cutoff = time.time() - max_age_s
+    removed = 0
+    for path in temp_dir.iterdir():
+        if path.is_file() and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
@@ -0,0 +1,222 @@
+"""Dry-run cost and latency estimator for the transform stage.
+
+Plans the same work list as `etl.transform` (from an in-memory copy of the
+raw manifest, so the manifest itself is left untouched), converts the
+originals to markdown (all of them, or a random sample) and projects:
+
+- Tokens: prompt + markdown + response schema, counted offline with a
+  characters-per-token heuristic (no API call, no tokenizer download)
+- Cost: tokens x per-model pricing from `config.MODEL_PRICING`
+- Wall-clock: conversion time measured during the dry run plus the p50/p95
+  extraction latency observed in previous runs (the manifest's
+  `transform_log`), spread over `config.ETL_CONCURRENCY` workers
+
+Usage:
+    uv run python -m structure_it.etl.transform --dry-run
+    uv run python -m structure_it.etl.transform --dry-run --sample 50 --concurrency 8
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from structure_it.config import DEFAULT_MODEL, ETL_CONCURRENCY, MODEL_PRICING
+from structure_it.etl.manifest import RawManifest, find_original_file
+from structure_it.etl.transform import EXTRACTORS, build_prompt
+from structure_it.extractors.gemini import _gemini_schema_for
+from structure_it.schemas.civic import CivicMeeting
+from structure_it.utils.convert import DocumentConverter
+from structure_it.utils.stats import percentile
+
+CHARS_PER_TOKEN = 4
+"""Rough chars/token ratio for Gemini on English prose (offline heuristic)."""
+
+# Used until the transform_log has history for the requested source type
+DEFAULT_EXTRACT_SECONDS = (10.0, 30.0)  # (p50, p95)
+DEFAULT_OUTPUT_RATIO = 0.1  # Extracted JSON chars per markdown char
+
+
+class TransformEstimate(BaseModel):
+    """Projected cost and duration of a transform run."""
+
+    model: str
+    concurrency: int
+    items: int
+    sampled: int
+    failed: int
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float | None = None  # None when the model has no pricing entry
+    convert_seconds: float
+    extract_p50_seconds: float
+    extract_p95_seconds: float
+    history_samples: int
+    wall_clock_p50_seconds: float
+    wall_clock_p95_seconds: float
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count for text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+async def estimate_transform(
+    raw_base: Path,
+    staged_base: Path,
+    source_type: str | None = None,
+    entity_id: str | None = None,
+    force: bool = False,
+    rescan: bool = False,
+    sample: int | None = None,
+    model_name: str | None = None,
+    concurrency: int = ETL_CONCURRENCY,
+) -> TransformEstimate:
+    """Estimate what `transform_all` would cost without calling the LLM.
+
+    Args:
+        raw_base: Raw root (e.g. ./data/raw).
+        staged_base: Staged root (e.g. ./data/staged).
+        source_type: Filter by source type.
+        entity_id: Estimate one item (requires source_type).
+        force: Estimate a full re-transform instead of pending items only.
+        rescan: Reconcile (a copy of) the manifest with the raw tree before planning.
+        sample: Convert at most this many items and extrapolate.
+        model_name: Model to price (defaults to config.DEFAULT_MODEL).
+        concurrency: Parallel transforms assumed for the wall-clock projection.
+
+    Returns:
+        TransformEstimate with projected tokens, cost and duration.
+    """
+    model_name = model_name or DEFAULT_MODEL
+    concurrency = max(concurrency, 1)
+    # Plan from a copy: scanning records new and changed items, which a dry run must not
+    manifest = RawManifest(raw_base, in_memory=True)
+
+    try:
+        if (entity_id and source_type) or rescan or manifest.last_scan(source_type) is None:
+            manifest.scan(staged_base, source_type, entity_id)
+
+        work = (
+            manifest.entries(source_type, entity_id)
+            if force
+            else manifest.pending(source_type, entity_id)
+        )
+        history = manifest.transform_history(source_type)
+    finally:
+        manifest.close()
+
+    sampled = random.Random(0).sample(work, sample) if sample and len(work) > sample else work
+
+    converter = DocumentConverter()
+    input_tokens = 0
+    content_chars = 0
+    convert_seconds = 0.0
+    converted = 0
+    failed = 0
+
+    for entry in sampled:
+        raw_dir = raw_base / entry.source_type / entry.entity_id
+        original = find_original_file(raw_dir)
+        if original is None:
+            failed += 1
+            continue
+
+        source_path = raw_dir / "source.json"
+        source = json.loads(source_path.read_text()) if source_path.exists() else {}
+        schema, base_prompt = EXTRACTORS.get(entry.source_type, (CivicMeeting, "Extract data."))
+
+        start = time.perf_counter()
+        try:
+            content_md = await asyncio.to_thread(converter.convert, original, source.get("content_type"))
+        except Exception as e:
+            print(f"  [ERROR] {entry.entity_id}: markdown conversion failed: {e}")
+            failed += 1
+            continue
+        convert_seconds += time.perf_counter() - start
+
+        content_chars += len(content_md)
+        input_tokens += (
+            estimate_tokens(build_prompt(source, base_prompt))
+            + estimate_tokens(content_md)
+            + estimate_tokens(json.dumps(_gemini_schema_for(schema)))
+        )
+        converted += 1
+
+    # Observed extraction latency and output size from earlier runs
+    extract_times = [row["extract_s"] for row in history if row["extract_s"] is not None]
+    if extract_times:
+        extract_p50, extract_p95 = percentile(extract_times, 50), percentile(extract_times, 95)
+    else:
+        extract_p50, extract_p95 = DEFAULT_EXTRACT_SECONDS
+    ratios = [
+        row["output_chars"] / row["content_chars"]
+        for row in history
+        if row["content_chars"] and row["output_chars"] is not None
+    ]
+    output_ratio = percentile(ratios, 50) if ratios else DEFAULT_OUTPUT_RATIO
+
+    # Extrapolate the sample to the full work list
+    scale = len(work) / converted if converted else 0.0
+    input_tokens = round(input_tokens * scale)
+    output_tokens = round(content_chars * output_ratio / CHARS_PER_TOKEN * scale)
+    convert_per_item = convert_seconds / converted if converted else 0.0
+    rounds = math.ceil(len(work) / concurrency) if converted else 0
+
+    cost = None
+    if model_name in MODEL_PRICING:
+        input_price, output_price = MODEL_PRICING[model_name]
+        cost = round((input_tokens * input_price + output_tokens * output_price) / 1_000_000, 4)
+
+    return TransformEstimate(
+        model=model_name,
+        concurrency=concurrency,
+        items=len(work),
+        sampled=len(sampled),
+        failed=failed,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cost_usd=cost,
+        convert_seconds=round(convert_seconds, 3),
+        extract_p50_seconds=round(extract_p50, 3),
+        extract_p95_seconds=round(extract_p95, 3),
+        history_samples=len(extract_times),
+        wall_clock_p50_seconds=round(rounds * (convert_per_item + extract_p50), 1),
+        wall_clock_p95_seconds=round(rounds * (convert_per_item + extract_p95), 1),
+    )
+
+
+def _duration(seconds: float) -> str:
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{secs:02d}s" if hours else f"{minutes}m{secs:02d}s"
+
+
+def format_estimate(estimate: TransformEstimate) -> str:
+    """Human-readable summary of an estimate."""
+    cost = f"${estimate.cost_usd:,.2f}" if estimate.cost_usd is not None else "unknown (no pricing)"
+    latency_source = (
+        f"{estimate.history_samples} previous transforms"
+        if estimate.history_samples
+        else "defaults, no transform history yet"
+    )
+    return "\n".join(
+        [
+            f"Items to transform: {estimate.items} "
+            f"(converted {estimate.sampled - estimate.failed} of {estimate.sampled} sampled, "
+            f"{estimate.failed} failed)",
+            f"Model: {estimate.model}",
+            f"Input tokens: ~{estimate.input_tokens:,}",
+            f"Output tokens: ~{estimate.output_tokens:,}",
+            f"Projected cost: {cost}",
+            f"Extraction latency p50/p95: {estimate.extract_p50_seconds:.1f}s / "
+            f"{estimate.extract_p95_seconds:.1f}s ({latency_source})",
+            f"Projected wall-clock at concurrency {estimate.concurrency}: "
+            f"{_duration(estimate.wall_clock_p50_seconds)} (p50), "
+            f"{_duration(estimate.wall_clock_p95_seconds)} (p95)",
+        ]
+    )
@@ -12,6 +12,7 @@ Usage:
     uv run python -m structure_it.etl.load --source-type civic_meeting
     uv run python -m structure_it.etl.load --entity-id abc123
     uv run python -m structure_it.etl.load --force  # Reload even if unchanged
+    uv run python -m structure_it.etl.load --bulk   # Set-based load in one transaction
 """
 
 import argparse
@@ -117,6 +118,39 @@ async def load_all(
     return counts
 
 
+async def load_all_bulk(
+    staged_base: Path,
+    db_path: Path,
+    source_type: str | None = None,
+    entity_id: str | None = None,
+    force: bool = False,
+) -> dict[str, int]:
+    """Load staged items to DuckDB in a single set-based transaction.
+
+    Same CDC semantics as `load_all`, but DuckDB reads the staged files itself
+    and shreds lists in SQL instead of looping over records in Python.
+
+    Returns:
+        Dict of status counts: {'created': N, 'updated': N, 'unchanged': N, 'error': N}
+    """
+    if entity_id and source_type:
+        staged_glob = staged_base / source_type / f"{entity_id}.json"
+    elif source_type:
+        staged_glob = staged_base / source_type / "*.json"
+    else:
+        staged_glob = staged_base / "**" / "*.json"
+
+    print(f"Bulk loading {staged_glob}")
+
+    storage = StarSchemaStorage(db_path=db_path)
+    try:
+        counts = await asyncio.to_thread(storage.bulk_load_staged, str(staged_glob), force)
+    finally:
+        storage.close()
+
+    return counts
+
+
 def main():
     parser = argparse.ArgumentParser(description="Load staged data to DuckDB")
     parser.add_argument("--staged-dir", default="./data/staged", help="Staged data directory")
@@ -124,6 +158,9 @@ def main():
     parser.add_argument("--source-type", help="Filter by source type")
     parser.add_argument("--entity-id", help="Load specific entity")
     parser.add_argument("--force", action="store_true", help="Reload even if unchanged")
+    parser.add_argument(
+        "--bulk", action="store_true", help="Set-based load (one transaction, SQL shredding)"
+    )
 
     args = parser.parse_args()
 
@@ -134,8 +171,9 @@ def main():
     print(f"DB path: {args.db_path}")
     print()
 
+    loader = load_all_bulk if args.bulk else load_all
     counts = asyncio.run(
-        load_all(
+        loader(
             Path(args.staged_dir),
             Path(args.db_path),
             args.source_type,
@@ -0,0 +1,586 @@
+"""Raw-layer manifest for incremental change detection (Bronze layer).
+
+Records one row per raw item so a transform run can compute its to-do set
+with a single query instead of walking data/raw/ and opening every
+source.json:
+
+    entity_id | source_type | original size/mtime | content_hash | staged_hash
+
+- content_hash: SHA256 of the original file bytes as currently staged in raw/
+- staged_hash: the content_hash that was last transformed into staged/
+
+An item needs transforming when staged_hash is missing or differs from
+content_hash. Re-downloading identical bytes leaves content_hash alone, so
+only real changes to the original file trigger a new transform.
+
+Duplicates: CivicPlus often serves the same file under several URLs
+(agenda vs packet links, previous-version links), each with its own
+entity_id. An item whose bytes match another item of the same source type
+becomes an alias of it (canonical_id set) and is never transformed itself;
+`aliases()` lists the extra URLs for the canonical document. If the
+canonical's file later changes, its oldest alias takes over the old bytes.
+
+Pending items also carry the context the work scheduler (`etl.scheduler`)
+orders by: meeting_date, host (municipality), attempts (failed transforms
+since the last change) and queued_at (when the item became pending).
+
+The manifest lives in SQLite (data/raw/.manifest.sqlite) rather than DuckDB:
+the crawl process (RawStagingPipeline) and ETL processes open it at the same
+time, and DuckDB allows only one writer process per database file.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+from pydantic import BaseModel
+
+from structure_it.utils.hashing import generate_file_hash
+
+ORIGINAL_EXTENSIONS = (".pdf", ".html", ".htm")
+
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS raw_manifest (
+    entity_id TEXT PRIMARY KEY,
+    source_type TEXT NOT NULL,
+    original_file TEXT,          -- File name inside data/raw/{source_type}/{entity_id}/
+    original_size INTEGER,
+    original_mtime REAL,
+    content_hash TEXT,           -- SHA256 of the original file bytes
+    staged_hash TEXT,            -- content_hash last transformed into staged/
+    first_seen_at TEXT,
+    last_seen_at TEXT,           -- Last (re-)download of the source
+    changed_at TEXT,             -- Last time content_hash actually changed
+    meeting_date TEXT,           -- From source.json, used for scheduling
+    host TEXT,                   -- Source host (one municipality per host)
+    attempts INTEGER NOT NULL DEFAULT 0,  -- Failed transforms since last change
+    queued_at TEXT,              -- When the item last became pending
+    url TEXT,                    -- Source URL
+    canonical_id TEXT            -- Set when the bytes duplicate another item's
+);
+CREATE INDEX IF NOT EXISTS idx_raw_manifest_source_type ON raw_manifest(source_type);
+CREATE INDEX IF NOT EXISTS idx_raw_manifest_content ON raw_manifest(source_type, content_hash);
+CREATE INDEX IF NOT EXISTS idx_raw_manifest_canonical ON raw_manifest(canonical_id);
+
+-- One row per successful transform, used for dry-run latency projections
+CREATE TABLE IF NOT EXISTS transform_log (
+    entity_id TEXT NOT NULL,
+    source_type TEXT NOT NULL,
+    model TEXT,
+    content_chars INTEGER,       -- Markdown characters sent to the model
+    output_chars INTEGER,        -- JSON characters of the extracted result
+    convert_s REAL,              -- Original -> markdown conversion time
+    extract_s REAL,              -- LLM extraction round trip
+    transformed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transform_log_source_type ON transform_log(source_type);
+
+-- Manifest state, e.g. when the raw tree was last fully scanned
+CREATE TABLE IF NOT EXISTS manifest_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class ManifestEntry(BaseModel):
+    """A single raw item as recorded in the manifest."""
+
+    entity_id: str
+    source_type: str
+    original_file: str | None = None
+    original_size: int | None = None
+    original_mtime: float | None = None
+    content_hash: str | None = None
+    staged_hash: str | None = None
+    meeting_date: str | None = None
+    host: str | None = None
+    attempts: int = 0
+    queued_at: str | None = None
+    url: str | None = None
+    canonical_id: str | None = None
+
+
+def source_context(source: dict) -> tuple[str | None, str | None]:
+    """(meeting_date, host) scheduling context from source.json metadata."""
+    host = urlparse(source["url"]).hostname if source.get("url") else None
+    return source.get("meeting_date"), host
+
+
+def _scan_key(source_type: str | None) -> str:
+    return f"scanned_at:{source_type}" if source_type else "scanned_at"
+
+
+def find_original_file(item_dir: Path) -> Path | None:
+    """Return the original source file in a raw item folder, if any."""
+    for ext in ORIGINAL_EXTENSIONS:
+        candidate = item_dir / f"original{ext}"
+        if candidate.exists():
+            return candidate
+    return None
+
+
+class RawManifest:
+    """SQLite-backed manifest of the raw (Bronze) layer."""
+
+    def __init__(
+        self,
+        raw_dir: str | Path = "./data/raw",
+        db_name: str = ".manifest.sqlite",
+        in_memory: bool = False,
+    ):
+        """Open (or create) the manifest for a raw directory.
+
+        Args:
+            raw_dir: Root of the raw layer (e.g. ./data/raw).
+            db_name: Manifest file name inside raw_dir. Dot-prefixed so the
+                raw tree walkers ignore it.
+            in_memory: Work on an in-memory copy of the manifest (empty if
+                there is none yet). Scans and updates are discarded on close
+                and the file is never written, e.g. for dry runs.
+        """
+        self.raw_dir = Path(raw_dir)
+        self.db_path = self.raw_dir / db_name
+
+        if in_memory:
+            self.conn = sqlite3.connect(":memory:")
+            if self.db_path.exists():
+                source = sqlite3.connect(f"{self.db_path.as_uri()}?mode=ro", uri=True)
+                try:
+                    source.backup(self.conn)
+                finally:
+                    source.close()
+        else:
+            self.raw_dir.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(MANIFEST_SCHEMA)
+        self.conn.commit()
+
+    def _get(self, entity_id: str) -> sqlite3.Row | None:
+        row: sqlite3.Row | None = self.conn.execute(
+            "SELECT * FROM raw_manifest WHERE entity_id = ?", [entity_id]
+        ).fetchone()
+        return row
+
+    def record_original(
+        self,
+        entity_id: str,
+        source_type: str,
+        original_path: Path | None,
+        content_hash: str | None = None,
+        meeting_date: str | None = None,
+        host: str | None = None,
+        url: str | None = None,
+    ) -> str:
+        """Record a freshly staged raw item.
+
+        Args:
+            entity_id: Raw item ID.
+            source_type: Source type folder the item lives in.
+            original_path: Path to the staged original file (None if the item
+                has no original, e.g. inline HTML snippets).
+            content_hash: SHA256 of the original bytes, if already known.
+                Computed from original_path otherwise.
+            meeting_date: Meeting date (YYYY-MM-DD) for scheduling, if known.
+            host: Source host for scheduling fairness, if known.
+            url: Source URL, if known.
+
+        Returns:
+            'new', 'changed' or 'unchanged' (bytes identical to the last
+            download). Whether the bytes duplicate another item is tracked
+            separately (see canonical_of()).
+        """
+        now = datetime.now().isoformat()
+        size = mtime = None
+        if original_path is not None:
+            stat = original_path.stat()
+            size, mtime = stat.st_size, stat.st_mtime
+            content_hash = content_hash or generate_file_hash(original_path)
+        original_file = original_path.name if original_path is not None else None
+
+        existing = self._get(entity_id)
+
+        if existing is None:
+            status = "new"
+            self.conn.execute(
+                """
+                INSERT INTO raw_manifest
+                (entity_id, source_type, original_file, original_size, original_mtime,
+                 content_hash, staged_hash, first_seen_at, last_seen_at, changed_at,
+                 meeting_date, host, attempts, queued_at, url)
+                VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?, ?, ?, ?, 0, ?, ?)
+                """,
+                [
+                    entity_id,
+                    source_type,
+                    original_file,
+                    size,
+                    mtime,
+                    content_hash,
+                    now,
+                    now,
+                    now,
+                    meeting_date,
+                    host,
+                    now,
+                    url,
+                ],
+            )
+        else:
+            status = "unchanged" if existing["content_hash"] == content_hash else "changed"
+            self.conn.execute(
+                """
+                UPDATE raw_manifest SET
+                source_type = ?,
+                original_file = ?,
+                original_size = ?,
+                original_mtime = ?,
+                content_hash = ?,
+                last_seen_at = ?,
+                changed_at = CASE WHEN ? = 'changed' THEN ? ELSE changed_at END,
+                meeting_date = COALESCE(?, meeting_date),
+                host = COALESCE(?, host),
+                url = COALESCE(?, url),
+                attempts = CASE WHEN ? = 'changed' THEN 0 ELSE attempts END,
+                queued_at = CASE WHEN ? = 'changed' THEN ? ELSE queued_at END
+                WHERE entity_id = ?
+                """,
+                [
+                    source_type,
+                    original_file,
+                    size,
+                    mtime,
+                    content_hash,
+                    now,
+                    status,
+                    now,
+                    meeting_date,
+                    host,
+                    url,
+                    status,
+                    status,
+                    now,
+                    entity_id,
+                ],
+            )
+            if status == "changed" and existing["canonical_id"] is None:
+                self._promote_alias(entity_id, existing["content_hash"])
+
+        self._resolve_canonical(entity_id, source_type, content_hash)
+        self.conn.commit()
+        return status
+
+    def find_canonical(self, source_type: str, content_hash: str, entity_id: str) -> str | None:
+        """The earliest other canonical item of source_type with these bytes, if any.
+
+        Also used by StructureItPipeline to skip extracting duplicates.
+        """
+        row = self.conn.execute(
+            """
+            SELECT entity_id FROM raw_manifest
+            WHERE source_type = ? AND content_hash = ? AND canonical_id IS NULL AND entity_id <> ?
+            ORDER BY first_seen_at, entity_id LIMIT 1
+            """,
+            [source_type, content_hash, entity_id],
+        ).fetchone()
+        canonical: str | None = row["entity_id"] if row is not None else None
+        return canonical
+
+    def _resolve_canonical(self, entity_id: str, source_type: str, content_hash: str | None) -> None:
+        """Make the item an alias of an earlier item with the same bytes, or canonical."""
+        canonical = None
+        if content_hash is not None:
+            canonical = self.find_canonical(source_type, content_hash, entity_id)
+        current = self._get(entity_id)
+        previous = current["canonical_id"] if current is not None else None
+        if canonical == previous:
+            return
+        if canonical is None:
+            # No longer a duplicate: transform it as a document of its own
+            self.conn.execute(
+                "UPDATE raw_manifest SET canonical_id = NULL, staged_hash = NULL, attempts = 0, "
+                "queued_at = ? WHERE entity_id = ?",
+                [datetime.now().isoformat(), entity_id],
+            )
+        else:
+            self.conn.execute(
+                "UPDATE raw_manifest SET canonical_id = ? WHERE entity_id = ?", [canonical, entity_id]
+            )
+            # Aliases of this item follow it
+            self.conn.execute(
+                "UPDATE raw_manifest SET canonical_id = ? WHERE canonical_id = ?", [canonical, entity_id]
+            )
+
+    def _promote_alias(self, entity_id: str, old_hash: str | None) -> None:
+        """The canonical's bytes changed: its oldest alias still holding the old bytes takes over."""
+        aliases = self.conn.execute(
+            "SELECT entity_id, content_hash FROM raw_manifest WHERE canonical_id = ? "
+            "ORDER BY first_seen_at, entity_id",
+            [entity_id],
+        ).fetchall()
+        successor = next((a["entity_id"] for a in aliases if a["content_hash"] == old_hash), None)
+        if successor is None:
+            return
+        self.conn.execute(
+            "UPDATE raw_manifest SET canonical_id = NULL, staged_hash = NULL, attempts = 0, "
+            "queued_at = ? WHERE entity_id = ?",
+            [datetime.now().isoformat(), successor],
+        )
+        self.conn.execute(
+            "UPDATE raw_manifest SET canonical_id = ? WHERE canonical_id = ? AND content_hash = ?",
+            [successor, entity_id, old_hash],
+        )
+
+    def canonical_of(self, entity_id: str) -> str | None:
+        """The item this one duplicates, or None if it is canonical (or unknown)."""
+        row = self._get(entity_id)
+        return row["canonical_id"] if row is not None else None
+
+    def aliases(self, entity_id: str) -> list[dict[str, str | None]]:
+        """Other items (entity_id, url) with the same bytes as a canonical item."""
+        return [
+            {"entity_id": row["entity_id"], "url": row["url"]}
+            for row in self.conn.execute(
+                "SELECT entity_id, url FROM raw_manifest WHERE canonical_id = ? ORDER BY first_seen_at",
+                [entity_id],
+            )
+        ]
+
+    def dedup_summary(self, source_type: str | None = None) -> dict[str, int]:
+        """Canonical documents vs aliases (duplicates not transformed) and their bytes."""
+        query = (
+            "SELECT count(*) FILTER (WHERE canonical_id IS NULL) AS documents, "
+            "count(*) FILTER (WHERE canonical_id IS NOT NULL) AS aliases, "
+            "coalesce(sum(original_size) FILTER (WHERE canonical_id IS NOT NULL), 0) AS alias_bytes "
+            "FROM raw_manifest WHERE content_hash IS NOT NULL"
+        )
+        params: list[str] = []
+        if source_type:
+            query += " AND source_type = ?"
+            params.append(source_type)
+        row = self.conn.execute(query, params).fetchone()
+        return {"documents": row["documents"], "aliases": row["aliases"], "alias_bytes": row["alias_bytes"]}
+
+    def scan(
+        self,
+        staged_base: Path | None = None,
+        source_type: str | None = None,
+        entity_id: str | None = None,
+    ) -> dict[str, int]:
+        """Reconcile the manifest with what is actually on disk.
+
+        Only needed for trees populated outside RawStagingPipeline (or edited
+        by hand). Files whose size and mtime match the manifest are not
+        re-hashed. Items discovered for the first time that already have a
+        staged record are assumed to be up to date, so bootstrapping a
+        manifest over an existing tree does not trigger a full re-transform.
+
+        Args:
+            staged_base: Staged root (e.g. ./data/staged), used when bootstrapping.
+            source_type: Limit the scan to one source type.
+            entity_id: Limit the scan to one item (requires source_type).
+
+        Returns:
+            Dict of counts: {'new': N, 'changed': N, 'unchanged': N, 'removed': N}
+        """
+        counts = {"new": 0, "changed": 0, "unchanged": 0, "removed": 0}
+
+        if entity_id and source_type:
+            item_dirs = [self.raw_dir / source_type / entity_id]
+            item_dirs = [d for d in item_dirs if d.is_dir()]
+        else:
+            if source_type:
+                source_dirs = [self.raw_dir / source_type]
+            elif self.raw_dir.is_dir():  # An in-memory manifest may have no raw tree yet
+                source_dirs = [d for d in self.raw_dir.iterdir() if d.is_dir() and not d.name.startswith(".")]
+            else:
+                source_dirs = []
+            item_dirs = [
+                d for sd in source_dirs if sd.is_dir() for d in sd.iterdir() if d.is_dir()
+            ]
+
+        seen = set()
+        for item_dir in item_dirs:
+            item_source_type = item_dir.parent.name
+            item_id = item_dir.name
+            seen.add(item_id)
+
+            original = find_original_file(item_dir)
+            existing = self._get(item_id)
+
+            if (
+                existing is not None
+                and original is not None
+                and existing["original_file"] == original.name
+            ):
+                stat = original.stat()
+                # Rows from before scheduling context existed (no host) are refreshed once
+                if (
+                    existing["original_size"] == stat.st_size
+                    and existing["original_mtime"] == stat.st_mtime
+                    and existing["host"] is not None
+                ):
+                    counts["unchanged"] += 1
+                    continue
+
+            source_path = item_dir / "source.json"
+            source = json.loads(source_path.read_text()) if source_path.exists() else {}
+            meeting_date, host = source_context(source)
+
+            status = self.record_original(
+                item_id, item_source_type, original, None, meeting_date, host, source.get("url")
+            )
+            counts[status] += 1
+
+            if status == "new" and staged_base is not None:
+                entry = self._get(item_id)
+                if entry is not None and (staged_base / item_source_type / f"{item_id}.json").exists():
+                    self.mark_staged(item_id, entry["content_hash"])
+
+        # Forget items whose folders were deleted
+        query = "SELECT entity_id FROM raw_manifest"
+        params: list[str] = []
+        if entity_id and source_type:
+            query += " WHERE entity_id = ?"
+            params = [entity_id]
+        elif source_type:
+            query += " WHERE source_type = ?"
+            params = [source_type]
+        removed = [r[0] for r in self.conn.execute(query, params) if r[0] not in seen]
+        self.conn.executemany("DELETE FROM raw_manifest WHERE entity_id = ?", [[r] for r in removed])
+        if not (entity_id and source_type):
+            self.conn.execute(
+                "INSERT OR REPLACE INTO manifest_meta (key, value) VALUES (?, ?)",
+                [_scan_key(source_type), datetime.now().isoformat()],
+            )
+        self.conn.commit()
+        counts["removed"] = len(removed)
+
+        return counts
+
+    def last_scan(self, source_type: str | None = None) -> str | None:
+        """When the raw tree (or source_type's part of it) was last fully scanned.
+
+        None until a scan covering it completes: items already on disk when
+        the manifest was created are only known after that bootstrap scan,
+        however many items the crawl has recorded since.
+        """
+        keys = [_scan_key(None)] + ([_scan_key(source_type)] if source_type else [])
+        row = self.conn.execute(
+            f"SELECT max(value) FROM manifest_meta WHERE key IN ({', '.join('?' * len(keys))})", keys
+        ).fetchone()
+        last: str | None = row[0]
+        return last
+
+    def _filtered(self, where: str, source_type: str | None, entity_id: str | None) -> list[ManifestEntry]:
+        query = f"SELECT * FROM raw_manifest WHERE {where}"
+        params: list[str] = []
+        if source_type:
+            query += " AND source_type = ?"
+            params.append(source_type)
+        if entity_id:
+            query += " AND entity_id = ?"
+            params.append(entity_id)
+        query += " ORDER BY source_type, entity_id"
+        rows = self.conn.execute(query, params).fetchall()
+        return [ManifestEntry(**{k: row[k] for k in ManifestEntry.model_fields}) for row in rows]
+
+    def pending(
+        self, source_type: str | None = None, entity_id: str | None = None
+    ) -> list[ManifestEntry]:
+        """Items whose original has never been transformed or has changed since.
+
+        Aliases (duplicates of another item's bytes) are never pending.
+        """
+        return self._filtered(
+            "content_hash IS NOT NULL AND canonical_id IS NULL "
+            "AND (staged_hash IS NULL OR staged_hash <> content_hash)",
+            source_type,
+            entity_id,
+        )
+
+    def entries(
+        self, source_type: str | None = None, entity_id: str | None = None
+    ) -> list[ManifestEntry]:
+        """All transformable items (those with an original file, except aliases)."""
+        return self._filtered("content_hash IS NOT NULL AND canonical_id IS NULL", source_type, entity_id)
+
+    def count(self, source_type: str | None = None, entity_id: str | None = None) -> int:
+        """Number of items in the manifest, optionally filtered."""
+        query = "SELECT count(*) FROM raw_manifest WHERE 1=1"
+        params: list[str] = []
+        if source_type:
+            query += " AND source_type = ?"
+            params.append(source_type)
+        if entity_id:
+            query += " AND entity_id = ?"
+            params.append(entity_id)
+        total: int = self.conn.execute(query, params).fetchone()[0]
+        return total
+
+    def mark_staged(self, entity_id: str, content_hash: str | None) -> None:
+        """Record that the given original content has been transformed to staged/."""
+        self.conn.execute(
+            "UPDATE raw_manifest SET staged_hash = ?, attempts = 0 WHERE entity_id = ?",
+            [content_hash, entity_id],
+        )
+        self.conn.commit()
+
+    def mark_failed(self, entity_id: str) -> None:
+        """Count a failed transform (the item stays pending, at lower priority)."""
+        self.conn.execute(
+            "UPDATE raw_manifest SET attempts = attempts + 1 WHERE entity_id = ?", [entity_id]
+        )
+        self.conn.commit()
+
+    def record_transform(
+        self,
+        entity_id: str,
+        source_type: str,
+        model: str | None,
+        content_chars: int,
+        output_chars: int,
+        convert_s: float,
+        extract_s: float,
+    ) -> None:
+        """Log the size and stage timings of a completed transform."""
+        self.conn.execute(
+            """
+            INSERT INTO transform_log
+            (entity_id, source_type, model, content_chars, output_chars,
+             convert_s, extract_s, transformed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                entity_id,
+                source_type,
+                model,
+                content_chars,
+                output_chars,
+                convert_s,
+                extract_s,
+                datetime.now().isoformat(),
+            ],
+        )
+        self.conn.commit()
+
+    def transform_history(
+        self, source_type: str | None = None, limit: int = 1000
+    ) -> list[sqlite3.Row]:
+        """Most recent transform_log rows, optionally for one source type."""
+        query = "SELECT * FROM transform_log"
+        params: list[str | int] = []
+        if source_type:
+            query += " WHERE source_type = ?"
+            params.append(source_type)
+        query += " ORDER BY transformed_at DESC LIMIT ?"
+        params.append(limit)
+        return self.conn.execute(query, params).fetchall()
+
+    def close(self) -> None:
+        """Close the manifest connection."""
+        self.conn.close()
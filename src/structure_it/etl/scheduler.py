@@ -0,0 +1,159 @@
+"""Priority-aware ordering of pending ELT work.
+
+The manifest knows which raw items need transforming; this module decides in
+what order. Items fall into priority classes that are served strictly in
+order:
+
+- urgent:  meeting date within `recent_days` of today (tonight's agenda)
+- normal:  everything else
+- backlog: meetings older than `stale_days`, or very large originals
+- retry:   items whose last transform failed (parked after `max_attempts`)
+
+Inside a class, items are interleaved round-robin across (host, source_type)
+buckets so one large municipality or document type cannot starve the rest.
+Each bucket is ordered by meeting-date proximity, then size (small first).
+
+Usage:
+    scheduler = WorkScheduler()
+    for entry in scheduler.plan(manifest.pending()):
+        ...
+"""
+
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from itertools import zip_longest
+
+from pydantic import BaseModel, Field
+
+from structure_it.etl.manifest import ManifestEntry
+from structure_it.utils.stats import percentile
+
+PRIORITY_CLASSES = ("urgent", "normal", "backlog", "retry")
+
+
+class SchedulerPolicy(BaseModel):
+    """Tunable thresholds for priority classification."""
+
+    recent_days: int = 14
+    stale_days: int = 365
+    large_bytes: int = 25 * 1024 * 1024
+    max_attempts: int = 3
+    # Lower weight is served first when buckets are interleaved
+    source_type_weights: dict[str, int] = Field(
+        default_factory=lambda: {
+            "civic_meeting": 0,
+            "civic_bid": 1,
+            "building_permit": 2,
+            "civic_service_request": 3,
+            "civic_financial_report": 4,
+        }
+    )
+
+
+def _parse_date(value: str | None) -> date | None:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+class WorkScheduler:
+    """Orders manifest entries by priority class with per-bucket fairness."""
+
+    def __init__(self, policy: SchedulerPolicy | None = None, today: date | None = None):
+        """Initialize the scheduler.
+
+        Args:
+            policy: Classification thresholds (defaults to SchedulerPolicy()).
+            today: Reference date for recency (defaults to the current date).
+        """
+        self.policy = policy or SchedulerPolicy()
+        self.today = today
+
+    def _days_away(self, entry: ManifestEntry) -> int | None:
+        meeting = _parse_date(entry.meeting_date)
+        if meeting is None:
+            return None
+        return abs((meeting - (self.today or date.today())).days)
+
+    def classify(self, entry: ManifestEntry) -> str:
+        """Priority class of a pending item."""
+        if entry.attempts > 0:
+            return "retry"
+        days = self._days_away(entry)
+        if days is not None and days <= self.policy.recent_days:
+            return "urgent"
+        if (days is not None and days > self.policy.stale_days) or (
+            entry.original_size or 0
+        ) > self.policy.large_bytes:
+            return "backlog"
+        return "normal"
+
+    def is_parked(self, entry: ManifestEntry) -> bool:
+        """True once an item has failed `max_attempts` times since its last change."""
+        return entry.attempts >= self.policy.max_attempts
+
+    def _bucket_order(self, entry: ManifestEntry) -> tuple:
+        days = self._days_away(entry)
+        return (days if days is not None else float("inf"), entry.original_size or 0, entry.entity_id)
+
+    def plan(
+        self, entries: list[ManifestEntry], include_parked: bool = False
+    ) -> list[ManifestEntry]:
+        """Order entries for processing.
+
+        Args:
+            entries: Pending manifest entries.
+            include_parked: Keep items that exhausted their retries (e.g. --force).
+
+        Returns:
+            Entries in processing order.
+        """
+        classes: dict[str, dict[tuple[str, str], list[ManifestEntry]]] = {
+            name: defaultdict(list) for name in PRIORITY_CLASSES
+        }
+        for entry in entries:
+            if self.is_parked(entry) and not include_parked:
+                continue
+            classes[self.classify(entry)][(entry.host or "", entry.source_type)].append(entry)
+
+        weights = self.policy.source_type_weights
+        ordered: list[ManifestEntry] = []
+        for name in PRIORITY_CLASSES:
+            buckets = classes[name]
+            for bucket in buckets.values():
+                bucket.sort(key=self._bucket_order)
+            keys = sorted(buckets, key=lambda k: (weights.get(k[1], len(weights)), k))
+            for round_ in zip_longest(*(buckets[k] for k in keys)):
+                ordered.extend(e for e in round_ if e is not None)
+        return ordered
+
+
+class QueueLatency:
+    """Time from becoming pending (manifest queued_at) to being picked up."""
+
+    def __init__(self) -> None:
+        self.waits: dict[str, list[float]] = defaultdict(list)
+
+    def record(self, priority_class: str, queued_at: str | None) -> None:
+        """Record that an item of the given class started processing now."""
+        if not queued_at:
+            return
+        wait = time.time() - datetime.fromisoformat(queued_at).timestamp()
+        self.waits[priority_class].append(max(wait, 0.0))
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Per-class count and p50/p95/max wait in seconds."""
+        return {
+            name: {
+                "count": len(self.waits[name]),
+                "p50_s": round(percentile(self.waits[name], 50), 1),
+                "p95_s": round(percentile(self.waits[name], 95), 1),
+                "max_s": round(max(self.waits[name]), 1),
+            }
+            for name in PRIORITY_CLASSES
+            if self.waits.get(name)
+        }
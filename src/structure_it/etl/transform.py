@@ -3,7 +3,7 @@
 Reads from data/raw/ (Bronze) and outputs to data/staged/ (Silver).
 
 Transformations:
-1. Convert original files to markdown (MarkItDown)
+1. Convert original files to markdown (MarkItDown; HTML pages via utils.convert)
 2. Extract structured data via Gemini
 3. Save as JSON ready for DuckDB loading
 
@@ -12,17 +12,22 @@ Usage:
     uv run python -m structure_it.etl.transform --source-type civic_meeting
     uv run python -m structure_it.etl.transform --entity-id abc123
     uv run python -m structure_it.etl.transform --force  # Re-transform even if staged exists
+    uv run python -m structure_it.etl.transform --rescan  # Re-sync the raw manifest with disk first
+    uv run python -m structure_it.etl.transform --dry-run --sample 50  # Project cost/time offline
+    uv run python -m structure_it.etl.transform --watch --concurrency 4  # Follow the crawl
 """
 
 import argparse
 import asyncio
 import json
+import time
 from datetime import datetime
 from pathlib import Path
 
-from markitdown import MarkItDown
-
-from structure_it.extractors import GeminiExtractor
+from structure_it.config import ETL_CONCURRENCY
+from structure_it.etl.manifest import RawManifest, find_original_file
+from structure_it.etl.scheduler import QueueLatency, WorkScheduler
+from structure_it.extractors import ExtractorRegistry, GeminiExtractor
 from structure_it.schemas.civic import (
     BuildingPermit,
     CivicBid,
@@ -30,6 +35,7 @@ from structure_it.schemas.civic import (
     CivicMeeting,
     CivicServiceRequest,
 )
+from structure_it.utils.convert import DocumentConverter
 from structure_it.utils.hashing import generate_id
 
 
@@ -43,19 +49,36 @@ EXTRACTORS = {
 }
 
 
+def build_prompt(source: dict, base_prompt: str) -> str:
+    """Build the contextual extraction prompt for a raw item."""
+    prompt_parts = [base_prompt]
+    if source.get("title"):
+        prompt_parts.append(f"Title: {source['title']}")
+    if source.get("committee_name"):
+        prompt_parts.append(f"Committee: {source['committee_name']}")
+    if source.get("meeting_date"):
+        prompt_parts.append(f"Date: {source['meeting_date']}")
+
+    return " ".join(prompt_parts)
+
+
 async def transform_item(
     raw_dir: Path,
     staged_dir: Path,
-    md_converter: MarkItDown,
+    converter: DocumentConverter,
     force: bool = False,
+    extractors: ExtractorRegistry | None = None,
+    aliases: list[dict] | None = None,
 ) -> dict | None:
     """Transform a single raw item to staged format.
 
     Args:
         raw_dir: Path to raw item folder (e.g., data/raw/civic_meeting/abc123/)
         staged_dir: Path to staged output folder (e.g., data/staged/civic_meeting/)
-        md_converter: MarkItDown instance
+        converter: Document converter (MarkItDown, or the HTML fast path for pages)
         force: Re-transform even if staged file exists
+        extractors: Shared per-run extractors (a one-off extractor is built if omitted)
+        aliases: Other items (entity_id, url) serving the same bytes, from the manifest
 
     Returns:
         Staged record dict, or None if skipped/failed
@@ -81,12 +104,7 @@ async def transform_item(
     print(f"  [TRANSFORM] {entity_id} ({source_type})")
 
     # Find original file
-    original_file = None
-    for ext in [".pdf", ".html", ".htm"]:
-        candidate = raw_dir / f"original{ext}"
-        if candidate.exists():
-            original_file = candidate
-            break
+    original_file = find_original_file(raw_dir)
 
     if not original_file:
         print(f"  [ERROR] No original file found in {raw_dir}")
@@ -94,12 +112,13 @@ async def transform_item(
 
     # 1. Convert to markdown
     print(f"    Converting {original_file.name} to markdown...")
+    start = time.perf_counter()
     try:
-        result = await asyncio.to_thread(md_converter.convert, str(original_file))
-        content_md = result.text_content
+        content_md = await asyncio.to_thread(converter.convert, original_file, source.get("content_type"))
     except Exception as e:
         print(f"    [ERROR] Markdown conversion failed: {e}")
         return None
+    convert_s = time.perf_counter() - start
 
     content_hash = generate_id(content_md)
 
@@ -107,21 +126,17 @@ async def transform_item(
     print(f"    Extracting with Gemini...")
     schema_class, base_prompt = EXTRACTORS.get(source_type, (CivicMeeting, "Extract data."))
 
-    extractor = GeminiExtractor(schema=schema_class)
-
-    # Build contextual prompt
-    prompt_parts = [base_prompt]
-    if source.get("title"):
-        prompt_parts.append(f"Title: {source['title']}")
-    if source.get("committee_name"):
-        prompt_parts.append(f"Committee: {source['committee_name']}")
-    if source.get("meeting_date"):
-        prompt_parts.append(f"Date: {source['meeting_date']}")
+    if extractors is not None:
+        extractor = extractors.get(source_type)
+    else:
+        extractor = GeminiExtractor(schema=schema_class)
 
-    prompt = " ".join(prompt_parts)
+    prompt = build_prompt(source, base_prompt)
 
+    start = time.perf_counter()
     try:
         extracted = await extractor.extract(content=content_md, prompt=prompt)
+        extract_s = time.perf_counter() - start
         extracted_data = extracted.to_dict()
 
         # Augment with source metadata
@@ -141,6 +156,7 @@ async def transform_item(
         "entity_id": entity_id,
         "source_type": source_type,
         "url": source.get("url"),
+        "aliases": aliases or [],
         # Content
         "content_md": content_md,
         "content_hash": content_hash,
@@ -150,6 +166,11 @@ async def transform_item(
         "source_metadata": source,
         # Timestamps
         "transformed_at": datetime.now().isoformat(),
+        "timings": {
+            "model": extractor.model_name,
+            "convert_s": round(convert_s, 3),
+            "extract_s": round(extract_s, 3),
+        },
     }
 
     # 4. Save to staged
@@ -160,62 +181,212 @@ async def transform_item(
     return staged_record
 
 
+def create_extractors() -> ExtractorRegistry:
+    """One extractor per schema in EXTRACTORS, sharing one pooled client."""
+    return ExtractorRegistry(
+        {key: schema for key, (schema, _) in EXTRACTORS.items()},
+        default_schema=CivicMeeting,
+    )
+
+
 async def transform_all(
     raw_base: Path,
     staged_base: Path,
     source_type: str | None = None,
     entity_id: str | None = None,
     force: bool = False,
+    rescan: bool = False,
+    concurrency: int = ETL_CONCURRENCY,
+    limit: int | None = None,
+    scheduler: WorkScheduler | None = None,
+    extractors: ExtractorRegistry | None = None,
 ) -> tuple[int, int, int]:
     """Transform all raw items to staged format.
 
+    Work is discovered from the raw-layer manifest (see `etl.manifest`)
+    instead of walking data/raw/: only items whose original file is new or
+    has changed since it was last staged are transformed, in the order chosen
+    by the work scheduler (see `etl.scheduler`).
+
+    Args:
+        raw_base: Raw root (e.g. ./data/raw).
+        staged_base: Staged root (e.g. ./data/staged).
+        source_type: Filter by source type.
+        entity_id: Transform one item (requires source_type).
+        force: Re-transform every matching item, changed or not.
+        rescan: Reconcile the manifest with the raw tree before planning
+            (picks up files added or edited outside RawStagingPipeline).
+        concurrency: Number of items transformed in parallel.
+        limit: Transform at most this many items (highest priority first).
+        scheduler: Work ordering policy (defaults to WorkScheduler()).
+        extractors: Shared extractors kept open by the caller (one is built for the run if omitted)
+
     Returns:
         Tuple of (transformed, skipped, failed) counts
     """
-    md = MarkItDown()
+    manifest = RawManifest(raw_base)
+    scheduler = scheduler or WorkScheduler()
+    latency = QueueLatency()
     transformed = 0
-    skipped = 0
     failed = 0
 
-    # Find items to transform
-    if entity_id and source_type:
-        # Single item
-        raw_dirs = [raw_base / source_type / entity_id]
-    elif source_type:
-        # All items of a source type
-        source_dir = raw_base / source_type
-        raw_dirs = [d for d in source_dir.iterdir() if d.is_dir()] if source_dir.exists() else []
-    else:
-        # All items across all source types
-        raw_dirs = []
-        for source_dir in raw_base.iterdir():
-            if source_dir.is_dir() and not source_dir.name.startswith("."):
-                raw_dirs.extend(d for d in source_dir.iterdir() if d.is_dir())
-
-    print(f"Found {len(raw_dirs)} raw items to process")
-
-    for raw_dir in raw_dirs:
-        # Determine staged output dir
-        parts = raw_dir.relative_to(raw_base).parts
-        if len(parts) >= 1:
-            item_source_type = parts[0]
-            staged_dir = staged_base / item_source_type
-
-            result = await transform_item(raw_dir, staged_dir, md, force)
-            if result:
-                transformed += 1
-            elif result is None:
-                # Check if it was skipped or failed
-                source_path = raw_dir / "source.json"
-                staged_path = staged_dir / f"{raw_dir.name}.json"
-                if staged_path.exists() and not force:
-                    skipped += 1
-                else:
-                    failed += 1
+    try:
+        # A single item is always reconciled (cheap); a full scan only runs when
+        # asked to or when bootstrapping a manifest over an existing tree.
+        if (entity_id and source_type) or rescan or manifest.last_scan(source_type) is None:
+            counts = manifest.scan(staged_base, source_type, entity_id)
+            if counts["new"] or counts["changed"] or counts["removed"]:
+                print(
+                    f"Manifest scan: {counts['new']} new, {counts['changed']} changed, "
+                    f"{counts['removed']} removed"
+                )
+
+        if force:
+            work = manifest.entries(source_type, entity_id)
+        else:
+            work = manifest.pending(source_type, entity_id)
+        skipped = manifest.count(source_type, entity_id) - len(work)
+
+        planned = scheduler.plan(work, include_parked=force)
+        parked = len(work) - len(planned)
+        if limit is not None:
+            planned = planned[:limit]
+
+        # Aliases (same bytes as another item's URL) are skipped, not transformed twice
+        if entity_id:
+            duplicates = 1 if manifest.canonical_of(entity_id) else 0
+        else:
+            duplicates = manifest.dedup_summary(source_type)["aliases"]
+        print(
+            f"Found {len(work)} raw items to process ({skipped - duplicates} unchanged"
+            + (f", {duplicates} duplicates of other URLs" if duplicates else "")
+            + (f", {parked} parked after repeated failures" if parked else "")
+            + ")"
+        )
+
+        if planned:
+            converter = DocumentConverter()
+            # One extractor per schema, sharing one pooled client for the whole run
+            owned = extractors is None
+            registry = create_extractors() if extractors is None else extractors
+            # Shared by all workers, so items are started strictly in plan order
+            queue = iter(planned)
+
+            async def worker() -> None:
+                nonlocal transformed, failed
+                for entry in queue:
+                    latency.record(scheduler.classify(entry), entry.queued_at)
+                    raw_dir = raw_base / entry.source_type / entry.entity_id
+                    staged_dir = staged_base / entry.source_type
+
+                    # The manifest already decided this item needs (re-)transforming
+                    result = await transform_item(
+                        raw_dir, staged_dir, converter, True, registry, manifest.aliases(entry.entity_id)
+                    )
+                    if result:
+                        manifest.mark_staged(entry.entity_id, entry.content_hash)
+                        timings = result.get("timings", {})
+                        manifest.record_transform(
+                            entry.entity_id,
+                            entry.source_type,
+                            timings.get("model"),
+                            len(result.get("content_md", "")),
+                            len(json.dumps(result.get("extracted", {}), default=str)),
+                            timings.get("convert_s"),
+                            timings.get("extract_s"),
+                        )
+                        transformed += 1
+                    else:
+                        manifest.mark_failed(entry.entity_id)
+                        failed += 1
+
+            try:
+                await asyncio.gather(*(worker() for _ in range(max(concurrency, 1))))
+            finally:
+                if owned:
+                    print(f"Extractor pool: {registry.summary()}")
+                    registry.close()
+
+            for name, stats in latency.summary().items():
+                print(
+                    f"Queue latency [{name}]: {stats['count']} items, "
+                    f"p50 {stats['p50_s']:.0f}s, p95 {stats['p95_s']:.0f}s, max {stats['max_s']:.0f}s"
+                )
+    finally:
+        manifest.close()
 
     return transformed, skipped, failed
 
 
+async def watch_transform(
+    raw_base: Path,
+    staged_base: Path,
+    source_type: str | None = None,
+    concurrency: int = ETL_CONCURRENCY,
+    poll_interval: float = 30.0,
+    max_passes: int | None = None,
+) -> tuple[int, int]:
+    """Continuously transform items as RawStagingPipeline records them.
+
+    Each pass takes only the top few planned items, so an urgent document
+    that arrives while a large backlog is being worked jumps the queue on the
+    next pass instead of waiting for the whole backlog.
+
+    Args:
+        raw_base: Raw root (e.g. ./data/raw).
+        staged_base: Staged root (e.g. ./data/staged).
+        source_type: Filter by source type.
+        concurrency: Number of items transformed in parallel.
+        poll_interval: Seconds to sleep when the queue is empty.
+        max_passes: Stop after this many passes (None = run until interrupted).
+
+    Returns:
+        Tuple of (transformed, failed) totals
+    """
+    scheduler = WorkScheduler()
+    batch_size = max(concurrency, 1) * 4
+    totals = [0, 0]
+    passes = 0
+    # Created on the first pass with work and reused so pooled connections stay warm
+    extractors: ExtractorRegistry | None = None
+
+    try:
+        while max_passes is None or passes < max_passes:
+            passes += 1
+            manifest = RawManifest(raw_base)
+            try:
+                # Until the bootstrap scan has run, items already on disk are unknown
+                has_work = manifest.last_scan(source_type) is None or bool(
+                    scheduler.plan(manifest.pending(source_type))
+                )
+            finally:
+                manifest.close()
+
+            if not has_work:
+                await asyncio.sleep(poll_interval)
+                continue
+
+            if extractors is None:
+                extractors = create_extractors()
+            transformed, _, failed = await transform_all(
+                raw_base,
+                staged_base,
+                source_type,
+                concurrency=concurrency,
+                limit=batch_size,
+                scheduler=scheduler,
+                extractors=extractors,
+            )
+            totals[0] += transformed
+            totals[1] += failed
+    finally:
+        if extractors is not None:
+            print(f"Extractor pool: {extractors.summary()}")
+            extractors.close()
+
+    return totals[0], totals[1]
+
+
 def main():
     parser = argparse.ArgumentParser(description="Transform raw data to staged format")
     parser.add_argument("--raw-dir", default="./data/raw", help="Raw data directory")
@@ -223,6 +394,27 @@ def main():
     parser.add_argument("--source-type", help="Filter by source type")
     parser.add_argument("--entity-id", help="Transform specific entity")
     parser.add_argument("--force", action="store_true", help="Re-transform even if staged exists")
+    parser.add_argument(
+        "--rescan", action="store_true", help="Re-sync the raw manifest with the raw tree first"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Convert and count tokens only; print projected cost and wall-clock time",
+    )
+    parser.add_argument("--sample", type=int, help="Dry run: convert at most N items and extrapolate")
+    parser.add_argument("--model", help="Dry run: model to price (default: STRUCTURE_IT_MODEL)")
+    parser.add_argument(
+        "--concurrency", type=int, default=ETL_CONCURRENCY, help="Parallel transforms"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and transform new raw items as they are staged",
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=30.0, help="Watch: seconds between idle polls"
+    )
 
     args = parser.parse_args()
 
@@ -233,6 +425,41 @@ def main():
     print(f"Staged dir: {args.staged_dir}")
     print()
 
+    if args.dry_run:
+        from structure_it.etl.estimate import estimate_transform, format_estimate
+
+        estimate = asyncio.run(
+            estimate_transform(
+                Path(args.raw_dir),
+                Path(args.staged_dir),
+                args.source_type,
+                args.entity_id,
+                args.force,
+                args.rescan,
+                sample=args.sample,
+                model_name=args.model,
+                concurrency=args.concurrency,
+            )
+        )
+        print(format_estimate(estimate))
+        return
+
+    if args.watch:
+        print("Watching for new raw items (Ctrl+C to stop)...")
+        try:
+            asyncio.run(
+                watch_transform(
+                    Path(args.raw_dir),
+                    Path(args.staged_dir),
+                    args.source_type,
+                    args.concurrency,
+                    args.poll_interval,
+                )
+            )
+        except KeyboardInterrupt:
+            print("Stopped.")
+        return
+
     transformed, skipped, failed = asyncio.run(
         transform_all(
             Path(args.raw_dir),
@@ -240,6 +467,8 @@ def main():
             args.source_type,
             args.entity_id,
             args.force,
+            args.rescan,
+            args.concurrency,
         )
     )
 
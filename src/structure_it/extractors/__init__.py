@@ -6,6 +6,7 @@ from structure_it.extractors.policy_extractor import PolicyRequirementsExtractor
 from structure_it.extractors.code_extractor import CodeDocsExtractor
 from structure_it.extractors.meeting_extractor import MeetingExtractor
 from structure_it.extractors.media_extractor import MediaExtractor
+from structure_it.extractors.registry import ExtractorRegistry
 
 __all__ = [
     "BaseExtractor",
@@ -15,4 +16,5 @@ __all__ = [
     "CodeDocsExtractor",
     "MeetingExtractor",
     "MediaExtractor",
+    "ExtractorRegistry",
 ]
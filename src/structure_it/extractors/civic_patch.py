@@ -1,25 +1,73 @@
 """Patch civic-scraper to be safe."""
 
+import functools
 import logging
+from typing import Any
+
+import civic_scraper.base.asset
 import civic_scraper.platforms.civic_plus.site
-from structure_it.utils.safety import DEFAULT_SAFE_SESSION
+
+from structure_it.utils.safety import SyncSafeSession
 
 logger = logging.getLogger(__name__)
 
-def patch_civic_scraper():
+_SESSION: SyncSafeSession | None = None
+
+
+def get_civic_session() -> SyncSafeSession:
+    """Shared blocking facade over AsyncSafeSession used by the patch."""
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = SyncSafeSession(requests_per_minute=10)
+    return _SESSION
+
+
+def patch_civic_scraper() -> None:
     """Monkeypatch civic-scraper to use our SafeSession.
-    
-    This replaces `requests.get` and `requests.head` in the `site` module
-    with our rate-limited, backoff-enabled versions.
+
+    Swaps the `requests.Session` each `Site` creates for our rate-limited,
+    backoff-enabled session, and makes `Asset.download` (which otherwise
+    calls the global `requests.get`) use the same session. Requests go
+    through AsyncSafeSession's pooled keep-alive connections and per-host
+    limits, so scraping several municipalities does not serialize on one
+    global rate limit. The `requests` module itself is left alone, so other
+    code in the process keeps getting `requests` responses and exceptions.
     """
     logger.info("Applying safety patch to civic-scraper...")
-    
-    # The site.py module imports requests as 'requests'
-    # We replace the 'get' and 'head' functions on that imported module object
-    # Note: We must patch where it is USED, not where it is defined.
-    
-    # Patch civic_plus.site
-    civic_scraper.platforms.civic_plus.site.requests.get = DEFAULT_SAFE_SESSION.get
-    civic_scraper.platforms.civic_plus.site.requests.head = DEFAULT_SAFE_SESSION.head
-    
+    safe_session = get_civic_session()
+    site_module = civic_scraper.platforms.civic_plus.site
+    asset_class = civic_scraper.base.asset.Asset
+
+    # Asset.download falls back to requests.get when no session is passed
+    if not getattr(asset_class.download, "_safe_session_patched", False):
+        original_download = asset_class.download
+
+        @functools.wraps(original_download)
+        def patched_download(
+            self: Any, target_dir: str, session: Any = None, timeout: float | None = None
+        ) -> str:
+            path: str = original_download(
+                self, target_dir, session=session or safe_session, timeout=timeout
+            )
+            return path
+
+        patched_download._safe_session_patched = True  # type: ignore[attr-defined]
+        asset_class.download = patched_download
+
+    # Site.__init__ builds its own requests.Session for search pages and HEADs
+    if not getattr(site_module.Site.__init__, "_safe_session_patched", False):
+        original_init = site_module.Site.__init__
+
+        @functools.wraps(original_init)
+        def patched_init(self: Any, *args: Any, **kwargs: Any) -> None:
+            original_init(self, *args, **kwargs)
+            # Keep civic-scraper's identity headers; httpx manages encoding/keep-alive
+            safe_session.headers.update(
+                {k: v for k, v in self.session.headers.items() if k.lower() in ("user-agent", "accept")}
+            )
+            self.session = safe_session
+
+        patched_init._safe_session_patched = True  # type: ignore[attr-defined]
+        site_module.Site.__init__ = patched_init
+
     logger.info("Safety patch applied. All civic-scraper requests are now rate-limited.")
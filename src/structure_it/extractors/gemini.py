@@ -1,14 +1,23 @@
 """Gemini-based structured data extractor."""
 
+from __future__ import annotations
+
 import asyncio
-from typing import Any
+from functools import cache
+from typing import TYPE_CHECKING, Any
 
-from google import genai
-from google.genai import types
 from pydantic import BaseModel
 
 from structure_it.config import DEFAULT_MODEL
 from structure_it.extractors.base import BaseExtractor, ExtractionError, TSchema
+from structure_it.utils.lazy import LazyImport
+
+if TYPE_CHECKING:
+    import google.genai
+
+# Imported on first use (see utils.lazy): about a second on its own
+genai = LazyImport("google.genai")
+types = LazyImport("google.genai.types")
 
 
 def _resolve_refs(schema_dict: dict[str, Any], defs: dict[str, Any]) -> dict[str, Any]:
@@ -95,6 +104,12 @@ def _clean_schema_for_gemini(schema_dict: dict[str, Any]) -> dict[str, Any]:
     return _strip_unsupported(resolved)
 
 
+@cache
+def _gemini_schema_for(schema: type[BaseModel]) -> dict[str, Any]:
+    """Cleaned Gemini response schema for a Pydantic model (computed once per class)."""
+    return _clean_schema_for_gemini(schema.model_json_schema())
+
+
 class GeminiExtractor(BaseExtractor[TSchema]):
     """Structured data extractor using Google Gemini API.
 
@@ -107,6 +122,7 @@ class GeminiExtractor(BaseExtractor[TSchema]):
         schema: type[TSchema],
         model_name: str | None = None,
         api_key: str | None = None,
+        client: google.genai.Client | None = None,
         **model_kwargs: Any,
     ) -> None:
         """Initialize the Gemini extractor.
@@ -115,6 +131,8 @@ class GeminiExtractor(BaseExtractor[TSchema]):
             schema: Pydantic model class defining the output structure.
             model_name: Gemini model to use (defaults to config.DEFAULT_MODEL).
             api_key: Google API key (if not set via environment).
+            client: Existing Gemini client to share (see `ExtractorRegistry`).
+                When given, api_key is ignored.
             **model_kwargs: Additional model configuration parameters.
         """
         super().__init__(schema)
@@ -122,7 +140,9 @@ class GeminiExtractor(BaseExtractor[TSchema]):
         self.model_kwargs = model_kwargs
 
         # Initialize Gemini client
-        if api_key:
+        if client is not None:
+            self.client = client
+        elif api_key:
             self.client = genai.Client(api_key=api_key)
         else:
             from structure_it.config import GOOGLE_API_KEY
@@ -164,9 +184,8 @@ class GeminiExtractor(BaseExtractor[TSchema]):
                 parts = [instruction, content]
 
             # Configure generation with schema
-            # Clean the Pydantic schema for Gemini compatibility
-            raw_schema = self.schema.model_json_schema()
-            cleaned_schema = _clean_schema_for_gemini(raw_schema)
+            # Clean the Pydantic schema for Gemini compatibility (cached per schema class)
+            cleaned_schema = _gemini_schema_for(self.schema)
 
             config_params = {
                 **self.model_kwargs,
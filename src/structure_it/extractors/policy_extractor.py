@@ -1,15 +1,19 @@
 """Policy requirements extractor using Gemini."""
 
+from __future__ import annotations
+
 import hashlib
 from datetime import datetime
 from pathlib import Path
-from typing import Any
-
-from markitdown import MarkItDown
+from typing import Any, BinaryIO
 
 from structure_it.config import DEFAULT_MODEL
 from structure_it.extractors.gemini import GeminiExtractor
 from structure_it.schemas.policy_requirements import PolicyRequirements
+from structure_it.utils.lazy import LazyImport
+
+# Imported on first use (see utils.lazy)
+MarkItDown = LazyImport("markitdown", "MarkItDown")
 
 
 class PolicyRequirementsExtractor:
@@ -58,15 +62,30 @@ class PolicyRequirementsExtractor:
         if not file_path.exists():
             raise ValueError(f"File not found: {file_path}")
 
-        # Auto-detect file type from extension
-        suffix = file_path.suffix.lower()
+        with open(file_path, "rb") as stream:
+            return self._convert_stream_to_markdown(stream, file_path.suffix)
+
+    def _convert_stream_to_markdown(self, stream: BinaryIO, suffix: str) -> str:
+        """Convert an open document to markdown text (e.g. an upload buffer).
+
+        Args:
+            stream: Binary stream positioned at the start of the document.
+            suffix: File extension (".pdf" or ".md") selecting the format.
+
+        Returns:
+            Markdown content of the document.
+
+        Raises:
+            ValueError: If the format is unsupported.
+        """
+        suffix = suffix.lower()
 
         if suffix == ".md":
             # Read markdown directly
-            return file_path.read_text(encoding="utf-8")
+            return stream.read().decode("utf-8")
         elif suffix == ".pdf":
             # Convert PDF to markdown using markitdown
-            result = self.markdown_converter.convert(str(file_path))
+            result = self.markdown_converter.convert_stream(stream, file_extension=suffix)
             return result.text_content
         else:
             raise ValueError(
@@ -162,6 +181,7 @@ Pay special attention to:
         self,
         pdf_path: str | Path,
         policy_metadata: dict[str, Any],
+        content: str | None = None,
         **kwargs: Any,
     ) -> PolicyRequirements:
         """Extract requirements from a policy document (PDF or markdown).
@@ -174,6 +194,8 @@ Pay special attention to:
                 - policy_type: Type (Financial, IT Security, HR, Legal, Compliance)
                 - policy_version: Optional version string
                 - effective_date: Optional effective date string
+            content: The document already converted to markdown, if the
+                caller has it (skips converting pdf_path again).
             **kwargs: Additional generation parameters.
 
         Returns:
@@ -194,7 +216,7 @@ Pay special attention to:
         policy_type = policy_metadata["policy_type"]
 
         # Convert document to markdown (handles both PDF and .md)
-        markdown_content = self._convert_to_markdown(pdf_path)
+        markdown_content = content if content is not None else self._convert_to_markdown(pdf_path)
 
         # Build extraction prompt
         prompt = self._build_extraction_prompt(policy_type)
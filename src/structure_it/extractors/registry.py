@@ -0,0 +1,180 @@
+"""Per-run registry of Gemini extractors sharing one pooled client.
+
+Creating a `GeminiExtractor` per document also creates a `genai.Client` with
+its own HTTP connection pool, so every document paid for a fresh TCP + TLS
+handshake. The registry builds one extractor per schema, backed by a single
+client whose keep-alive pool is shared by all of them, and counts how often
+requests reuse an existing connection.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
+
+import httpx
+from pydantic import BaseModel
+
+from structure_it.config import EXTRACTOR_MAX_CONNECTIONS
+from structure_it.extractors.gemini import GeminiExtractor, genai, types
+
+if TYPE_CHECKING:
+    import google.genai
+
+
+class ConnectionStats:
+    """Thread-safe counters fed by httpcore trace events."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    def _trace(self, event_name: str, info: dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def on_request(self, request: httpx.Request) -> None:
+        """httpx request hook: count the request and attach the tracer."""
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    @property
+    def reused(self) -> int:
+        """Requests served over an already-open connection."""
+        return max(self.requests - self.connections_opened, 0)
+
+    def to_dict(self) -> dict[str, int | float]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "reused": self.reused,
+            "reuse_ratio": round(self.reused / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+def create_pooled_client(
+    api_key: str | None = None,
+    max_connections: int = EXTRACTOR_MAX_CONNECTIONS,
+    stats: ConnectionStats | None = None,
+) -> tuple[google.genai.Client, httpx.Client]:
+    """Create a Gemini client backed by an explicit, instrumented httpx pool.
+
+    Args:
+        api_key: Google API key (defaults to config.GOOGLE_API_KEY).
+        max_connections: Keep-alive pool size (match the extraction concurrency).
+        stats: Counters to attach to every request.
+
+    Returns:
+        Tuple of (Gemini client, underlying httpx client). Close the httpx
+        client when the run is finished.
+
+    Raises:
+        ValueError: If no API key is available.
+    """
+    if not api_key:
+        from structure_it.config import GOOGLE_API_KEY
+
+        api_key = GOOGLE_API_KEY
+    if not api_key:
+        raise ValueError(
+            "GOOGLE_API_KEY is not set. Please set the GOOGLE_API_KEY "
+            "environment variable or pass it to the extractor."
+        )
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        timeout=httpx.Timeout(300.0, connect=30.0),
+        event_hooks={"request": [stats.on_request]} if stats else None,
+    )
+    client = genai.Client(
+        api_key=api_key,
+        http_options=types.HttpOptions(httpx_client=http_client),
+    )
+    return client, http_client
+
+
+class ExtractorRegistry:
+    """Lazily builds one `GeminiExtractor` per schema, all sharing one client.
+
+    Keyed by source type, mirroring `etl.transform.EXTRACTORS`; source types
+    that map to the same schema share an extractor instance.
+    """
+
+    def __init__(
+        self,
+        schemas: Mapping[str, type[BaseModel]],
+        default_schema: type[BaseModel] | None = None,
+        model_name: str | None = None,
+        api_key: str | None = None,
+        max_connections: int = EXTRACTOR_MAX_CONNECTIONS,
+    ) -> None:
+        """Initialize the registry and its shared client.
+
+        Args:
+            schemas: Mapping of source_type -> Pydantic schema class.
+            default_schema: Schema for source types not in the mapping.
+            model_name: Gemini model for every extractor.
+            api_key: Google API key (if not set via environment).
+            max_connections: Keep-alive pool size of the shared client.
+        """
+        self.schemas = dict(schemas)
+        self.default_schema = default_schema
+        self.model_name = model_name
+        self.connection_stats = ConnectionStats()
+        self.client, self._http_client = create_pooled_client(
+            api_key, max_connections, self.connection_stats
+        )
+        self._extractors: dict[type[BaseModel], GeminiExtractor] = {}
+        self._calls: dict[str, int] = {}
+
+    def get(self, source_type: str) -> GeminiExtractor:
+        """Return the shared extractor for a source type.
+
+        Raises:
+            KeyError: If the source type is unknown and there is no default schema.
+        """
+        schema = self.schemas.get(source_type, self.default_schema)
+        if schema is None:
+            raise KeyError(f"No extractor registered for source type '{source_type}'")
+
+        extractor = self._extractors.get(schema)
+        if extractor is None:
+            extractor = GeminiExtractor(schema=schema, model_name=self.model_name, client=self.client)
+            self._extractors[schema] = extractor
+
+        self._calls[source_type] = self._calls.get(source_type, 0) + 1
+        return extractor
+
+    def stats(self) -> dict[str, Any]:
+        """Instance and connection reuse statistics for this run."""
+        return {
+            "clients": 1,
+            "extractors": len(self._extractors),
+            "lookups_by_source_type": dict(self._calls),
+            **self.connection_stats.to_dict(),
+        }
+
+    def summary(self) -> str:
+        """One-line human-readable version of `stats()`."""
+        stats = self.stats()
+        return (
+            f"{stats['extractors']} extractors on {stats['clients']} client, "
+            f"{stats['requests']} requests over {stats['connections_opened']} connections "
+            f"(reuse {stats['reuse_ratio']:.0%})"
+        )
+
+    def close(self) -> None:
+        """Close the shared connection pool."""
+        self._http_client.close()
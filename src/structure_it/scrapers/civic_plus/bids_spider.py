@@ -1,12 +1,15 @@
 """Spider for scraping Bids and RFPs from CivicPlus."""
 
+import hashlib
 import re
 from datetime import datetime
+from pathlib import Path
 from urllib.parse import urljoin
 
 import scrapy
 
 from structure_it.config import get_scraper_settings
+from structure_it.utils.hashing import generate_entity_id
 
 
 class CivicPlusBidsSpider(scrapy.Spider):
@@ -59,7 +62,9 @@ class CivicPlusBidsSpider(scrapy.Spider):
                 meta={
                     "title": title,
                     "status": status,
-                    "source_type": "civic_bid"
+                    "source_type": "civic_bid",
+                    # Revalidate with ETag/Last-Modified (see middlewares.py)
+                    "conditional_get": True,
                 }
             )
 
@@ -79,6 +84,13 @@ class CivicPlusBidsSpider(scrapy.Spider):
             if doc_href:
                 documents.append(urljoin(response.url, doc_href))
 
+        # Keep the page we already have so the pipeline converts it directly
+        # (HTML fast path) instead of downloading it a second time
+        entity_id = generate_entity_id(response.url, "civic_bid")
+        temp_path = Path(f"temp_downloads/{entity_id}.html")
+        temp_path.parent.mkdir(exist_ok=True)
+        temp_path.write_bytes(response.body)
+
         # We yield the Page itself as the item to be processed
         yield {
             "source_type": "civic_bid",
@@ -87,5 +99,7 @@ class CivicPlusBidsSpider(scrapy.Spider):
             "url": response.url,
             "documents": documents,
             "scraped_at": datetime.now().isoformat(),
+            "temp_path": str(temp_path),
+            "content_hash": hashlib.sha256(response.body).hexdigest(),
             "content_type": "html" # Hint for pipeline
         }
@@ -0,0 +1,206 @@
+"""Persistent crawl frontier for incremental CivicPlus crawls.
+
+Remembers every document URL the spider has fetched (when, and with what
+content hash) in the crawl-state SQLite db, so a re-crawl only requests
+documents that are new or due for a revisit:
+
+- New URLs (not in the Bloom filter) are always scheduled, without a
+  database lookup.
+- Known URLs are scheduled once their revisit interval has elapsed. The
+  interval depends on the asset type and how close the meeting is:
+  agendas are re-checked daily around the meeting date (late changes,
+  packets), minutes weekly for a couple of months (approval, corrections),
+  and everything else rarely.
+
+Works alongside ConditionalGetMiddleware: the frontier decides whether to
+ask at all, conditional GET makes the asking cheap.
+"""
+
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from structure_it.utils.bloom import BloomFilter
+
+FRONTIER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_frontier (
+    url TEXT PRIMARY KEY,
+    asset_type TEXT,
+    meeting_date TEXT,
+    first_seen_at TEXT,
+    last_fetched_at TEXT,        -- Last 200 or 304 for this URL
+    content_hash TEXT,           -- SHA256 of the last downloaded body
+    fetch_count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+AGENDA_TYPES = {"Agenda", "AgendaPacket"}
+MINUTES_TYPES = {"Minutes"}
+
+
+class RevisitPolicy:
+    """Revisit intervals per asset type, relative to the meeting date."""
+
+    def __init__(
+        self,
+        agenda_window_days: int = 7,
+        minutes_window_days: int = 60,
+        default_interval: timedelta = timedelta(days=30),
+        rare_interval: timedelta = timedelta(days=365),
+    ):
+        """Initialize the policy.
+
+        Args:
+            agenda_window_days: Agendas are re-checked daily from this many
+                days before the meeting until this many days after it.
+            minutes_window_days: Minutes are re-checked weekly for this many
+                days after the meeting.
+            default_interval: Interval for undated or unknown assets.
+            rare_interval: Interval for settled documents (old agendas and
+                minutes, audio/video).
+        """
+        self.agenda_window_days = agenda_window_days
+        self.minutes_window_days = minutes_window_days
+        self.default_interval = default_interval
+        self.rare_interval = rare_interval
+
+    def interval(self, asset_type: str | None, meeting_date: str | None, today: date) -> timedelta:
+        """How long a fetched document stays fresh."""
+        try:
+            meeting = date.fromisoformat(meeting_date) if meeting_date else None
+        except ValueError:
+            meeting = None
+        if meeting is None:
+            return self.default_interval
+
+        days_after = (today - meeting).days
+        if asset_type in AGENDA_TYPES:
+            if -self.agenda_window_days <= days_after <= self.agenda_window_days:
+                return timedelta(days=1)
+            if days_after < 0:
+                return timedelta(days=7)
+            return self.rare_interval
+        if asset_type in MINUTES_TYPES:
+            if days_after <= self.minutes_window_days:
+                return timedelta(days=7)
+            return self.rare_interval
+        if asset_type in {"Audio", "Video", "Captions"}:
+            return self.rare_interval
+        return self.default_interval
+
+
+class CrawlFrontier:
+    """SQLite-backed seen-URL store with a Bloom filter front."""
+
+    def __init__(self, db_path: str | Path, policy: RevisitPolicy | None = None):
+        """Open (or create) the frontier.
+
+        Args:
+            db_path: Crawl-state SQLite file (shared with conditional GET).
+            policy: Revisit policy (defaults to RevisitPolicy()).
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.policy = policy or RevisitPolicy()
+
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(FRONTIER_SCHEMA)
+
+        known = self.conn.execute("SELECT count(*) FROM crawl_frontier").fetchone()[0]
+        self.seen = BloomFilter(capacity=max(known * 2, 100_000))
+        for (url,) in self.conn.execute("SELECT url FROM crawl_frontier"):
+            self.seen.add(url)
+
+        self.counts = {"new": 0, "due": 0, "fresh": 0}
+
+    def should_visit(
+        self,
+        url: str,
+        asset_type: str | None = None,
+        meeting_date: str | None = None,
+        now: datetime | None = None,
+    ) -> bool:
+        """Decide whether a discovered document link should be requested.
+
+        Args:
+            url: Document URL.
+            asset_type: Agenda, Minutes, AgendaPacket, ...
+            meeting_date: Meeting date (YYYY-MM-DD), if known.
+            now: Reference time (defaults to now).
+
+        Returns:
+            True for new URLs and for known URLs due for a revisit.
+        """
+        now = now or datetime.now()
+
+        if url not in self.seen:
+            self.counts["new"] += 1
+            self._remember(url, asset_type, meeting_date, now)
+            return True
+
+        row = self.conn.execute(
+            "SELECT last_fetched_at, asset_type, meeting_date FROM crawl_frontier WHERE url = ?",
+            [url],
+        ).fetchone()
+        if row is None:
+            # Bloom filter false positive
+            self.counts["new"] += 1
+            self._remember(url, asset_type, meeting_date, now)
+            return True
+        if row["last_fetched_at"] is None:
+            self.counts["due"] += 1
+            return True
+
+        interval = self.policy.interval(
+            asset_type or row["asset_type"], meeting_date or row["meeting_date"], now.date()
+        )
+        if now - datetime.fromisoformat(row["last_fetched_at"]) >= interval:
+            self.counts["due"] += 1
+            return True
+
+        self.counts["fresh"] += 1
+        return False
+
+    def _remember(
+        self, url: str, asset_type: str | None, meeting_date: str | None, now: datetime
+    ) -> None:
+        self.conn.execute(
+            "INSERT OR IGNORE INTO crawl_frontier (url, asset_type, meeting_date, first_seen_at) "
+            "VALUES (?, ?, ?, ?)",
+            [url, asset_type, meeting_date, now.isoformat()],
+        )
+        self.conn.commit()
+        self.seen.add(url)
+
+    def record_fetch(
+        self,
+        url: str,
+        content_hash: str | None = None,
+        asset_type: str | None = None,
+        meeting_date: str | None = None,
+    ) -> None:
+        """Record a completed fetch (content_hash None keeps the previous hash, e.g. on 304)."""
+        now = datetime.now()
+        self._remember(url, asset_type, meeting_date, now)
+        self.conn.execute(
+            """
+            UPDATE crawl_frontier SET
+                last_fetched_at = ?,
+                content_hash = COALESCE(?, content_hash),
+                asset_type = COALESCE(?, asset_type),
+                meeting_date = COALESCE(?, meeting_date),
+                fetch_count = fetch_count + 1
+            WHERE url = ?
+            """,
+            [now.isoformat(), content_hash, asset_type, meeting_date, url],
+        )
+        self.conn.commit()
+
+    def get(self, url: str) -> sqlite3.Row | None:
+        """Frontier record for a URL, if any."""
+        return self.conn.execute("SELECT * FROM crawl_frontier WHERE url = ?", [url]).fetchone()
+
+    def close(self) -> None:
+        self.conn.close()
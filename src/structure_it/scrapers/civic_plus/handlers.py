@@ -0,0 +1,235 @@
+"""Scrapy download handler that streams document bodies to disk.
+
+Scrapy's HTTP handler buffers the whole response body in memory and the
+spider then writes it out again, so a handful of concurrent 100 MB agenda
+packets inflate the crawler's RSS by hundreds of MB.
+
+StreamingDownloadHandler takes over requests flagged with
+``meta["stream_to_disk"] = True``:
+
+- The body is written to STREAM_DOWNLOAD_DIR chunk by chunk and hashed
+  (SHA256) on the fly; memory use is one chunk regardless of document size.
+- DOWNLOAD_MAXSIZE (or ``meta["download_maxsize"]``) is enforced from the
+  Content-Length header before reading, and again while streaming.
+- The response reaches the spider with an empty body and the file path,
+  hash and size in ``response.meta["download_path" | "download_sha256" |
+  "download_size"]``.
+
+HTML responses (CivicPlus viewer wrappers, error pages) and non-200
+statuses are small and are returned in memory as usual, so selectors,
+redirects and conditional GET keep working. Unflagged requests go to
+Scrapy's default HTTP handler. Requests still pass through the download
+slots, so DOWNLOAD_DELAY and concurrency limits apply unchanged.
+
+Flagged requests are sent with httpx rather than Twisted, so only these
+downloader settings are carried over: ``meta["proxy"]`` (with the
+Proxy-Authorization header HttpProxyMiddleware sets),
+DOWNLOAD_VERIFY_CERTIFICATES, DOWNLOADER_CLIENT_TLS_METHOD,
+DOWNLOADER_CLIENT_TLS_CIPHERS, DOWNLOAD_TIMEOUT and DOWNLOAD_MAXSIZE.
+Others (DOWNLOAD_BIND_ADDRESS, DOWNLOADER_CLIENTCONTEXTFACTORY, HTTP/2,
+DOWNLOAD_WARNSIZE) do not apply to streamed documents.
+"""
+
+import hashlib
+import os
+import ssl
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+from scrapy import Request
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+from scrapy.crawler import Crawler
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import Headers, Response
+from scrapy.responsetypes import responsetypes
+from scrapy.settings import BaseSettings
+from scrapy.utils.misc import build_from_crawler
+
+CHUNK_SIZE = 256 * 1024
+
+# DOWNLOADER_CLIENT_TLS_METHOD values; "TLS" negotiates the best version
+_TLS_METHODS = {
+    "TLS": None,
+    "TLSv1.0": ssl.TLSVersion.TLSv1,
+    "TLSv1.1": ssl.TLSVersion.TLSv1_1,
+    "TLSv1.2": ssl.TLSVersion.TLSv1_2,
+}
+
+
+def _ssl_context(settings: BaseSettings) -> ssl.SSLContext:
+    """SSL context matching Scrapy's TLS settings (no verification by default)."""
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    if settings.getbool("DOWNLOAD_VERIFY_CERTIFICATES"):
+        ctx.load_default_certs()
+    else:
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+    method = settings.get("DOWNLOADER_CLIENT_TLS_METHOD", "TLS")
+    if method not in _TLS_METHODS:
+        raise ValueError(f"Unsupported DOWNLOADER_CLIENT_TLS_METHOD: {method}")
+    if version := _TLS_METHODS[method]:
+        ctx.minimum_version = ctx.maximum_version = version
+    if ciphers := settings.get("DOWNLOADER_CLIENT_TLS_CIPHERS"):
+        ctx.set_ciphers(ciphers)
+    return ctx
+
+
+class StreamingDownloadHandler:
+    """HTTP(S) handler that streams flagged document downloads to disk."""
+
+    lazy = False
+
+    def __init__(self, crawler: Crawler):
+        self.crawler = crawler
+        settings = crawler.settings
+        self._default_handler: HTTP11DownloadHandler | None = None
+        self.download_dir = Path(settings.get("STREAM_DOWNLOAD_DIR", "temp_downloads"))
+        self.maxsize = settings.getint("DOWNLOAD_MAXSIZE")
+        self.timeout = settings.getfloat("DOWNLOAD_TIMEOUT", 180)
+        self._ssl_context = _ssl_context(settings)
+        self._limits = httpx.Limits(
+            max_keepalive_connections=settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN", 8)
+        )
+        self.client = self._make_client()
+        # httpx proxies are per client: one client per (proxy URL, credentials)
+        self._proxy_clients: dict[tuple[str, str | None], httpx.AsyncClient] = {}
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> "StreamingDownloadHandler":
+        return cls(crawler)
+
+    @property
+    def default_handler(self) -> HTTP11DownloadHandler:
+        """Scrapy's HTTP handler, built on first use for unflagged requests."""
+        if self._default_handler is None:
+            self._default_handler = build_from_crawler(HTTP11DownloadHandler, self.crawler)
+        return self._default_handler
+
+    async def download_request(self, request: Request) -> Response:
+        if not request.meta.get("stream_to_disk"):
+            return await self.default_handler.download_request(request)
+        return await self._stream(request)
+
+    async def close(self) -> None:
+        if self._default_handler is not None:
+            await self._default_handler.close()
+        await self.client.aclose()
+        for client in self._proxy_clients.values():
+            await client.aclose()
+
+    def _make_client(self, proxy: httpx.Proxy | None = None) -> httpx.AsyncClient:
+        transport = httpx.AsyncHTTPTransport(
+            verify=self._ssl_context, limits=self._limits, proxy=proxy, trust_env=False
+        )
+        # RedirectMiddleware handles redirects
+        return httpx.AsyncClient(transport=transport, follow_redirects=False, trust_env=False)
+
+    def _client_for(self, request: Request) -> httpx.AsyncClient:
+        """Client for the request's ``meta["proxy"]``, or the direct client."""
+        proxy_url = request.meta.get("proxy")
+        if not proxy_url:
+            return self.client
+        auth = request.headers.get(b"Proxy-Authorization")
+        key = (proxy_url, auth.decode("latin-1") if auth else None)
+        if key not in self._proxy_clients:
+            proxy_headers = {"Proxy-Authorization": key[1]} if key[1] else None
+            self._proxy_clients[key] = self._make_client(
+                httpx.Proxy(proxy_url, headers=proxy_headers)
+            )
+        return self._proxy_clients[key]
+
+    def _response(
+        self,
+        request: Request,
+        upstream: httpx.Response,
+        body: bytes,
+        flags: list[str] | None = None,
+    ) -> Response:
+        headers = Headers(upstream.headers.multi_items())
+        if not body:
+            # The body was decoded into a file; nothing left to decompress
+            headers.pop(b"Content-Encoding", None)
+        respcls = responsetypes.from_args(headers=headers, url=str(upstream.url), body=body)
+        response: Response = respcls(
+            url=request.url,
+            status=upstream.status_code,
+            headers=headers,
+            body=body,
+            flags=flags,
+            request=request,
+            protocol=upstream.http_version,
+        )
+        return response
+
+    def _check_size(
+        self, size: int, maxsize: int, request: Request, path: Path | None = None
+    ) -> None:
+        if maxsize and size > maxsize:
+            if path is not None:
+                path.unlink(missing_ok=True)
+            self.crawler.stats.inc_value("streaming/too_large")
+            raise IgnoreRequest(
+                f"Document exceeds download size cap ({size} > {maxsize} bytes): {request.url}"
+            )
+
+    async def _stream(self, request: Request) -> Response:
+        maxsize = request.meta.get("download_maxsize", self.maxsize)
+        headers = [
+            (key.decode("latin-1"), value.decode("latin-1"))
+            for key, values in request.headers.items()
+            for value in values
+            # Sent to the proxy only (see _client_for), never to the origin
+            if key.lower() != b"proxy-authorization"
+        ]
+
+        started = time.monotonic()
+        async with self._client_for(request).stream(
+            request.method,
+            request.url,
+            headers=headers,
+            content=request.body or None,
+            timeout=request.meta.get("download_timeout", self.timeout),
+        ) as upstream:
+            # Time to response headers, as HTTP11DownloadHandler reports it
+            request.meta["download_latency"] = time.monotonic() - started
+            content_length = upstream.headers.get("Content-Length")
+            if content_length and content_length.isdigit():
+                self._check_size(int(content_length), maxsize, request)
+
+            content_type = upstream.headers.get("Content-Type", "").lower()
+            if upstream.status_code != 200 or "text/html" in content_type:
+                chunks = []
+                received = 0
+                async for chunk in upstream.aiter_raw(CHUNK_SIZE):
+                    received += len(chunk)
+                    self._check_size(received, maxsize, request)
+                    chunks.append(chunk)
+                return self._response(request, upstream, b"".join(chunks))
+
+            self.download_dir.mkdir(parents=True, exist_ok=True)
+            download_id = uuid.uuid4().hex
+            part_path = self.download_dir / f".{download_id}.part"
+            hasher = hashlib.sha256()
+            size = 0
+            try:
+                with open(part_path, "wb") as f:
+                    async for chunk in upstream.aiter_bytes(CHUNK_SIZE):
+                        size += len(chunk)
+                        self._check_size(size, maxsize, request, part_path)
+                        hasher.update(chunk)
+                        f.write(chunk)
+            except BaseException:
+                part_path.unlink(missing_ok=True)
+                raise
+
+        final_path = self.download_dir / f"{download_id}.download"
+        os.replace(part_path, final_path)
+
+        request.meta["download_path"] = str(final_path)
+        request.meta["download_sha256"] = hasher.hexdigest()
+        request.meta["download_size"] = size
+        self.crawler.stats.inc_value("streaming/files")
+        self.crawler.stats.inc_value("streaming/bytes", size)
+        return self._response(request, upstream, b"", flags=["streamed"])
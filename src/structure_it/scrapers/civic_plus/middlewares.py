@@ -0,0 +1,525 @@
+"""Scrapy downloader middlewares for CivicPlus spiders.
+
+ConditionalGetMiddleware:
+    Remembers the ETag / Last-Modified validators of every downloaded
+    document in a persistent SQLite store and revalidates on the next crawl
+    (If-None-Match / If-Modified-Since). A 304 means the document is
+    unchanged: the request is dropped before it reaches the spider, so no
+    item is produced and neither RawStagingPipeline nor StructureItPipeline
+    runs for it.
+
+    Only requests with ``meta["conditional_get"] = True`` are revalidated
+    (document downloads); listing pages are always fetched in full because
+    they are how new documents are discovered.
+
+    The validators of a 200 are held in ``meta["http_validators"]`` and only
+    saved once the item built from the response has passed every item
+    pipeline (item_scraped). If the spider, the download handler or a
+    pipeline (RawStagingPipeline drops items it fails to stage) fails, the
+    next crawl downloads the document in full instead of being told 304.
+
+    Stats (also logged when the spider closes):
+        conditional_get/requests      revalidation requests sent
+        conditional_get/not_modified  304 responses
+        conditional_get/bytes_saved   body bytes not downloaded thanks to 304s
+
+FleetThrottleMiddleware:
+    Per-host politeness shared by every crawler in the process. Scrapy's
+    DOWNLOAD_DELAY and CONCURRENT_REQUESTS_PER_DOMAIN are enforced per
+    crawler, so several spiders (or sites) crawled at once by the fleet
+    orchestrator (`scrapers.fleet`) could hit one host at the sum of their
+    rates. This middleware holds each request until the host has a free
+    connection (FLEET_HOST_CONCURRENCY) and FLEET_HOST_DELAY has passed
+    since the previous request to that host from any crawler.
+
+    With FLEET_THROTTLE_ADAPTIVE the host's delay and connection limit are
+    tuned from what the host reports back, within FLEET_HOST_DELAY_MIN /
+    FLEET_HOST_DELAY_MAX and 1..FLEET_HOST_CONCURRENCY: 429 / 5xx /
+    timeouts double the delay (or follow Retry-After) and halve the
+    connections, latency climbing well above the host's best eases off, and
+    runs of fast healthy responses shorten the delay, then add connections.
+    All spiders touching a host share one controller (the agenda, bids,
+    permits and services spiders of a municipality run against the same
+    server); the most conservative bounds among them apply.
+
+    On for every profile from `get_scraper_settings` unless
+    STRUCTURE_IT_ADAPTIVE_POLITENESS=false.
+
+    Stats:
+        fleet_throttle/delayed        requests that had to wait for the host
+        fleet_throttle/wait_seconds   total time requests waited
+        fleet_throttle/hosts/<host>/  current delay, concurrency, rate_per_min
+                                      (responses in the last minute),
+                                      latency_ms, responses, errors
+"""
+
+import asyncio
+import random
+import sqlite3
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+from scrapy import Request, Spider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import Response
+from scrapy.statscollectors import StatsCollector
+
+VALIDATOR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_validators (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_length INTEGER,      -- Body size of the last full download
+    checked_at TEXT,             -- Last revalidation (200 or 304)
+    modified_at TEXT             -- Last full (200) download
+);
+"""
+
+
+class ValidatorStore:
+    """SQLite-backed store of HTTP cache validators per URL."""
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(VALIDATOR_SCHEMA)
+
+    def get(self, url: str) -> sqlite3.Row | None:
+        """Stored validators for a URL, if any."""
+        row: sqlite3.Row | None = self.conn.execute(
+            "SELECT * FROM http_validators WHERE url = ?", [url]
+        ).fetchone()
+        return row
+
+    def save(self, url: str, etag: str | None, last_modified: str | None, content_length: int) -> None:
+        """Record the validators of a full (200) download."""
+        now = datetime.now().isoformat()
+        self.conn.execute(
+            """
+            INSERT INTO http_validators
+            (url, etag, last_modified, content_length, checked_at, modified_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                content_length = excluded.content_length,
+                checked_at = excluded.checked_at,
+                modified_at = excluded.modified_at
+            """,
+            [url, etag, last_modified, content_length, now, now],
+        )
+        self.conn.commit()
+
+    def touch(self, url: str) -> None:
+        """Record a successful revalidation (304)."""
+        self.conn.execute(
+            "UPDATE http_validators SET checked_at = ? WHERE url = ?",
+            [datetime.now().isoformat(), url],
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class ConditionalGetMiddleware:
+    """Revalidate document downloads and drop unchanged ones (HTTP 304)."""
+
+    def __init__(self, store: ValidatorStore, stats: StatsCollector):
+        self.store = store
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> "ConditionalGetMiddleware":
+        if not crawler.settings.getbool("CONDITIONAL_GET_ENABLED", True):
+            raise NotConfigured
+        store = ValidatorStore(crawler.settings.get("CRAWL_STATE_DB", "./data/crawl_state.sqlite"))
+        assert crawler.stats is not None
+        middleware = cls(store, crawler.stats)
+        crawler.signals.connect(middleware.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_request(self, request: Request, spider: Spider | None = None) -> None:
+        if not request.meta.get("conditional_get"):
+            return None
+
+        validators = self.store.get(request.url)
+        if validators is None:
+            return None
+
+        if validators["etag"]:
+            request.headers.setdefault(b"If-None-Match", validators["etag"])
+        if validators["last_modified"]:
+            request.headers.setdefault(b"If-Modified-Since", validators["last_modified"])
+        if validators["etag"] or validators["last_modified"]:
+            self.stats.inc_value("conditional_get/requests")
+        return None
+
+    def process_response(
+        self, request: Request, response: Response, spider: Spider | None = None
+    ) -> Response:
+        if not request.meta.get("conditional_get"):
+            return response
+
+        if response.status == 304:
+            validators = self.store.get(request.url)
+            self.store.touch(request.url)
+            self.stats.inc_value("conditional_get/not_modified")
+            self.stats.inc_value(
+                "conditional_get/bytes_saved", (validators["content_length"] or 0) if validators else 0
+            )
+            # Lets the request errback tell "unchanged" apart from other ignores
+            request.meta["not_modified"] = True
+            raise IgnoreRequest(f"Not modified since last crawl: {request.url}")
+
+        if response.status == 200:
+            etag = response.headers.get(b"ETag")
+            last_modified = response.headers.get(b"Last-Modified")
+            if etag or last_modified:
+                # Saved by item_scraped once the document is staged. Keyed by
+                # URL: a viewer page's follow-up request carries its meta along
+                request.meta.setdefault("http_validators", {})[request.url] = {
+                    "etag": etag.decode("latin-1") if etag else None,
+                    "last_modified": last_modified.decode("latin-1") if last_modified else None,
+                    # Streamed downloads arrive with an empty body
+                    "content_length": request.meta.get("download_size", len(response.body)),
+                }
+            self.stats.inc_value("conditional_get/modified")
+        return response
+
+    def item_scraped(self, item: Any, response: Response, spider: Spider) -> None:
+        """Save the validators of the response an item came from, now that it is stored."""
+        request = getattr(response, "request", None)
+        if request is None:
+            return
+        for url, validators in request.meta.get("http_validators", {}).items():
+            self.store.save(url, **validators)
+
+    def report(self) -> dict[str, float]:
+        """Revalidation counts, 304 ratio and bytes saved for this crawl."""
+        requests = self.stats.get_value("conditional_get/requests", 0)
+        not_modified = self.stats.get_value("conditional_get/not_modified", 0)
+        return {
+            "requests": requests,
+            "not_modified": not_modified,
+            "not_modified_ratio": round(not_modified / requests, 3) if requests else 0.0,
+            "bytes_saved": self.stats.get_value("conditional_get/bytes_saved", 0),
+        }
+
+    def spider_closed(self, spider: Spider) -> None:
+        report = self.report()
+        self.stats.set_value("conditional_get/not_modified_ratio", report["not_modified_ratio"])
+        spider.logger.info(
+            f"[CONDITIONAL GET] {report['not_modified']}/{report['requests']} revalidated documents "
+            f"unchanged ({report['not_modified_ratio']:.0%}), "
+            f"{report['bytes_saved'] / 1024 / 1024:.1f} MB not downloaded"
+        )
+        self.store.close()
+
+
+class _HostState:
+    def __init__(self, delay: float, concurrency: int, min_delay: float, max_delay: float, adaptive: bool):
+        self.delay = delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_concurrency = max(concurrency, 1)
+        # Adaptive hosts start with one connection and earn more
+        self.limit = 1 if adaptive else self.max_concurrency
+        self.adaptive = adaptive
+        self.active = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.lock = asyncio.Lock()
+        self.next_start = 0.0
+        self.latency: float | None = None  # EWMA of time to response headers
+        self.baseline: float | None = None  # Fastest response seen
+        self.streak = 0  # Healthy responses since the last adjustment
+        self.responses = 0
+        self.errors = 0
+        self.recent: deque[float] = deque()  # Response times in the last minute
+
+    def merge(self, delay: float, concurrency: int, min_delay: float, max_delay: float, adaptive: bool) -> None:
+        """Apply another crawler's bounds; the most conservative ones win."""
+        self.min_delay = max(self.min_delay, min_delay)
+        self.max_delay = max(self.max_delay, max_delay, self.min_delay)
+        self.max_concurrency = min(self.max_concurrency, max(concurrency, 1))
+        self.limit = min(self.limit, self.max_concurrency)
+        self.adaptive = self.adaptive and adaptive
+        if not self.adaptive:
+            self.delay = max(self.delay, delay)
+        self.delay = min(max(self.delay, self.min_delay), self.max_delay)
+
+    def wake(self) -> None:
+        while self.waiters and self.active < self.limit:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+    def observe(self, latency: float | None, error: bool, retry_after: float | None) -> None:
+        now = time.monotonic()
+        self.responses += 1
+        self.recent.append(now)
+        while self.recent and self.recent[0] < now - 60:
+            self.recent.popleft()
+        if not self.adaptive:
+            return
+
+        if error:
+            # Back off sharply: double the delay, halve the connections
+            self.errors += 1
+            self.streak = 0
+            self.delay = min(self.max_delay, max(self.delay * 2, self.min_delay, 0.25, retry_after or 0))
+            self.limit = max(1, self.limit // 2)
+            if retry_after:
+                self.next_start = max(self.next_start, now + retry_after)
+            return
+
+        if latency is None:
+            return
+        self.latency = latency if self.latency is None else 0.7 * self.latency + 0.3 * latency
+        self.baseline = latency if self.baseline is None else min(self.baseline, latency)
+        if self.latency > max(2 * self.baseline, self.baseline + 0.5):
+            # The server is slowing down under our load: ease off
+            self.streak = 0
+            self.delay = min(self.max_delay, max(self.delay * 1.25, self.min_delay))
+            self.limit = max(1, self.limit - 1)
+            return
+
+        # Speed up gradually: first shorten the delay, then add connections
+        self.streak += 1
+        if self.streak >= 5 * self.limit:
+            self.streak = 0
+            if self.delay > self.min_delay:
+                self.delay *= 0.8
+                if self.delay - self.min_delay < 0.05:
+                    self.delay = self.min_delay
+            elif self.limit < self.max_concurrency:
+                self.limit += 1
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "delay": round(self.delay, 3),
+            "concurrency": self.limit,
+            "rate_per_min": len(self.recent),
+            "latency_ms": round(self.latency * 1000) if self.latency is not None else 0,
+            "responses": self.responses,
+            "errors": self.errors,
+        }
+
+
+class HostThrottle:
+    """Per-host connection limit and request spacing across crawlers.
+
+    With bounds (min_delay < max_delay), a host's delay and connection
+    limit adapt to how it responds: errors (429, 5xx, timeouts) double the
+    delay and halve the connections, rising latency eases off, and a run of
+    fast healthy responses shortens the delay and then adds connections.
+    """
+
+    _shared: "HostThrottle | None" = None
+
+    def __init__(self) -> None:
+        self.hosts: dict[str, _HostState] = {}
+
+    @classmethod
+    def shared(cls) -> "HostThrottle":
+        """The process-wide throttle used by FleetThrottleMiddleware."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def _state(
+        self, host: str, delay: float, concurrency: int, min_delay: float | None, max_delay: float | None
+    ) -> _HostState:
+        lo, hi = delay, delay
+        adaptive = False
+        if min_delay is not None and max_delay is not None and min_delay < max_delay:
+            lo, hi = min_delay, max_delay
+            adaptive = True
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = _HostState(
+                min(max(delay, lo), hi), concurrency, lo, hi, adaptive
+            )
+        else:
+            state.merge(delay, concurrency, lo, hi, adaptive)
+        return state
+
+    async def acquire(
+        self,
+        host: str,
+        delay: float,
+        concurrency: int,
+        jitter: bool = False,
+        min_delay: float | None = None,
+        max_delay: float | None = None,
+    ) -> float:
+        """Wait for a free connection and the host's delay; returns seconds waited.
+
+        Args:
+            host: Host name.
+            delay: Seconds between request starts to this host (the starting
+                point when adaptive).
+            concurrency: Connections per host (the ceiling when adaptive).
+            jitter: Randomize the delay to 0.5x-1.5x, like RANDOMIZE_DOWNLOAD_DELAY.
+            min_delay: Lower bound of the adaptive delay.
+            max_delay: Upper bound of the adaptive delay. Without both bounds
+                the delay and concurrency stay fixed. Crawlers sharing a host
+                share its state; the most conservative bounds apply.
+        """
+        state = self._state(host, delay, concurrency, min_delay, max_delay)
+
+        started = time.monotonic()
+        if state.active < state.limit and not state.waiters:
+            state.active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            state.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self.release(host)
+                raise
+        async with state.lock:
+            wait = state.next_start - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            factor = random.uniform(0.5, 1.5) if jitter else 1.0
+            state.next_start = time.monotonic() + state.delay * factor
+        return time.monotonic() - started
+
+    def release(
+        self, host: str, latency: float | None = None, error: bool = False, retry_after: float | None = None
+    ) -> None:
+        """Free the connection taken by acquire() and feed back the outcome.
+
+        Args:
+            host: Host name.
+            latency: Seconds until the response headers arrived.
+            error: The request failed in a way that suggests overload
+                (429, 5xx, timeout, connection error).
+            retry_after: Seconds the server asked us to wait.
+        """
+        state = self.hosts[host]
+        state.active -= 1
+        state.observe(latency, error, retry_after)
+        state.wake()
+
+    def snapshot(self, host: str) -> dict[str, float]:
+        """Current delay, connections, observed rate and latency for host."""
+        return self.hosts[host].snapshot()
+
+
+class FleetThrottleMiddleware:
+    """Enforce (and adapt) per-host delay and concurrency across all crawlers in the process."""
+
+    OVERLOAD_STATUSES = {429, 500, 502, 503, 504, 520, 521, 522, 524}
+
+    def __init__(
+        self,
+        throttle: HostThrottle,
+        delay: float,
+        concurrency: int,
+        jitter: bool,
+        stats: StatsCollector,
+        min_delay: float | None = None,
+        max_delay: float | None = None,
+    ) -> None:
+        self.throttle = throttle
+        self.delay = delay
+        self.concurrency = concurrency
+        self.jitter = jitter
+        self.stats = stats
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.hosts: set[str] = set()
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> "FleetThrottleMiddleware":
+        settings = crawler.settings
+        if not settings.getbool("FLEET_THROTTLE_ENABLED"):
+            raise NotConfigured
+        assert crawler.stats is not None
+        adaptive = settings.getbool("FLEET_THROTTLE_ADAPTIVE")
+        middleware = cls(
+            HostThrottle.shared(),
+            settings.getfloat("FLEET_HOST_DELAY", settings.getfloat("DOWNLOAD_DELAY")),
+            settings.getint("FLEET_HOST_CONCURRENCY", 1),
+            settings.getbool("RANDOMIZE_DOWNLOAD_DELAY"),
+            crawler.stats,
+            settings.getfloat("FLEET_HOST_DELAY_MIN") if adaptive else None,
+            settings.getfloat("FLEET_HOST_DELAY_MAX") if adaptive else None,
+        )
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    async def process_request(self, request: Request, spider: Spider | None = None) -> None:
+        host = urlparse(request.url).hostname
+        if not host:
+            return None
+        waited = await self.throttle.acquire(
+            host, self.delay, self.concurrency, self.jitter, self.min_delay, self.max_delay
+        )
+        # Released once the download finishes (or fails)
+        request.meta["_fleet_throttle_host"] = host
+        request.meta["_fleet_throttle_started"] = time.monotonic()
+        self.hosts.add(host)
+        if waited >= 0.001:
+            self.stats.inc_value("fleet_throttle/delayed")
+            # StatsCollector sums floats as well; its annotation says int
+            self.stats.inc_value("fleet_throttle/wait_seconds", round(waited, 3))  # type: ignore[arg-type]
+        return None
+
+    def _release(self, request: Request, error: bool, retry_after: float | None = None) -> None:
+        host = request.meta.pop("_fleet_throttle_host", None)
+        started = request.meta.pop("_fleet_throttle_started", None)
+        if host is None:
+            return
+        latency = request.meta.get("download_latency")
+        if latency is None and started is not None:
+            latency = time.monotonic() - started
+        self.throttle.release(host, None if error else latency, error, retry_after)
+        self._record(host)
+
+    def _record(self, host: str) -> None:
+        for key, value in self.throttle.snapshot(host).items():
+            self.stats.set_value(f"fleet_throttle/hosts/{host}/{key}", value)
+
+    def process_response(
+        self, request: Request, response: Response, spider: Spider | None = None
+    ) -> Response:
+        error = response.status in self.OVERLOAD_STATUSES
+        retry_after = None
+        if error:
+            header = (response.headers.get(b"Retry-After") or b"").decode("latin-1").strip()
+            retry_after = min(float(header), 300.0) if header.isdigit() else None
+        self._release(request, error, retry_after)
+        return response
+
+    def process_exception(
+        self, request: Request, exception: Exception, spider: Spider | None = None
+    ) -> None:
+        # Timeouts and refused/reset connections: treat the host as overloaded.
+        # IgnoreRequest from later middlewares says nothing about the host.
+        self._release(request, not isinstance(exception, IgnoreRequest))
+        return None
+
+    def spider_closed(self, spider: Spider) -> None:
+        for host in sorted(self.hosts):
+            self._record(host)
+            state = self.throttle.snapshot(host)
+            spider.logger.info(
+                f"[HOST THROTTLE] {host}: delay {state['delay']}s, {state['concurrency']} connections, "
+                f"{state['rate_per_min']} req/min, latency {state['latency_ms']} ms, "
+                f"{state['errors']}/{state['responses']} errors"
+            )
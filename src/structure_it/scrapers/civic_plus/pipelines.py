@@ -1,16 +1,39 @@
 """Scrapy Pipelines for structure-it.
 
 This pipeline integrates Scrapy with our StarSchemaStorage and GeminiExtractor.
+
+StructureItPipeline does not convert or extract inline: `process_item`
+appends the item to a durable work queue (see work_queue.py) and returns, so
+the crawl never waits on Gemini or DuckDB. A WorkerPool running ItemProcessor
+drains the queue, inside the crawl process (PIPELINE_WORKERS > 0) and/or as a
+separate worker process:
+
+    python -m structure_it.scrapers.civic_plus.pipelines --workers 8 --watch
+
+Items whose bytes are already in the raw-layer manifest (etl.manifest) under
+another URL are not queued: the manifest is the one content-hash index for
+both extraction paths. It is filled by RawStagingPipeline (run it first, at
+a lower ITEM_PIPELINES order) and by `etl.transform --rescan`.
 """
 
+import argparse
 import asyncio
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from urllib.parse import urljoin
+from typing import Any, TypeVar
 
-from markitdown import MarkItDown
-from parsel import Selector
+from scrapy import Spider
+from scrapy.crawler import Crawler
+from scrapy.statscollectors import StatsCollector
+from scrapy.utils.defer import deferred_from_coro
+from twisted.internet.defer import Deferred
 
-from structure_it.extractors import GeminiExtractor
+from structure_it.config import PIPELINE_QUEUE_DB, PIPELINE_WORKERS
+from structure_it.etl.manifest import RawManifest
+from structure_it.extractors import ExtractorRegistry
 from structure_it.schemas.civic import (
     CivicMeeting, 
     BuildingPermit, 
@@ -18,38 +41,68 @@ from structure_it.schemas.civic import (
     CivicServiceRequest, 
     CivicFinancialReport
 )
+from structure_it.scrapers.civic_plus.work_queue import WorkerPool, WorkQueue, format_snapshot
 from structure_it.storage.star_schema_storage import StarSchemaStorage
+from structure_it.utils.convert import DocumentConverter
 from structure_it.utils.hashing import generate_entity_id, generate_id
-from structure_it.utils.safety import DEFAULT_SAFE_SESSION
+from structure_it.utils.safety import AsyncSafeSession
 
+logger = logging.getLogger(__name__)
 
-class StructureItPipeline:
-    """Pipeline to download, extract, and store civic data.
-    
-    Leverages Scrapy's native async support.
-    """
+T = TypeVar("T")
 
-    def __init__(self):
+
+class ItemProcessor:
+    """Converts, extracts and stores one queued item (the work behind the pipeline)."""
+
+    def __init__(self) -> None:
         self.storage = StarSchemaStorage()
-        self.md = MarkItDown()
-        self.meeting_extractor = GeminiExtractor(schema=CivicMeeting)
-        self.permit_extractor = GeminiExtractor(schema=BuildingPermit)
-        self.bid_extractor = GeminiExtractor(schema=CivicBid)
-        self.service_extractor = GeminiExtractor(schema=CivicServiceRequest)
-        self.financial_extractor = GeminiExtractor(schema=CivicFinancialReport)
-        self.session = DEFAULT_SAFE_SESSION
+        # DuckDB calls are synchronous: run them on one dedicated thread so
+        # they neither block the event loop nor share the connection across threads
+        self.db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="duckdb")
+        self.converter = DocumentConverter()
+        # All extractors share one pooled Gemini client
+        self.extractors = ExtractorRegistry(
+            {
+                "civic_meeting": CivicMeeting,
+                "building_permit": BuildingPermit,
+                "civic_bid": CivicBid,
+                "civic_service_request": CivicServiceRequest,
+                "civic_financial_report": CivicFinancialReport,
+            }
+        )
+        self.meeting_extractor = self.extractors.get("civic_meeting")
+        self.permit_extractor = self.extractors.get("building_permit")
+        self.bid_extractor = self.extractors.get("civic_bid")
+        self.service_extractor = self.extractors.get("civic_service_request")
+        self.financial_extractor = self.extractors.get("civic_financial_report")
+        self.session = AsyncSafeSession(requests_per_minute=10)
+
+    async def _db(self, func: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self.db_executor, func, *args)
 
-    async def process_item(self, item, spider):
-        """Process a single item asynchronously.
+    async def close(self) -> None:
+        await self.session.aclose()
+        logger.info(f"Extractor pool: {self.extractors.summary()}")
+        self.extractors.close()
+        self.db_executor.shutdown()
+        self.storage.close()
+
+    async def process(self, item: dict) -> None:
+        """Process a single queued item.
 
         Expects item to have 'temp_path' from spider (already downloaded via Scrapy).
         This ensures all downloads respect Scrapy's rate limiting.
+
+        Raises:
+            Exception: Any conversion/extraction/storage error; the worker pool
+                records it and retries the item.
         """
         url = item["url"]
         source_type = item.get("source_type", "civic_meeting")
         entity_id = generate_entity_id(url, source_type)
 
-        spider.logger.info(f"Processing item: {item.get('title', 'Untitled')} ({url})")
+        logger.info(f"Processing item: {item.get('title', 'Untitled')} ({url})")
 
         try:
             # 1. Get content from pre-downloaded file or raw_text
@@ -62,17 +115,16 @@ class StructureItPipeline:
                 # Normal case: Spider already downloaded via Scrapy (rate-limited)
                 temp_path = Path(item["temp_path"])
                 if not temp_path.exists():
-                    spider.logger.error(f"temp_path does not exist: {temp_path}")
-                    return item
+                    # Retried, then parked as failed, rather than marked done
+                    raise FileNotFoundError(f"temp_path does not exist: {temp_path}")
 
-                # Convert to markdown (CPU Bound - Run in Thread)
-                spider.logger.info(f"Converting {temp_path} to MD...")
-                result = await asyncio.to_thread(self.md.convert, str(temp_path))
-                content = result.text_content
+                # Convert to text (CPU Bound - Run in Thread); HTML skips MarkItDown
+                logger.info(f"Converting {temp_path} to MD...")
+                content = await asyncio.to_thread(self.converter.convert, temp_path, item.get("content_type"))
             else:
                 # Fallback: Download directly (only for legacy/other spiders)
                 # This path should rarely be hit with the updated spider
-                spider.logger.warning(f"No temp_path - falling back to direct download for {url}")
+                logger.warning(f"No temp_path - falling back to direct download for {url}")
                 ext = ".pdf"
                 if item.get("content_type") == "html" or url.endswith(".aspx") or url.endswith(".html"):
                     ext = ".html"
@@ -80,25 +132,24 @@ class StructureItPipeline:
                 temp_path.parent.mkdir(exist_ok=True)
 
                 if not temp_path.exists():
-                    spider.logger.info(f"Downloading {url}...")
-                    await asyncio.to_thread(self._download_file, url, temp_path, ext == ".html")
+                    logger.info(f"Downloading {url}...")
+                    await self.session.download(url, temp_path, expected_html=ext == ".html")
 
-                result = await asyncio.to_thread(self.md.convert, str(temp_path))
-                content = result.text_content
+                content = await asyncio.to_thread(self.converter.convert, temp_path, ext.lstrip("."))
 
             # 3. CDC Check (Memory Phase)
             content_hash = generate_id(content)
             
-            is_new, has_changed = await asyncio.to_thread(
+            is_new, has_changed = await self._db(
                 self.storage.check_document_status, entity_id, content_hash
             )
 
             if not is_new and not has_changed:
-                spider.logger.info(f"Skipping {entity_id} (No Change)")
-                return item
+                logger.info(f"Skipping {entity_id} (No Change)")
+                return
 
             # 4. Extraction (Brain Phase - Network Bound)
-            spider.logger.info(f"Extracting with Gemini ({source_type})...")
+            logger.info(f"Extracting with Gemini ({source_type})...")
             
             if source_type == "building_permit":
                 prompt = f"Extract building permit data from this document: {item.get('title')}"
@@ -134,92 +185,162 @@ class StructureItPipeline:
                 if hasattr(extracted_data, 'date') and item.get('meeting_date'):
                      extracted_data.date = item['meeting_date']
 
-            # 5. Storage
-            await self.storage.store_entity(
-                entity_id=entity_id,
-                source_type=source_type,
-                source_url=url,
-                raw_content=content,
-                structured_data=extracted_data.to_dict(),
-                metadata=item,
+            # 5. Storage (on the DuckDB thread)
+            await self._db(
+                self.storage.store_entity_sync,
+                entity_id,
+                source_type,
+                url,
+                content,
+                extracted_data.to_dict(),
+                item,
             )
-            spider.logger.info(f"Successfully stored {entity_id}")
+            logger.info(f"Successfully stored {entity_id}")
 
         except Exception as e:
-            spider.logger.error(f"Error processing {url}: {e}")
+            logger.error(f"Error processing {url}: {e}")
+            raise
+
+
+class StructureItPipeline:
+    """Pipeline to download, extract, and store civic data.
+
+    Queues items durably and returns immediately; extraction runs in a
+    worker pool so crawl speed and extraction speed are independent.
+    """
+
+    def __init__(
+        self,
+        queue_db: str = PIPELINE_QUEUE_DB,
+        workers: int = PIPELINE_WORKERS,
+        stats: StatsCollector | None = None,
+        raw_dir: str = "./data/raw",
+    ):
+        """Initialize the pipeline.
+
+        Args:
+            queue_db: Work queue SQLite file.
+            workers: In-process extraction workers (0 = only enqueue; run
+                the worker CLI separately).
+            stats: Scrapy stats collector.
+            raw_dir: Raw layer whose manifest identifies duplicate documents.
+        """
+        self.queue = WorkQueue(queue_db)
+        self.manifest = RawManifest(raw_dir)
+        self.workers = workers
+        self.stats = stats
+        self.processor: ItemProcessor | None = None
+        self.pool: WorkerPool | None = None
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> "StructureItPipeline":
+        settings = crawler.settings
+        return cls(
+            settings.get("PIPELINE_QUEUE_DB", PIPELINE_QUEUE_DB),
+            settings.getint("PIPELINE_WORKERS", PIPELINE_WORKERS),
+            crawler.stats,
+        )
+
+    def open_spider(self, spider: Spider) -> None:
+        if self.workers > 0:
+            self.processor = ItemProcessor()
+            self.pool = WorkerPool(
+                WorkQueue(self.queue.db_path),
+                self.processor.process,
+                concurrency=self.workers,
+                stats=self.stats,
+            )
+            self.pool.start()
 
+    async def process_item(self, item: Any, spider: Spider) -> Any:
+        """Queue the item for extraction and hand it on immediately.
+
+        Items whose downloaded bytes the raw manifest already has under another
+        URL are not extracted again (RawStagingPipeline records them as aliases).
+        """
+        source_type = item.get("source_type", "civic_meeting")
+        entity_id = generate_entity_id(item["url"], source_type)
+        if item.get("content_hash"):
+            canonical = self.manifest.find_canonical(source_type, item["content_hash"], entity_id)
+            if canonical is not None:
+                if self.stats is not None:
+                    self.stats.inc_value("work_queue/duplicates")
+                spider.logger.info(f"Duplicate of {canonical}, not queued: {item['url']}")
+                return item
+        self.queue.enqueue(entity_id, dict(item))
+        if self.stats is not None:
+            self.stats.inc_value("work_queue/enqueued")
+        spider.logger.info(f"Queued item: {item.get('title', 'Untitled')} ({entity_id})")
         return item
 
-    def _download_file(self, url, path, expected_html=False):
-        """Helper for blocking download with viewer unwrapping."""
-        
-        # 1. HEAD Check for size and type
-        try:
-            head = self.session.head(url, allow_redirects=True, timeout=5)
-            size = int(head.headers.get('Content-Length', 0))
-            content_type = head.headers.get('Content-Type', '').lower()
-            
-            if size > 100_000_000: # 100MB limit
-                raise ValueError(f"File too large: {size} bytes")
-            
-            # 2. Viewer Page Detection
-            if "text/html" in content_type and not expected_html:
-                # We expected a binary file (PDF), but got HTML.
-                # This might be a viewer wrapper.
-                print(f"Detected HTML wrapper for expected binary: {url}. Attempting to unwrap...")
-                
-                # Fetch the HTML
-                r = self.session.get(url, timeout=10)
-                r.raise_for_status()
-                html_content = r.text
-                
-                # Use Selector to find a better link
-                sel = Selector(text=html_content)
-                
-                # Common CivicPlus download patterns
-                # 1. <a id="download-link" ...>
-                # 2. <a href=".../View/...?write=true">
-                # 3. Link with text "Download"
-                
-                download_url = None
-                
-                # Try specific ID first
-                download_url = sel.css("#download-link::attr(href)").get()
-                
-                if not download_url:
-                    # Try link with 'write=true' (CivicPlus standard for forcing download)
-                    download_url = sel.css('a[href*="write=true"]::attr(href)').get()
-                    
-                if not download_url:
-                    # Try link with text "Download"
-                    # xpath: //a[contains(text(), "Download")]
-                    download_url = sel.xpath('//a[contains(translate(text(), "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz"), "download")]/@href').get()
-
-                if download_url:
-                    # Resolve relative URL
-                    download_url = urljoin(url, download_url)
-                    print(f"Found unwrapped download URL: {download_url}")
-                    # Recursively call (but ensure we don't loop forever - simple recursion is okay here as likely 1 level)
-                    # We pass expected_html=False again to ensure the new link is also binary
-                    return self._download_file(download_url, path, expected_html=False)
-                else:
-                    print(f"Could not find download link in wrapper. Proceeding with HTML content.")
-                    # Write the HTML content we already fetched? 
-                    # Or just let it fall through? 
-                    # If we write HTML to a .pdf file, MarkItDown might fail or just extract text.
-                    # Let's write the HTML content we have to the path to avoid re-requesting
-                    with open(path, "w", encoding="utf-8") as f:
-                        f.write(html_content)
-                    return
+    def close_spider(self, spider: Spider) -> "Deferred[None]":
+        return deferred_from_coro(self._close(spider))
 
-        except Exception as e:
-            # If head fails or isn't supported, we proceed with caution
-            # print(f"Head request failed: {e}")
-            pass
-
-        # 3. Normal Download
-        with self.session.get(url, stream=True) as r:
-            r.raise_for_status()
-            with open(path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
+    async def _close(self, spider: Spider) -> None:
+        if self.pool is not None:
+            spider.logger.info(f"[QUEUE] Crawl done, draining: {format_snapshot(self.queue.snapshot())}")
+            await self.pool.close(drain=True)
+            if self.processor is not None:
+                await self.processor.close()
+            self.pool.queue.close()
+        spider.logger.info(f"[QUEUE] {format_snapshot(self.queue.snapshot())}")
+        self.queue.close()
+        self.manifest.close()
+
+
+async def run_workers(queue_db: str, workers: int, watch: bool, report_interval: float = 60.0) -> None:
+    """Drain the work queue outside the crawl process.
+
+    Args:
+        queue_db: Work queue SQLite file.
+        workers: Items processed concurrently.
+        watch: Keep polling for new items instead of exiting when empty.
+        report_interval: Seconds between progress lines.
+    """
+    queue = WorkQueue(queue_db)
+    processor = ItemProcessor()
+    pool = WorkerPool(WorkQueue(queue_db), processor.process, concurrency=workers)
+    pool.start()
+    if not watch:
+        closing = asyncio.ensure_future(pool.close(drain=True))
+    try:
+        last_report = time.monotonic()
+        while watch or not closing.done():
+            await asyncio.sleep(1)
+            if time.monotonic() - last_report >= report_interval:
+                print(format_snapshot(queue.snapshot()))
+                last_report = time.monotonic()
+    finally:
+        if watch:
+            await pool.close(drain=False)
+        print(f"Processed: {pool.processed} | Failed: {pool.failed}")
+        print(format_snapshot(queue.snapshot()))
+        await processor.close()
+        pool.queue.close()
+        queue.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process items queued by StructureItPipeline")
+    parser.add_argument("--queue-db", default=PIPELINE_QUEUE_DB, help="Work queue SQLite file")
+    parser.add_argument("--workers", type=int, default=max(PIPELINE_WORKERS, 1), help="Concurrent items")
+    parser.add_argument("--watch", action="store_true", help="Keep running and wait for new items")
+    parser.add_argument("--report-interval", type=float, default=60.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    print("=" * 60)
+    print("EXTRACT WORKERS: work queue -> DuckDB")
+    print("=" * 60)
+    print(f"Queue: {args.queue_db} | Workers: {args.workers}")
+    print(format_snapshot(WorkQueue(args.queue_db).snapshot()))
+    print()
+
+    try:
+        asyncio.run(run_workers(args.queue_db, args.workers, args.watch, args.report_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
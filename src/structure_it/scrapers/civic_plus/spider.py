@@ -7,14 +7,18 @@ All downloads (HTML pages AND PDFs) go through Scrapy's downloader,
 which respects DOWNLOAD_DELAY and CONCURRENT_REQUESTS settings.
 """
 
+import hashlib
+import os
 import re
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import urljoin
 
 import scrapy
+from scrapy import signals
 
 from structure_it.config import get_scraper_settings
+from structure_it.scrapers.civic_plus.frontier import CrawlFrontier
 from structure_it.utils.hashing import generate_entity_id
 
 
@@ -34,6 +38,43 @@ class CivicPlusSpider(scrapy.Spider):
             self.base_url = "https://example.com/AgendaCenter"
 
         self.start_urls = [self.base_url]
+        self.frontier = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        if crawler.settings.getbool("CRAWL_FRONTIER_ENABLED"):
+            spider.frontier = CrawlFrontier(crawler.settings.get("CRAWL_STATE_DB"))
+            crawler.signals.connect(spider.record_scraped, signal=signals.item_scraped)
+            crawler.signals.connect(spider.close_frontier, signal=signals.spider_closed)
+        return spider
+
+    def record_scraped(self, item, response, spider):
+        """Mark a document fetched once every pipeline has accepted its item.
+
+        Recording it any earlier would leave an item that failed staging
+        marked fresh for its whole revisit interval (up to a year for old
+        minutes) instead of retried on the next crawl.
+        """
+        meta = response.meta
+        if "frontier_url" not in meta:
+            return
+        self.frontier.record_fetch(
+            meta["frontier_url"],
+            item.get("content_hash"),
+            meta.get("asset_type"),
+            meta.get("meeting_date"),
+        )
+
+    def close_frontier(self, spider):
+        counts = self.frontier.counts
+        for key, value in counts.items():
+            self.crawler.stats.set_value(f"frontier/{key}", value)
+        self.logger.info(
+            f"[FRONTIER] {counts['new']} new, {counts['due']} due for revisit, "
+            f"{counts['fresh']} skipped as fresh"
+        )
+        self.frontier.close()
 
     def parse(self, response):
         """Parse the main AgendaCenter page."""
@@ -131,10 +172,17 @@ class CivicPlusSpider(scrapy.Spider):
 
                     full_url = urljoin(self.base_url, href)
 
+                    # Skip documents fetched recently enough for their revisit policy
+                    if self.frontier and not self.frontier.should_visit(
+                        full_url, asset_type, meeting_date
+                    ):
+                        continue
+
                     # Yield a Request - Scrapy will download the PDF respecting rate limits
                     yield scrapy.Request(
                         url=full_url,
                         callback=self.parse_document,
+                        errback=self.document_failed,
                         meta={
                             "source_type": "civic_meeting",
                             "committee_name": committee_name,
@@ -142,6 +190,12 @@ class CivicPlusSpider(scrapy.Spider):
                             "title": meeting_title,
                             "asset_type": asset_type,
                             "scraped_at": datetime.now().isoformat(),
+                            # Revalidate with ETag/Last-Modified (see middlewares.py)
+                            "conditional_get": True,
+                            # Listing URL the frontier knows this document by
+                            "frontier_url": full_url,
+                            # Write the body to disk as it arrives (see handlers.py)
+                            "stream_to_disk": True,
                         },
                         # Don't filter duplicates - same URL might be linked multiple times
                         dont_filter=False,
@@ -185,6 +239,7 @@ class CivicPlusSpider(scrapy.Spider):
                 yield scrapy.Request(
                     url=full_url,
                     callback=self.parse_document,
+                    errback=self.document_failed,
                     meta=meta,
                     dont_filter=True,  # Allow re-visiting with different URL
                 )
@@ -208,12 +263,21 @@ class CivicPlusSpider(scrapy.Spider):
         temp_path = Path(f"temp_downloads/{entity_id}{ext}")
         temp_path.parent.mkdir(exist_ok=True)
 
-        with open(temp_path, "wb") as f:
-            f.write(response.body)
+        if meta.get("download_path"):
+            # Streamed to disk by StreamingDownloadHandler, already hashed
+            os.replace(meta["download_path"], temp_path)
+            content_hash = meta["download_sha256"]
+            size = meta["download_size"]
+        else:
+            with open(temp_path, "wb") as f:
+                f.write(response.body)
+            content_hash = hashlib.sha256(response.body).hexdigest()
+            size = len(response.body)
 
-        self.logger.info(f"Downloaded {len(response.body)} bytes to {temp_path}")
+        self.logger.info(f"Downloaded {size} bytes to {temp_path}")
 
-        # Yield item with temp_path for pipeline
+        # Yield item with temp_path for pipeline (the frontier records the
+        # fetch once it is staged, see record_scraped)
         yield {
             "source_type": source_type,
             "committee_name": meta.get("committee_name"),
@@ -223,5 +287,19 @@ class CivicPlusSpider(scrapy.Spider):
             "url": url,
             "scraped_at": meta.get("scraped_at"),
             "temp_path": str(temp_path),  # Pipeline uses this instead of downloading
+            "content_hash": content_hash,  # SHA256 of the original file bytes
             "content_type": "pdf" if ext == ".pdf" else "html",
         }
+
+    def document_failed(self, failure):
+        """Errback for document requests; a 304 still counts as a fetch."""
+        request = failure.request
+        if request.meta.get("not_modified") and self.frontier:
+            self.frontier.record_fetch(
+                request.meta.get("frontier_url", request.url),
+                None,
+                request.meta.get("asset_type"),
+                request.meta.get("meeting_date"),
+            )
+        elif not failure.check(scrapy.exceptions.IgnoreRequest):
+            self.logger.error(f"Document download failed: {request.url}: {failure.value}")
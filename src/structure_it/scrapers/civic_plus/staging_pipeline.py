@@ -2,8 +2,12 @@
 
 This pipeline stages raw data from source systems:
 - Downloads files via Scrapy (rate-limited)
-- Saves original files untouched to data/raw/
+- Hands original files over untouched to data/raw/ (rename + hard link
+  into a content-addressed store, no copy; see etl/blobs.py)
 - Saves minimal source metadata
+- Records each item in the raw-layer manifest (change detection for Transform;
+  an item whose bytes duplicate another URL's is recorded as an alias and
+  not transformed again)
 
 NO transformation happens here - that's the Transform step.
 
@@ -14,10 +18,14 @@ ELT Layers:
 """
 
 import json
-import shutil
 from datetime import datetime
 from pathlib import Path
 
+from scrapy.exceptions import DropItem
+
+from structure_it.config import SCRAPER_DOWNLOAD_DIR
+from structure_it.etl.blobs import BlobStore, sweep_temp_dir
+from structure_it.etl.manifest import RawManifest, source_context
 from structure_it.utils.hashing import generate_entity_id
 
 
@@ -31,17 +39,48 @@ class RawStagingPipeline:
     No markdown conversion, no Gemini extraction.
     """
 
-    def __init__(self, raw_dir: str = "./data/raw"):
+    def __init__(self, raw_dir: str = "./data/raw", temp_dir: str = SCRAPER_DOWNLOAD_DIR):
         self.raw_dir = Path(raw_dir)
         self.raw_dir.mkdir(parents=True, exist_ok=True)
+        self.temp_dir = Path(temp_dir)
+        self.manifest = RawManifest(self.raw_dir)
+        self.blobs = BlobStore(self.raw_dir)
+        self.duplicates = 0
+
+    def close_spider(self, spider):
+        if self.duplicates:
+            spider.logger.info(
+                f"[RAW] {self.duplicates} items duplicate documents already in the raw layer "
+                "(recorded as aliases, not transformed again)"
+            )
+        self.manifest.close()
+        stats = self.blobs.stats
+        spider.logger.info(
+            f"[RAW] Handoff: {stats['ingested']} new blobs, {stats['deduplicated']} duplicates "
+            f"({stats['bytes_deduplicated'] / 1024 / 1024:.1f} MB not stored twice), "
+            f"{stats['copied']} copies"
+        )
+        pruned = self.blobs.prune()
+        swept = sweep_temp_dir(self.temp_dir)
+        if pruned or swept:
+            spider.logger.info(f"[RAW] Removed {pruned} unreferenced blobs, {swept} stale temp files")
 
     async def process_item(self, item, spider):
         """Stage raw item from source system.
 
         Creates folder structure:
         data/raw/{source_type}/{entity_id}/
-            - original.{pdf|html}   # Untouched source file
+            - original.{pdf|html}   # Untouched source file (hard link into .blobs/)
             - source.json           # Minimal source metadata
+
+        The downloaded temp file is consumed (moved into the blob store), and
+        the item's temp_path points at the staged original from then on.
+
+        Raises:
+            DropItem: The item could not be staged. It is not passed on, so
+                item_scraped does not fire and neither the conditional-GET
+                validators nor the frontier record it as fetched: the next
+                crawl downloads it again.
         """
         url = item["url"]
         source_type = item.get("source_type", "civic_meeting")
@@ -54,15 +93,21 @@ class RawStagingPipeline:
         spider.logger.info(f"[RAW] Staging: {item.get('title', 'Untitled')} -> {item_dir}")
 
         try:
-            # 1. Copy original file (untouched)
+            # 1. Hand the original file over (untouched, no copy)
             original_path = None
+            content_hash = None
             if item.get("temp_path"):
                 temp_path = Path(item["temp_path"])
-                if temp_path.exists():
-                    ext = temp_path.suffix or ".pdf"
-                    original_path = item_dir / f"original{ext}"
-                    shutil.copy2(temp_path, original_path)
-                    spider.logger.info(f"[RAW] Saved original: {original_path.name}")
+                if not temp_path.exists():
+                    raise FileNotFoundError(f"Downloaded file missing: {temp_path}")
+                ext = temp_path.suffix or ".pdf"
+                original_path = item_dir / f"original{ext}"
+                # Hashed while streaming the download; avoids re-reading the file
+                blob_path, content_hash = self.blobs.ingest(temp_path, item.get("content_hash"))
+                self.blobs.link(blob_path, original_path)
+                # The temp file is gone; later pipelines (StructureItPipeline) read the original
+                item["temp_path"] = str(original_path)
+                spider.logger.info(f"[RAW] Saved original: {original_path.name}")
 
             # 2. Save source metadata (minimal - just what came from source)
             source_metadata = {
@@ -92,9 +137,28 @@ class RawStagingPipeline:
                 encoding="utf-8"
             )
 
-            spider.logger.info(f"[RAW] Staged {entity_id}")
+            # 3. Record in manifest (distinguishes real changes from re-downloads).
+            # New/changed items are picked up by `etl.transform --watch` by priority.
+            meeting_date, host = source_context(source_metadata)
+            status = self.manifest.record_original(
+                entity_id,
+                source_type,
+                original_path,
+                content_hash=content_hash,
+                meeting_date=meeting_date,
+                host=host,
+                url=url,
+            )
+
+            canonical_id = self.manifest.canonical_of(entity_id)
+            if canonical_id:
+                self.duplicates += 1
+                spider.logger.info(f"[RAW] Staged {entity_id} ({status}, duplicate of {canonical_id})")
+            else:
+                spider.logger.info(f"[RAW] Staged {entity_id} ({status})")
 
         except Exception as e:
             spider.logger.error(f"[RAW] Error staging {url}: {e}")
+            raise DropItem(f"Not staged: {url}") from e
 
         return item
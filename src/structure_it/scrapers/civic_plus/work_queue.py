@@ -0,0 +1,367 @@
+"""Durable work queue between the crawl and extraction.
+
+StructureItPipeline used to convert, extract (Gemini) and store every item
+inside `process_item`, so the crawl advanced at the speed of the LLM. Now
+the pipeline only appends the item to this SQLite-backed queue and returns;
+a WorkerPool drains it, either inside the crawl process (alongside the
+reactor, on the same event loop) or in a separate process:
+
+    python -m structure_it.scrapers.civic_plus.pipelines --workers 8 --watch
+
+The queue survives restarts: items enqueued by a crawl that stopped before
+they were processed are picked up by the next worker. Re-enqueuing an entity
+that is still pending replaces its payload instead of adding a duplicate.
+Each WorkerPool registers itself (queue_workers) and stamps the entries it
+claims, so when a pool starts, entries left processing by a pool whose
+process has exited (a crash) go straight back to pending.
+
+Observability: `counts()` gives the backlog per status and `snapshot()` the
+enqueue/completion rates and enqueue-to-done latency, so crawl speed and
+extraction speed can be watched separately.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from scrapy.statscollectors import StatsCollector
+
+from structure_it.utils.stats import percentile
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,           -- entity_id; at most one pending entry per key
+    payload TEXT NOT NULL,       -- JSON-encoded item
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending | processing | done | failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    error TEXT,
+    worker_id TEXT               -- WorkerPool that claimed it
+);
+CREATE INDEX IF NOT EXISTS idx_work_queue_status ON work_queue(status, attempts, id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_work_queue_pending_key
+    ON work_queue(key) WHERE status = 'pending';
+
+-- Running WorkerPools (SQLite in WAL mode needs them all on one host)
+CREATE TABLE IF NOT EXISTS queue_workers (
+    worker_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    started_at TEXT NOT NULL
+);
+"""
+
+QUEUE_STATUSES = ("pending", "processing", "done", "failed")
+
+logger = logging.getLogger(__name__)
+
+
+class WorkQueue:
+    """SQLite-backed FIFO of items awaiting extraction."""
+
+    def __init__(self, db_path: str | Path):
+        """Open (or create) the queue.
+
+        Args:
+            db_path: SQLite file; shared by the crawl and any worker processes.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(QUEUE_SCHEMA)
+
+    def enqueue(self, key: str, payload: dict) -> None:
+        """Add an item, or replace the payload of the key's pending entry."""
+        self.conn.execute(
+            """
+            INSERT INTO work_queue (key, payload, enqueued_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) WHERE status = 'pending' DO UPDATE SET payload = excluded.payload
+            """,
+            [key, json.dumps(payload, default=str), datetime.now().isoformat()],
+        )
+
+    def claim(self, worker_id: str | None = None) -> sqlite3.Row | None:
+        """Take the next pending entry (marks it processing), if any.
+
+        Entries never attempted go first, oldest first; failed entries are
+        retried after them.
+
+        Args:
+            worker_id: Registered worker taking the entry (see register_worker).
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row: sqlite3.Row | None = self.conn.execute(
+                # Fresh items before retries, then FIFO
+                "SELECT * FROM work_queue WHERE status = 'pending' ORDER BY attempts, id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE work_queue SET status = 'processing', started_at = ?, "
+                    "attempts = attempts + 1, worker_id = ? WHERE id = ?",
+                    [datetime.now().isoformat(), worker_id, row["id"]],
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def complete(self, entry_id: int) -> None:
+        """Mark a claimed entry done."""
+        self.conn.execute(
+            "UPDATE work_queue SET status = 'done', finished_at = ?, error = NULL WHERE id = ?",
+            [datetime.now().isoformat(), entry_id],
+        )
+
+    def fail(self, entry_id: int, error: str, max_attempts: int = 3) -> str:
+        """Record a failed attempt; the entry is retried until max_attempts.
+
+        Returns:
+            The entry's new status ('pending' or 'failed').
+        """
+        self.conn.execute(
+            """
+            UPDATE work_queue SET
+                error = ?,
+                finished_at = ?,
+                status = CASE
+                    WHEN attempts >= ? THEN 'failed'
+                    -- A newer payload for the same key is already queued
+                    WHEN EXISTS (SELECT 1 FROM work_queue p
+                                 WHERE p.key = work_queue.key AND p.status = 'pending') THEN 'failed'
+                    ELSE 'pending'
+                END
+            WHERE id = ?
+            """,
+            [error, datetime.now().isoformat(), max_attempts, entry_id],
+        )
+        status: str = self.conn.execute(
+            "SELECT status FROM work_queue WHERE id = ?", [entry_id]
+        ).fetchone()["status"]
+        return status
+
+    def register_worker(self) -> str:
+        """Record a running worker (pool) of this process; returns its id for claim()."""
+        worker_id = uuid.uuid4().hex
+        self.conn.execute(
+            "INSERT INTO queue_workers (worker_id, pid, started_at) VALUES (?, ?, ?)",
+            [worker_id, os.getpid(), datetime.now().isoformat()],
+        )
+        return worker_id
+
+    def unregister_worker(self, worker_id: str) -> None:
+        """Forget a worker that stopped cleanly."""
+        self.conn.execute("DELETE FROM queue_workers WHERE worker_id = ?", [worker_id])
+
+    def live_workers(self) -> set[str]:
+        """Registered workers whose process is still running (others are forgotten)."""
+        live, dead = set(), []
+        for row in self.conn.execute("SELECT worker_id, pid FROM queue_workers").fetchall():
+            if _process_alive(row["pid"]):
+                live.add(row["worker_id"])
+            else:
+                dead.append([row["worker_id"]])
+        self.conn.executemany("DELETE FROM queue_workers WHERE worker_id = ?", dead)
+        return live
+
+    def recover(self, stale_after: timedelta | None = None) -> int:
+        """Return entries stranded in processing to pending.
+
+        An entry is stranded when the worker that claimed it is no longer
+        running (its process exited without finishing it), or when it was
+        claimed before workers were tracked.
+
+        Args:
+            stale_after: Also requeue entries processing for longer than this,
+                whoever holds them.
+
+        Returns:
+            Number of entries requeued.
+        """
+        live = sorted(self.live_workers())
+        stranded = f"worker_id IS NULL OR worker_id NOT IN ({', '.join('?' * len(live))})"
+        params: list[str] = live
+        if stale_after is not None:
+            stranded += " OR started_at < ?"
+            params = [*live, (datetime.now() - stale_after).isoformat()]
+        cursor = self.conn.execute(
+            f"""
+            UPDATE work_queue SET status = 'pending', worker_id = NULL
+            WHERE status = 'processing' AND ({stranded})
+              AND NOT EXISTS (SELECT 1 FROM work_queue p
+                              WHERE p.key = work_queue.key AND p.status = 'pending')
+            """,
+            params,
+        )
+        return cursor.rowcount
+
+    def purge(self, older_than: timedelta = timedelta(days=7)) -> int:
+        """Delete done entries finished before the cutoff."""
+        cutoff = (datetime.now() - older_than).isoformat()
+        return self.conn.execute(
+            "DELETE FROM work_queue WHERE status = 'done' AND finished_at < ?", [cutoff]
+        ).rowcount
+
+    def counts(self) -> dict[str, int]:
+        """Entries per status."""
+        counts = dict.fromkeys(QUEUE_STATUSES, 0)
+        for row in self.conn.execute("SELECT status, count(*) AS n FROM work_queue GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+    def snapshot(self, window: timedelta = timedelta(minutes=5)) -> dict[str, float]:
+        """Backlog, rates over the last `window` and enqueue-to-done latency."""
+        since = (datetime.now() - window).isoformat()
+        minutes = window.total_seconds() / 60
+        enqueued = self.conn.execute(
+            "SELECT count(*) FROM work_queue WHERE enqueued_at >= ?", [since]
+        ).fetchone()[0]
+        waits = [
+            (datetime.fromisoformat(row["finished_at"]) - datetime.fromisoformat(row["enqueued_at"]))
+            .total_seconds()
+            for row in self.conn.execute(
+                "SELECT enqueued_at, finished_at FROM work_queue "
+                "WHERE status = 'done' AND finished_at >= ?",
+                [since],
+            )
+        ]
+        counts = self.counts()
+        return {
+            "pending": counts["pending"],
+            "processing": counts["processing"],
+            "failed": counts["failed"],
+            "enqueued_per_min": round(enqueued / minutes, 1),
+            "done_per_min": round(len(waits) / minutes, 1),
+            "latency_p50_s": round(percentile(waits, 50), 1) if waits else 0.0,
+            "latency_p95_s": round(percentile(waits, 95), 1) if waits else 0.0,
+        }
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def format_snapshot(snapshot: dict[str, float]) -> str:
+    """One-line rendering of WorkQueue.snapshot()."""
+    return (
+        f"backlog {snapshot['pending']} pending / {snapshot['processing']} processing / "
+        f"{snapshot['failed']} failed | in {snapshot['enqueued_per_min']}/min, "
+        f"out {snapshot['done_per_min']}/min | latency p50 {snapshot['latency_p50_s']}s "
+        f"p95 {snapshot['latency_p95_s']}s"
+    )
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, under another user
+        return True
+    return True
+
+
+class WorkerPool:
+    """Async workers draining a WorkQueue with a coroutine handler."""
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        handler: Callable[[dict[str, Any]], Awaitable[None]],
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        max_attempts: int = 3,
+        stats: StatsCollector | None = None,
+    ):
+        """Initialize the pool.
+
+        Args:
+            queue: Queue to drain.
+            handler: `async def handler(payload: dict)`; raising marks the
+                attempt failed.
+            concurrency: Items processed at the same time.
+            poll_interval: Seconds between polls while the queue is empty.
+            max_attempts: Attempts before an entry is marked failed.
+            stats: Optional Scrapy stats collector (work_queue/* counters).
+        """
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = max(concurrency, 1)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.stats = stats
+        self.processed = 0
+        self.failed = 0
+        self.worker_id: str | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._closing = False
+        self._drain = True
+
+    def _inc(self, key: str) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(f"work_queue/{key}")
+
+    def start(self) -> None:
+        """Start the workers on the running event loop.
+
+        Entries a crashed worker left processing are requeued first.
+        """
+        recovered = self.queue.recover()
+        if recovered:
+            logger.info(f"Requeued {recovered} entries left processing by stopped workers")
+        self.worker_id = self.queue.register_worker()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)]
+
+    async def _worker(self) -> None:
+        while True:
+            if self._closing and not self._drain:
+                return
+            entry = self.queue.claim(self.worker_id)
+            if entry is None:
+                if self._closing:
+                    return
+                await asyncio.sleep(self.poll_interval)
+                continue
+            try:
+                await self.handler(json.loads(entry["payload"]))
+            except Exception as e:
+                status = self.queue.fail(entry["id"], f"{type(e).__name__}: {e}", self.max_attempts)
+                logger.error(f"Error processing {entry['key']} (attempt {entry['attempts'] + 1}, {status}): {e}")
+                if status == "failed":
+                    self.failed += 1
+                    self._inc("failed")
+                else:
+                    self._inc("retried")
+            else:
+                self.queue.complete(entry["id"])
+                self.processed += 1
+                self._inc("processed")
+
+    async def close(self, drain: bool = True) -> None:
+        """Stop the workers.
+
+        Args:
+            drain: Keep going until the queue is empty; otherwise stop after
+                the items in progress (the rest stays queued).
+        """
+        self._closing = True
+        self._drain = drain
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        if self.worker_id is not None:
+            self.queue.unregister_worker(self.worker_id)
+            self.worker_id = None
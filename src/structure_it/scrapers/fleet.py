@@ -0,0 +1,372 @@
+"""Fleet orchestrator: crawl many municipality sites in one process.
+
+`examples/run_scrapy_civic.py` runs one spider against one URL per process.
+The fleet orchestrator reads a site registry and runs every due
+(site, spider) pair as a crawler inside a single CrawlerProcess, so
+throughput grows with the number of sites instead of crawling one site at
+a time:
+
+- Up to `max_sites` crawlers run at once; the next due crawl starts as
+  soon as one finishes.
+- Politeness moves from each crawler's own DOWNLOAD_DELAY / AutoThrottle
+  to FleetThrottleMiddleware, which enforces the per-host delay and
+  connection limit across every crawler in the process (two spiders on one
+  site share the host's budget) and, with adaptive politeness, tunes them
+  to the host's latency and errors. A site's "delay" is a floor the
+  controller never goes below; its "concurrency" a ceiling.
+- Each crawl's Scrapy stats are persisted per site and spider in the
+  crawl-state db (site_crawls table); the schedule uses them to decide
+  what is due.
+
+Registry (JSON, default data/sites.json):
+
+    {
+      "sites": [
+        {"name": "springfield", "url": "https://www.springfield.gov",
+         "spiders": ["agenda", "bids"], "schedule": "daily"},
+        {"name": "shelbyville", "url": "https://shelbyville.gov",
+         "spiders": ["agenda", "permits"], "schedule": "weekly", "delay": 5,
+         "spider_args": {"permits": {"start_url": "https://shelbyville.gov/DocumentCenter/Index/12"}}}
+      ]
+    }
+
+Usage:
+    python -m structure_it.scrapers.fleet                       # due crawls
+    python -m structure_it.scrapers.fleet --all --max-sites 64  # everything now
+    python -m structure_it.scrapers.fleet --site springfield
+"""
+
+import argparse
+import json
+import sqlite3
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, TypeVar
+from urllib.parse import urljoin
+
+from pydantic import BaseModel, Field
+from scrapy import Spider, signals
+from scrapy.crawler import Crawler, CrawlerProcess
+
+from structure_it.config import (
+    SCRAPER_FLEET_HOST_CONCURRENCY,
+    SCRAPER_FLEET_MAX_SITES,
+    SCRAPER_SITE_REGISTRY,
+    SCRAPER_STATE_DB,
+)
+from structure_it.scrapers.civic_plus.bids_spider import CivicPlusBidsSpider
+from structure_it.scrapers.civic_plus.permits_spider import CivicPlusPermitsSpider
+from structure_it.scrapers.civic_plus.services_spider import CivicPlusServicesSpider
+from structure_it.scrapers.civic_plus.spider import CivicPlusSpider
+
+T = TypeVar("T")
+
+# platform -> spider name -> (spider class, URL argument, default path on the site)
+PLATFORM_SPIDERS = {
+    "civicplus": {
+        "agenda": (CivicPlusSpider, "place_url", "/AgendaCenter"),
+        "bids": (CivicPlusBidsSpider, "place_url", "/Bids.aspx"),
+        "services": (CivicPlusServicesSpider, "place_url", "/RequestTracker.aspx"),
+        # Document Center folders are site-specific: needs spider_args.permits.start_url
+        "permits": (CivicPlusPermitsSpider, "start_url", None),
+    },
+}
+
+SCHEDULES = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+    "weekly": timedelta(days=7),
+    "monthly": timedelta(days=30),
+    "manual": None,  # Only with --all or --site
+}
+
+# Scrapy stats persisted as columns (everything else goes to stats_json)
+STAT_COLUMNS = {
+    "requests": "downloader/request_count",
+    "responses": "downloader/response_count",
+    "bytes": "downloader/response_bytes",
+    "items": "item_scraped_count",
+    "errors": "log_count/ERROR",
+}
+
+SITE_CRAWLS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS site_crawls (
+    site TEXT NOT NULL,
+    spider TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    finish_reason TEXT,
+    requests INTEGER,
+    responses INTEGER,
+    bytes INTEGER,
+    items INTEGER,
+    errors INTEGER,
+    stats_json TEXT              -- Full Scrapy stats of the crawl
+);
+CREATE INDEX IF NOT EXISTS idx_site_crawls_site ON site_crawls(site, spider, finished_at);
+"""
+
+
+class SiteConfig(BaseModel):
+    """One municipality site in the registry."""
+
+    name: str
+    url: str
+    platform: str = "civicplus"
+    spiders: list[str] = Field(default_factory=lambda: ["agenda"])
+    schedule: str = "daily"
+    delay: float | None = None  # Minimum seconds between requests to the host (spider profile default)
+    concurrency: int | None = None  # Maximum connections to the host (fleet default)
+    spider_args: dict[str, dict[str, str]] = Field(default_factory=dict)
+    enabled: bool = True
+
+
+def load_site_registry(path: str | Path) -> list[SiteConfig]:
+    """Load and validate the site registry.
+
+    Raises:
+        ValueError: On unknown platforms, spiders or schedules, or a permits
+            spider without a start_url.
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    sites = [SiteConfig(**entry) for entry in data.get("sites", [])]
+    for site in sites:
+        spiders = PLATFORM_SPIDERS.get(site.platform)
+        if spiders is None:
+            raise ValueError(f"{site.name}: unknown platform '{site.platform}'")
+        if site.schedule not in SCHEDULES:
+            raise ValueError(f"{site.name}: unknown schedule '{site.schedule}'")
+        for name in site.spiders:
+            if name not in spiders:
+                raise ValueError(f"{site.name}: unknown spider '{name}' for {site.platform}")
+            _, url_arg, default_path = spiders[name]
+            if default_path is None and url_arg not in site.spider_args.get(name, {}):
+                raise ValueError(f"{site.name}: spider '{name}' needs spider_args.{name}.{url_arg}")
+    return sites
+
+
+class CrawlHistory:
+    """Per-site crawl stats, stored in the crawl-state SQLite db."""
+
+    def __init__(self, db_path: str | Path = SCRAPER_STATE_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SITE_CRAWLS_SCHEMA)
+
+    def record(
+        self, site: str, spider: str, started_at: datetime, finish_reason: str, stats: dict
+    ) -> None:
+        """Store the stats of a finished crawl."""
+        self.conn.execute(
+            """
+            INSERT INTO site_crawls
+            (site, spider, started_at, finished_at, finish_reason,
+             requests, responses, bytes, items, errors, stats_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                site,
+                spider,
+                started_at.isoformat(),
+                datetime.now().isoformat(),
+                finish_reason,
+                *(stats.get(key, 0) for key in STAT_COLUMNS.values()),
+                json.dumps(stats, default=str),
+            ],
+        )
+        self.conn.commit()
+
+    def last_finished(self, site: str, spider: str) -> datetime | None:
+        """When the last crawl of a site/spider finished (any reason)."""
+        row = self.conn.execute(
+            "SELECT max(finished_at) FROM site_crawls WHERE site = ? AND spider = ?", [site, spider]
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row[0] else None
+
+    def latest(self) -> list[sqlite3.Row]:
+        """Most recent crawl per site and spider."""
+        return self.conn.execute(
+            """
+            SELECT * FROM site_crawls
+            WHERE rowid IN (SELECT max(rowid) FROM site_crawls GROUP BY site, spider)
+            ORDER BY site, spider
+            """
+        ).fetchall()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def due_crawls(
+    sites: list[SiteConfig],
+    history: CrawlHistory,
+    now: datetime | None = None,
+    include_all: bool = False,
+) -> list[tuple[SiteConfig, str]]:
+    """(site, spider) pairs to crawl now, least recently crawled first.
+
+    Args:
+        sites: Registry entries.
+        history: Past crawls.
+        now: Reference time (defaults to now).
+        include_all: Ignore schedules (still skips disabled sites).
+    """
+    now = now or datetime.now()
+    due = []
+    for site in sites:
+        if not site.enabled:
+            continue
+        interval = SCHEDULES[site.schedule]
+        for spider in site.spiders:
+            last = history.last_finished(site.name, spider)
+            if include_all or last is None or (interval is not None and now - last >= interval):
+                due.append((last or datetime.min, site, spider))
+    due.sort(key=lambda d: d[0])
+    return [(site, spider) for _, site, spider in due]
+
+
+class FleetRunner:
+    """Runs (site, spider) crawls concurrently in one CrawlerProcess."""
+
+    def __init__(
+        self,
+        crawls: list[tuple[SiteConfig, str]],
+        history: CrawlHistory,
+        max_sites: int = SCRAPER_FLEET_MAX_SITES,
+        settings: dict | None = None,
+    ):
+        """Initialize the runner.
+
+        Args:
+            crawls: (site, spider) pairs, in start order.
+            history: Where per-site stats are recorded.
+            max_sites: Crawlers running at the same time.
+            settings: Process-wide Scrapy settings (pipelines, log level, ...).
+        """
+        self.pending = list(crawls)
+        self.history = history
+        self.max_sites = max(max_sites, 1)
+        self.process = CrawlerProcess(settings or {})
+        self._receivers: list[Callable[[Spider, str], None]] = []
+
+    def _create_crawler(self, site: SiteConfig, spider_name: str) -> tuple[Crawler, dict[str, Any]]:
+        spidercls, url_arg, default_path = PLATFORM_SPIDERS[site.platform][spider_name]
+        kwargs = {url_arg: urljoin(site.url, default_path)} if default_path else {}
+        kwargs.update(site.spider_args.get(spider_name, {}))
+
+        crawler = self.process.create_crawler(spidercls)
+        settings = crawler.settings
+        delay = settings.getfloat("FLEET_HOST_DELAY", settings.getfloat("DOWNLOAD_DELAY"))
+        min_delay = settings.getfloat("FLEET_HOST_DELAY_MIN", delay)
+        if site.delay is not None:
+            delay = max(delay, site.delay)
+            min_delay = site.delay
+        concurrency = site.concurrency or SCRAPER_FLEET_HOST_CONCURRENCY
+        # The fleet throttle spaces requests per host across crawlers; the
+        # crawler's own slot delay and AutoThrottle would only add to it
+        for key, value in {
+            "FLEET_THROTTLE_ENABLED": True,
+            "FLEET_HOST_DELAY": delay,
+            "FLEET_HOST_DELAY_MIN": min_delay,
+            "FLEET_HOST_CONCURRENCY": concurrency,
+            "CONCURRENT_REQUESTS": concurrency,
+            "CONCURRENT_REQUESTS_PER_DOMAIN": concurrency,
+            "DOWNLOAD_DELAY": 0,
+            "AUTOTHROTTLE_ENABLED": False,
+            "CRAWL_STATE_DB": str(self.history.db_path),
+        }.items():
+            settings.set(key, value, priority="cmdline")
+
+        started_at = datetime.now()
+
+        def spider_closed(spider: Spider, reason: str) -> None:
+            self.history.record(site.name, spider_name, started_at, reason, crawler.stats.get_stats())
+
+        # Scrapy holds signal receivers weakly; keep the closure alive
+        self._receivers.append(spider_closed)
+        crawler.signals.connect(spider_closed, signal=signals.spider_closed)
+        return crawler, kwargs
+
+    def _start_next(self, _: T | None = None) -> T | None:
+        if not self.pending:
+            return _
+        site, spider_name = self.pending.pop(0)
+        crawler, kwargs = self._create_crawler(site, spider_name)
+        print(f"[FLEET] Starting {site.name}/{spider_name} ({len(self.pending)} queued)")
+        # Start the next crawl before this one's Deferred is released, so
+        # CrawlerProcess.join() keeps the reactor running
+        self.process.crawl(crawler, **kwargs).addBoth(self._start_next)
+        return _
+
+    def run(self) -> None:
+        """Run every crawl, at most max_sites at a time; blocks until done."""
+        for _ in range(min(self.max_sites, len(self.pending))):
+            self._start_next()
+        self.process.start()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Crawl the registered municipality sites")
+    parser.add_argument("--registry", default=SCRAPER_SITE_REGISTRY, help="Site registry JSON")
+    parser.add_argument("--state-db", default=SCRAPER_STATE_DB, help="Crawl-state SQLite db")
+    parser.add_argument("--site", action="append", help="Only these sites (ignores schedules)")
+    parser.add_argument("--all", action="store_true", help="Crawl every site now, ignoring schedules")
+    parser.add_argument(
+        "--max-sites", type=int, default=SCRAPER_FLEET_MAX_SITES, help="Crawlers running at once"
+    )
+    parser.add_argument(
+        "--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO"
+    )
+    args = parser.parse_args()
+
+    sites = load_site_registry(args.registry)
+    if args.site:
+        sites = [s for s in sites if s.name in args.site]
+
+    history = CrawlHistory(args.state_db)
+    crawls = due_crawls(sites, history, include_all=args.all or bool(args.site))
+
+    print("=" * 60)
+    print("FLEET: Sources -> data/raw/ (Bronze)")
+    print("=" * 60)
+    print(f"Registry: {args.registry} ({len(sites)} sites)")
+    print(f"Due crawls: {len(crawls)} | Max concurrent: {args.max_sites}")
+    print()
+    if not crawls:
+        history.close()
+        return
+
+    runner = FleetRunner(
+        crawls,
+        history,
+        max_sites=args.max_sites,
+        settings={
+            "ITEM_PIPELINES": {
+                "structure_it.scrapers.civic_plus.staging_pipeline.RawStagingPipeline": 300,
+            },
+            "LOG_LEVEL": args.log_level,
+        },
+    )
+    runner.run()
+
+    ran = {(site.name, spider) for site, spider in crawls}
+    print()
+    print("=" * 60)
+    print(f"{'site/spider':<32} {'reason':<12} {'items':>6} {'reqs':>6} {'MB':>8} {'errors':>6}")
+    for row in history.latest():
+        if (row["site"], row["spider"]) in ran:
+            print(
+                f"{row['site'] + '/' + row['spider']:<32} {row['finish_reason']:<12} "
+                f"{row['items']:>6} {row['requests']:>6} {row['bytes'] / 1024 / 1024:>8.1f} "
+                f"{row['errors']:>6}"
+            )
+    print("=" * 60)
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 from structure_it.storage.base import BaseStorage, StoredEntity
 from structure_it.storage.duckdb_storage import DuckDBStorage
 from structure_it.storage.json_storage import JSONStorage
+from structure_it.storage.pool import StoragePool
 from structure_it.storage.star_schema_storage import StarSchemaStorage
 
 __all__ = [
@@ -11,4 +12,5 @@ __all__ = [
     "JSONStorage",
     "DuckDBStorage",
     "StarSchemaStorage",
+    "StoragePool",
 ]
\ No newline at end of file
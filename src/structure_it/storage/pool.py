@@ -0,0 +1,206 @@
+"""Star schema storage for concurrent callers (the API server).
+
+StarSchemaStorage holds a single DuckDB connection, and its methods, though
+async, run synchronously. A server sharing one instance therefore runs every
+query on its event loop: a search waits behind whatever store is running,
+and nothing else is served meanwhile. Using the one connection from
+several threads instead is not safe.
+
+StoragePool has the same interface and splits the work:
+
+- writes (store_entity, delete_entity, bulk_load_staged) run on one
+  dedicated writer thread with the original connection, so they are
+  serialized and never conflict
+- reads (get_entity, query_entities, count_entities, retrieve_context,
+  search_page) run on a pool of reader threads, each with its own cursor
+  (a connection to the same database instance). Reads run alongside each
+  other and alongside a write, and see the last committed state (DuckDB
+  is MVCC).
+
+Every call is awaited off the event loop, like ItemProcessor's DuckDB thread
+in the scraper pipeline. Thread counts: `read_threads` (STRUCTURE_IT_SERVER_DB_READERS)
+and DuckDB's threads per query (`duckdb_threads`, STRUCTURE_IT_SERVER_DB_THREADS).
+"""
+
+import asyncio
+import functools
+import threading
+from collections.abc import Callable, Coroutine
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, TypeVar, overload
+
+from structure_it.config import DEFAULT_DB_PATH, SERVER_DB_READERS, SERVER_DB_THREADS
+from structure_it.storage.base import BaseStorage, StoredEntity
+from structure_it.storage.star_schema_storage import StarSchemaStorage
+
+T = TypeVar("T")
+
+
+class StoragePool(BaseStorage):
+    """StarSchemaStorage with a single writer thread and a pool of reader cursors."""
+
+    def __init__(
+        self,
+        db_path: str | Path = DEFAULT_DB_PATH,
+        read_threads: int = SERVER_DB_READERS,
+        duckdb_threads: int = SERVER_DB_THREADS,
+    ) -> None:
+        """Open the database (creating the schema) and start the executors.
+
+        Args:
+            db_path: Path to DuckDB database file.
+            read_threads: Reader threads, each with its own cursor.
+            duckdb_threads: DuckDB worker threads per query (0 keeps DuckDB's default).
+        """
+        self.writer = StarSchemaStorage(db_path)
+        if duckdb_threads:
+            self.writer.conn.execute(f"SET threads = {int(duckdb_threads)}")
+        self.read_threads = read_threads
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="duckdb-writer")
+        self._read_executor = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix="duckdb-reader")
+        # Per thread: its storage handle and an event loop to complete the
+        # storage's async-in-name-only methods
+        self._local = threading.local()
+        self._readers: list[StarSchemaStorage] = []
+        self._loops: list[asyncio.AbstractEventLoop] = []
+        self._lock = threading.Lock()
+
+    @property
+    def db_path(self) -> Path:
+        return self.writer.db_path
+
+    @property
+    def generation(self) -> int:
+        """Bumped by every write that changes documents or facts."""
+        return self.writer.generation
+
+    def _reader(self) -> StarSchemaStorage:
+        reader = getattr(self._local, "storage", None)
+        if reader is None:
+            reader = self._local.storage = self.writer.cursor()
+            with self._lock:
+                self._readers.append(reader)
+        return reader
+
+    def _run(
+        self,
+        storage_for_thread: Callable[[], StarSchemaStorage],
+        func: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        result = func(storage_for_thread(), *args, **kwargs)
+        if asyncio.iscoroutine(result):
+            loop = getattr(self._local, "loop", None)
+            if loop is None:
+                loop = self._local.loop = asyncio.new_event_loop()
+                with self._lock:
+                    self._loops.append(loop)
+            result = loop.run_until_complete(result)
+        return result
+
+    @overload
+    async def read(
+        self, func: Callable[..., Coroutine[Any, Any, T]], *args: Any, **kwargs: Any
+    ) -> T: ...
+
+    @overload
+    async def read(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T: ...
+
+    async def read(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run func(storage, *args, **kwargs) on a reader thread and return its result.
+
+        func may be a StarSchemaStorage method (sync or async) or any callable
+        taking the storage handle; it must not write.
+        """
+        call = functools.partial(self._run, self._reader, func, args, kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._read_executor, call)
+
+    @overload
+    async def write(
+        self, func: Callable[..., Coroutine[Any, Any, T]], *args: Any, **kwargs: Any
+    ) -> T: ...
+
+    @overload
+    async def write(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T: ...
+
+    async def write(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run func(storage, *args, **kwargs) on the writer thread and return its result."""
+        call = functools.partial(self._run, lambda: self.writer, func, args, kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._write_executor, call)
+
+    async def store_entity(
+        self,
+        entity_id: str,
+        source_type: str,
+        source_url: str,
+        raw_content: str,
+        structured_data: dict[str, Any],
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        """Store an entity (on the writer thread); see StarSchemaStorage.store_entity."""
+        await self.write(
+            StarSchemaStorage.store_entity_sync,
+            entity_id=entity_id,
+            source_type=source_type,
+            source_url=source_url,
+            raw_content=raw_content,
+            structured_data=structured_data,
+            metadata=metadata,
+        )
+
+    async def delete_entity(self, entity_id: str) -> bool:
+        """Delete an entity and its facts (on the writer thread)."""
+        return await self.write(StarSchemaStorage.delete_entity, entity_id)
+
+    async def bulk_load_staged(self, staged_glob: str, force: bool = False) -> dict[str, int]:
+        """Load staged records (on the writer thread); see StarSchemaStorage.bulk_load_staged."""
+        return await self.write(StarSchemaStorage.bulk_load_staged, staged_glob, force)
+
+    async def get_entity(self, entity_id: str) -> StoredEntity | None:
+        """Retrieve a document (on a reader thread)."""
+        return await self.read(StarSchemaStorage.get_entity, entity_id)
+
+    async def query_entities(
+        self,
+        source_type: str | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> list[StoredEntity]:
+        """Query documents (on a reader thread)."""
+        return await self.read(StarSchemaStorage.query_entities, source_type, limit, offset)
+
+    async def count_entities(self, source_type: str | None = None) -> int:
+        """Count documents (on a reader thread)."""
+        return await self.read(StarSchemaStorage.count_entities, source_type)
+
+    async def retrieve_context(
+        self,
+        query_vector: list[float],
+        filters: dict[str, Any] | None = None,
+        limit: int = 5,
+    ) -> list[dict[str, Any]]:
+        """Hybrid search (on a reader thread); see StarSchemaStorage.retrieve_context."""
+        return await self.read(StarSchemaStorage.retrieve_context, query_vector, filters, limit)
+
+    async def search_page(
+        self,
+        filters: dict[str, Any] | None = None,
+        limit: int = 20,
+        after: str | None = None,
+    ) -> tuple[list[str], str | None]:
+        """A page of JSON result rows (on a reader thread); see StarSchemaStorage.search_page."""
+        return await self.read(StarSchemaStorage.search_page, filters, limit, after)
+
+    def close(self) -> None:
+        """Wait for running calls, then close the cursors and the connection."""
+        self._write_executor.shutdown()
+        self._read_executor.shutdown()
+        for reader in self._readers:
+            reader.close()
+        for loop in self._loops:
+            loop.close()
+        self._readers.clear()
+        self._loops.clear()
+        self.writer.close()
@@ -18,13 +18,27 @@ class StarSchemaStorage(BaseStorage):
     optimized for granular retrieval and LLM context assembly.
     """
 
-    def __init__(self, db_path: str | Path = "./data/structure_it.duckdb") -> None:
+    def __init__(
+        self,
+        db_path: str | Path = "./data/structure_it.duckdb",
+        conn: duckdb.DuckDBPyConnection | None = None,
+    ) -> None:
         """Initialize DuckDB storage.
 
         Args:
             db_path: Path to DuckDB database file.
+            conn: Existing connection to the database (see `cursor()`); the
+                schema is then assumed to exist.
         """
         self.db_path = Path(db_path)
+        # Bumped by every write that changes documents or facts (through this
+        # handle); search caches key on it
+        self.generation = 0
+
+        if conn is not None:
+            self.conn = conn
+            return
+
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
         # Initialize database connection
@@ -36,6 +50,15 @@ class StarSchemaStorage(BaseStorage):
         # Create schema
         self._create_schema()
 
+    def cursor(self) -> "StarSchemaStorage":
+        """Another storage handle on the same database, with its own DuckDB cursor.
+
+        A DuckDB connection must not be used from several threads at once;
+        a cursor is a separate connection to the same database instance, so
+        each thread can query through its own handle (see storage.pool).
+        """
+        return type(self)(self.db_path, conn=self.conn.cursor())
+
     def _create_schema(self) -> None:
         """Create database schema from SQL file."""
         schema_path = Path(__file__).parent / "schemas" / "star_schema.sql"
@@ -118,6 +141,30 @@ class StarSchemaStorage(BaseStorage):
     ) -> None:
         """Store an entity by shredding it into dimensions and facts.
 
+        Runs synchronously; callers with a DuckDB thread of their own call
+        `store_entity_sync` on it instead.
+
+        Args:
+            entity_id: Unique identifier.
+            source_type: Type of source.
+            source_url: Source URL.
+            raw_content: Original content.
+            structured_data: Extracted data.
+            metadata: Additional metadata.
+        """
+        self.store_entity_sync(entity_id, source_type, source_url, raw_content, structured_data, metadata)
+
+    def store_entity_sync(
+        self,
+        entity_id: str,
+        source_type: str,
+        source_url: str,
+        raw_content: str,
+        structured_data: dict[str, Any],
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        """Synchronous `store_entity`, for running on a dedicated thread.
+
         Args:
             entity_id: Unique identifier.
             source_type: Type of source.
@@ -283,6 +330,272 @@ class StarSchemaStorage(BaseStorage):
                     """,
                     items_to_insert
                 )
+            self.generation += 1
+
+    def _shredding_select_sql(self, source_table: str) -> str:
+        """Build a set-based equivalent of the shredding loop in `store_entity`.
+
+        One `unnest` subquery per shredding rule, unioned together. Primitive
+        list entries and dict entries follow the same content/ID/location
+        rules as the Python path, so both load paths produce identical facts.
+
+        Args:
+            source_table: Table with entity_id, domain and extracted (JSON) columns.
+
+        Returns:
+            SELECT statement yielding fact_items rows (minus embedding).
+        """
+
+        def truthy(path: str) -> str:
+            # Python truthiness of a JSON value (None, "", 0, False, [], {} are falsy)
+            return (
+                f"coalesce(json_extract(item, '{path}')::VARCHAR NOT IN "
+                "('null', '\"\"', '0', '0.0', 'false', '[]', '{}'), false)"
+            )
+
+        selects = []
+        for rule_order, (list_key, rules) in enumerate(self._get_shredding_rules().items()):
+            content_field = rules["content_field"]
+            id_field = rules["id_field"]
+            location_field = rules["location_field"]
+            is_str = "json_type(item) = 'VARCHAR'"
+            has_description = truthy("$.description")
+
+            seed = f"'{list_key}_' || idx"
+            if id_field:
+                seed = f"CASE WHEN {truthy(f'$.{id_field}')} THEN item->>'$.{id_field}' ELSE {seed} END"
+            location = f"item->>'$.{location_field}'" if location_field else "NULL"
+
+            selects.append(f"""
+                SELECT
+                    entity_id AS doc_id,
+                    domain,
+                    '{rules["item_type"]}' AS item_type,
+                    {rule_order} AS rule_order,
+                    idx,
+                    CASE WHEN {is_str} THEN item->>'$'
+                    ELSE coalesce(item->>'$.{content_field}', '')
+                        || CASE WHEN {has_description}
+                           THEN ' ' || (item->>'$.description') ELSE '' END
+                    END AS content_text,
+                    CASE WHEN {is_str} THEN '{{}}'
+                    ELSE json_merge_patch(item, '{{"{content_field}": null}}')
+                    END AS properties,
+                    CASE WHEN {is_str} THEN '{list_key}_' || idx ELSE {seed} END AS item_seed,
+                    CASE WHEN {is_str} THEN NULL ELSE {location} END AS location_pointer
+                FROM (
+                    SELECT
+                        entity_id,
+                        domain,
+                        unnest(json_extract(extracted, '$.{list_key}[*]')) AS item,
+                        unnest(range(json_array_length(extracted, '$.{list_key}')::BIGINT)) AS idx
+                    FROM {source_table}
+                    WHERE json_type(extracted, '$.{list_key}') = 'ARRAY'
+                )
+            """)
+
+        return " UNION ALL ".join(selects)
+
+    def bulk_load_staged(
+        self,
+        staged_glob: str,
+        force: bool = False,
+    ) -> dict[str, int]:
+        """Load every staged JSON record matching a glob in one transaction.
+
+        Set-based counterpart of calling `check_document_status` + `store_entity`
+        per file: files are read with DuckDB's `read_text`, CDC is a single join
+        against `dim_documents.content_hash`, and list shredding is done with
+        SQL `unnest` driven by `_get_shredding_rules()`.
+
+        Args:
+            staged_glob: Glob of staged files (e.g. 'data/staged/**/*.json').
+            force: Touch `last_extracted_at` on unchanged documents too.
+
+        Returns:
+            Dict of status counts: {'created': N, 'updated': N, 'unchanged': N, 'error': N}
+        """
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "error": 0}
+
+        total_files = self.conn.execute("SELECT count(*) FROM glob(?)", [staged_glob]).fetchone()[0]
+        if not total_files:
+            return counts
+
+        excluded_keys = list(self._get_shredding_rules()) + ["content", "paragraphs"]
+        excluded_sql = ", ".join(f"'{k}'" for k in excluded_keys)
+        record_shape = json.dumps(
+            {
+                "entity_id": "VARCHAR",
+                "source_type": "VARCHAR",
+                "url": "VARCHAR",
+                "content_md": "VARCHAR",
+                "extracted": "JSON",
+                "source_metadata": "JSON",
+                "transformed_at": "VARCHAR",
+            }
+        )
+
+        self.conn.begin()
+        try:
+            # 1. Read + parse all staged files (invalid JSON is counted as an error)
+            self.conn.execute(
+                f"""
+                CREATE OR REPLACE TEMP TABLE _staged AS
+                SELECT
+                    r.entity_id,
+                    r.source_type,
+                    coalesce(r.url, '') AS url,
+                    coalesce(r.content_md, '') AS content_md,
+                    sha256(coalesce(r.content_md, '')) AS content_hash,
+                    coalesce(r.extracted, '{{}}') AS extracted,
+                    CASE WHEN json_type(r.source_metadata) = 'OBJECT'
+                         THEN r.source_metadata ELSE '{{}}' END AS source_metadata,
+                    r.transformed_at
+                FROM (
+                    SELECT unnest(json_transform(
+                        CASE WHEN json_valid(content) THEN content END, '{record_shape}'
+                    ))
+                    FROM read_text(?)
+                ) r
+                WHERE r.entity_id IS NOT NULL AND r.source_type IS NOT NULL
+                  AND json_type(coalesce(r.extracted, '{{}}')) = 'OBJECT'
+                QUALIFY row_number() OVER (
+                    PARTITION BY r.entity_id ORDER BY r.transformed_at DESC NULLS LAST
+                ) = 1
+                """,
+                [staged_glob],
+            )
+
+            # 2. CDC: classify every record with one join against dim_documents
+            self.conn.execute(
+                f"""
+                CREATE OR REPLACE TEMP TABLE _staged_cdc AS
+                SELECT
+                    s.*,
+                    d.content_hash AS old_hash,
+                    d.version AS old_version,
+                    CASE
+                        WHEN d.doc_id IS NULL THEN 'created'
+                        WHEN d.content_hash IS DISTINCT FROM s.content_hash THEN 'updated'
+                        ELSE 'unchanged'
+                    END AS status,
+                    coalesce(
+                        nullif(s.extracted->>'$.title', ''),
+                        nullif(s.extracted->>'$.policy_title', ''),
+                        'Untitled'
+                    ) AS title,
+                    CASE WHEN json_exists(s.extracted, '$.policy_type')
+                         THEN s.extracted->>'$.policy_type' ELSE s.source_type END AS domain,
+                    to_json(map_concat(
+                        CAST(s.source_metadata AS MAP(VARCHAR, JSON)),
+                        map_from_entries(list_filter(
+                            map_entries(CAST(s.extracted AS MAP(VARCHAR, JSON))),
+                            e -> e.key NOT IN ({excluded_sql})
+                        ))
+                    )) AS doc_metadata
+                FROM _staged s
+                LEFT JOIN dim_documents d ON d.doc_id = s.entity_id
+                """
+            )
+
+            # 3. Document dimension + audit trail
+            self.conn.execute(
+                """
+                INSERT INTO dim_documents
+                (doc_id, source_type, title, url, metadata, full_text_blob, content_hash, version, first_seen_at, last_extracted_at)
+                SELECT entity_id, source_type, title, url, doc_metadata, content_md, content_hash,
+                       1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+                FROM _staged_cdc WHERE status = 'created'
+                """
+            )
+            self.conn.execute(
+                """
+                INSERT INTO audit_document_changes (change_id, doc_id, change_type, new_content_hash, details)
+                SELECT nextval('seq_audit_changes'), entity_id, 'create', content_hash, 'Initial extraction'
+                FROM _staged_cdc WHERE status = 'created'
+                """
+            )
+            self.conn.execute(
+                """
+                UPDATE dim_documents SET
+                title = c.title,
+                metadata = c.doc_metadata,
+                full_text_blob = c.content_md,
+                content_hash = c.content_hash,
+                version = dim_documents.version + 1,
+                last_extracted_at = CURRENT_TIMESTAMP
+                FROM _staged_cdc c
+                WHERE dim_documents.doc_id = c.entity_id AND c.status = 'updated'
+                """
+            )
+            self.conn.execute(
+                """
+                INSERT INTO audit_document_changes (change_id, doc_id, change_type, old_content_hash, new_content_hash, details)
+                SELECT nextval('seq_audit_changes'), entity_id, 'update', old_hash, content_hash,
+                       'Updated to version ' || (old_version + 1)
+                FROM _staged_cdc WHERE status = 'updated'
+                """
+            )
+            if force:
+                self.conn.execute(
+                    """
+                    UPDATE dim_documents SET last_extracted_at = CURRENT_TIMESTAMP
+                    WHERE doc_id IN (SELECT entity_id FROM _staged_cdc WHERE status = 'unchanged')
+                    """
+                )
+            # Clearing every re-shredded doc up front lets the fact insert below be a
+            # plain INSERT rather than a (much slower) per-row upsert.
+            self.conn.execute(
+                """
+                DELETE FROM fact_items
+                WHERE doc_id IN (SELECT entity_id FROM _staged_cdc WHERE status <> 'unchanged')
+                """
+            )
+
+            # 4. Fact items, shredded in SQL (last occurrence of an item_id wins,
+            #    matching INSERT OR REPLACE over the Python loop order)
+            self.conn.execute(
+                f"""
+                INSERT INTO fact_items
+                (item_id, doc_id, domain, item_type, content_text, embedding, properties, location_pointer)
+                SELECT item_id, doc_id, domain, item_type, content_text, ?::FLOAT[], properties, location_pointer
+                FROM (
+                    SELECT sha256(doc_id || item_seed) AS item_id, *
+                    FROM ({self._shredding_select_sql(
+                        "(SELECT * FROM _staged_cdc WHERE status IN ('created', 'updated'))"
+                    )})
+                )
+                QUALIFY row_number() OVER (
+                    PARTITION BY item_id ORDER BY rule_order DESC, idx DESC
+                ) = 1
+                """,
+                [[0.0] * 768],
+            )
+
+            status_rows = self.conn.execute(
+                "SELECT status, count(*) FROM _staged_cdc GROUP BY status"
+            ).fetchall()
+            loaded = self.conn.execute("SELECT count(*) FROM _staged").fetchone()[0]
+
+            for table in ("_staged_cdc", "_staged"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        for status, n in status_rows:
+            counts[status] += n
+        if force:
+            # Mirror load_item: a forced reload of an unchanged doc reports 'updated'
+            counts["updated"] += counts.pop("unchanged")
+            counts["unchanged"] = 0
+        counts["error"] = total_files - loaded
+        if counts["created"] or counts["updated"]:
+            self.generation += 1
+
+        return counts
 
     async def get_entity(self, entity_id: str) -> StoredEntity | None:
         """Retrieve an entity from DuckDB.
@@ -377,6 +690,7 @@ class StarSchemaStorage(BaseStorage):
         self.conn.execute("DELETE FROM fact_items WHERE doc_id = ?", [entity_id])
         # Then delete doc
         result = self.conn.execute("DELETE FROM dim_documents WHERE doc_id = ?", [entity_id])
+        self.generation += 1
         return result.fetchone()[0] > 0
 
     async def count_entities(self, source_type: str | None = None) -> int:
@@ -451,6 +765,67 @@ class StarSchemaStorage(BaseStorage):
             for r in results
         ]
 
+    async def search_page(
+        self,
+        filters: dict[str, Any] | None = None,
+        limit: int = 20,
+        after: str | None = None,
+    ) -> tuple[list[str], str | None]:
+        """One page of fact items matching filters, serialized to JSON by DuckDB.
+
+        Same rows and keys as `retrieve_context` (properties stay JSON, never
+        decoded in Python), in item_id order so pages are stable: keyset
+        pagination, pass the returned cursor as `after` for the next page.
+
+        Args:
+            filters: Equality filters on fact properties.
+            limit: Page size.
+            after: Cursor returned with the previous page.
+
+        Returns:
+            (rows, next_cursor): one JSON object string per row; next_cursor
+            is None on the last page.
+        """
+        # Filter and order the facts first, then join and build JSON for
+        # the page's rows only
+        where = "WHERE 1=1"
+        params: list[Any] = []
+        for k, v in (filters or {}).items():
+            # Key as a bound JSON path; non-string values compare in their JSON form
+            where += " AND json_extract_string(properties, ?) = ?"
+            params += [f"$.{k}", v if isinstance(v, str) else json.dumps(v)]
+        if after:
+            where += " AND item_id > ?"
+            params.append(after)
+        # One extra row tells whether there is a next page
+        params.append(limit + 1)
+        sql = f"""
+        SELECT
+            item.item_id,
+            json_object(
+                'content', item.content_text,
+                'type', item.item_type,
+                'properties', item.properties,
+                'source_title', doc.title,
+                'source_url', doc.url,
+                'location', item.location_pointer
+            )::VARCHAR
+        FROM (
+            SELECT item_id, doc_id, item_type, content_text, properties, location_pointer
+            FROM fact_items
+            {where}
+            ORDER BY item_id
+            LIMIT ?
+        ) item
+        JOIN dim_documents doc ON item.doc_id = doc.doc_id
+        ORDER BY item.item_id
+        """
+
+        rows = self.conn.execute(sql, params).fetchall()
+        page = rows[:limit]
+        next_cursor = page[-1][0] if len(rows) > limit else None
+        return [row[1] for row in page], next_cursor
+
     def close(self) -> None:
         """Close the database connection."""
         self.conn.close()
@@ -3,13 +3,17 @@
 from structure_it.utils.hashing import (
     generate_content_id,
     generate_entity_id,
+    generate_file_hash,
     generate_id,
     generate_relationship_id,
 )
+from structure_it.utils.stats import percentile
 
 __all__ = [
     "generate_id",
     "generate_entity_id",
     "generate_relationship_id",
     "generate_content_id",
+    "generate_file_hash",
+    "percentile",
 ]
@@ -0,0 +1,41 @@
+"""Minimal Bloom filter for fast "definitely not seen" checks."""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    Uses double hashing over one BLAKE2b digest, so each lookup costs a
+    single hash regardless of the number of bit positions.
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001):
+        """Size the filter.
+
+        Args:
+            capacity: Expected number of keys.
+            error_rate: Target false-positive rate at that capacity.
+        """
+        capacity = max(capacity, 1)
+        self.num_bits = max(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.num_hashes = max(round(self.num_bits / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        """Add a key."""
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
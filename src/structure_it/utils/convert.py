@@ -0,0 +1,286 @@
+"""Document to text conversion, selected by content type.
+
+MarkItDown handles everything (PDF, Office, HTML), but for HTML pages
+(CivicPlus bid details, service listings) it converts the whole page: menus,
+headers, footers and scripts' noscript fallbacks all end up in the prompt.
+HTML goes through a pluggable main-content extractor instead:
+
+- lxml (default): keeps the page's main content area, drops navigation and
+  boilerplate, renders headings, lists and tables as light markdown.
+- markdownify: the whole <body> as markdown (what MarkItDown produces,
+  without its file-type detection).
+- trafilatura: if installed (`pip install trafilatura`).
+- markitdown: MarkItDown as before.
+
+If the selected converter yields (almost) nothing, MarkItDown is used
+instead, so a page layout the extractor does not understand still gets
+converted. Choose the converter with STRUCTURE_IT_HTML_CONVERTER; compare
+them with scripts/benchmark_html_converters.py. Other converters can be
+added with `register_html_converter()`.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import re
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+import lxml.html
+
+from structure_it.config import HTML_CONVERTER
+from structure_it.utils.lazy import LazyImport
+
+if TYPE_CHECKING:
+    import markitdown
+
+# Imported on first use (see utils.lazy)
+MarkItDown = LazyImport("markitdown", "MarkItDown")
+
+logger = logging.getLogger(__name__)
+
+HTML_SUFFIXES = (".html", ".htm", ".aspx")
+
+# Main content containers, most specific first (CivicPlus module and page areas)
+MAIN_CONTENT_XPATHS = (
+    "//main",
+    "//*[@role='main']",
+    "//*[@id='moduleContent']",
+    "//*[@id='contentarea']",
+    "//*[@id='mainContent']",
+    "//*[@id='content']",
+    "//article",
+)
+
+DROP_TAGS = (
+    "script", "style", "noscript", "template", "nav", "header", "footer", "aside",
+    "form", "iframe", "svg", "button", "select", "input", "textarea",
+)
+
+# id/class tokens of page furniture (matched on word boundaries)
+BOILERPLATE = re.compile(
+    r"(^|[\s_-])(nav|navbar|menu|breadcrumbs?|footer|sidebar|banner|skip|social|share|"
+    r"search|cookie|widget|alert|modal|translate|print)($|[\s_-])",
+    re.IGNORECASE,
+)
+
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "blockquote", "pre", "address",
+    "dl", "dt", "dd", "figure", "figcaption", "fieldset", "ul", "ol",
+}
+
+# Output shorter than this (characters) means the extractor missed the content
+MIN_CONTENT_CHARS = 40
+
+HtmlConverter = Callable[[str], str]
+
+
+def _clean_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _is_boilerplate(el: lxml.html.HtmlElement) -> bool:
+    marker = f"{el.get('id', '')} {el.get('class', '')}"
+    return bool(marker.strip()) and BOILERPLATE.search(marker) is not None
+
+
+def _render(el: lxml.html.HtmlElement, out: list[str]) -> None:
+    """Append light markdown for el's subtree to out."""
+    tag = el.tag if isinstance(el.tag, str) else ""
+
+    if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+        text = _clean_text(el.text_content())
+        if text:
+            out.append(f"\n\n{'#' * int(tag[1])} {text}\n\n")
+    elif tag == "li":
+        text = _clean_text(el.text_content())
+        if text:
+            out.append(f"\n- {text}")
+    elif tag == "table":
+        rows = []
+        for tr in el.iter("tr"):
+            cells = [
+                _clean_text(td.text_content()).replace("|", "/") for td in tr if td.tag in ("td", "th")
+            ]
+            if any(cells):
+                rows.append("| " + " | ".join(cells) + " |")
+        if rows:
+            out.append("\n\n" + "\n".join(rows) + "\n\n")
+    else:
+        if el.text and tag:
+            out.append(re.sub(r"\s+", " ", el.text))
+        for child in el:
+            _render(child, out)
+        if tag in BLOCK_TAGS or tag == "tr":
+            out.append("\n\n" if tag != "tr" else "\n")
+    if el.tail:
+        # Source line breaks are layout, not content; structure adds the newlines
+        out.append(re.sub(r"\s+", " ", el.tail))
+
+
+def lxml_main_content(html: str) -> str:
+    """Main content of an HTML page as light markdown (lxml, no extra deps)."""
+    if not html.strip():
+        return ""
+    doc = lxml.html.document_fromstring(html)
+    for el in list(doc.iter(*DROP_TAGS)):
+        el.drop_tree()
+    # Keep <br> as a separator inside table cells and list items
+    for br in list(doc.iter("br")):
+        br.tail = " " + (br.tail or "")
+        br.drop_tag()
+    furniture = [
+        el for el in doc.iter() if isinstance(el.tag, str) and el.tag != "body" and _is_boilerplate(el)
+    ]
+    for el in furniture:
+        if el.getparent() is not None:
+            el.drop_tree()
+
+    root = None
+    for xpath in MAIN_CONTENT_XPATHS:
+        found = doc.xpath(xpath)
+        if found and len(_clean_text(found[0].text_content())) >= MIN_CONTENT_CHARS:
+            root = found[0]
+            break
+    if root is None:
+        root = doc.find("body") if doc.find("body") is not None else doc
+
+    title = doc.findtext(".//title")
+    out: list[str] = []
+    _render(root, out)
+    text = "".join(out)
+    # Tidy whitespace: trim lines, at most one blank line in a row
+    lines = [re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in text.split("\n")]
+    text = re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+    if title and not text.startswith("#"):
+        text = f"# {_clean_text(title)}\n\n{text}"
+    return text
+
+
+def markdownify_body(html: str) -> str:
+    """Whole <body> as markdown via markdownify (installed with markitdown)."""
+    from markdownify import markdownify
+
+    doc = lxml.html.document_fromstring(html) if html.strip() else None
+    if doc is None:
+        return ""
+    for el in list(doc.iter("script", "style", "noscript", "template")):
+        el.drop_tree()
+    body = doc.find("body")
+    text = markdownify(lxml.html.tostring(body if body is not None else doc, encoding="unicode"))
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def trafilatura_main_content(html: str) -> str:
+    """Main content via trafilatura (optional dependency)."""
+    import trafilatura
+
+    return trafilatura.extract(html, output_format="markdown", include_tables=True) or ""
+
+
+_markitdown: markitdown.MarkItDown | None = None
+
+
+def markitdown_html(html: str) -> str:
+    """MarkItDown's HTML conversion (the previous behaviour)."""
+    global _markitdown
+    if _markitdown is None:
+        _markitdown = MarkItDown()
+    result = _markitdown.convert_stream(io.BytesIO(html.encode("utf-8")), file_extension=".html")
+    return result.text_content
+
+
+HTML_CONVERTERS: dict[str, HtmlConverter] = {
+    "lxml": lxml_main_content,
+    "markdownify": markdownify_body,
+    "trafilatura": trafilatura_main_content,
+    "markitdown": markitdown_html,
+}
+
+
+def register_html_converter(name: str, converter: HtmlConverter) -> None:
+    """Add (or replace) an HTML converter selectable by name."""
+    HTML_CONVERTERS[name] = converter
+
+
+def is_html(path: Path, content_type: str | None = None) -> bool:
+    """Whether a downloaded document is an HTML page."""
+    if content_type:
+        return "html" in content_type.lower()
+    if path.suffix.lower() in HTML_SUFFIXES:
+        return True
+    with open(path, "rb") as f:
+        head = f.read(512).lstrip().lower()
+    return head.startswith((b"<!doctype html", b"<html"))
+
+
+def count_pages(path: str | Path) -> int | None:
+    """Number of pages of a PDF (from its page tree, without parsing content).
+
+    Returns None for other files or if the PDF cannot be read.
+    """
+    path = Path(path)
+    if path.suffix.lower() != ".pdf":
+        return None
+    with open(path, "rb") as f:
+        return count_pdf_pages(f)
+
+
+def count_pdf_pages(stream: BinaryIO) -> int | None:
+    """Number of pages of an open PDF, or None if it cannot be read."""
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+
+    try:
+        document = PDFDocument(PDFParser(stream))
+        return int(resolve1(document.catalog["Pages"])["Count"])
+    except Exception as e:
+        logger.debug(f"Could not count PDF pages: {e}")
+        return None
+
+
+class DocumentConverter:
+    """Converts downloaded documents to text for extraction, by content type."""
+
+    def __init__(self, html_converter: str = HTML_CONVERTER):
+        """Initialize the converter.
+
+        Args:
+            html_converter: Name of the HTML converter (see HTML_CONVERTERS).
+
+        Raises:
+            ValueError: If the converter name is unknown.
+        """
+        if html_converter not in HTML_CONVERTERS:
+            raise ValueError(
+                f"Unknown HTML converter {html_converter!r} (available: {', '.join(HTML_CONVERTERS)})"
+            )
+        self.html_converter = html_converter
+        self.md: markitdown.MarkItDown = MarkItDown()
+
+    def convert_html(self, html: str) -> str:
+        """HTML to text with the selected converter, falling back to MarkItDown."""
+        try:
+            text = HTML_CONVERTERS[self.html_converter](html)
+        except ImportError as e:
+            logger.warning(f"HTML converter {self.html_converter!r} unavailable ({e}); using MarkItDown")
+            text = ""
+        if len(text) < MIN_CONTENT_CHARS and self.html_converter != "markitdown":
+            text = markitdown_html(html)
+        return text
+
+    def convert(self, path: str | Path, content_type: str | None = None) -> str:
+        """Convert a file to text.
+
+        Args:
+            path: Downloaded document.
+            content_type: MIME type or hint ("html", "pdf"), if known;
+                otherwise detected from the suffix and first bytes.
+        """
+        path = Path(path)
+        if is_html(path, content_type):
+            return self.convert_html(path.read_text(encoding="utf-8", errors="replace"))
+        return self.md.convert(str(path)).text_content
@@ -5,6 +5,7 @@ Uses SHA256 for deterministic, collision-resistant identifiers.
 """
 
 import hashlib
+from pathlib import Path
 from typing import Any
 
 
@@ -97,3 +98,24 @@ def generate_content_id(content: str) -> str:
         '7d4c...'
     """
     return generate_id(content)
+
+
+def generate_file_hash(path: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    """Generate a SHA256 hash of a file's bytes without loading it into memory.
+
+    Args:
+        path: Path to the file.
+        chunk_size: Bytes read per iteration.
+
+    Returns:
+        64-character hexadecimal SHA256 hash of the file content.
+
+    Examples:
+        >>> generate_file_hash("data/raw/civic_meeting/abc123/original.pdf")
+        '9b1c...'
+    """
+    hash_obj = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hash_obj.update(chunk)
+    return hash_obj.hexdigest()
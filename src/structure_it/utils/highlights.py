@@ -0,0 +1,259 @@
+"""Locate extracted values in the source text for visual highlights.
+
+The API server used to call `str.find` for every string in an extraction
+result, up to twice (whole value, then its first 50 characters), so a
+policy with hundreds of requirements meant hundreds of full passes over a
+long document, and any difference in whitespace, case or markdown
+punctuation between the model's output and the converted text lost the
+highlight.
+
+HighlightLocator tokenizes the text once (words, lowercased; whitespace and
+punctuation, including markdown markup, separate words and are otherwise
+ignored) and finds every value
+in a single pass with an Aho-Corasick automaton over word tokens. Values are
+matched, in order of preference:
+
+1. exact: the value's words appear in sequence
+2. prefix: its first PREFIX_WORDS words do (the model completed or trimmed
+   the end); the span is estimated from the value's length, as before
+3. fuzzy: the model paraphrased; windows around the value's rarest words
+   are scored with difflib, and the best one above FUZZY_MIN_RATIO is kept
+
+Highlights keep the server's structure: {"id": JSON path, "start", "end",
+"text"}, plus "match" (exact, prefix or fuzzy). Offsets are into the
+original text, first occurrence wins.
+"""
+
+import string
+from collections import Counter, deque
+from collections.abc import Iterator
+from difflib import SequenceMatcher
+from typing import Any
+
+# Punctuation (markdown markup included) separates words, like whitespace.
+# One character for one, so offsets in the translated text are the original's.
+_SEPARATORS = str.maketrans(dict.fromkeys(string.punctuation + "‘’“”«»–—•·§¶…", " "))
+
+# Values shorter than this (characters) are not located (dates, enum labels)
+MIN_SNIPPET_CHARS = 10
+
+# Words of a value's start that locate it when the whole value does not match
+PREFIX_WORDS = 8
+
+# Fuzzy matching: minimum difflib ratio over words, anchors tried per value,
+# and anchors more frequent than this in the text are not used
+FUZZY_MIN_RATIO = 0.7
+FUZZY_ANCHORS = 3
+FUZZY_MAX_ANCHOR_HITS = 50
+
+
+def iter_strings(data: Any, path: str = "") -> Iterator[tuple[str, str]]:
+    """(JSON path, value) for every string in a nested dict/list structure."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from iter_strings(value, f"{path}.{key}" if path else key)
+    elif isinstance(data, list):
+        for i, item in enumerate(data):
+            yield from iter_strings(item, f"{path}[{i}]")
+    elif isinstance(data, str):
+        yield path, data
+
+
+def _words(text: str) -> list[str]:
+    return text.translate(_SEPARATORS).lower().split()
+
+
+class _Automaton:
+    """Aho-Corasick automaton over word sequences."""
+
+    def __init__(self, patterns: list[tuple[str, ...]]):
+        self.patterns = patterns
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[list[int]] = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for word in pattern:
+                nxt = self.goto[state].get(word)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][word] = nxt
+                state = nxt
+            self.out[state].append(pattern_id)
+
+        # Failure links, breadth first
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(word, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def first_matches(self, words: list[str]) -> dict[int, int]:
+        """Pattern id -> index in words where its first occurrence starts."""
+        goto, fail, out, patterns = self.goto, self.fail, self.out, self.patterns
+        vocabulary = {word for pattern in patterns for word in pattern}
+        found: dict[int, int] = {}
+        remaining = len(patterns)
+        state = 0
+        for i, word in enumerate(words):
+            if word not in vocabulary:
+                # No pattern continues through this word
+                state = 0
+                continue
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            if out[state]:
+                for pattern_id in out[state]:
+                    if pattern_id not in found:
+                        found[pattern_id] = i - len(patterns[pattern_id]) + 1
+                        remaining -= 1
+                if not remaining:
+                    break
+        return found
+
+
+class HighlightLocator:
+    """Finds extracted values in one source text; reusable across results."""
+
+    def __init__(self, full_text: str, fuzzy: bool = True):
+        """Tokenize the text.
+
+        Args:
+            full_text: The converted document.
+            fuzzy: Also look for paraphrased values.
+        """
+        self.text = full_text
+        self.fuzzy = fuzzy
+        self._separated = full_text.translate(_SEPARATORS)
+        # Lowercasing can change lengths, never word boundaries: the two lists align
+        self._tokens = self._separated.split()
+        self.words = self._separated.lower().split()
+        self._starts: list[int] = []
+        self._counts: Counter | None = None
+
+    def _start(self, index: int) -> int:
+        # Character offsets only up to the last word a highlight needs
+        starts, tokens, separated = self._starts, self._tokens, self._separated
+        pos = starts[-1] + len(tokens[len(starts) - 1]) if starts else 0
+        for k in range(len(starts), index + 1):
+            pos = separated.find(tokens[k], pos)
+            starts.append(pos)
+            pos += len(tokens[k])
+        return starts[index]
+
+    def _span(self, first: int, count: int) -> tuple[int, int]:
+        last = first + count - 1
+        return self._start(first), self._start(last) + len(self._tokens[last])
+
+    def locate(self, snippets: list[str]) -> list[dict | None]:
+        """Locate each snippet: {"start", "end", "match"} or None if not found."""
+        patterns: dict[tuple[str, ...], int] = {}
+        wanted: list[tuple[tuple[str, ...], tuple[str, ...] | None]] = []
+        for snippet in snippets:
+            words = tuple(_words(snippet)) if len(snippet) >= MIN_SNIPPET_CHARS else ()
+            prefix = words[:PREFIX_WORDS] if len(words) > PREFIX_WORDS else None
+            for pattern in (words, prefix):
+                if pattern:
+                    patterns.setdefault(pattern, len(patterns))
+            wanted.append((words, prefix))
+
+        found = _Automaton(list(patterns)).first_matches(self.words) if patterns else {}
+
+        results: list[dict | None] = []
+        unmatched: list[int] = []
+        for index, (snippet, (words, prefix)) in enumerate(zip(snippets, wanted, strict=True)):
+            if not words:
+                results.append(None)
+            elif patterns[words] in found:
+                start, end = self._span(found[patterns[words]], len(words))
+                if self.text.startswith(snippet, start):
+                    end = start + len(snippet)  # Verbatim: keep trailing punctuation
+                results.append({"start": start, "end": end, "match": "exact"})
+            elif prefix and patterns[prefix] in found:
+                start, _ = self._span(found[patterns[prefix]], len(prefix))
+                end = min(start + len(snippet), len(self.text))
+                results.append({"start": start, "end": end, "match": "prefix"})
+            else:
+                results.append(None)
+                unmatched.append(index)
+
+        if self.fuzzy and unmatched:
+            for index, location in zip(unmatched, self._fuzzy([wanted[i][0] for i in unmatched]), strict=True):
+                results[index] = location
+        return results
+
+    def _fuzzy(self, values: list[tuple[str, ...]]) -> list[dict | None]:
+        if self._counts is None:
+            self._counts = Counter(self.words)
+        counts = self._counts
+
+        # Each value's rarest words that do occur in the text
+        anchors_of = []
+        for words in values:
+            present = sorted(
+                {w for w in words if 0 < counts[w] <= FUZZY_MAX_ANCHOR_HITS}, key=counts.__getitem__
+            )
+            anchors_of.append(present[:FUZZY_ANCHORS])
+        needed = {w for anchors in anchors_of for w in anchors}
+        positions: dict[str, list[int]] = {}
+        if needed:
+            for i, word in enumerate(self.words):
+                if word in needed:
+                    positions.setdefault(word, []).append(i)
+
+        results: list[dict | None] = []
+        for words, anchors in zip(values, anchors_of, strict=True):
+            best, best_ratio = None, FUZZY_MIN_RATIO
+            matcher = SequenceMatcher(autojunk=False)
+            matcher.set_seq2(list(words))
+            tried = set()
+            for anchor in anchors:
+                offsets = [j for j, w in enumerate(words) if w == anchor]
+                for position in positions.get(anchor, []):
+                    for offset in offsets:
+                        first = max(position - offset, 0)
+                        if first in tried:
+                            continue
+                        tried.add(first)
+                        window = self.words[first:first + len(words)]
+                        matcher.set_seq1(window)
+                        if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                            continue
+                        ratio = matcher.ratio()
+                        if ratio >= best_ratio:
+                            best, best_ratio = (first, len(window)), ratio
+            if best is None:
+                results.append(None)
+            else:
+                start, end = self._span(*best)
+                results.append({"start": start, "end": end, "match": "fuzzy"})
+        return results
+
+
+def locate_highlights(data: Any, full_text: str, fuzzy: bool = True) -> list[dict]:
+    """Highlights for every string value of an extraction result found in full_text.
+
+    Args:
+        data: Extraction result (model_dump() of the schema).
+        full_text: The converted document the values were extracted from.
+        fuzzy: Also look for paraphrased values.
+
+    Returns:
+        [{"id": JSON path, "start", "end", "text", "match"}] in traversal order.
+    """
+    values = list(iter_strings(data))
+    locations = HighlightLocator(full_text, fuzzy=fuzzy).locate([value for _, value in values])
+    return [
+        {"id": path, "start": loc["start"], "end": loc["end"], "text": value, "match": loc["match"]}
+        for (path, value), loc in zip(values, locations, strict=True)
+        if loc is not None
+    ]
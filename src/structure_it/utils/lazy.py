@@ -0,0 +1,64 @@
+"""Deferred imports of heavy dependencies.
+
+google.genai and MarkItDown (with its PDF and file-type detection stack)
+take over a second to import together, which every process importing an
+extractor used to pay up front, including an API server that only
+searches. A module binds them as LazyImport instead:
+
+    genai = LazyImport("google.genai")
+    MarkItDown = LazyImport("markitdown", "MarkItDown")
+
+and the import happens on first attribute access or call, from whichever
+thread gets there first. Modules using them in annotations need
+`from __future__ import annotations`. `preload()` imports them ahead of
+time (the server's warm-up).
+"""
+
+import importlib
+import threading
+from typing import Any
+
+
+class LazyImport:
+    """A module, or an attribute of one, imported on first use."""
+
+    def __init__(self, module: str, attribute: str | None = None):
+        """Bind without importing.
+
+        Args:
+            module: Dotted module name.
+            attribute: Name within the module (a class, function), if not the module itself.
+        """
+        self._module = module
+        self._attribute = attribute
+        self._target: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._target is not None
+
+    def load(self) -> Any:
+        """Import (once) and return the module or attribute."""
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    target = importlib.import_module(self._module)
+                    self._target = getattr(target, self._attribute) if self._attribute else target
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load(), name)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        name = f"{self._module}.{self._attribute}" if self._attribute else self._module
+        return f"<LazyImport {name} ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def preload(*modules: str) -> None:
+    """Import modules now (LazyImports of them then resolve without waiting)."""
+    for module in modules:
+        importlib.import_module(module)
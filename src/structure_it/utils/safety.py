@@ -1,20 +1,48 @@
-"""Safety utilities for scraping."""
+"""Safety utilities for scraping.
 
+SafeSession: blocking `requests` session with a global interval rate limit
+and exponential backoff (used to monkeypatch civic-scraper historically).
+
+AsyncSafeSession: asyncio-native counterpart built on a pooled keep-alive
+httpx client:
+- per-host token buckets (politeness applies per site, so requests to
+  different municipalities no longer queue behind each other)
+- retries with jittered exponential backoff (honouring Retry-After on 429)
+  for connection errors, timeouts, 429 and 5xx
+- `download()`: HEAD size guard, streaming to disk with a byte cap, and
+  CivicPlus viewer-page unwrapping
+SyncSafeSession bridges it to blocking callers (civic-scraper) by running
+it on a background event loop.
+"""
+
+import asyncio
 import logging
+import threading
 import time
-from typing import Any, Optional
+from collections.abc import Callable, Coroutine, Iterator
+from pathlib import Path
+from typing import Any, Literal, TypeVar
+from urllib.parse import urljoin, urlparse
 
+import httpx
 import requests
+from parsel import Selector
 from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    before_sleep_log,
     retry,
+    retry_if_exception,
+    retry_if_exception_type,
     stop_after_attempt,
     wait_exponential,
-    retry_if_exception_type,
-    before_sleep_log,
+    wait_exponential_jitter,
 )
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 class RateLimiter:
     """Token-bucket style rate limiter (interval based)."""
 
@@ -76,3 +104,311 @@ class SafeSession:
 
 # Global safe session singleton for monkeypatching
 DEFAULT_SAFE_SESSION = SafeSession(requests_per_minute=10)
+
+
+class AsyncRateLimiter:
+    """Per-host token buckets for asyncio code."""
+
+    def __init__(self, requests_per_minute: float = 10, burst: int = 1):
+        """Initialize the limiter.
+
+        Args:
+            requests_per_minute: Sustained rate per host.
+            burst: Requests a host may receive back to back after being idle.
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(max(burst, 1))
+        self.buckets: dict[str, tuple[float, float]] = {}  # host -> (tokens, updated)
+        self.locks: dict[str, asyncio.Lock] = {}
+
+    async def acquire(self, host: str) -> float:
+        """Wait for a token for host; returns seconds waited."""
+        lock = self.locks.setdefault(host, asyncio.Lock())
+        started = time.monotonic()
+        async with lock:
+            tokens, updated = self.buckets.get(host, (self.capacity, started))
+            now = time.monotonic()
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                await asyncio.sleep((1 - tokens) / self.rate)
+                now = time.monotonic()
+                tokens = 1.0
+            self.buckets[host] = (tokens - 1, now)
+        return time.monotonic() - started
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.TransportError):  # Connection errors and timeouts
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+class _RetryAfterOrBackoff:
+    """Tenacity wait: the server's Retry-After on 429/503, else jittered backoff."""
+
+    def __init__(self, backoff: Callable[[RetryCallState], float], max_wait: float):
+        self.backoff = backoff
+        self.max_wait = max_wait
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        if isinstance(exc, httpx.HTTPStatusError):
+            retry_after = exc.response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_wait)
+        return self.backoff(retry_state)
+
+
+def find_viewer_download_url(html: str, base_url: str) -> str | None:
+    """Find the real file link in a CivicPlus viewer/wrapper page.
+
+    Tries, in order: `#download-link`, a link forcing download
+    (`write=true`), then any link whose text contains "download".
+
+    Returns:
+        Absolute download URL, or None if the page has no such link.
+    """
+    sel = Selector(text=html)
+    download_url = (
+        sel.css("#download-link::attr(href)").get()
+        or sel.css('a[href*="write=true"]::attr(href)').get()
+        or sel.xpath(
+            '//a[contains(translate(text(), "ABCDEFGHIJKLMNOPQRSTUVWXYZ", '
+            '"abcdefghijklmnopqrstuvwxyz"), "download")]/@href'
+        ).get()
+    )
+    return urljoin(base_url, download_url) if download_url else None
+
+
+class AsyncSafeSession:
+    """Asyncio-native SafeSession: pooled connections, per-host rate limits, retries."""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 10,
+        burst: int = 1,
+        user_agent: str = "structure-it/research-bot",
+        max_connections: int = 100,
+        max_keepalive_connections: int = 50,
+        timeout: float = 30.0,
+        max_attempts: int = 5,
+        max_wait: float = 60.0,
+    ):
+        """Initialize the session.
+
+        Args:
+            requests_per_minute: Sustained request rate per host.
+            burst: Back-to-back requests allowed per idle host.
+            user_agent: User-Agent header.
+            max_connections: Connection pool size (all hosts).
+            max_keepalive_connections: Idle connections kept open for reuse.
+            timeout: Per-request timeout in seconds.
+            max_attempts: Attempts per request (retries = max_attempts - 1).
+            max_wait: Longest backoff between attempts, in seconds.
+        """
+        self.limiter = AsyncRateLimiter(requests_per_minute, burst)
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": user_agent},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=timeout,
+        )
+        self.max_attempts = max_attempts
+        self.max_wait = max_wait
+
+    def _retrying(self) -> AsyncRetrying:
+        return AsyncRetrying(
+            reraise=True,
+            stop=stop_after_attempt(self.max_attempts),
+            wait=_RetryAfterOrBackoff(wait_exponential_jitter(initial=2, max=self.max_wait), self.max_wait),
+            retry=retry_if_exception(_is_retryable),
+            before_sleep=before_sleep_log(logger, logging.WARNING),
+        )
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Execute a request with per-host rate limiting and retries.
+
+        Raises:
+            httpx.HTTPStatusError: On a 4xx/5xx response (after retries for 429/5xx).
+            httpx.TransportError: When the host stays unreachable.
+        """
+        host = urlparse(url).hostname or ""
+        async for attempt in self._retrying():
+            with attempt:
+                await self.limiter.acquire(host)
+                response = await self.client.request(method, url, **kwargs)
+                if response.status_code == 429:
+                    logger.warning(f"Rate limit hit (429) for {url}")
+                response.raise_for_status()
+        return response
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def head(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("HEAD", url, **kwargs)
+
+    async def download(
+        self,
+        url: str,
+        path: Path,
+        expected_html: bool = False,
+        max_bytes: int = 100_000_000,
+        max_unwraps: int = 2,
+    ) -> Path:
+        """Download a file to path, unwrapping CivicPlus viewer pages.
+
+        A HEAD request checks the size first (files over max_bytes are
+        refused) and the type: an HTML page where a binary file was
+        expected is treated as a viewer wrapper and the real download link
+        inside it is followed. If the wrapper has no such link, its HTML is
+        saved instead. The cap is enforced again while streaming.
+
+        Args:
+            url: File URL.
+            path: Destination file.
+            expected_html: The caller wants an HTML page (no unwrapping).
+            max_bytes: Size cap in bytes.
+            max_unwraps: Viewer pages followed at most.
+
+        Raises:
+            ValueError: If the file exceeds max_bytes.
+        """
+        path = Path(path)
+        try:
+            head = await self.head(url, follow_redirects=True, timeout=5)
+        except httpx.HTTPError:
+            head = None  # HEAD unsupported or flaky: rely on the streaming cap
+
+        if head is not None:
+            size = int(head.headers.get("Content-Length", 0) or 0)
+            if size > max_bytes:
+                raise ValueError(f"File too large: {size} bytes")
+
+            content_type = head.headers.get("Content-Type", "").lower()
+            if "text/html" in content_type and not expected_html and max_unwraps > 0:
+                logger.info(f"Detected HTML wrapper for expected binary: {url}. Attempting to unwrap...")
+                page = await self.get(url, follow_redirects=True, timeout=10)
+                download_url = find_viewer_download_url(page.text, str(page.url))
+                if download_url:
+                    logger.info(f"Found unwrapped download URL: {download_url}")
+                    return await self.download(
+                        download_url, path, max_bytes=max_bytes, max_unwraps=max_unwraps - 1
+                    )
+                logger.info("Could not find download link in wrapper. Proceeding with HTML content.")
+                path.write_text(page.text, encoding="utf-8")
+                return path
+
+        host = urlparse(url).hostname or ""
+        async for attempt in self._retrying():
+            with attempt:
+                await self.limiter.acquire(host)
+                async with self.client.stream("GET", url, follow_redirects=True) as response:
+                    response.raise_for_status()
+                    received = 0
+                    with open(path, "wb") as f:
+                        async for chunk in response.aiter_bytes(64 * 1024):
+                            received += len(chunk)
+                            if received > max_bytes:
+                                f.close()
+                                path.unlink(missing_ok=True)
+                                raise ValueError(f"File too large: over {max_bytes} bytes")
+                            f.write(chunk)
+        return path
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class SyncResponse:
+    """The requests.Response surface civic-scraper uses, over an httpx response.
+
+    The body is read in full before the response is returned; `stream=True`
+    is ignored and iter_content() only slices `content`. civic-scraper's
+    `Asset.download` reads `response.content` in one piece anyway, so each
+    document it downloads is held in memory whole (a 100 MB packet costs
+    100 MB). Use AsyncSafeSession.download() or the Scrapy spiders'
+    streaming handler where that matters.
+    """
+
+    def __init__(self, response: httpx.Response):
+        self.status_code = response.status_code
+        self.headers = response.headers  # Case-insensitive, like requests
+        self.url = str(response.url)
+        self.content = response.content
+        self.encoding = response.encoding
+        self._response = response
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    def json(self) -> Any:
+        return self._response.json()
+
+    def raise_for_status(self) -> None:
+        self._response.raise_for_status()
+
+    def iter_content(self, chunk_size: int = 8192) -> Iterator[bytes]:
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+    def __enter__(self) -> "SyncResponse":
+        return self
+
+    def __exit__(self, *exc: object) -> Literal[False]:
+        return False
+
+
+class SyncSafeSession:
+    """Blocking facade over AsyncSafeSession for synchronous callers.
+
+    Runs its own AsyncSafeSession on a background event loop thread, so
+    blocking code (civic-scraper) shares the pooled connections and
+    per-host limits. Accepts the requests-style `allow_redirects` keyword.
+    """
+
+    def __init__(self, **session_kwargs: Any):
+        self.headers: dict[str, str] = {}  # requests.Session compatibility
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._session = self._call(self._create(session_kwargs))
+
+    @staticmethod
+    async def _create(session_kwargs: dict) -> AsyncSafeSession:
+        return AsyncSafeSession(**session_kwargs)
+
+    def _call(self, coro: Coroutine[Any, Any, T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def request(self, method: str, url: str, **kwargs: Any) -> SyncResponse:
+        kwargs.pop("stream", None)  # Bodies are read eagerly
+        if "timeout" in kwargs and kwargs["timeout"] is None:
+            del kwargs["timeout"]  # requests' default (none): keep the session's timeout
+        if "allow_redirects" in kwargs:
+            kwargs["follow_redirects"] = kwargs.pop("allow_redirects")
+        if self.headers:
+            kwargs["headers"] = {**self.headers, **(kwargs.get("headers") or {})}
+        return SyncResponse(self._call(self._session.request(method, url, **kwargs)))
+
+    def get(self, url: str, **kwargs: Any) -> SyncResponse:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> SyncResponse:
+        return self.request("POST", url, **kwargs)
+
+    def head(self, url: str, **kwargs: Any) -> SyncResponse:
+        return self.request("HEAD", url, **kwargs)
+
+    def close(self) -> None:
+        self._call(self._session.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
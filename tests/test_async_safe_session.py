@@ -0,0 +1,145 @@
+"""Tests for the asyncio SafeSession and its blocking bridge."""
+
+import asyncio
+import http.server
+import threading
+import time
+from itertools import pairwise
+
+import httpx
+import pytest
+import requests
+
+from structure_it.utils.safety import AsyncRateLimiter, AsyncSafeSession, SyncSafeSession
+
+PDF_BODY = b"%PDF-1.7\n" + b"x" * 200_000
+VIEWER_HTML = b"<html><body><a href='/doc.pdf?write=true'>Download File</a></body></html>"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    flaky_hits = 0
+
+    def _respond(self, include_body):
+        if self.path == "/flaky" and _Handler.flaky_hits < 2:
+            _Handler.flaky_hits += 1
+            status, body, content_type = 503, b"busy", "text/plain"
+        elif self.path == "/viewer":
+            status, body, content_type = 200, VIEWER_HTML, "text/html"
+        elif self.path.startswith("/doc.pdf"):
+            status, body, content_type = 200, PDF_BODY, "application/pdf"
+        else:
+            status, body, content_type = 200, b"ok", "text/plain"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond(True)
+
+    def do_HEAD(self):
+        self._respond(False)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+async def test_rate_limiter_is_per_host():
+    limiter = AsyncRateLimiter(requests_per_minute=300)  # One request per 0.2 s
+    started = time.monotonic()
+    log = []
+
+    async def fetch(host):
+        await limiter.acquire(host)
+        log.append((host, time.monotonic() - started))
+
+    await asyncio.gather(*(fetch(h) for h in ["a.gov", "a.gov", "a.gov", "b.gov"]))
+    a_times = [t for host, t in log if host == "a.gov"]
+    assert all(later - earlier >= 0.19 for earlier, later in pairwise(a_times))
+    # b.gov is not queued behind a.gov
+    (b_time,) = [t for host, t in log if host == "b.gov"]
+    assert b_time < 0.05
+
+
+async def test_retries_on_503_honouring_retry_after(server):
+    session = AsyncSafeSession(requests_per_minute=6000, max_attempts=3)
+    try:
+        _Handler.flaky_hits = 0
+        response = await session.get(f"{server}/flaky")
+        assert response.status_code == 200 and _Handler.flaky_hits == 2
+
+        # Out of attempts: the last error surfaces
+        session.max_attempts = 2
+        _Handler.flaky_hits = 0
+        with pytest.raises(httpx.HTTPStatusError):
+            await session.get(f"{server}/flaky")
+    finally:
+        await session.aclose()
+
+
+async def test_download_unwraps_viewer_and_enforces_size(server, tmp_path):
+    session = AsyncSafeSession(requests_per_minute=6000)
+    try:
+        path = await session.download(f"{server}/viewer", tmp_path / "doc.pdf")
+        assert path.read_bytes() == PDF_BODY
+
+        # Asked for HTML: the viewer page itself is kept
+        path = await session.download(f"{server}/viewer", tmp_path / "page.html", expected_html=True)
+        assert path.read_bytes() == VIEWER_HTML
+
+        with pytest.raises(ValueError, match="too large"):
+            await session.download(f"{server}/doc.pdf", tmp_path / "big.pdf", max_bytes=1000)
+        assert not (tmp_path / "big.pdf").exists()
+    finally:
+        await session.aclose()
+
+
+def test_sync_bridge_matches_requests_surface(server):
+    session = SyncSafeSession(requests_per_minute=6000)
+    try:
+        session.headers.update({"X-Test": "1"})
+        response = session.get(f"{server}/doc.pdf", allow_redirects=True, timeout=5)
+        response.raise_for_status()
+        assert response.content == PDF_BODY
+        assert b"".join(response.iter_content(8192)) == PDF_BODY
+        assert session.head(f"{server}/doc.pdf").headers["content-type"] == "application/pdf"
+    finally:
+        session.close()
+
+
+def test_civic_patch_leaves_requests_alone(server, tmp_path, monkeypatch):
+    from civic_scraper.base import asset as asset_module
+    from civic_scraper.base.asset import Asset
+    from civic_scraper.platforms.civic_plus import site as site_module
+
+    from structure_it.extractors import civic_patch
+
+    session = SyncSafeSession(requests_per_minute=6000)
+    monkeypatch.setattr(civic_patch, "_SESSION", session)
+    monkeypatch.setattr(Asset, "download", Asset.download)
+    monkeypatch.setattr(site_module.Site, "__init__", site_module.Site.__init__)
+    get, head = requests.get, requests.head
+    try:
+        civic_patch.patch_civic_scraper()
+        assert (requests.get, requests.head) == (get, head)
+
+        # Asset.download without a session goes through the safe session
+        monkeypatch.setattr(asset_module, "requests", None)
+        asset = Asset(f"{server}/doc.pdf", meeting_id="m1", asset_type="agenda", content_type="application/pdf")
+        path = asset.download(str(tmp_path))
+        assert open(path, "rb").read() == PDF_BODY
+    finally:
+        session.close()
@@ -0,0 +1,117 @@
+"""Tests for the conditional-GET downloader middleware."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from scrapy import Request, signals
+from scrapy.exceptions import DropItem, IgnoreRequest
+from scrapy.http import Response
+from scrapy.utils.test import get_crawler
+
+from structure_it.config import get_scraper_settings
+from structure_it.scrapers.civic_plus.middlewares import ConditionalGetMiddleware
+from structure_it.scrapers.civic_plus.staging_pipeline import RawStagingPipeline
+
+URL = "https://example.com/AgendaCenter/ViewFile/Agenda/_01012025-1"
+
+
+@pytest.fixture
+def crawler(tmp_path):
+    settings = get_scraper_settings("moderate")
+    settings["CRAWL_STATE_DB"] = str(tmp_path / "crawl_state.sqlite")
+    return get_crawler(settings_dict=settings)
+
+
+def _document_request(url=URL):
+    return Request(url, meta={"conditional_get": True})
+
+
+def _scraped(crawler, response):
+    """What Scrapy does once an item from response has passed every pipeline."""
+    crawler.signals.send_catch_log(signals.item_scraped, item={}, response=response, spider=None)
+
+
+def test_revalidates_and_drops_unchanged_documents(crawler):
+    mw = ConditionalGetMiddleware.from_crawler(crawler)
+
+    # First crawl: full download, validators stored
+    request = _document_request()
+    assert mw.process_request(request) is None
+    assert b"If-None-Match" not in request.headers
+    response = Response(
+        URL,
+        status=200,
+        headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+        body=b"%PDF" + b"x" * 996,
+        request=request,
+    )
+    assert mw.process_response(request, response) is response
+    _scraped(crawler, response)
+
+    # Second crawl: conditional request, 304 short-circuits the item
+    request = _document_request()
+    mw.process_request(request)
+    assert request.headers[b"If-None-Match"] == b'"v1"'
+    assert request.headers[b"If-Modified-Since"] == b"Wed, 01 Jan 2025 00:00:00 GMT"
+    with pytest.raises(IgnoreRequest):
+        mw.process_response(request, Response(URL, status=304))
+
+    assert mw.report() == {
+        "requests": 1,
+        "not_modified": 1,
+        "not_modified_ratio": 1.0,
+        "bytes_saved": 1000,
+    }
+
+
+def test_validators_persist_across_crawls(crawler, tmp_path):
+    mw = ConditionalGetMiddleware.from_crawler(crawler)
+    request = _document_request()
+    response = Response(URL, status=200, headers={"ETag": '"v1"'}, body=b"a", request=request)
+    mw.process_response(request, response)
+    _scraped(crawler, response)
+    mw.store.close()
+
+    settings = get_scraper_settings("moderate")
+    settings["CRAWL_STATE_DB"] = str(tmp_path / "crawl_state.sqlite")
+    crawler = get_crawler(settings_dict=settings)
+    mw = ConditionalGetMiddleware.from_crawler(crawler)
+    request = _document_request()
+    mw.process_request(request)
+    assert request.headers[b"If-None-Match"] == b'"v1"'
+
+    # Changed upstream: 200 with a new ETag passes through and replaces the validator
+    response = Response(URL, status=200, headers={"ETag": '"v2"'}, body=b"ab", request=request)
+    assert mw.process_response(request, response) is response
+    _scraped(crawler, response)
+    assert mw.store.get(URL)["etag"] == '"v2"'
+
+
+async def test_document_that_fails_staging_is_fetched_again(crawler, tmp_path):
+    mw = ConditionalGetMiddleware.from_crawler(crawler)
+    pipeline = RawStagingPipeline(str(tmp_path / "raw"), str(tmp_path / "temp_downloads"))
+
+    request = _document_request()
+    response = Response(URL, status=200, headers={"ETag": '"v1"'}, body=b"%PDF", request=request)
+    mw.process_response(request, response)
+    # The downloaded file is gone by the time the pipeline stages it
+    item = {"url": URL, "temp_path": str(tmp_path / "temp_downloads" / "missing.pdf")}
+    with pytest.raises(DropItem):
+        await pipeline.process_item(item, MagicMock())
+    assert mw.store.get(URL) is None
+
+    # Next crawl: a full download, not a 304 for a document never staged
+    request = _document_request()
+    mw.process_request(request)
+    assert b"If-None-Match" not in request.headers
+
+
+def test_listing_pages_are_not_revalidated(crawler):
+    mw = ConditionalGetMiddleware.from_crawler(crawler)
+    listing = Request("https://example.com/AgendaCenter")
+    mw.process_response(listing, Response(listing.url, status=200, headers={"ETag": '"l"'}))
+
+    request = Request("https://example.com/AgendaCenter")
+    mw.process_request(request)
+    assert b"If-None-Match" not in request.headers
+    assert mw.store.get(listing.url) is None
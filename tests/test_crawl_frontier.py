@@ -0,0 +1,121 @@
+"""Tests for the persistent CivicPlus crawl frontier."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from scrapy import Request
+from scrapy.http import HtmlResponse
+
+from structure_it.scrapers.civic_plus.frontier import CrawlFrontier, RevisitPolicy
+from structure_it.scrapers.civic_plus.spider import CivicPlusSpider
+from structure_it.utils.bloom import BloomFilter
+
+AGENDA_CENTER = """
+<div id="cat1"><h2>Village Board</h2><table><tbody>
+  <tr><td><a name="_01152020"></a><p>Old Meeting</p>
+    <a href="/AgendaCenter/ViewFile/Agenda/_01152020-1">Agenda</a>
+    <a href="/AgendaCenter/ViewFile/Minutes/_01152020-1">Minutes</a></td></tr>
+  <tr><td><a name="_{today}"></a><p>Tonight</p>
+    <a href="/AgendaCenter/ViewFile/Agenda/_{today}-2">Agenda</a></td></tr>
+</tbody></table></div>
+"""
+
+
+@pytest.fixture
+def frontier(tmp_path):
+    f = CrawlFrontier(tmp_path / "crawl_state.sqlite")
+    yield f
+    f.close()
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"https://example.com/{i}")
+    assert all(f"https://example.com/{i}" in bloom for i in range(1000))
+    false_positives = sum(f"https://other.com/{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_revisit_policy():
+    policy = RevisitPolicy()
+    today = date(2025, 6, 1)
+    assert policy.interval("Agenda", "2025-06-03", today) == timedelta(days=1)
+    assert policy.interval("Agenda", "2025-08-01", today) == timedelta(days=7)
+    assert policy.interval("Agenda", "2024-01-01", today) == timedelta(days=365)
+    assert policy.interval("Minutes", "2025-05-01", today) == timedelta(days=7)
+    assert policy.interval("Minutes", "2023-05-01", today) == timedelta(days=365)
+    assert policy.interval("Other", None, today) == timedelta(days=30)
+
+
+def test_frontier_schedules_new_and_due_only(frontier, tmp_path):
+    url = "https://example.com/AgendaCenter/ViewFile/Minutes/_01152020-1"
+    assert frontier.should_visit(url, "Minutes", "2020-01-15")
+    # Discovered but never fetched (e.g. the download failed): still due
+    assert frontier.should_visit(url, "Minutes", "2020-01-15")
+
+    frontier.record_fetch(url, "hash1", "Minutes", "2020-01-15")
+    assert not frontier.should_visit(url, "Minutes", "2020-01-15")
+    assert frontier.should_visit(
+        url, "Minutes", "2020-01-15", now=datetime.now() + timedelta(days=400)
+    )
+    assert frontier.counts == {"new": 1, "due": 2, "fresh": 1}
+
+    # Survives a restart; a 304 (no hash) keeps the last content hash
+    frontier.close()
+    reopened = CrawlFrontier(tmp_path / "crawl_state.sqlite")
+    assert url in reopened.seen
+    reopened.record_fetch(url)
+    assert reopened.get(url)["content_hash"] == "hash1"
+    assert reopened.get(url)["fetch_count"] == 2
+    reopened.close()
+
+
+def test_second_crawl_skips_fresh_documents(frontier):
+    spider = CivicPlusSpider(place_url="https://example.com/AgendaCenter")
+    spider.frontier = frontier
+    today = date.today().strftime("%m%d%Y")
+    body = AGENDA_CENTER.format(today=today).encode()
+    response = HtmlResponse(url="https://example.com/AgendaCenter", body=body, encoding="utf-8")
+
+    first = list(spider.parse(response))
+    assert len(first) == 3
+    for request in first:
+        frontier.record_fetch(
+            request.meta["frontier_url"],
+            "h",
+            request.meta["asset_type"],
+            request.meta["meeting_date"],
+        )
+
+    # Re-crawl a day later: only tonight's agenda is due again
+    later = datetime.now() + timedelta(days=1, minutes=1)
+    due = [
+        r.url
+        for r in first
+        if frontier.should_visit(r.url, r.meta["asset_type"], r.meta["meeting_date"], now=later)
+    ]
+    assert due == [f"https://example.com/AgendaCenter/ViewFile/Agenda/_{today}-2"]
+    assert list(spider.parse(response)) == []
+
+
+def test_fetch_recorded_only_once_item_is_scraped(frontier, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    spider = CivicPlusSpider(place_url="https://example.com/AgendaCenter")
+    spider.frontier = frontier
+    url = "https://example.com/AgendaCenter/ViewFile/Minutes/_01152020-1"
+    meta = {"frontier_url": url, "asset_type": "Minutes", "meeting_date": "2020-01-15"}
+    response = HtmlResponse(
+        url=url,
+        body=b"%PDF-1.7",
+        headers={"Content-Type": "application/pdf"},
+        request=Request(url, meta=meta),
+    )
+
+    (item,) = spider.parse_document(response)
+    # Staging may still fail: not fresh yet
+    assert frontier.should_visit(url, "Minutes", "2020-01-15")
+
+    spider.record_scraped(item, response, spider)
+    assert not frontier.should_visit(url, "Minutes", "2020-01-15")
+    assert frontier.get(url)["content_hash"] == item["content_hash"]
@@ -0,0 +1,92 @@
+"""Tests for the offline transform cost/latency estimator."""
+
+import json
+
+import pytest
+
+from structure_it.etl.estimate import estimate_tokens, estimate_transform
+from structure_it.etl.manifest import RawManifest
+from structure_it.utils.stats import percentile
+
+
+def _make_html_item(raw_base, entity_id, words=400):
+    item_dir = raw_base / "civic_meeting" / entity_id
+    item_dir.mkdir(parents=True)
+    body = " ".join(["budget"] * words)
+    # Distinct bytes per item, or the manifest treats them as one document
+    (item_dir / "original.html").write_text(f"<html><!-- {entity_id} --><body><p>{body}</p></body></html>")
+    (item_dir / "source.json").write_text(
+        json.dumps({"entity_id": entity_id, "source_type": "civic_meeting", "title": "Board"})
+    )
+
+
+def test_percentile_and_tokens():
+    assert percentile([5.0, 1.0, 3.0, 2.0, 4.0], 50) == 3.0
+    assert percentile([5.0, 1.0, 3.0, 2.0, 4.0], 95) == 5.0
+    assert estimate_tokens("abcdefgh") == 2
+
+
+async def test_estimate_uses_defaults_without_history(tmp_path):
+    raw_base = tmp_path / "raw"
+    for i in range(4):
+        _make_html_item(raw_base, f"item{i}")
+
+    estimate = await estimate_transform(
+        raw_base, tmp_path / "staged", model_name="gemini-2.5-flash", concurrency=2
+    )
+
+    assert estimate.items == 4
+    assert estimate.failed == 0
+    assert estimate.history_samples == 0
+    # 400 words of markdown (~700 tokens) plus prompt and schema per item
+    assert estimate.input_tokens > 4 * 700
+    assert estimate.cost_usd is not None and estimate.cost_usd > 0
+    assert estimate.wall_clock_p50_seconds >= 4 * 10.0 / 2
+
+
+async def test_estimate_samples_and_uses_history(tmp_path):
+    raw_base = tmp_path / "raw"
+    for i in range(10):
+        _make_html_item(raw_base, f"item{i:02d}")
+
+    manifest = RawManifest(raw_base)
+    manifest.scan(tmp_path / "staged")
+    for i, seconds in enumerate([1.0, 2.0, 3.0, 4.0, 20.0]):
+        manifest.record_transform(f"old{i}", "civic_meeting", "m", 1000, 500, 0.1, seconds)
+    manifest.close()
+
+    full = await estimate_transform(raw_base, tmp_path / "staged", model_name="unpriced")
+    sampled = await estimate_transform(raw_base, tmp_path / "staged", sample=3, concurrency=1)
+
+    assert full.cost_usd is None
+    assert (full.extract_p50_seconds, full.extract_p95_seconds) == (3.0, 20.0)
+    assert full.history_samples == 5
+    # Identical items: the 3-item sample extrapolates to the full run
+    assert sampled.sampled == 3
+    assert sampled.items == 10
+    assert sampled.input_tokens == pytest.approx(full.input_tokens, rel=0.01)
+    # Output ratio from history (0.5 JSON chars per markdown char), not the default
+    assert full.output_tokens == pytest.approx(10 * len(" ".join(["budget"] * 400)) * 0.5 / 4, rel=0.05)
+
+
+async def test_estimate_leaves_the_manifest_untouched(tmp_path):
+    raw_base = tmp_path / "raw"
+    for i in range(2):
+        _make_html_item(raw_base, f"item{i}")
+
+    estimate = await estimate_transform(raw_base, tmp_path / "staged")
+    assert estimate.items == 2
+    assert not (raw_base / ".manifest.sqlite").exists()
+
+    manifest = RawManifest(raw_base)
+    manifest.scan(tmp_path / "staged")
+    manifest.close()
+    for i in range(2, 4):
+        _make_html_item(raw_base, f"item{i}")
+
+    estimate = await estimate_transform(raw_base, tmp_path / "staged", rescan=True)
+
+    assert estimate.items == 4
+    manifest = RawManifest(raw_base)
+    assert manifest.count() == 2
+    manifest.close()
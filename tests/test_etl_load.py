@@ -0,0 +1,124 @@
+"""Tests for the ELT load step (per-item and bulk paths)."""
+
+import json
+
+import duckdb
+import pytest
+
+from structure_it.etl.load import load_all, load_all_bulk
+
+
+def _write_staged(staged_base, entity_id, source_type, content_md, extracted, metadata=None):
+    path = staged_base / source_type / f"{entity_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {
+        "entity_id": entity_id,
+        "source_type": source_type,
+        "url": f"https://example.com/{entity_id}",
+        "content_md": content_md,
+        "content_hash": "ignored",
+        "extracted": extracted,
+        "source_metadata": metadata or {"committee_name": "Village Board"},
+        "transformed_at": "2025-01-01T00:00:00",
+    }
+    path.write_text(json.dumps(record, indent=2), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def staged_dir(tmp_path):
+    staged = tmp_path / "staged"
+    _write_staged(
+        staged,
+        "meeting1",
+        "civic_meeting",
+        "# Board meeting minutes",
+        {
+            "title": "Board Meeting",
+            "government_body": "Village Board",
+            "date": None,
+            "agenda_items": [
+                {"number": "1", "title": "Call to Order", "description": "Mayor presiding"},
+                {"number": None, "title": "Public Hearing", "description": ""},
+                {"number": "1", "title": "Duplicate number wins last"},
+            ],
+            "votes": [{"motion": "Approve minutes", "result": "Passed"}],
+            "public_comments": ["Resident asked about parking", "Another comment"],
+        },
+    )
+    _write_staged(
+        staged,
+        "policy1",
+        "policy",
+        "Policy text",
+        {
+            "policy_title": "Expense Policy",
+            "policy_type": "Financial",
+            "requirements": [
+                {"requirement_id": "R1", "statement": "Submit receipts.", "source_section": "2.1"},
+                {"statement": "Managers review.", "requirement_type": "recommended"},
+            ],
+            "content": "dropped from metadata",
+        },
+        metadata={"model": "test-model", "policy_title": "overridden"},
+    )
+    (staged / "civic_meeting" / "broken.json").write_text("{not json", encoding="utf-8")
+    return staged
+
+
+def _snapshot(db_path):
+    conn = duckdb.connect(str(db_path))
+    docs = conn.execute(
+        "SELECT doc_id, source_type, title, url, metadata, full_text_blob, content_hash, version "
+        "FROM dim_documents ORDER BY doc_id"
+    ).fetchall()
+    docs = [(*d[:4], json.loads(d[4]), *d[5:]) for d in docs]
+    facts = conn.execute(
+        "SELECT item_id, doc_id, domain, item_type, content_text, len(embedding), "
+        "properties, location_pointer FROM fact_items ORDER BY item_id"
+    ).fetchall()
+    facts = [(*f[:6], json.loads(f[6]), f[7]) for f in facts]
+    audits = conn.execute(
+        "SELECT doc_id, change_type, old_content_hash, new_content_hash, details "
+        "FROM audit_document_changes ORDER BY doc_id, change_id"
+    ).fetchall()
+    conn.close()
+    return docs, facts, audits
+
+
+async def test_bulk_load_matches_per_item_load(staged_dir, tmp_path):
+    item_db = tmp_path / "item.duckdb"
+    bulk_db = tmp_path / "bulk.duckdb"
+
+    item_counts = await load_all(staged_dir, item_db)
+    bulk_counts = await load_all_bulk(staged_dir, bulk_db)
+
+    assert bulk_counts == item_counts == {"created": 2, "updated": 0, "unchanged": 0, "error": 1}
+    assert _snapshot(bulk_db) == _snapshot(item_db)
+
+
+async def test_bulk_load_cdc(staged_dir, tmp_path):
+    db_path = tmp_path / "bulk.duckdb"
+    await load_all_bulk(staged_dir, db_path)
+
+    # Re-running with no changes is a no-op
+    counts = await load_all_bulk(staged_dir, db_path)
+    assert counts == {"created": 0, "updated": 0, "unchanged": 2, "error": 1}
+
+    # Changing the content bumps the version, audits the change and replaces facts
+    _write_staged(
+        staged_dir,
+        "policy1",
+        "policy",
+        "Policy text v2",
+        {"policy_title": "Expense Policy", "requirements": [{"statement": "Only this one."}]},
+    )
+    counts = await load_all_bulk(staged_dir, db_path, source_type="policy")
+    assert counts == {"created": 0, "updated": 1, "unchanged": 0, "error": 0}
+
+    docs, facts, audits = _snapshot(db_path)
+    policy = next(d for d in docs if d[0] == "policy1")
+    assert policy[7] == 2
+    assert [f[4] for f in facts if f[1] == "policy1"] == ["Only this one."]
+    assert audits[-1][1] == "update"
+    assert audits[-1][4] == "Updated to version 2"
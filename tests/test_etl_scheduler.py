@@ -0,0 +1,122 @@
+"""Tests for priority-aware ELT work scheduling."""
+
+import json
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+from structure_it.etl.manifest import ManifestEntry, RawManifest
+from structure_it.etl.scheduler import QueueLatency, WorkScheduler
+from structure_it.etl.transform import transform_all, watch_transform
+
+TODAY = date(2025, 6, 1)
+
+
+def _make_raw_item(raw_base, entity_id, meeting_date):
+    item_dir = raw_base / "civic_meeting" / entity_id
+    item_dir.mkdir(parents=True)
+    (item_dir / "original.pdf").write_bytes(entity_id.encode())
+    (item_dir / "source.json").write_text(
+        json.dumps({"entity_id": entity_id, "url": "https://x.gov/a", "meeting_date": meeting_date})
+    )
+    return item_dir
+
+
+def _entry(entity_id, meeting_date=None, host="a.gov", source_type="civic_meeting", **kwargs):
+    return ManifestEntry(
+        entity_id=entity_id,
+        source_type=source_type,
+        meeting_date=meeting_date,
+        host=host,
+        content_hash="h",
+        **kwargs,
+    )
+
+
+def test_classify():
+    scheduler = WorkScheduler(today=TODAY)
+    assert scheduler.classify(_entry("tonight", "2025-06-01")) == "urgent"
+    assert scheduler.classify(_entry("next_week", "2025-06-08")) == "urgent"
+    assert scheduler.classify(_entry("spring", "2025-03-01")) == "normal"
+    assert scheduler.classify(_entry("undated")) == "normal"
+    assert scheduler.classify(_entry("old", "2019-01-01")) == "backlog"
+    assert scheduler.classify(_entry("huge", "2025-03-01", original_size=10**9)) == "backlog"
+    assert scheduler.classify(_entry("failed", "2025-06-01", attempts=1)) == "retry"
+
+
+def test_plan_is_strict_by_class_and_fair_within_class():
+    scheduler = WorkScheduler(today=TODAY)
+    entries = [
+        *[_entry(f"big{i}", "2025-02-01", host="big.gov") for i in range(3)],
+        _entry("small0", "2025-02-01", host="small.gov"),
+        _entry("bid0", host="big.gov", source_type="civic_bid"),
+        _entry("old", "2010-01-01"),
+        _entry("retry", "2025-06-01", attempts=1),
+        _entry("parked", "2025-06-01", attempts=3),
+        _entry("tonight", "2025-06-01", host="big.gov"),
+    ]
+
+    order = [e.entity_id for e in scheduler.plan(entries)]
+
+    assert order[0] == "tonight"
+    # Meetings from both hosts are interleaved before the bid bucket's second turn
+    assert order[1:5] == ["big0", "small0", "bid0", "big1"]
+    assert order[-2:] == ["old", "retry"]
+    assert "parked" not in order
+    assert "parked" in [e.entity_id for e in scheduler.plan(entries, include_parked=True)]
+
+
+def test_queue_latency_summary():
+    latency = QueueLatency()
+    latency.record("urgent", "2000-01-01T00:00:00")
+    latency.record("urgent", None)
+    summary = latency.summary()
+    assert list(summary) == ["urgent"]
+    assert summary["urgent"]["count"] == 1
+    assert summary["urgent"]["p95_s"] > 0
+
+
+async def test_transform_all_follows_plan_and_counts_failures(tmp_path):
+    raw_base = tmp_path / "raw"
+    _make_raw_item(raw_base, "old", "2001-01-01")
+    _make_raw_item(raw_base, "new", date.today().isoformat())
+
+    with (
+        patch(
+            "structure_it.etl.transform.transform_item", new=AsyncMock(return_value=None)
+        ) as mock_transform,
+        patch("structure_it.etl.transform.ExtractorRegistry"),
+    ):
+        assert await transform_all(raw_base, tmp_path / "staged", concurrency=2) == (0, 0, 2)
+
+    # The urgent item was started first even though "old" sorts first on disk
+    assert [c.args[0].name for c in mock_transform.await_args_list] == ["new", "old"]
+
+    manifest = RawManifest(raw_base)
+    try:
+        assert {e.entity_id: (e.attempts, e.host) for e in manifest.pending()} == {
+            "new": (1, "x.gov"),
+            "old": (1, "x.gov"),
+        }
+    finally:
+        manifest.close()
+
+
+async def test_watch_picks_up_items_staged_between_passes(tmp_path):
+    raw_base = tmp_path / "raw"
+    manifest = RawManifest(raw_base)
+    item_dir = _make_raw_item(raw_base, "late", date.today().isoformat())
+    manifest.record_original("late", "civic_meeting", item_dir / "original.pdf", host="x.gov")
+    manifest.close()
+
+    with (
+        patch(
+            "structure_it.etl.transform.transform_item", new=AsyncMock(return_value={"ok": True})
+        ),
+        patch("structure_it.etl.transform.ExtractorRegistry") as registry_cls,
+    ):
+        # First pass transforms the item, second pass finds nothing and idles
+        totals = await watch_transform(raw_base, tmp_path / "staged", poll_interval=0, max_passes=2)
+    assert totals == (1, 0)
+    # One pooled registry per watch session, closed when the session ends
+    registry_cls.assert_called_once()
+    registry_cls.return_value.close.assert_called_once()
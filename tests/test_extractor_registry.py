@@ -0,0 +1,77 @@
+"""Tests for the shared extractor registry and its connection instrumentation."""
+
+import http.server
+import threading
+
+import pytest
+
+from structure_it.extractors.registry import (
+    ConnectionStats,
+    ExtractorRegistry,
+    create_pooled_client,
+)
+from structure_it.schemas.civic import CivicBid, CivicMeeting
+
+
+@pytest.fixture
+def local_server():
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def test_registry_shares_extractors_and_client():
+    registry = ExtractorRegistry(
+        {"civic_meeting": CivicMeeting, "civic_bid": CivicBid, "legacy_meeting": CivicMeeting},
+        default_schema=CivicMeeting,
+        api_key="test-api-key",
+    )
+    try:
+        meeting = registry.get("civic_meeting")
+        assert registry.get("civic_meeting") is meeting
+        assert registry.get("legacy_meeting") is meeting
+        assert registry.get("unknown_type") is meeting
+        assert registry.get("civic_bid").client is meeting.client
+
+        stats = registry.stats()
+        assert stats["clients"] == 1
+        assert stats["extractors"] == 2
+        assert stats["lookups_by_source_type"]["civic_meeting"] == 2
+    finally:
+        registry.close()
+
+
+def test_registry_without_default_rejects_unknown_type():
+    registry = ExtractorRegistry({"civic_bid": CivicBid}, api_key="test-api-key")
+    try:
+        with pytest.raises(KeyError):
+            registry.get("civic_meeting")
+    finally:
+        registry.close()
+
+
+def test_pooled_client_reuses_connections(local_server):
+    stats = ConnectionStats()
+    _, http_client = create_pooled_client("test-api-key", max_connections=2, stats=stats)
+    try:
+        for _ in range(5):
+            http_client.get(local_server)
+    finally:
+        http_client.close()
+
+    assert stats.requests == 5
+    assert stats.connections_opened == 1
+    assert stats.to_dict()["reuse_ratio"] == 0.8
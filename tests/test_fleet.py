@@ -0,0 +1,159 @@
+"""Tests for the fleet orchestrator and the shared per-host throttle."""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from itertools import pairwise
+
+import pytest
+
+from structure_it.scrapers.civic_plus.middlewares import HostThrottle
+from structure_it.scrapers.fleet import CrawlHistory, due_crawls, load_site_registry
+
+
+def _write_registry(tmp_path, sites):
+    path = tmp_path / "sites.json"
+    path.write_text(json.dumps({"sites": sites}), encoding="utf-8")
+    return path
+
+
+def test_registry_validation(tmp_path):
+    sites = load_site_registry(
+        _write_registry(
+            tmp_path,
+            [
+                {"name": "springfield", "url": "https://springfield.gov", "spiders": ["agenda", "bids"]},
+                {
+                    "name": "shelbyville",
+                    "url": "https://shelbyville.gov",
+                    "spiders": ["permits"],
+                    "spider_args": {"permits": {"start_url": "https://shelbyville.gov/DocumentCenter/Index/12"}},
+                },
+            ],
+        )
+    )
+    assert [s.name for s in sites] == ["springfield", "shelbyville"]
+    assert sites[0].schedule == "daily"
+
+    # Document Center folders cannot be guessed from the site URL
+    bad = _write_registry(tmp_path, [{"name": "x", "url": "https://x.gov", "spiders": ["permits"]}])
+    with pytest.raises(ValueError, match="start_url"):
+        load_site_registry(bad)
+
+    bad = _write_registry(tmp_path, [{"name": "x", "url": "https://x.gov", "spiders": ["minutes"]}])
+    with pytest.raises(ValueError, match="unknown spider"):
+        load_site_registry(bad)
+
+
+def test_due_crawls_follow_schedule_and_history(tmp_path):
+    sites = load_site_registry(
+        _write_registry(
+            tmp_path,
+            [
+                {"name": "daily", "url": "https://a.gov", "schedule": "daily"},
+                {"name": "weekly", "url": "https://b.gov", "schedule": "weekly"},
+                {"name": "never", "url": "https://c.gov", "schedule": "manual"},
+                {"name": "off", "url": "https://d.gov", "enabled": False},
+            ],
+        )
+    )
+    history = CrawlHistory(tmp_path / "crawl_state.sqlite")
+    start = datetime.now()
+    for site in ("daily", "weekly", "never"):
+        history.record(site, "agenda", start, "finished", {"item_scraped_count": 3})
+
+    later = datetime.now() + timedelta(days=2)
+    assert [(s.name, spider) for s, spider in due_crawls(sites, history, now=later)] == [
+        ("daily", "agenda")
+    ]
+    assert {s.name for s, _ in due_crawls(sites, history, now=later, include_all=True)} == {
+        "daily",
+        "weekly",
+        "never",
+    }
+    assert history.latest()[0]["items"] == 3
+    history.close()
+
+
+def test_host_throttle_spaces_requests_per_host():
+    throttle = HostThrottle()
+
+    async def fetch(host, log):
+        await throttle.acquire(host, delay=0.2, concurrency=2)
+        log.append((host, time.monotonic()))
+        throttle.release(host)
+
+    async def run():
+        log = []
+        # Two crawlers on the same host, one on another host
+        await asyncio.gather(*(fetch(h, log) for h in ["a.gov", "a.gov", "a.gov", "b.gov"]))
+        return log
+
+    log = asyncio.run(run())
+    a_times = [t for host, t in log if host == "a.gov"]
+    assert all(later - earlier >= 0.19 for earlier, later in pairwise(a_times))
+    # Other hosts are not held back by a.gov's delay
+    (b_time,) = [t for host, t in log if host == "b.gov"]
+    assert b_time - a_times[0] < 0.1
+
+
+def test_host_throttle_limits_connections():
+    throttle = HostThrottle()
+    active = peak = 0
+
+    async def fetch():
+        nonlocal active, peak
+        await throttle.acquire("a.gov", delay=0, concurrency=2)
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        throttle.release("a.gov")
+
+    async def run():
+        await asyncio.gather(*(fetch() for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_adaptive_throttle_backs_off_and_recovers():
+    throttle = HostThrottle()
+
+    async def fetch(latency=0.01, error=False, retry_after=None):
+        await throttle.acquire("a.gov", delay=1.0, concurrency=4, min_delay=0.0, max_delay=8.0)
+        throttle.release("a.gov", None if error else latency, error, retry_after)
+        return throttle.snapshot("a.gov")
+
+    async def run():
+        state = await fetch()
+        assert (state["delay"], state["concurrency"]) == (1.0, 1)
+        # 503s: double the delay each time, up to the bound
+        for expected in (2.0, 4.0, 8.0, 8.0):
+            throttle.hosts["a.gov"].next_start = 0  # Skip the real sleep
+            assert (await fetch(error=True))["delay"] == expected
+        # Healthy fast responses: shorter delay first, then more connections
+        for _ in range(200):
+            throttle.hosts["a.gov"].next_start = 0
+            state = await fetch()
+        assert state["delay"] == 0.0 and state["concurrency"] == 4
+        assert state["errors"] == 4 and state["rate_per_min"] == 205
+
+    asyncio.run(run())
+
+
+def test_adaptive_throttle_shares_most_conservative_bounds():
+    throttle = HostThrottle()
+
+    async def run():
+        # A moderate spider and a conservative one on the same host
+        await throttle.acquire("a.gov", delay=2.0, concurrency=4, min_delay=0.5, max_delay=60.0)
+        throttle.release("a.gov", 0.01)
+        await throttle.acquire("a.gov", delay=10.0, concurrency=1, min_delay=5.0, max_delay=60.0)
+        throttle.release("a.gov", 0.01)
+
+    asyncio.run(run())
+    state = throttle.hosts["a.gov"]
+    assert (state.min_delay, state.max_concurrency) == (5.0, 1)
+    assert throttle.snapshot("a.gov")["delay"] == 5.0
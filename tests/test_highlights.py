@@ -0,0 +1,76 @@
+"""Tests for locating extracted values in the source text."""
+
+from structure_it.utils.highlights import HighlightLocator, locate_highlights
+
+TEXT = """# Travel Policy
+
+| Rule | Detail |
+| Employees **must** book   travel through the
+approved portal. | yes |
+
+Managers shall approve all expenses above $5,000 within ten business days of submission.
+Receipts must be retained for seven years.
+"""
+
+
+def _find(highlights, path):
+    return next((h for h in highlights if h["id"] == path), None)
+
+
+def test_verbatim_value_keeps_previous_offsets():
+    value = "Receipts must be retained for seven years."
+    (highlight,) = locate_highlights({"rule": value}, TEXT)
+    assert highlight == {
+        "id": "rule",
+        "start": TEXT.find(value),
+        "end": TEXT.find(value) + len(value),
+        "text": value,
+        "match": "exact",
+    }
+
+
+def test_whitespace_case_and_markup_differences_still_match():
+    value = "employees must book travel through the approved portal."
+    highlight = _find(locate_highlights({"requirements": [{"statement": value}]}, TEXT), "requirements[0].statement")
+    assert highlight["match"] == "exact"
+    assert TEXT[highlight["start"]:highlight["end"]] == "Employees **must** book   travel through the\napproved portal"
+
+
+def test_prefix_and_paraphrase_fallbacks():
+    data = {
+        # Same opening, different ending
+        "trimmed": "Managers shall approve all expenses above $5,000 within ten days of the submission date",
+        # Paraphrased by the model
+        "paraphrase": "Managers must approve every expense exceeding $5,000 within ten business days of submission.",
+        "absent": "Contractors are reimbursed for mileage at the federal rate",
+        "short": "Policy",
+    }
+    highlights = locate_highlights(data, TEXT)
+    start = TEXT.find("Managers shall")
+    assert _find(highlights, "trimmed")["match"] == "prefix"
+    assert _find(highlights, "trimmed")["start"] == start
+    assert _find(highlights, "paraphrase")["match"] == "fuzzy"
+    assert TEXT[_find(highlights, "paraphrase")["start"]:].startswith("Managers shall approve")
+    assert _find(highlights, "absent") is None
+    assert _find(highlights, "short") is None
+
+    assert _find(locate_highlights(data, TEXT, fuzzy=False), "paraphrase") is None
+
+
+def test_first_occurrence_and_shared_prefixes():
+    text = "alpha beta gamma delta. alpha beta gamma epsilon. alpha beta gamma delta."
+    locator = HighlightLocator(text)
+    first, second, overlapping = locator.locate(
+        ["alpha beta gamma delta", "alpha beta gamma epsilon", "gamma delta. alpha beta"]
+    )
+    assert (first["start"], first["end"]) == (0, 22)
+    assert second["start"] == text.find("alpha beta gamma epsilon")
+    assert overlapping["start"] == text.find("gamma delta")
+
+
+def test_paths_follow_result_structure():
+    data = {"policy": {"sections": [{"title": "Travel Policy"}, {"title": "Receipts must be retained"}]}}
+    assert [h["id"] for h in locate_highlights(data, TEXT)] == [
+        "policy.sections[0].title",
+        "policy.sections[1].title",
+    ]
@@ -0,0 +1,65 @@
+"""Tests for the HTML main-content conversion path."""
+
+from pathlib import Path
+
+import pytest
+
+from structure_it.utils.convert import (
+    DocumentConverter,
+    is_html,
+    lxml_main_content,
+    markitdown_html,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+PAGE_FURNITURE = ["Skip to Main Content", "Agendas & Minutes", "uses cookies", "Select Language"]
+
+
+@pytest.fixture(params=["civicplus_bid_detail.html", "civicplus_request_tracker.html"])
+def page(request):
+    return (FIXTURES / request.param).read_text()
+
+
+def test_lxml_keeps_main_content_and_drops_furniture(page):
+    text = lxml_main_content(page)
+    assert text.startswith("# ")
+    for furniture in PAGE_FURNITURE:
+        assert furniture not in text
+    # Far less text for the model than the whole page
+    assert len(text) < 0.6 * len(markitdown_html(page))
+
+
+def test_bid_detail_fields_survive():
+    text = lxml_main_content((FIXTURES / "civicplus_bid_detail.html").read_text())
+    assert "| Closing Date/Time | 12/6/2024 2:00 PM |" in text
+    assert "## Description" in text
+    assert "- Remove approximately 1,440 cubic feet" in text
+    # <br> inside a cell stays a separator
+    assert "Purchasing Manager Phone: 555-555-0142" in text
+
+
+def test_unknown_layout_falls_back_to_markitdown():
+    converter = DocumentConverter("lxml")
+    # Everything is page furniture: the extractor finds nothing
+    html = "<html><body><nav><a href='/a'>Home</a> <a href='/b'>Departments and services</a></nav></body></html>"
+    assert converter.convert_html(html) == markitdown_html(html)
+
+
+def test_unknown_converter_rejected():
+    with pytest.raises(ValueError, match="Unknown HTML converter"):
+        DocumentConverter("nope")
+
+
+def test_convert_routes_by_content_type(tmp_path, monkeypatch):
+    page = tmp_path / "page"
+    page.write_text((FIXTURES / "civicplus_bid_detail.html").read_text())
+    assert is_html(page)  # Sniffed from the first bytes
+    assert is_html(tmp_path / "detail.aspx")
+    assert not is_html(page, "application/pdf")
+
+    converter = DocumentConverter("lxml")
+    calls = []
+    monkeypatch.setattr(converter.md, "convert", lambda path: calls.append(path))
+    assert "## Description" in converter.convert(page, "html")
+    assert calls == []
@@ -0,0 +1,92 @@
+"""Tests for the zero-copy raw handoff (blob store + RawStagingPipeline)."""
+
+import hashlib
+import os
+import time
+from unittest.mock import MagicMock
+
+from structure_it.etl.blobs import BlobStore, sweep_temp_dir
+from structure_it.scrapers.civic_plus.staging_pipeline import RawStagingPipeline
+
+PACKET = b"%PDF-1.7 shared agenda packet"
+
+
+def _download(temp_dir, name, content=PACKET):
+    temp_dir.mkdir(exist_ok=True)
+    path = temp_dir / name
+    path.write_bytes(content)
+    return path
+
+
+def _item(temp_path, url):
+    return {
+        "url": url,
+        "title": "Regular Meeting",
+        "meeting_date": "2025-01-15",
+        "temp_path": str(temp_path),
+        "content_hash": hashlib.sha256(temp_path.read_bytes()).hexdigest(),
+    }
+
+
+async def test_identical_documents_are_stored_once(tmp_path):
+    raw_dir, temp_dir = tmp_path / "raw", tmp_path / "temp_downloads"
+    pipeline = RawStagingPipeline(str(raw_dir), str(temp_dir))
+    spider = MagicMock()
+
+    # The same packet linked from two agendas
+    first = await pipeline.process_item(_item(_download(temp_dir, "a.pdf"), "https://x.gov/a"), spider)
+    await pipeline.process_item(_item(_download(temp_dir, "b.pdf"), "https://x.gov/b"), spider)
+
+    originals = list(raw_dir.glob("civic_meeting/*/original.pdf"))
+    assert len(originals) == 2
+    assert os.path.samefile(originals[0], originals[1])
+    assert originals[0].read_bytes() == PACKET
+    assert len(list((raw_dir / ".blobs").glob("*/*.pdf"))) == 1
+    assert pipeline.blobs.stats["deduplicated"] == 1
+
+    # Temp files are consumed by the handoff; later pipelines read the original
+    assert not any(temp_dir.iterdir())
+    assert first["temp_path"] in {str(p) for p in originals}
+    pipeline.close_spider(spider)
+
+
+async def test_changed_document_relinks_and_orphan_is_pruned(tmp_path):
+    raw_dir, temp_dir = tmp_path / "raw", tmp_path / "temp_downloads"
+    pipeline = RawStagingPipeline(str(raw_dir), str(temp_dir))
+    spider = MagicMock()
+
+    await pipeline.process_item(_item(_download(temp_dir, "a.pdf"), "https://x.gov/a"), spider)
+    revised = _download(temp_dir, "a.pdf", b"%PDF-1.7 revised packet")
+    await pipeline.process_item(_item(revised, "https://x.gov/a"), spider)
+
+    (original,) = raw_dir.glob("civic_meeting/*/original.pdf")
+    assert original.read_bytes() == b"%PDF-1.7 revised packet"
+    assert pipeline.manifest.pending()[0].content_hash == hashlib.sha256(
+        b"%PDF-1.7 revised packet"
+    ).hexdigest()
+
+    # The first version is no longer linked from any item
+    assert pipeline.blobs.prune(min_age_s=0) == 1
+    assert original.read_bytes() == b"%PDF-1.7 revised packet"
+    pipeline.close_spider(spider)
+
+
+def test_ingest_hashes_when_hash_unknown(tmp_path):
+    blobs = BlobStore(tmp_path / "raw")
+    blob_path, content_hash = blobs.ingest(_download(tmp_path / "tmp", "doc.html", b"<html/>"))
+
+    assert content_hash == hashlib.sha256(b"<html/>").hexdigest()
+    assert blob_path == blobs.path_for(content_hash, ".html")
+    assert blob_path.read_bytes() == b"<html/>"
+
+
+def test_sweep_removes_only_stale_temp_files(tmp_path):
+    temp_dir = tmp_path / "temp_downloads"
+    stale = _download(temp_dir, ".abc.part")
+    fresh = _download(temp_dir, "fresh.pdf")
+    old = time.time() - 2 * 24 * 3600
+    os.utime(stale, (old, old))
+
+    assert sweep_temp_dir(temp_dir) == 1
+    assert not stale.exists()
+    assert fresh.exists()
@@ -0,0 +1,155 @@
+"""Tests for the raw-layer manifest and manifest-driven transform planning."""
+
+import json
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from structure_it.etl.manifest import RawManifest
+from structure_it.etl.transform import transform_all
+
+
+def _make_raw_item(raw_base, source_type, entity_id, content=b"%PDF-1.4 original"):
+    item_dir = raw_base / source_type / entity_id
+    item_dir.mkdir(parents=True, exist_ok=True)
+    (item_dir / "original.pdf").write_bytes(content)
+    (item_dir / "source.json").write_text(
+        json.dumps({"entity_id": entity_id, "source_type": source_type}), encoding="utf-8"
+    )
+    return item_dir
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    m = RawManifest(tmp_path / "raw")
+    yield m
+    m.close()
+
+
+def test_record_original_detects_redownload_vs_change(manifest, tmp_path):
+    item_dir = _make_raw_item(tmp_path / "raw", "civic_meeting", "abc")
+    original = item_dir / "original.pdf"
+
+    assert manifest.record_original("abc", "civic_meeting", original) == "new"
+    assert [e.entity_id for e in manifest.pending()] == ["abc"]
+
+    manifest.mark_staged("abc", manifest.pending()[0].content_hash)
+    assert manifest.pending() == []
+
+    # Same bytes downloaded again (new mtime) is not a change
+    original.write_bytes(b"%PDF-1.4 original")
+    os.utime(original, (0, 0))
+    assert manifest.record_original("abc", "civic_meeting", original) == "unchanged"
+    assert manifest.pending() == []
+
+    original.write_bytes(b"%PDF-1.4 revised agenda")
+    assert manifest.record_original("abc", "civic_meeting", original) == "changed"
+    assert [e.entity_id for e in manifest.pending()] == ["abc"]
+
+
+def test_scan_bootstraps_existing_tree(manifest, tmp_path):
+    raw_base = tmp_path / "raw"
+    staged_base = tmp_path / "staged"
+    _make_raw_item(raw_base, "civic_meeting", "staged_already")
+    _make_raw_item(raw_base, "civic_bid", "never_staged")
+    (staged_base / "civic_meeting").mkdir(parents=True)
+    (staged_base / "civic_meeting" / "staged_already.json").write_text("{}")
+
+    counts = manifest.scan(staged_base)
+    assert counts["new"] == 2
+    assert [e.entity_id for e in manifest.pending()] == ["never_staged"]
+
+    # Unmodified files are not re-hashed or reported on a rescan
+    assert manifest.scan(staged_base) == {"new": 0, "changed": 0, "unchanged": 2, "removed": 0}
+
+
+async def test_transform_all_only_processes_pending(tmp_path):
+    raw_base = tmp_path / "raw"
+    staged_base = tmp_path / "staged"
+    _make_raw_item(raw_base, "civic_meeting", "one", b"%PDF-1.4 agenda one")
+    _make_raw_item(raw_base, "civic_meeting", "two", b"%PDF-1.4 agenda two")
+
+    with (
+        patch(
+            "structure_it.etl.transform.transform_item", new=AsyncMock(return_value={"ok": True})
+        ) as mock_transform,
+        patch("structure_it.etl.transform.ExtractorRegistry"),
+    ):
+        assert await transform_all(raw_base, staged_base) == (2, 0, 0)
+        assert mock_transform.await_count == 2
+
+        # No-op run: nothing changed, nothing transformed
+        mock_transform.reset_mock()
+        assert await transform_all(raw_base, staged_base) == (0, 2, 0)
+        mock_transform.assert_not_awaited()
+
+        # Changing one original (outside the pipeline) is picked up by a rescan
+        (raw_base / "civic_meeting" / "two" / "original.pdf").write_bytes(b"new bytes")
+        assert await transform_all(raw_base, staged_base, rescan=True) == (1, 1, 0)
+        assert mock_transform.await_args.args[0].name == "two"
+
+
+async def test_bootstrap_scan_runs_once_even_after_crawl_rows(tmp_path):
+    raw_base = tmp_path / "raw"
+    staged_base = tmp_path / "staged"
+    _make_raw_item(raw_base, "civic_meeting", "on_disk", b"%PDF-1.4 before the manifest")
+    # A crawl records one item before the first transform run
+    manifest = RawManifest(raw_base)
+    crawled = _make_raw_item(raw_base, "civic_meeting", "crawled", b"%PDF-1.4 crawled")
+    manifest.record_original("crawled", "civic_meeting", crawled / "original.pdf")
+    assert manifest.last_scan() is None
+    manifest.close()
+
+    with (
+        patch(
+            "structure_it.etl.transform.transform_item", new=AsyncMock(return_value={"ok": True})
+        ) as mock_transform,
+        patch("structure_it.etl.transform.ExtractorRegistry"),
+    ):
+        assert await transform_all(raw_base, staged_base) == (2, 0, 0)
+        assert sorted(c.args[0].name for c in mock_transform.await_args_list) == ["crawled", "on_disk"]
+
+        # Bootstrapped: later runs plan from the manifest alone
+        _make_raw_item(raw_base, "civic_meeting", "copied_in", b"%PDF-1.4 outside the pipeline")
+        assert await transform_all(raw_base, staged_base) == (0, 2, 0)
+
+    manifest = RawManifest(raw_base)
+    assert manifest.last_scan() is not None
+    assert manifest.last_scan("civic_bid") == manifest.last_scan()
+    manifest.close()
+
+
+def test_duplicate_bytes_become_aliases(manifest, tmp_path):
+    raw_base = tmp_path / "raw"
+    packet = b"%PDF-1.4 council packet"
+    for entity_id, url in [
+        ("agenda_link", "https://x.gov/AgendaCenter/ViewFile/Agenda/_01"),
+        ("packet_link", "https://x.gov/AgendaCenter/ViewFile/Agenda/_01?packet=true"),
+        ("old_version", "https://x.gov/AgendaCenter/ViewFile/Agenda/_01?html=true"),
+    ]:
+        original = _make_raw_item(raw_base, "civic_meeting", entity_id, packet) / "original.pdf"
+        assert manifest.record_original(entity_id, "civic_meeting", original, url=url) == "new"
+    # Same bytes in another source type are extracted with another schema
+    other = _make_raw_item(raw_base, "civic_bid", "bid_copy", packet) / "original.pdf"
+    manifest.record_original("bid_copy", "civic_bid", other)
+
+    # One extraction per distinct file
+    assert sorted(e.entity_id for e in manifest.pending()) == ["agenda_link", "bid_copy"]
+    assert manifest.canonical_of("packet_link") == "agenda_link"
+    assert [a["url"] for a in manifest.aliases("agenda_link")] == [
+        "https://x.gov/AgendaCenter/ViewFile/Agenda/_01?packet=true",
+        "https://x.gov/AgendaCenter/ViewFile/Agenda/_01?html=true",
+    ]
+    summary = manifest.dedup_summary("civic_meeting")
+    assert (summary["documents"], summary["aliases"]) == (1, 2)
+    assert summary["alias_bytes"] == 2 * len(packet)
+
+    # The canonical URL now serves a revised agenda: the oldest alias takes over
+    # the packet bytes, the other alias follows it
+    manifest.mark_staged("agenda_link", manifest.pending()[0].content_hash)
+    revised = raw_base / "civic_meeting" / "agenda_link" / "original.pdf"
+    revised.write_bytes(b"%PDF-1.4 revised agenda")
+    assert manifest.record_original("agenda_link", "civic_meeting", revised) == "changed"
+    assert sorted(e.entity_id for e in manifest.pending("civic_meeting")) == ["agenda_link", "packet_link"]
+    assert manifest.canonical_of("old_version") == "packet_link"
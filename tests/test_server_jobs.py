@@ -0,0 +1,357 @@
+"""Tests for the API server's background extraction jobs."""
+
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+import server.main as server_main
+from server.cache import ResultCache
+from server.jobs import JobQueue, QueueFull
+
+DOCUMENT = "# Travel Policy\n\nEmployees must book travel through the approved portal.\n"
+
+
+class _Summary(BaseModel):
+    title: str
+    statement: str
+
+
+class _FakeTextTool:
+    conversions = 0
+
+    def _convert_stream_to_markdown(self, stream, suffix):
+        _FakeTextTool.conversions += 1
+        if suffix != ".md":
+            raise ValueError(f"Unsupported file format: {suffix}")
+        time.sleep(0.05)  # Blocking, like MarkItDown
+        return stream.read().decode()
+
+
+class _FakeGeminiExtractor:
+    delay = 0.0
+
+    def __init__(self, schema):
+        self.schema = schema
+
+    async def extract(self, content):
+        await asyncio.sleep(self.delay)
+        return _Summary(
+            title="Travel Policy",
+            statement="Employees must book travel through the approved portal.",
+        )
+
+
+class _FakeStorage:
+    def __init__(self):
+        self.stored = []
+
+    async def store_entity(self, **kwargs):
+        self.stored.append(kwargs)
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(server_main, "PolicyRequirementsExtractor", _FakeTextTool)
+    monkeypatch.setattr(server_main, "GeminiExtractor", _FakeGeminiExtractor)
+    monkeypatch.setattr(server_main, "storage", _FakeStorage())
+    monkeypatch.setattr(server_main, "SERVER_UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(server_main, "jobs", JobQueue(workers=2))
+    monkeypatch.setattr(server_main, "cache", ResultCache(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(server_main, "inflight", {})
+    _FakeGeminiExtractor.delay = 0.0
+    _FakeTextTool.conversions = 0
+    with TestClient(server_main.app) as client:
+        yield client
+
+
+def _upload(client, path="/api/jobs", name="policy.md", type="article", content=DOCUMENT, **form):
+    return client.post(path, files={"file": (name, content.encode())}, data={"type": type, **form})
+
+
+def test_submit_returns_before_extraction_finishes(client, tmp_path):
+    _FakeGeminiExtractor.delay = 1.0
+    started = time.perf_counter()
+    response = _upload(client)
+    assert time.perf_counter() - started < 0.5
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] in ("queued", "running")
+    assert job["info"] == {"filename": "policy.md", "type": "article"}
+
+    job = client.get(job["status_url"], params={"wait": 10}).json()
+    assert job["status"] == "done"
+    assert job["result"]["data"]["title"] == "Travel Policy"
+    assert [h["id"] for h in job["result"]["highlights"]] == ["title", "statement"]
+    assert server_main.storage.stored[0]["source_url"] == "policy.md"
+    # The upload is removed once processed
+    assert list((tmp_path / "uploads").iterdir()) == []
+
+
+def test_failed_job_reports_error(client):
+    job = _upload(client, name="policy.xyz").json()
+    job = client.get(f"/api/jobs/{job['id']}", params={"wait": 10}).json()
+    assert job["status"] == "failed"
+    assert "Unsupported file format" in job["error"]
+    assert "result" not in job
+
+    assert client.get("/api/jobs/nope").status_code == 404
+    assert _upload(client, type="nope").status_code == 400
+
+
+def test_extract_endpoint_still_returns_result(client):
+    response = _upload(client, path="/api/extract")
+    assert response.status_code == 200
+    assert response.json()["raw_text"] == DOCUMENT
+    assert _FakeTextTool.conversions == 1
+
+
+def test_jobs_run_concurrently_on_workers(client):
+    _FakeGeminiExtractor.delay = 0.5
+    started = time.perf_counter()
+    ids = [_upload(client, name=f"p{i}.md", content=f"{DOCUMENT}\n{i}").json()["id"] for i in range(4)]
+    for job_id in ids:
+        assert client.get(f"/api/jobs/{job_id}", params={"wait": 10}).json()["status"] == "done"
+    # Two workers, four half-second extractions: two rounds, not four
+    assert time.perf_counter() - started < 1.8
+
+
+async def test_queue_forgets_oldest_finished_jobs():
+    queue = JobQueue(workers=1, history=2)
+
+    async def handler(job):
+        return {"n": job.info["n"]}
+
+    submitted = [queue.submit(handler, n=n) for n in range(3)]
+    for job in submitted:
+        await queue.wait(job.id, timeout=5)
+    assert queue.get(submitted[0].id) is None
+    assert queue.get(submitted[2].id).result == {"n": 2}
+    assert queue.counts() == {"queued": 0, "running": 0, "done": 2, "failed": 0}
+    # Evicted between the 404 check and the stream starting: the stream just ends
+    assert [event async for event in queue.subscribe(submitted[0].id)] == []
+    await queue.close()
+
+
+def _read_events(response):
+    events = []
+    for line in response.iter_lines():
+        if line.startswith("data: "):
+            events.append(json.loads(line[len("data: "):]))
+    return events
+
+
+def test_progress_events_stream_partial_results(client):
+    _FakeGeminiExtractor.delay = 0.3
+    job = _upload(client).json()
+    with client.stream("GET", f"/api/jobs/{job['id']}/events") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _read_events(response)
+
+    stages = [event["stage"] for event in events]
+    assert stages == ["uploaded", "converted", "extracted", "highlights", "stored", "done"]
+    by_stage = {event["stage"]: event for event in events}
+    assert by_stage["converted"]["raw_text"] == DOCUMENT and by_stage["converted"]["pages"] is None
+    assert by_stage["extracted"]["data"]["title"] == "Travel Policy"
+    assert len(by_stage["highlights"]["highlights"]) == 2
+    # Elapsed time grows; the extraction stage shows its cost
+    assert [e["elapsed"] for e in events] == sorted(e["elapsed"] for e in events)
+    timings = client.get(f"/api/jobs/{job['id']}").json()["timings"]
+    assert timings["extracted"] >= 0.3
+    assert set(timings) == {
+        "uploaded", "queued", "cpu_wait", "converted", "llm_wait", "extracted", "highlights", "stored"
+    }
+
+    # A late subscriber gets the whole history, ending with the outcome
+    with client.stream("GET", f"/api/jobs/{job['id']}/events") as response:
+        assert [e["stage"] for e in _read_events(response)] == stages
+
+
+def test_failed_job_stream_ends_with_error(client):
+    job = _upload(client, name="policy.xyz").json()
+    with client.stream("GET", f"/api/jobs/{job['id']}/events") as response:
+        events = _read_events(response)
+    assert events[-1]["stage"] == "failed"
+    assert "Unsupported file format" in events[-1]["error"]
+    assert client.get("/api/jobs/nope/events").status_code == 404
+
+
+class _CountingExtractor(_FakeGeminiExtractor):
+    calls = 0
+
+    async def extract(self, content):
+        _CountingExtractor.calls += 1
+        return await super().extract(content)
+
+
+def test_repeat_upload_served_from_cache(client, monkeypatch):
+    monkeypatch.setattr(server_main, "GeminiExtractor", _CountingExtractor)
+    _CountingExtractor.calls = 0
+    first = _upload(client, path="/api/extract").json()
+
+    started = time.perf_counter()
+    response = _upload(client, name="renamed.md")
+    assert time.perf_counter() - started < 0.5
+    job = response.json()
+    assert job["status"] == "done" and job["info"]["cached"] is True
+    assert job["result"]["data"] == first["data"]
+    assert job["result"]["highlights"] == first["highlights"]
+    assert job["result"]["doc_id"] == first["doc_id"] and job["result"]["cached"] is True
+    assert _CountingExtractor.calls == 1 and _FakeTextTool.conversions == 1
+    assert server_main.cache.stats()["hits"] == 1
+    # Event-stream clients get the same stages
+    with client.stream("GET", f"/api/jobs/{job['id']}/events") as stream:
+        assert [e["stage"] for e in _read_events(stream)] == [
+            "uploaded", "converted", "extracted", "highlights", "stored", "done"
+        ]
+
+    # Another type reuses the conversion; force runs everything again
+    _upload(client, path="/api/extract", type="meeting")
+    assert _CountingExtractor.calls == 2 and _FakeTextTool.conversions == 1
+    forced = _upload(client, path="/api/extract", force="true").json()
+    assert "cached" not in forced
+    assert _CountingExtractor.calls == 3 and _FakeTextTool.conversions == 2
+
+
+def test_concurrent_duplicate_joins_running_job(client):
+    _FakeGeminiExtractor.delay = 0.5
+    first = _upload(client).json()
+    second = _upload(client, name="copy.md").json()
+    assert second["id"] == first["id"]
+    assert client.get(f"/api/jobs/{first['id']}", params={"wait": 10}).json()["status"] == "done"
+    assert _FakeTextTool.conversions == 1
+
+
+def test_result_fields_and_compression(client):
+    document = DOCUMENT * 200
+    response = client.post(
+        "/api/extract",
+        files={"file": ("policy.md", document.encode())},
+        data={"type": "article"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["raw_text"] == document  # Decoded by the client
+
+    response = _upload(client, path="/api/extract?fields=data,highlights", content=document)
+    assert set(response.json()) == {"data", "highlights"}
+    assert _upload(client, path="/api/extract?fields=nope", content=document).status_code == 400
+
+    small = client.get("/api/jobs/nope", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_raw_text_by_range(client):
+    job = _upload(client, content="Résumé policy\n" * 100).json()
+    job = client.get(job["status_url"], params={"wait": 10, "fields": "doc_id"}).json()
+    assert set(job["result"]) == {"doc_id"}
+
+    url = f"/api/jobs/{job['id']}/raw_text"
+    whole = client.get(url)
+    assert whole.headers["accept-ranges"] == "bytes"
+    assert whole.text == "Résumé policy\n" * 100
+    size = len(whole.content)
+
+    parts = [client.get(url, headers={"Range": f"bytes={start}-{start + 499}"}) for start in range(0, size, 500)]
+    assert all(part.status_code == 206 for part in parts)
+    assert parts[0].headers["content-range"] == f"bytes 0-499/{size}"
+    assert b"".join(part.content for part in parts).decode() == whole.text
+    assert client.get(url, headers={"Range": "bytes=-14"}).content == "Résumé policy\n".encode()[-14:]
+    assert client.get(url, headers={"Range": f"bytes={size}-"}).status_code == 416
+    assert client.get("/api/jobs/nope/raw_text").status_code == 404
+
+
+async def test_queue_is_fair_across_clients():
+    queue = JobQueue(workers=1)
+    release = asyncio.Event()
+    started = []
+
+    async def handler(job):
+        started.append(job.info["name"])
+        if job.info["name"] == "blocker":
+            await release.wait()
+        return {}
+
+    queue.submit(handler, client="a", name="blocker")
+    await asyncio.sleep(0)
+    submitted = [queue.submit(handler, client="a", name=f"a{i}") for i in range(3)]
+    submitted.append(queue.submit(handler, client="b", name="b0"))
+    release.set()
+    for job in submitted:
+        await queue.wait(job.id, timeout=5)
+    # b's job does not wait behind all of a's
+    assert started == ["blocker", "a0", "b0", "a1", "a2"]
+    await queue.close()
+
+
+async def test_queue_refuses_beyond_limits():
+    queue = JobQueue(workers=1, max_queued=3, max_queued_per_client=2)
+    release = asyncio.Event()
+
+    async def handler(job):
+        await release.wait()
+        return {}
+
+    queue.submit(handler, client="a")
+    await asyncio.sleep(0)  # Running, no longer queued
+    queue.submit(handler, client="a")
+    queue.submit(handler, client="a")
+    with pytest.raises(QueueFull) as error:
+        queue.submit(handler, client="a")
+    assert error.value.reason == "client_limit" and error.value.retry_after >= 1
+    queue.submit(handler, client="b")
+    with pytest.raises(QueueFull) as error:
+        queue.submit(handler, client="c")
+    assert error.value.reason == "queue_full"
+
+    metrics = queue.metrics()
+    assert (metrics["queued"], metrics["running"], metrics["clients_queued"]) == (3, 1, 2)
+    assert metrics["admitted"] == 4
+    assert metrics["rejected"] == {"queue_full": 1, "client_limit": 1}
+    release.set()
+    await queue.close()
+
+
+async def test_stage_slots_cap_concurrency():
+    queue = JobQueue(workers=4, stage_limits={"cpu": 1, "llm": 2})
+    active, peak = {"cpu": 0, "llm": 0}, {"cpu": 0, "llm": 0}
+
+    async def handler(job):
+        for stage in ("cpu", "llm"):
+            async with queue.slot(job, stage):
+                active[stage] += 1
+                peak[stage] = max(peak[stage], active[stage])
+                await asyncio.sleep(0.05 if stage == "cpu" else 0.2)
+                active[stage] -= 1
+        return {}
+
+    submitted = [queue.submit(handler) for _ in range(4)]
+    for job in submitted:
+        await queue.wait(job.id, timeout=5)
+    assert peak == {"cpu": 1, "llm": 2}
+    assert max(job.timings["cpu_wait"] for job in submitted) >= 0.1
+    stages = queue.metrics()["stages"]
+    assert stages["cpu"]["wait"]["max"] >= 0.1 and stages["llm"]["active"] == 0
+    await queue.close()
+
+
+def test_upload_refused_with_retry_after_when_full(client, monkeypatch):
+    monkeypatch.setattr(server_main, "jobs", JobQueue(workers=1, max_queued=1))
+    _FakeGeminiExtractor.delay = 1.0
+    accepted = [_upload(client, name=f"p{i}.md", content=f"{DOCUMENT}\n{i}") for i in range(2)]
+    assert [r.status_code for r in accepted] == [202, 202]  # One running, one queued
+
+    refused = _upload(client, name="p2.md", content=f"{DOCUMENT}\n2")
+    assert refused.status_code == 429
+    assert int(refused.headers["retry-after"]) >= 1
+    assert refused.json()["reason"] == "queue_full"
+
+    metrics = client.get("/api/metrics").json()
+    assert metrics["queued"] == 1 and metrics["rejected"]["queue_full"] == 1
+    text = client.get("/api/metrics", params={"format": "prometheus"}).text
+    assert 'structure_it_jobs_rejected{reason="queue_full"} 1' in text
+    for response in accepted:
+        assert client.get(response.json()["status_url"], params={"wait": 10}).json()["status"] == "done"
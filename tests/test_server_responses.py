@@ -0,0 +1,49 @@
+"""Tests for the API server's response encoding helpers."""
+
+import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from server import responses
+from server.responses import choose_encoding, dumps, parse_range, select_fields
+
+
+def test_choose_encoding(monkeypatch):
+    assert choose_encoding(None) is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, *") == ("br" if responses.brotli else "gzip")
+    assert choose_encoding("br;q=0.5, gzip;q=0.8") == "gzip"
+    monkeypatch.setattr(responses, "brotli", None)
+    assert choose_encoding("br") is None
+    assert choose_encoding("br, gzip") == "gzip"
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-200", 100) == (90, 99)
+    assert parse_range("bytes=50-", 100) == (50, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    # Ignored: whole body
+    for header in ("items=0-9", "bytes=0-9,20-29", "bytes=9-0", "bytes=a-b", "bytes=-"):
+        assert parse_range(header, 100) is None
+    for header in ("bytes=100-", "bytes=-0"):
+        with pytest.raises(HTTPException) as error:
+            parse_range(header, 100)
+        assert error.value.status_code == 416
+        assert error.value.headers["Content-Range"] == "bytes */100"
+
+
+def test_dumps_and_select_fields(monkeypatch):
+    payload = {"when": datetime.date(2024, 5, 1), "text": "Résumé", "n": 1}
+    assert dumps(payload) == '{"when":"2024-05-01","text":"Résumé","n":1}'.encode()
+    monkeypatch.setattr(responses, "orjson", None)
+    assert dumps(payload) == '{"when":"2024-05-01","text":"Résumé","n":1}'.encode()
+
+    assert select_fields(payload, None) is payload
+    assert select_fields(payload, " n,text ") == {"n": 1, "text": "Résumé"}
+    with pytest.raises(HTTPException):
+        select_fields(payload, "raw_text")
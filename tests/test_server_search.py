@@ -0,0 +1,107 @@
+"""Tests for the API server's paginated, cached search."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server.main as server_main
+from server.cache import SearchCache
+from structure_it.storage.pool import StoragePool
+
+
+def _policy(n: int, prefix: str = "REQ") -> dict:
+    return {
+        "policy_title": "Travel Policy",
+        "requirements": [
+            {
+                "requirement_id": f"{prefix}-{i}",
+                "statement": f"Requirement {prefix}-{i}.",
+                "category": "mandatory" if i % 2 else "recommended",
+                "applies_to": ["Employees"],
+            }
+            for i in range(n)
+        ],
+    }
+
+
+@pytest.fixture
+def storage(monkeypatch, tmp_path):
+    storage = StoragePool(tmp_path / "search.duckdb", read_threads=2)
+    monkeypatch.setattr(server_main, "storage", storage)
+    monkeypatch.setattr(server_main, "search_cache", SearchCache(max_entries=8))
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def client(storage, monkeypatch, tmp_path):
+    # The lifespan would otherwise open the result cache under ./data
+    monkeypatch.setattr(server_main, "SERVER_CACHE_DB", str(tmp_path / "cache.sqlite"))
+    with TestClient(server_main.app) as client:
+        yield client
+
+
+async def _store(storage, doc_id: str, data: dict) -> None:
+    await storage.store_entity(
+        entity_id=doc_id, source_type="policy", source_url=f"{doc_id}.pdf", raw_content=doc_id, structured_data=data
+    )
+
+
+def _search(client, **params):
+    response = client.get("/api/search", params={"q": "travel", **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_cursor_pagination(client, storage):
+    await _store(storage, "doc-1", _policy(5))
+
+    pages, cursor = [], None
+    while True:
+        page = _search(client, limit=2, **({"cursor": cursor} if cursor else {}))
+        pages.append(page["results"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert [len(p) for p in pages] == [2, 2, 1]
+    statements = [r["content"] for p in pages for r in p]
+    assert sorted(statements) == [f"Requirement REQ-{i}." for i in range(5)]
+
+    first = pages[0][0]
+    assert set(first) == {"content", "type", "properties", "source_title", "source_url", "location"}
+    assert first["type"] == "requirement" and first["source_title"] == "Travel Policy"
+    assert first["properties"]["applies_to"] == ["Employees"]  # JSON, not a string
+
+    mandatory = _search(client, filter=json.dumps({"category": "mandatory"}))["results"]
+    assert sorted(r["content"] for r in mandatory) == ["Requirement REQ-1.", "Requirement REQ-3."]
+
+
+async def test_repeated_search_is_cached_until_next_write(client, storage):
+    await _store(storage, "doc-1", _policy(3))
+    first = _search(client)
+    # Same query modulo case, whitespace and filter order
+    assert _search(client, q="  TRAVEL ") == first
+    assert server_main.search_cache.stats()["hits"] == 1
+
+    await _store(storage, "doc-2", _policy(2, prefix="NEW"))
+    after_write = _search(client)
+    assert len(after_write["results"]) == 5
+    assert server_main.search_cache.stats()["hits"] == 1
+
+
+def test_invalid_filters(client):
+    assert client.get("/api/search", params={"q": "x", "filter": "{not json"}).status_code == 400
+    assert client.get("/api/search", params={"q": "x", "filter": "[1]"}).status_code == 400
+
+
+def test_search_cache_is_lru():
+    cache = SearchCache(max_entries=2)
+    keys = [SearchCache.key(f"q{i}", None, 20, None, 0) for i in range(3)]
+    cache.put(keys[0], b"0")
+    cache.put(keys[1], b"1")
+    assert cache.get(keys[0]) == b"0"  # Now most recent
+    cache.put(keys[2], b"2")
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == b"0" and cache.get(keys[2]) == b"2"
+    assert SearchCache.key("A  b", {"y": 1, "x": 2}, 20, None, 0) == SearchCache.key("a b", {"x": 2, "y": 1}, 20, None, 0)
@@ -0,0 +1,54 @@
+"""Tests for the API server's startup: lazy imports, lifespan, warm-up."""
+
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server.main as server_main
+from scripts.profile_imports import DEFERRED_MODULES, import_profile
+from structure_it.storage.pool import StoragePool
+from structure_it.utils.lazy import LazyImport
+
+
+def test_import_is_lazy(tmp_path):
+    records = import_profile("server.main", cwd=tmp_path)
+
+    imported = {r.module for r in records}
+    assert not imported & set(DEFERRED_MODULES)
+    assert set(DEFERRED_MODULES) == set(server_main.WARMUP_MODULES)
+    # Storage and the result cache are opened on startup, not at import
+    assert list(tmp_path.iterdir()) == []
+    # The wall-clock budget is checked by scripts/profile_imports.py, not here
+    assert records[-1].module == "server.main"
+
+
+def test_lifespan_opens_storage_and_warms_up(monkeypatch, tmp_path):
+    monkeypatch.setattr(server_main, "StoragePool", lambda: StoragePool(tmp_path / "startup.duckdb", read_threads=1))
+    monkeypatch.setattr(server_main, "SERVER_CACHE_DB", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(server_main, "warmup_task", None)
+    assert server_main.storage is None and server_main.cache is None
+    with pytest.raises(RuntimeError, match="lifespan"):
+        server_main.get_storage()
+
+    with TestClient(server_main.app) as client:
+        assert isinstance(server_main.storage, StoragePool)
+        assert client.get("/api/health").json()["warm"] is False
+
+        warm = client.post("/api/warmup").json()
+        assert set(warm["seconds"]) == {"imports", "storage"}
+        assert all(module in sys.modules for module in server_main.WARMUP_MODULES)
+        assert client.get("/api/health").json()["warm"] is True
+        assert client.get("/api/search", params={"q": "x"}).json() == {"results": [], "next_cursor": None}
+
+    assert server_main.storage is None and server_main.cache is None
+
+
+def test_lazy_import():
+    dumps = LazyImport("json", "dumps")
+    assert not dumps.loaded and "not loaded" in repr(dumps)
+    assert dumps([1]) == "[1]"
+    assert dumps.loaded
+
+    path = LazyImport("os.path")
+    assert path.join("a", "b") == f"a{path.sep}b"
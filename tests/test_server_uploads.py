@@ -0,0 +1,99 @@
+"""Tests for the API server's streaming multipart uploads."""
+
+import hashlib
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from server.uploads import discard_body, read_upload
+
+received = []
+
+
+def _app(spool_dir, **limits) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        upload, form = await read_upload(request, spool_dir=spool_dir, **limits)
+        received.append(upload)
+        body = upload.open().read()
+        return {
+            "filename": upload.filename,
+            "suffix": upload.suffix,
+            "size": upload.size,
+            "sha256": upload.content_hash,
+            "matches": hashlib.sha256(body).hexdigest() == upload.content_hash,
+            "in_memory": upload.in_memory,
+            "form": form,
+        }
+
+    return app
+
+
+@pytest.fixture
+def spool_dir(tmp_path):
+    received.clear()
+    yield tmp_path / "spool"
+    for upload in received:
+        upload.close()
+
+
+def test_small_upload_stays_in_memory(spool_dir):
+    client = TestClient(_app(spool_dir, spool_bytes=1024))
+    response = client.post(
+        "/upload", files={"file": ("Policy.MD", b"# Policy\n")}, data={"type": "policy", "force": "true"}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["filename"] == "Policy.MD" and body["suffix"] == ".md"
+    assert body["size"] == 9 and body["matches"] and body["in_memory"]
+    assert body["form"] == {"type": "policy", "force": "true"}
+
+
+def test_large_upload_rolls_over_without_named_files(spool_dir):
+    client = TestClient(_app(spool_dir, spool_bytes=64 * 1024))
+    content = bytes(range(256)) * 4096  # 1 MB, arrives in several chunks
+    body = client.post("/upload", files={"file": ("scan.pdf", content)}).json()
+    assert body["size"] == len(content) and body["matches"]
+    assert body["sha256"] == hashlib.sha256(content).hexdigest()
+    assert not body["in_memory"]
+    # Rolled over to an anonymous temporary file: nothing to clean up
+    assert list(spool_dir.iterdir()) == []
+
+
+def test_oversized_upload_is_refused(spool_dir):
+    client = TestClient(_app(spool_dir, max_bytes=1000))
+    response = client.post("/upload", files={"file": ("big.md", b"x" * 5000)})
+    assert response.status_code == 413
+    assert received == []
+
+
+def test_content_length_checked_before_reading(spool_dir):
+    client = TestClient(_app(spool_dir, max_bytes=1000))
+    response = client.post(
+        "/upload",
+        content=b"",
+        headers={"content-type": "multipart/form-data; boundary=x", "content-length": str(10**9)},
+    )
+    assert response.status_code == 413
+
+
+def test_malformed_requests(spool_dir):
+    client = TestClient(_app(spool_dir))
+    assert client.post("/upload", json={"file": "x"}).status_code == 400
+    assert client.post("/upload", data={"type": "policy"}, files={"other": ("a.md", b"x")}).status_code == 422
+
+
+def test_discard_body():
+    app = FastAPI()
+
+    @app.post("/refuse")
+    async def refuse(request: Request):
+        return {"drained": await discard_body(request, max_bytes=1000)}
+
+    client = TestClient(app)
+    assert client.post("/refuse", content=b"x" * 1000).json() == {"drained": True}
+    assert client.post("/refuse", content=b"x" * 1001).json() == {"drained": False}
+    assert client.post("/refuse", content=iter([b"x" * 600, b"x" * 600])).json() == {"drained": False}
@@ -0,0 +1,89 @@
+"""Tests for StoragePool: one writer thread, reader cursors off the event loop."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from structure_it.storage.pool import StoragePool
+
+POLICY = {
+    "policy_title": "Travel Policy",
+    "policy_type": "Financial",
+    "requirements": [
+        {"requirement_id": "REQ-01", "statement": "Employees must book travel early.", "category": "mandatory"},
+        {"requirement_id": "REQ-02", "statement": "Managers should review trips.", "category": "recommended"},
+    ],
+}
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = StoragePool(tmp_path / "pool.duckdb", read_threads=3, duckdb_threads=2)
+    yield pool
+    pool.close()
+
+
+async def _store(pool, doc_id="doc-1"):
+    await pool.store_entity(
+        entity_id=doc_id,
+        source_type="policy",
+        source_url=f"https://example.org/{doc_id}",
+        raw_content=f"Policy text of {doc_id}",
+        structured_data=POLICY,
+    )
+
+
+async def test_writes_and_reads_through_the_pool(pool):
+    await _store(pool)
+
+    assert await pool.count_entities() == 1
+    entity = await pool.get_entity("doc-1")
+    assert entity.structured_data["title"] == "Travel Policy"
+    results = await pool.retrieve_context([0.0] * 768, filters={"category": "mandatory"}, limit=5)
+    assert [r["content"] for r in results] == ["Employees must book travel early."]
+
+    await _store(pool, "doc-2")
+    entities = await pool.query_entities(source_type="policy")
+    assert sorted(e.entity_id for e in entities) == ["doc-1", "doc-2"]
+
+
+async def test_calls_run_on_their_threads(pool):
+    writer = await pool.write(lambda storage: threading.current_thread().name)
+    readers = await asyncio.gather(*(pool.read(lambda storage: threading.current_thread().name) for _ in range(6)))
+    assert writer.startswith("duckdb-writer")
+    assert all(name.startswith("duckdb-reader") for name in readers)
+    # One cursor per reader thread, not per call
+    assert len(pool._readers) == len(set(readers)) <= 3
+    assert threading.current_thread().name not in readers + [writer]
+
+
+async def test_reads_do_not_wait_for_a_running_write(pool):
+    await _store(pool)
+    in_transaction = threading.Event()
+
+    def slow_write(storage):
+        storage.conn.begin()
+        storage.conn.execute("UPDATE dim_documents SET title = 'Renamed' WHERE doc_id = 'doc-1'")
+        in_transaction.set()
+        time.sleep(0.5)
+        storage.conn.commit()
+
+    write = asyncio.ensure_future(pool.write(slow_write))
+    await asyncio.to_thread(in_transaction.wait)
+
+    # Served while the write holds its transaction, from the last committed state
+    started = time.perf_counter()
+    ticks = 0
+    entity = await pool.get_entity("doc-1")
+    while not write.done():
+        ticks += 1
+        await asyncio.sleep(0.01)
+    assert time.perf_counter() - started >= 0.2  # The write really was still running
+    assert entity.structured_data["title"] == "Travel Policy"
+    assert ticks > 10  # And the event loop was free meanwhile
+
+    await write
+    assert (await pool.get_entity("doc-1")).structured_data["title"] == "Renamed"
+    assert (await pool.read(lambda storage: storage.conn.execute("SELECT current_setting('threads')").fetchone()[0])) == 2
@@ -0,0 +1,107 @@
+"""Tests for the streaming document download handler."""
+
+import asyncio
+import hashlib
+import http.server
+import threading
+
+import pytest
+from scrapy import Request
+from scrapy.exceptions import IgnoreRequest
+from scrapy.utils.test import get_crawler
+
+from structure_it.config import get_scraper_settings
+from structure_it.scrapers.civic_plus.handlers import StreamingDownloadHandler
+
+PDF_BODY = b"%PDF-1.7\n" + b"x" * 500_000
+HTML_BODY = b"<html><body><iframe src='/doc.pdf'></iframe></body></html>"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    seen: list[tuple[str, str | None]] = []
+
+    def do_GET(self):
+        self.seen.append((self.path, self.headers.get("Proxy-Authorization")))
+        body, content_type = (HTML_BODY, "text/html") if self.path == "/viewer" else (PDF_BODY, "application/pdf")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def _stream(tmp_path, request, maxsize=None):
+    settings = get_scraper_settings("moderate")
+    settings["STREAM_DOWNLOAD_DIR"] = str(tmp_path / "downloads")
+    if maxsize is not None:
+        settings["DOWNLOAD_MAXSIZE"] = maxsize
+    crawler = get_crawler(settings_dict=settings)
+    handler = StreamingDownloadHandler.from_crawler(crawler)
+
+    async def run():
+        try:
+            return await handler._stream(request)
+        finally:
+            await handler.close()
+
+    return asyncio.run(run()), crawler.stats
+
+
+def test_document_body_is_streamed_to_disk(server, tmp_path):
+    request = Request(f"{server}/doc.pdf", meta={"stream_to_disk": True})
+    response, stats = _stream(tmp_path, request)
+
+    assert response.status == 200
+    assert response.body == b""
+    assert "streamed" in response.flags
+    with open(request.meta["download_path"], "rb") as f:
+        assert f.read() == PDF_BODY
+    assert request.meta["download_sha256"] == hashlib.sha256(PDF_BODY).hexdigest()
+    assert request.meta["download_size"] == len(PDF_BODY)
+    assert stats.get_value("streaming/bytes") == len(PDF_BODY)
+    # No partial files left behind
+    assert not list((tmp_path / "downloads").glob(".*.part"))
+
+
+def test_html_responses_stay_in_memory(server, tmp_path):
+    request = Request(f"{server}/viewer", meta={"stream_to_disk": True})
+    response, _ = _stream(tmp_path, request)
+
+    assert response.body == HTML_BODY
+    assert response.css("iframe::attr(src)").get() == "/doc.pdf"
+    assert "download_path" not in request.meta
+
+
+def test_oversized_documents_are_skipped(server, tmp_path):
+    request = Request(f"{server}/doc.pdf", meta={"stream_to_disk": True})
+    with pytest.raises(IgnoreRequest):
+        _stream(tmp_path, request, maxsize=1000)
+
+    assert "download_path" not in request.meta
+    assert not list((tmp_path / "downloads").glob("*"))
+
+
+def test_meta_proxy_is_used_for_streamed_documents(server, tmp_path):
+    # The test server answers absolute-form requests like a plain HTTP proxy
+    url = "http://docs.example.invalid/doc.pdf"
+    request = Request(
+        url,
+        meta={"stream_to_disk": True, "proxy": server},
+        headers={"Proxy-Authorization": "Basic dXNlcjpwYXNz"},
+    )
+    response, _ = _stream(tmp_path, request)
+
+    assert response.status == 200
+    assert request.meta["download_size"] == len(PDF_BODY)
+    assert (url, "Basic dXNlcjpwYXNz") in _Handler.seen
@@ -0,0 +1,162 @@
+"""Tests for the durable work queue behind StructureItPipeline."""
+
+import asyncio
+import subprocess
+import sys
+import time
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+
+from structure_it.etl.manifest import RawManifest
+from structure_it.scrapers.civic_plus.pipelines import ItemProcessor, StructureItPipeline
+from structure_it.scrapers.civic_plus.work_queue import WorkerPool, WorkQueue
+from structure_it.utils.hashing import generate_entity_id
+
+
+def test_queue_claim_complete_and_retry(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    queue.enqueue("a", {"url": "https://x.gov/a", "title": "v1"})
+    # Re-enqueued before processing: payload replaced, no duplicate
+    queue.enqueue("a", {"url": "https://x.gov/a", "title": "v2"})
+    queue.enqueue("b", {"url": "https://x.gov/b"})
+    assert queue.counts()["pending"] == 2
+
+    entry = queue.claim()
+    assert entry["key"] == "a" and '"v2"' in entry["payload"]
+    assert queue.counts()["processing"] == 1
+
+    # Failed attempts go back to pending until max_attempts
+    assert queue.fail(entry["id"], "boom", max_attempts=2) == "pending"
+    assert queue.claim()["key"] == "b"
+    retry = queue.claim()
+    assert retry["key"] == "a" and retry["attempts"] == 1
+    assert queue.fail(retry["id"], "boom", max_attempts=2) == "failed"
+    assert queue.claim() is None
+
+    assert queue.counts() == {"pending": 0, "processing": 1, "done": 0, "failed": 1}
+    queue.close()
+
+
+def test_recover_requeues_entries_of_stopped_workers(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    for key in ("crashed", "running", "legacy"):
+        queue.enqueue(key, {"key": key})
+
+    # A worker process that exited mid-item, one still running, and an
+    # entry claimed before workers were tracked
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    queue.conn.execute(
+        "INSERT INTO queue_workers (worker_id, pid, started_at) VALUES ('gone', ?, '2025-01-01')",
+        [int(exited.stdout)],
+    )
+    live = queue.register_worker()
+    queue.claim("gone")
+    queue.claim(live)
+    queue.claim()
+
+    # Recovered at once, not after a timeout
+    assert queue.recover() == 2
+    assert queue.live_workers() == {live}
+    pending = queue.conn.execute("SELECT key FROM work_queue WHERE status = 'pending' ORDER BY key").fetchall()
+    assert [row["key"] for row in pending] == ["crashed", "legacy"]
+
+    queue.unregister_worker(live)
+    assert queue.recover() == 1
+    queue.close()
+
+
+async def test_missing_download_fails_the_entry():
+    processor = ItemProcessor.__new__(ItemProcessor)
+    with pytest.raises(FileNotFoundError):
+        await processor.process({"url": "https://x.gov/a", "temp_path": "temp_downloads/missing.pdf"})
+
+
+async def test_worker_pool_drains_concurrently(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    for i in range(8):
+        queue.enqueue(f"item{i}", {"n": i})
+
+    seen = []
+
+    async def handler(payload):
+        await asyncio.sleep(0.1)
+        if payload["n"] == 3:
+            raise ValueError("extraction failed")
+        seen.append(payload["n"])
+
+    stats = MagicMock()
+    pool = WorkerPool(queue, handler, concurrency=4, poll_interval=0.01, max_attempts=1, stats=stats)
+    started = time.monotonic()
+    pool.start()
+    await pool.close(drain=True)
+
+    assert sorted(seen) == [0, 1, 2, 4, 5, 6, 7]
+    assert (pool.processed, pool.failed) == (7, 1)
+    # 8 items x 0.1 s over 4 workers
+    assert time.monotonic() - started < 0.5
+    snapshot = queue.snapshot()
+    assert snapshot["pending"] == 0 and snapshot["done_per_min"] > 0
+    queue.close()
+
+
+async def test_pipeline_returns_without_waiting_for_extraction(tmp_path):
+    class SlowProcessor:
+        def __init__(self):
+            self.done = []
+
+        async def process(self, item):
+            await asyncio.sleep(0.2)
+            self.done.append(item["url"])
+
+        async def close(self):
+            pass
+
+    spider = MagicMock()
+    with patch("structure_it.scrapers.civic_plus.pipelines.ItemProcessor", SlowProcessor):
+        pipeline = StructureItPipeline(str(tmp_path / "queue.sqlite"), workers=2, raw_dir=str(tmp_path / "raw"))
+        pipeline.open_spider(spider)
+
+        started = time.monotonic()
+        for i in range(6):
+            item = {"url": f"https://x.gov/doc{i}", "title": f"Doc {i}"}
+            assert await pipeline.process_item(item, spider) is item
+        # Six 0.2 s extractions did not hold up the crawl
+        assert time.monotonic() - started < 0.1
+
+        processor = pipeline.processor
+        await pipeline._close(spider)
+
+    assert len(processor.done) == 6
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    assert queue.counts()["done"] == 6
+    queue.close()
+
+
+async def test_pipeline_skips_documents_the_raw_manifest_has_under_another_url(tmp_path):
+    items = [
+        {"url": "https://x.gov/ViewFile/Agenda/_01", "content_hash": "aaa"},
+        {"url": "https://x.gov/ViewFile/Agenda/_01?packet=true", "content_hash": "aaa"},  # Same bytes
+        {"url": "https://x.gov/ViewFile/Minutes/_01", "content_hash": "bbb"},
+    ]
+    # Recorded by RawStagingPipeline ahead of this pipeline
+    manifest = RawManifest(tmp_path / "raw")
+    for item in items:
+        entity_id = generate_entity_id(item["url"], "civic_meeting")
+        manifest.record_original(entity_id, "civic_meeting", None, item["content_hash"], url=item["url"])
+    manifest.close()
+
+    spider = MagicMock()
+    stats = MagicMock()
+    pipeline = StructureItPipeline(
+        str(tmp_path / "queue.sqlite"), workers=0, stats=stats, raw_dir=str(tmp_path / "raw")
+    )
+    pipeline.open_spider(spider)
+    for item in items:
+        await pipeline.process_item(item, spider)
+    # Not staged yet, but its bytes are known under the agenda URL
+    await pipeline.process_item({"url": "https://x.gov/ViewFile/Agenda/_01?v=2", "content_hash": "aaa"}, spider)
+
+    assert pipeline.queue.counts()["pending"] == 2
+    assert stats.inc_value.call_args_list.count(call("work_queue/duplicates")) == 2
+    await pipeline._close(spider)
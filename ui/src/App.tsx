@@ -5,6 +5,9 @@ import { ComplianceMonitor } from './apps/ComplianceMonitor';
 import { DataSources } from './apps/DataSources';
 import { AtomicInspector } from './components/Shared/AtomicInspector';
 
+// Consecutive progress-stream errors (failed reconnects) before an upload is reported as lost
+const MAX_STREAM_ERRORS = 5;
+
 export default function App() {
   // Shell State
   const [activeApp, setActiveApp] = useState<AppID>('data');
@@ -24,14 +27,42 @@ export default function App() {
     formData.append('type', type);
 
     try {
-      const res = await fetch('http://localhost:8000/api/extract', {
+      // Submit as a background job, then follow its progress events
+      const res = await fetch('http://localhost:8000/api/jobs', {
         method: 'POST',
         body: formData
       });
-      const json = await res.json();
-      setExtractionData(json);
-      // Auto-switch to Compliance Monitor after successful upload
-      setActiveApp('compliance');
+      const job = await res.json();
+      if (!res.ok) throw new Error(job.detail);
+
+      await new Promise<void>((resolve, reject) => {
+        const events = new EventSource(`http://localhost:8000${job.status_url}/events`);
+        const partial = (update: any) => setExtractionData((prev: any) => ({ ...prev, ...update }));
+        events.addEventListener('converted', (e) => {
+          const { raw_text } = JSON.parse((e as MessageEvent).data);
+          // Show the document as soon as it is converted
+          setExtractionData({ raw_text, data: {}, highlights: [], type });
+          setActiveApp('compliance');
+        });
+        events.addEventListener('extracted', (e) => partial({ data: JSON.parse((e as MessageEvent).data).data }));
+        events.addEventListener('highlights', (e) => partial({ highlights: JSON.parse((e as MessageEvent).data).highlights }));
+        events.addEventListener('stored', (e) => partial({ doc_id: JSON.parse((e as MessageEvent).data).doc_id }));
+        events.addEventListener('done', () => { events.close(); resolve(); });
+        events.addEventListener('failed', (e) => {
+          events.close();
+          reject(new Error(JSON.parse((e as MessageEvent).data).error));
+        });
+        // EventSource reconnects on its own (the server replays past events);
+        // give up only once the browser does, or after repeated failures
+        let errors = 0;
+        events.onopen = () => { errors = 0; };
+        events.onerror = () => {
+          if (events.readyState === EventSource.CLOSED || ++errors >= MAX_STREAM_ERRORS) {
+            events.close();
+            reject(new Error('Lost job progress stream'));
+          }
+        };
+      });
     } catch (e) {
       console.error(e);
     } finally {